@@ -0,0 +1,515 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Measures codecheck on a synthetic repository under different settings, and writes the results to
+a JSON file that can be compared with the results of another version of codecheck:
+
+    python3 benchmarks/codecheck_benchmark.py run -j 1 4 --engines threads asyncio \\
+        --output results.json
+    python3 benchmarks/codecheck_benchmark.py compare baseline.json results.json
+
+Every run of codecheck is a separate process, so that its peak memory usage is measured on its
+own. For every combination of settings, the results of the fastest repetition are recorded: the
+wall time of the whole process, the durations of the stages of the run from its trace file, the
+number of processes created during the run (on Linux, counting all processes created on the
+machine), the peak memory usage of codecheck and of the largest check process, and the numbers of
+checks by result.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CODECHECK_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODECHECK_ROOT_PATH)
+
+from codecheck.constants import ALL_CHECK_TYPES, ENGINES, MYPY_MODES  # noqa: E402
+from codecheck.process_util import get_max_rss_bytes  # noqa: E402
+from codecheck.util import format_size, prepend_path_entries  # noqa: E402
+
+from synthetic_repo import SyntheticRepoParams, create_synthetic_repo  # noqa: E402
+
+
+# Ways of running the checks that codecheck supports besides one process per check:
+# processes  - every check is a separate process (--no-in-process).
+# in_process - compile and pycodestyle checks run inside codecheck where possible.
+# workers    - the worker pool and the fork server are enabled.
+PROCESS_MODES = ['processes', 'in_process', 'workers']
+
+# Check types selected by the special check type list "all".
+ALL_CHECK_TYPES_NAME = 'all'
+
+# Runs whose wall time grew by more than this fraction are reported as regressions by "compare".
+DEFAULT_REGRESSION_THRESHOLD = 0.1
+
+
+class BenchmarkConfig:
+    """
+    One combination of codecheck settings to measure.
+    """
+
+    def __init__(
+            self,
+            parallelism: int,
+            check_types: str,
+            engine: str,
+            mypy_mode: str,
+            process_mode: str) -> None:
+        self.parallelism = parallelism
+        # A comma-separated list of check types, or "all".
+        self.check_types = check_types
+        self.engine = engine
+        self.mypy_mode = mypy_mode
+        self.process_mode = process_mode
+
+    def get_name(self) -> str:
+        """
+        >>> BenchmarkConfig(4, 'all', 'threads', 'batch', 'in_process').get_name()
+        'j4 all threads mypy=batch in_process'
+        """
+        return 'j%d %s %s mypy=%s %s' % (
+            self.parallelism, self.check_types, self.engine, self.mypy_mode, self.process_mode)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+    def get_config_file_content(self, state_dir: str) -> str:
+        """
+        Returns the codecheck configuration file for the given state directory.
+
+        >>> print(BenchmarkConfig(1, 'mypy,compile', 'threads', 'per_file', 'workers')
+        ...       .get_config_file_content('/tmp/state'), end='')
+        [default]
+        mypy_config = mypy.ini
+        mypy_mode = per_file
+        state_dir = /tmp/state
+        [checks]
+        compile = on
+        doctest = off
+        import = off
+        mypy = on
+        pycodestyle = off
+        shellcheck = off
+        unittest = off
+        [workers]
+        enabled = on
+        [fork_server]
+        enabled = on
+        """
+        lines = [
+            '[default]',
+            'mypy_config = mypy.ini',
+            'mypy_mode = %s' % self.mypy_mode,
+            'state_dir = %s' % state_dir,
+        ]
+        if self.check_types != ALL_CHECK_TYPES_NAME:
+            enabled_check_types = self.check_types.split(',')
+            lines.append('[checks]')
+            lines.extend(
+                '%s = %s' % (check_type, 'on' if check_type in enabled_check_types else 'off')
+                for check_type in ALL_CHECK_TYPES)
+        if self.process_mode == 'workers':
+            lines.extend(['[workers]', 'enabled = on', '[fork_server]', 'enabled = on'])
+        return ''.join(line + '\n' for line in lines)
+
+    def get_codecheck_args(
+            self, config_path: str, output_path: str, trace_path: str) -> List[str]:
+        args = [
+            '-c', config_path,
+            '-j', str(self.parallelism),
+            '--engine', self.engine,
+            '--python-interpreter', sys.executable,
+            '--progress', 'off',
+            '--no-cache',
+            '--output-format', 'jsonl',
+            '--output-file', output_path,
+            '--trace-file', trace_path,
+        ]
+        if self.process_mode == 'processes':
+            args.append('--no-in-process')
+        return args
+
+
+def get_num_processes_created() -> Optional[int]:
+    """
+    Returns the number of processes created on this machine since it booted, or None if it is not
+    known, i.e. not on Linux.
+    """
+    try:
+        with open('/proc/stat') as stat_file:
+            for line in stat_file:
+                if line.startswith('processes '):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def get_subprocess_env() -> Dict[str, str]:
+    """
+    Returns the environment for codecheck processes, which makes the codecheck package being
+    measured importable by the processes it starts, e.g. worker processes.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = prepend_path_entries([CODECHECK_ROOT_PATH], env.get('PYTHONPATH'))
+    return env
+
+
+def measure(result_file_path: str, codecheck_args: List[str]) -> None:
+    """
+    Runs codecheck with the given arguments in this process, in the repository in the current
+    directory, and writes the measurements that can only be taken from inside the process to the
+    given file.
+    """
+    from codecheck.code_check import CodeChecker
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(filename)s:%(lineno)d] %(asctime)s %(levelname)s: %(message)s")
+    sys.argv = ['codecheck'] + codecheck_args
+    num_processes_before = get_num_processes_created()
+    successful = CodeChecker('.').run()
+    num_processes_after = get_num_processes_created()
+    with open(result_file_path, 'w') as result_file:
+        json.dump({
+            'successful': successful,
+            'num_processes': (
+                num_processes_after - num_processes_before
+                if num_processes_before is not None and num_processes_after is not None
+                else None),
+            'max_rss_bytes': get_max_rss_bytes(resource.getrusage(resource.RUSAGE_SELF)),
+            'max_check_rss_bytes': get_max_rss_bytes(
+                resource.getrusage(resource.RUSAGE_CHILDREN)),
+        }, result_file)
+
+
+def get_stage_durations_sec(trace_path: str) -> Dict[str, float]:
+    with open(trace_path) as trace_file:
+        events = json.load(trace_file)['traceEvents']
+    return {
+        event['name']: event['dur'] / 1000000.0
+        for event in events if event.get('cat') == 'stage'
+    }
+
+
+def get_check_counts(output_path: str) -> Dict[str, int]:
+    """
+    Counts the checks in a codecheck report in the jsonl format by result.
+    """
+    counts = {'success': 0, 'failure': 0, 'timeout': 0, 'skipped': 0}
+    with open(output_path) as output_file:
+        for line in output_file:
+            record = json.loads(line)
+            if record.get('skip_reason') is not None:
+                counts['skipped'] += 1
+            elif record.get('timed_out'):
+                counts['timeout'] += 1
+            elif record['returncode'] != 0:
+                counts['failure'] += 1
+            else:
+                counts['success'] += 1
+    return counts
+
+
+def run_once(config: BenchmarkConfig, repo_path: str, work_dir: str) -> Dict[str, Any]:
+    """
+    Runs codecheck with the given settings in a separate process and returns its measurements.
+    """
+    config_path = os.path.join(work_dir, 'codecheck.ini')
+    output_path = os.path.join(work_dir, 'results.jsonl')
+    trace_path = os.path.join(work_dir, 'trace.json')
+    result_path = os.path.join(work_dir, 'measurements.json')
+    log_path = os.path.join(work_dir, 'codecheck.log')
+    with open(config_path, 'w') as config_file:
+        config_file.write(config.get_config_file_content(os.path.join(work_dir, 'state')))
+    with open(log_path, 'w') as log_file:
+        start_time = time.perf_counter()
+        returncode = subprocess.call(
+            [sys.executable, os.path.abspath(__file__), 'measure', result_path, '--'] +
+            config.get_codecheck_args(config_path, output_path, trace_path),
+            cwd=repo_path,
+            env=get_subprocess_env(),
+            stdout=log_file,
+            stderr=subprocess.STDOUT)
+        wall_time_sec = time.perf_counter() - start_time
+    if returncode != 0:
+        with open(log_path) as log_file:
+            sys.stderr.write(log_file.read()[-5000:])
+        raise RuntimeError("Benchmark run '%s' failed with exit code %d, see %s" % (
+            config.get_name(), returncode, log_path))
+    with open(result_path) as result_file:
+        measurements = json.load(result_file)
+    measurements['wall_time_sec'] = wall_time_sec
+    measurements['stage_durations_sec'] = get_stage_durations_sec(trace_path)
+    measurements['checks_by_result'] = get_check_counts(output_path)
+    return measurements
+
+
+def stop_mypy_daemons(config: BenchmarkConfig, repo_path: str, work_dir: str) -> None:
+    subprocess.call(
+        [sys.executable, '-m', 'codecheck',
+         '-c', os.path.join(work_dir, 'codecheck.ini'),
+         '--python-interpreter', sys.executable,
+         'stop-daemons'],
+        cwd=repo_path,
+        env=get_subprocess_env(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL)
+
+
+def run_config(
+        config: BenchmarkConfig,
+        repo_path: str,
+        work_dir: str,
+        num_repetitions: int) -> Dict[str, Any]:
+    """
+    Measures codecheck with the given settings the given number of times, and returns the
+    measurements of the fastest repetition, with the wall times of all repetitions. The
+    repetitions share codecheck's state directory, so all but the first one use the check
+    durations and mypy caches of the previous ones, like repeated runs on a developer machine.
+    """
+    os.makedirs(work_dir)
+    all_measurements = []
+    try:
+        for _ in range(num_repetitions):
+            all_measurements.append(run_once(config, repo_path, work_dir))
+    finally:
+        if config.mypy_mode == 'daemon':
+            stop_mypy_daemons(config, repo_path, work_dir)
+    result = min(all_measurements, key=lambda measurements: measurements['wall_time_sec'])
+    result['name'] = config.get_name()
+    result['config'] = config.to_dict()
+    result['wall_time_sec_samples'] = [
+        measurements['wall_time_sec'] for measurements in all_measurements]
+    return result
+
+
+def get_codecheck_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=CODECHECK_ROOT_PATH,
+            stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args: argparse.Namespace) -> None:
+    for check_types in args.check_types:
+        if check_types == ALL_CHECK_TYPES_NAME:
+            continue
+        for check_type in check_types.split(','):
+            if check_type not in ALL_CHECK_TYPES:
+                raise ValueError("Unknown check type: %s, expected one of %s" % (
+                    check_type, ALL_CHECK_TYPES))
+    configs = [
+        BenchmarkConfig(parallelism, check_types, engine, mypy_mode, process_mode)
+        for parallelism, check_types, engine, mypy_mode, process_mode in itertools.product(
+            args.parallelism, args.check_types, args.engines, args.mypy_modes,
+            args.process_modes)
+    ]
+    repo_params = SyntheticRepoParams(
+        num_packages=args.num_packages,
+        modules_per_package=args.modules_per_package,
+        package_depth=args.package_depth,
+        num_shell_scripts=args.num_shell_scripts,
+        num_failures=args.num_failures)
+
+    tmp_dir = tempfile.mkdtemp(prefix='codecheck_benchmark_')
+    try:
+        repo_path = os.path.join(tmp_dir, 'repo')
+        os.makedirs(repo_path)
+        file_paths = create_synthetic_repo(repo_path, repo_params)
+        print("Created a repository with %d files" % len(file_paths))
+        runs = []
+        for index, config in enumerate(configs):
+            print("[%d/%d] %s" % (index + 1, len(configs), config.get_name()), end=': ',
+                  flush=True)
+            run = run_config(
+                config, repo_path, os.path.join(tmp_dir, 'run%d' % index), args.repetitions)
+            print(get_run_description(run))
+            runs.append(run)
+    finally:
+        if args.keep_tmp_dir:
+            print("Kept the repository and the logs of the runs in %s" % tmp_dir)
+        else:
+            shutil.rmtree(tmp_dir)
+
+    results = {
+        'codecheck_revision': get_codecheck_revision(),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'num_cpus': multiprocessing.cpu_count(),
+        'repo': dict(repo_params.to_dict(), num_files=len(file_paths)),
+        'repetitions': args.repetitions,
+        'runs': runs,
+    }
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+            output_file.write('\n')
+        print("Results written to %s" % args.output)
+
+
+def get_run_description(run: Dict[str, Any]) -> str:
+    """
+    >>> print(get_run_description({
+    ...     'wall_time_sec': 2.5, 'num_processes': 12, 'max_rss_bytes': 31457280,
+    ...     'max_check_rss_bytes': 104857600,
+    ...     'stage_durations_sec': {'discover files': 0.05, 'run checks': 2.1},
+    ...     'checks_by_result': {'success': 40, 'failure': 2}}))
+    2.50 seconds, 12 processes, peak memory 30.0M (checks: 100.0M), stages: discover files \
+0.05, run checks 2.10, checks: failure 2, success 40
+    """
+    return '%.2f seconds, %s processes, peak memory %s (checks: %s), stages: %s, checks: %s' % (
+        run['wall_time_sec'],
+        run['num_processes'] if run['num_processes'] is not None else 'unknown',
+        format_size(run['max_rss_bytes']),
+        format_size(run['max_check_rss_bytes']),
+        ', '.join('%s %.2f' % (stage_name, duration_sec)
+                  for stage_name, duration_sec in run['stage_durations_sec'].items()),
+        ', '.join('%s %d' % (result, count)
+                  for result, count in sorted(run['checks_by_result'].items()) if count))
+
+
+def get_relative_change(old_value: float, new_value: float) -> Optional[float]:
+    """
+    >>> get_relative_change(2.0, 2.5)
+    0.25
+    >>> get_relative_change(0, 1.0) is None
+    True
+    """
+    if not old_value:
+        return None
+    return (new_value - old_value) / old_value
+
+
+def compare_results(args: argparse.Namespace) -> bool:
+    """
+    Prints the changes of the wall time, the number of processes and the peak memory usage of
+    every run present in both result files. Returns False if the wall time of any run grew by more
+    than the threshold.
+    """
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.results) as results_file:
+        results = json.load(results_file)
+    if baseline['repo'] != results['repo']:
+        print("Warning: the results were measured on different repositories: %s vs. %s" % (
+            baseline['repo'], results['repo']))
+    baseline_runs = {run['name']: run for run in baseline['runs']}
+    has_regressions = False
+    for run in results['runs']:
+        baseline_run = baseline_runs.get(run['name'])
+        if baseline_run is None:
+            print("%s: not in the baseline" % run['name'])
+            continue
+        changes = []
+        for key in ['wall_time_sec', 'num_processes', 'max_rss_bytes', 'max_check_rss_bytes']:
+            if baseline_run.get(key) is None or run.get(key) is None:
+                continue
+            change = get_relative_change(baseline_run[key], run[key])
+            if change is not None:
+                changes.append('%s %+.1f%%' % (key, change * 100))
+        wall_time_change = get_relative_change(
+            baseline_run['wall_time_sec'], run['wall_time_sec'])
+        is_regression = wall_time_change is not None and wall_time_change > args.threshold
+        has_regressions = has_regressions or is_regression
+        print("%s: %s%s" % (
+            run['name'], ', '.join(changes), ' (REGRESSION)' if is_regression else ''))
+    return not has_regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser(
+        'run', help='Measure codecheck on a synthetic repository.')
+    run_parser.add_argument(
+        '-j', '--parallelism', type=int, nargs='+', default=[1, multiprocessing.cpu_count()],
+        help='Values of -j to measure.')
+    run_parser.add_argument(
+        '--check-types', nargs='+', default=[ALL_CHECK_TYPES_NAME],
+        help='Sets of check types to measure, each of them comma-separated or "%s".' %
+             ALL_CHECK_TYPES_NAME)
+    run_parser.add_argument(
+        '--engines', nargs='+', choices=ENGINES, default=['threads'],
+        help='Values of --engine to measure.')
+    run_parser.add_argument(
+        '--mypy-modes', nargs='+', choices=MYPY_MODES, default=['batch'],
+        help='Values of --mypy-mode to measure.')
+    run_parser.add_argument(
+        '--process-modes', nargs='+', choices=PROCESS_MODES, default=['in_process'],
+        help='How to run the checks: "processes" uses --no-in-process, "in_process" runs some '
+             'checks inside codecheck, "workers" enables the worker pool and the fork server.')
+    run_parser.add_argument(
+        '--repetitions', type=int, default=3,
+        help='How many times to measure each combination of settings. The fastest repetition '
+             'is recorded.')
+    run_parser.add_argument('--num-packages', type=int, default=4)
+    run_parser.add_argument('--modules-per-package', type=int, default=10)
+    run_parser.add_argument(
+        '--package-depth', type=int, default=2,
+        help='How many levels of subpackages each package has.')
+    run_parser.add_argument('--num-shell-scripts', type=int, default=5)
+    run_parser.add_argument(
+        '--num-failures', type=int, default=6,
+        help='How many files contain an intentional failure.')
+    run_parser.add_argument(
+        '--output', metavar='PATH', help='Write the results to this JSON file.')
+    run_parser.add_argument(
+        '--keep-tmp-dir', action='store_true',
+        help='Keep the synthetic repository and the logs of the runs.')
+
+    compare_parser = subparsers.add_parser(
+        'compare',
+        help='Compare results with a baseline. Exits with an error if any run has become slower '
+             'by more than the threshold.')
+    compare_parser.add_argument('baseline', help='Results of the baseline version.')
+    compare_parser.add_argument('results', help='Results of the version to compare.')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+        help='Relative increase of the wall time to report as a regression.')
+
+    measure_parser = subparsers.add_parser(
+        'measure', help='Run codecheck once in this process (used by "run").')
+    measure_parser.add_argument('result_file_path')
+    measure_parser.add_argument('codecheck_args', nargs=argparse.REMAINDER)
+
+    args = parser.parse_args()
+    if args.command == 'measure':
+        codecheck_args = args.codecheck_args
+        if codecheck_args[:1] == ['--']:
+            codecheck_args = codecheck_args[1:]
+        measure(args.result_file_path, codecheck_args)
+    elif args.command == 'compare':
+        sys.exit(0 if compare_results(args) else 1)
+    else:
+        run_benchmarks(args)
+
+
+if __name__ == '__main__':
+    main()
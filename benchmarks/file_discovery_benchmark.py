@@ -0,0 +1,167 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Measures how long it takes to find the files to check in a large repository, comparing the
+current implementation with the one that split "git ls-files" output on newlines, matched every
+pattern against every path and called stat for every file. Creates a synthetic git repository
+with the given number of files in a temporary directory:
+
+    python3 benchmarks/file_discovery_benchmark.py --num-files 300000
+"""
+
+from typing import Callable, List, Set, Tuple
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codecheck.code_check import CodeChecker  # noqa: E402
+from codecheck.config import CodeCheckConfig  # noqa: E402
+from codecheck.constants import ALL_CHECKED_SUFFIXES  # noqa: E402
+from codecheck.util import CompiledRE  # noqa: E402
+
+
+# Name suffixes of the generated files, most of which are not checked, like in a typical monorepo.
+FILE_SUFFIXES = ['.py', '_test.py', '.sh', '.cc', '.h', '.java', '.md', '.json']
+
+FILES_PER_DIR = 50
+
+# Inclusion and exclusion patterns, in the order they are applied, like in a configuration file.
+PATTERNS = [
+    (True, r'^.*[.](py|sh)$'),
+    (False, r'^third_party/'),
+    (False, r'^build/'),
+    (False, r'^.*/generated/'),
+    (True, r'^third_party/vendored_python/'),
+] + [(False, r'^dir%d/' % index) for index in range(0, 400, 40)]
+
+
+def create_repo(repo_path: str, num_files: int) -> None:
+    for index in range(num_files):
+        dir_path = os.path.join(
+            repo_path,
+            'dir%d' % (index // (FILES_PER_DIR * 20)),
+            'sub%d' % (index // FILES_PER_DIR % 20))
+        if index % FILES_PER_DIR == 0:
+            os.makedirs(dir_path)
+        suffix = FILE_SUFFIXES[index % len(FILE_SUFFIXES)]
+        with open(os.path.join(dir_path, 'file%d%s' % (index, suffix)), 'w') as output_file:
+            output_file.write('# %d\n' % index)
+    subprocess.check_call(['git', 'init', '-q'], cwd=repo_path)
+    subprocess.check_call(['git', 'add', '.'], cwd=repo_path)
+
+
+def discover_files_legacy(
+        repo_path: str, patterns: List[Tuple[bool, CompiledRE]]) -> Tuple[List[str], Set[str]]:
+    """
+    The implementation of CodeChecker.discover_files this benchmark compares against.
+    """
+    file_list = subprocess.check_output(
+        ['git', 'ls-files'], cwd=repo_path).decode('utf-8').split('\n')
+    tracked_file_paths = [
+        os.path.abspath(os.path.join(repo_path, file_path)) for file_path in file_list if file_path]
+    filtered_list = []
+    for item in file_list:
+        should_include_item = False
+        for is_inclusion_pattern, re_pattern in patterns:
+            if re_pattern.match(item):
+                should_include_item = is_inclusion_pattern
+        if should_include_item:
+            filtered_list.append(item)
+    input_file_paths = set(
+        os.path.abspath(os.path.join(repo_path, file_path)) for file_path in filtered_list
+        if file_path.endswith(ALL_CHECKED_SUFFIXES))
+    input_file_paths = set(
+        file_path for file_path in input_file_paths
+        if os.path.exists(file_path) and not os.path.islink(file_path))
+    return tracked_file_paths, input_file_paths
+
+
+def discover_files_current(
+        repo_path: str, patterns: List[Tuple[bool, CompiledRE]]) -> Tuple[List[str], Set[str]]:
+    checker = CodeChecker(repo_path)
+    checker.args = argparse.Namespace(file_pattern=None, verbose=False)
+    checker.config = CodeCheckConfig()
+    checker.config.included_regex_list = patterns
+    return checker.discover_files()
+
+
+def measure(
+        discover_files: Callable[[str, List[Tuple[bool, CompiledRE]]], Tuple[List[str], Set[str]]],
+        repo_path: str,
+        patterns: List[Tuple[bool, CompiledRE]],
+        num_repetitions: int) -> Tuple[float, Set[str]]:
+    """
+    Returns the shortest time it took to find the files, and the files to check.
+    """
+    best_time_sec = float('inf')
+    input_file_paths: Set[str] = set()
+    for _ in range(num_repetitions):
+        start_time = time.perf_counter()
+        _, input_file_paths = discover_files(repo_path, patterns)
+        best_time_sec = min(best_time_sec, time.perf_counter() - start_time)
+    return best_time_sec, input_file_paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument(
+        '--num-files', type=int, default=100000,
+        help='Number of files in the synthetic repository.')
+    parser.add_argument(
+        '--repetitions', type=int, default=3,
+        help='How many times to measure each implementation. The shortest time is reported.')
+    parser.add_argument(
+        '--repo-path',
+        help='Use this existing git repository instead of creating a synthetic one.')
+    args = parser.parse_args()
+
+    patterns = [(is_inclusion, re.compile(pattern)) for is_inclusion, pattern in PATTERNS]
+    tmp_dir = None
+    repo_path = args.repo_path
+    if repo_path is None:
+        tmp_dir = tempfile.mkdtemp(prefix='codecheck_discovery_benchmark_')
+        repo_path = tmp_dir
+        start_time = time.perf_counter()
+        create_repo(repo_path, args.num_files)
+        print("Created a repository with %d files in %.1f seconds" % (
+            args.num_files, time.perf_counter() - start_time))
+    repo_path = os.path.abspath(repo_path)
+    try:
+        legacy_time_sec, legacy_file_paths = measure(
+            discover_files_legacy, repo_path, patterns, args.repetitions)
+        current_time_sec, current_file_paths = measure(
+            discover_files_current, repo_path, patterns, args.repetitions)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir)
+
+    if legacy_file_paths != current_file_paths:
+        print("The implementations found different files: %d vs. %d" % (
+            len(legacy_file_paths), len(current_file_paths)))
+        sys.exit(1)
+    print("Files to check: %d" % len(current_file_paths))
+    print("Legacy:  %.3f seconds" % legacy_time_sec)
+    print("Current: %.3f seconds" % current_time_sec)
+    print("Speedup: %.1fx" % (legacy_time_sec / current_time_sec))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Generates synthetic git repositories for benchmarking codecheck: Python packages with nested
+subpackages, modules with doctests that import a module of their package, a unit test for every
+module, and shell scripts. A given number of files contain intentional failures, so that failed
+checks and the checks skipped because of them are part of the workload. The same parameters
+always produce the same repository.
+"""
+
+from typing import Dict, List
+
+import os
+import subprocess
+
+
+# Kinds of intentional failures, each of which fails a check of the file it is added to, and may
+# also fail checks of the unit test importing that file. The compile failure is added to a unit
+# test, which no other file imports, and causes its other checks to be skipped.
+FAILURE_KINDS = ['pycodestyle', 'mypy', 'doctest', 'unittest', 'compile', 'shellcheck']
+
+MYPY_INI = """[mypy]
+disallow_untyped_defs = True
+"""
+
+PACKAGE_INIT_TEMPLATE = '''"""
+Synthetic package {package_name}.
+"""
+'''
+
+BASE_MODULE_TEMPLATE = '''"""
+Helpers used by the other modules of the package.
+"""
+
+
+def scale(value: int) -> int:
+    """
+    >>> scale(3)
+    6
+    """
+    return value * 2
+'''
+
+MODULE_TEMPLATE = '''"""
+Synthetic module number {module_index}.
+"""
+
+from typing import List
+
+from {base_module_name} import scale
+
+
+def transform_{module_index}(values: List[int]) -> List[int]:
+    """
+    >>> transform_{module_index}([1, 2])
+    {doctest_output}
+    """
+    return [scale(value) + {module_index} for value in values]
+{extra_code}'''
+
+TEST_TEMPLATE = '''"""
+Tests for synthetic module number {module_index}.
+"""
+
+import unittest
+
+from {module_name} import transform_{module_index}
+
+
+class Transform{module_index}Test(unittest.TestCase):
+    def test_transform(self) -> None:
+        self.assertEqual(transform_{module_index}([1, 2]), {expected_output})
+
+
+if __name__ == '__main__':
+    unittest.main()
+{extra_code}'''
+
+SHELL_SCRIPT_TEMPLATE = '''#!/usr/bin/env bash
+# Synthetic script number {script_index}.
+
+set -euo pipefail
+
+print_items() {{
+  local item
+  for item in "$@"; do
+    echo "Item {script_index}: $item"
+  done
+}}
+
+print_items "${{@}}"
+{extra_code}'''
+
+# Code added to files to make one of their checks fail.
+PYCODESTYLE_FAILURE = '\n\nLIMIT=1\n'
+MYPY_FAILURE = '''
+
+def describe() -> int:
+    return 'not a number'
+'''
+COMPILE_FAILURE = '''
+
+def broken(:
+    pass
+'''
+SHELLCHECK_FAILURE = 'echo $1\n'
+
+
+class SyntheticRepoParams:
+    """
+    The shape of a synthetic repository. Modules are spread over the top-level directory of each
+    package and its nested subpackages.
+    """
+
+    def __init__(
+            self,
+            num_packages: int = 10,
+            modules_per_package: int = 20,
+            package_depth: int = 2,
+            num_shell_scripts: int = 10,
+            num_failures: int = 6) -> None:
+        self.num_packages = num_packages
+        self.modules_per_package = modules_per_package
+        self.package_depth = package_depth
+        self.num_shell_scripts = num_shell_scripts
+        self.num_failures = num_failures
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+def get_failure_kinds(params: SyntheticRepoParams) -> Dict[str, str]:
+    """
+    Decides which files get an intentional failure of which kind, spreading the failures evenly
+    over the modules, leaving out the base modules that other modules import, and over the shell
+    scripts. Returns a dictionary from a file key, e.g. "module:3" or "script:1", to the kind of
+    failure.
+
+    >>> get_failure_kinds(SyntheticRepoParams(
+    ...     num_packages=2, modules_per_package=4, num_shell_scripts=2, num_failures=3))
+    {'module:0': 'pycodestyle', 'module:4': 'mypy', 'script:0': 'shellcheck'}
+    """
+    num_modules = params.num_packages * params.modules_per_package
+    python_failure_kinds = [kind for kind in FAILURE_KINDS if kind != 'shellcheck']
+    num_script_failures = min(
+        params.num_failures // len(FAILURE_KINDS) + (
+            1 if params.num_failures % len(FAILURE_KINDS) > 0 else 0),
+        params.num_shell_scripts)
+    num_module_failures = min(params.num_failures - num_script_failures, num_modules)
+    failure_kinds: Dict[str, str] = {}
+    for index in range(num_module_failures):
+        module_index = index * num_modules // num_module_failures
+        failure_kinds['module:%d' % module_index] = python_failure_kinds[
+            index % len(python_failure_kinds)]
+    for index in range(num_script_failures):
+        script_index = index * params.num_shell_scripts // num_script_failures
+        failure_kinds['script:%d' % script_index] = 'shellcheck'
+    return failure_kinds
+
+
+def write_file(file_path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as output_file:
+        output_file.write(content)
+
+
+def get_package_dir_paths(package_name: str, package_depth: int) -> List[str]:
+    """
+    Returns the directories of a package and its nested subpackages, outermost first.
+
+    >>> get_package_dir_paths('pkg0', 2)
+    ['pkg0', 'pkg0/sub1', 'pkg0/sub1/sub2']
+    """
+    dir_paths = [package_name]
+    for depth in range(1, package_depth + 1):
+        dir_paths.append(os.path.join(dir_paths[-1], 'sub%d' % depth))
+    return dir_paths
+
+
+def create_synthetic_repo(repo_path: str, params: SyntheticRepoParams) -> List[str]:
+    """
+    Creates a git repository with the given shape in the given directory, with all files added to
+    the index, and returns the paths of the created files relative to the repository.
+    """
+    failure_kinds = get_failure_kinds(params)
+    files: Dict[str, str] = {'mypy.ini': MYPY_INI}
+    module_index = 0
+    for package_index in range(params.num_packages):
+        package_name = 'pkg%d' % package_index
+        dir_paths = get_package_dir_paths(package_name, params.package_depth)
+        for dir_path in dir_paths:
+            files[os.path.join(dir_path, '__init__.py')] = PACKAGE_INIT_TEMPLATE.format(
+                package_name=package_name)
+        files[os.path.join(dir_paths[0], 'base.py')] = BASE_MODULE_TEMPLATE
+        for index_in_package in range(params.modules_per_package):
+            dir_path = dir_paths[index_in_package % len(dir_paths)]
+            module_name = '.'.join(dir_path.split(os.sep) + ['mod%d' % module_index])
+            failure_kind = failure_kinds.get('module:%d' % module_index)
+            expected_output = [2 + module_index, 4 + module_index]
+            doctest_output = expected_output
+            if failure_kind == 'doctest':
+                doctest_output = [0, 0]
+            test_expected_output = expected_output
+            if failure_kind == 'unittest':
+                test_expected_output = [0, 0]
+            files[os.path.join(dir_path, 'mod%d.py' % module_index)] = MODULE_TEMPLATE.format(
+                module_index=module_index,
+                base_module_name='%s.base' % package_name,
+                doctest_output=doctest_output,
+                extra_code={
+                    'pycodestyle': PYCODESTYLE_FAILURE,
+                    'mypy': MYPY_FAILURE,
+                }.get(failure_kind or '', ''))
+            files[os.path.join(dir_path, 'mod%d_test.py' % module_index)] = TEST_TEMPLATE.format(
+                module_index=module_index,
+                module_name=module_name,
+                expected_output=test_expected_output,
+                extra_code=COMPILE_FAILURE if failure_kind == 'compile' else '')
+            module_index += 1
+
+    for script_index in range(params.num_shell_scripts):
+        files[os.path.join('scripts', 'script%d.sh' % script_index)] = (
+            SHELL_SCRIPT_TEMPLATE.format(
+                script_index=script_index,
+                extra_code=(
+                    SHELLCHECK_FAILURE
+                    if failure_kinds.get('script:%d' % script_index) == 'shellcheck' else '')))
+
+    for file_path, content in files.items():
+        write_file(os.path.join(repo_path, file_path), content)
+    subprocess.check_call(['git', 'init', '-q'], cwd=repo_path)
+    subprocess.check_call(['git', 'add', '.'], cwd=repo_path)
+    return sorted(files)
@@ -0,0 +1,82 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import shutil
+import sys
+import unittest
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_PATH))
+sys.path.insert(0, BENCHMARKS_PATH)
+
+from codecheck.test_util import TempRepoTestCase  # noqa: E402
+
+from codecheck_benchmark import get_check_counts  # noqa: E402
+from synthetic_repo import (  # noqa: E402
+    FAILURE_KINDS,
+    SyntheticRepoParams,
+    create_synthetic_repo,
+    get_failure_kinds,
+)
+
+
+class SyntheticRepoTest(TempRepoTestCase):
+    @unittest.skipUnless(shutil.which('shellcheck'), 'shellcheck is not installed')
+    def test_intentional_failures(self) -> None:
+        params = SyntheticRepoParams(
+            num_packages=2,
+            modules_per_package=3,
+            package_depth=1,
+            num_shell_scripts=2,
+            num_failures=len(FAILURE_KINDS))
+        self.assertEqual(get_failure_kinds(params), {
+            'module:0': 'pycodestyle',
+            'module:1': 'mypy',
+            'module:2': 'doctest',
+            'module:3': 'unittest',
+            'module:4': 'compile',
+            'script:0': 'shellcheck',
+        })
+        # Run all checks, like the benchmark does.
+        self.write_file('codecheck.ini', '')
+        file_paths = create_synthetic_repo(self.root_path, params)
+        self.assertIn('pkg0/sub1/mod1.py', file_paths)
+        self.assertIn('scripts/script1.sh', file_paths)
+
+        process = self.run_codecheck('--output-format', 'jsonl')
+        output_path = os.path.join(self.root_path, 'results.jsonl')
+        with open(output_path, 'w') as output_file:
+            output_file.write(process.stdout)
+        failed_checks = sorted(
+            '%s %s' % (record['check_type'], record['rel_file_path'])
+            for record in map(json.loads, process.stdout.splitlines())
+            if record['returncode'] != 0)
+        # Every kind of failure fails one check, and the compile failure in a unit test also
+        # fails its pycodestyle check and causes its other checks to be skipped.
+        self.assertEqual(failed_checks, [
+            'compile pkg1/sub1/mod4_test.py',
+            'doctest pkg0/mod2.py',
+            'mypy pkg0/sub1/mod1.py',
+            'pycodestyle pkg0/mod0.py',
+            'pycodestyle pkg1/sub1/mod4_test.py',
+            'shellcheck scripts/script0.sh',
+            'unittest pkg1/mod3_test.py',
+        ])
+        self.assertEqual(
+            get_check_counts(output_path),
+            {'success': 87, 'failure': 7, 'timeout': 0, 'skipped': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+A library API for running checks from other Python programs, without parsing the output of a
+codecheck process:
+
+    from codecheck.api import CheckOptions, check_files
+
+    with check_files(['src/app.py'], CheckOptions(root_path='/path/to/repo')) as run:
+        for check_result in run:
+            print(check_result.check_type, check_result.file_path, check_result.returncode)
+    print(run.summary.checks_by_result)
+
+The results can also be consumed from asyncio code using "async for check_result in run".
+"""
+
+from types import TracebackType
+from typing import AsyncIterator, Generator, Iterable, Iterator, List, Optional, Tuple, Type
+
+import argparse
+import asyncio
+import os
+import threading
+
+from codecheck.check_result import CheckResult
+from codecheck.code_check import CheckInput, CodeChecker
+from codecheck.constants import DEFAULT_CONF_FILE_NAME, DEFAULT_ENGINE, ENGINES, MYPY_MODES
+from codecheck.run_stats import RunStats
+
+
+class CheckOptions:
+    """
+    Options of a run of checks, corresponding to the command-line options of codecheck. Relative
+    paths, including the ones in the configuration file, are relative to the repository root.
+    Options that are None take their defaults from the command line parser, or from the
+    configuration file.
+
+    Unlike on the command line, checks run as separate processes by default. With in_process set,
+    compile and pycodestyle checks may run in threads of the calling process, and the worker pool
+    and the fork server are used if they are enabled in the configuration file.
+    """
+
+    def __init__(
+            self,
+            root_path: str = '.',
+            config_path: Optional[str] = None,
+            parallelism: Optional[int] = None,
+            python_interpreter: Optional[str] = None,
+            mypy_mode: Optional[str] = None,
+            engine: str = DEFAULT_ENGINE,
+            use_cache: bool = True,
+            in_process: bool = False,
+            fail_fast: Optional[int] = None,
+            verbose: bool = False) -> None:
+        if mypy_mode is not None and mypy_mode not in MYPY_MODES:
+            raise ValueError(f"Invalid mypy mode: {mypy_mode}, expected one of {MYPY_MODES}")
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine: {engine}, expected one of {ENGINES}")
+        if parallelism is not None and parallelism < 1:
+            raise ValueError(f"Invalid parallelism: {parallelism}")
+        if fail_fast is not None and fail_fast < 1:
+            raise ValueError(f"Invalid number of failed checks to stop after: {fail_fast}")
+        self.root_path = root_path
+        self.config_path = config_path
+        self.parallelism = parallelism
+        self.python_interpreter = python_interpreter
+        self.mypy_mode = mypy_mode
+        self.engine = engine
+        self.use_cache = use_cache
+        self.in_process = in_process
+        self.fail_fast = fail_fast
+        self.verbose = verbose
+
+    def to_args(self, parser: argparse.ArgumentParser) -> argparse.Namespace:
+        """
+        Returns the arguments that the given command line parser would return for these options.
+        """
+        args = parser.parse_args([])
+        args.config_path = os.path.join(
+            self.root_path,
+            self.config_path if self.config_path is not None else DEFAULT_CONF_FILE_NAME)
+        if self.parallelism is not None:
+            args.parallelism = self.parallelism
+        if self.python_interpreter is not None:
+            args.python_interpreter = self.python_interpreter
+        args.mypy_mode = self.mypy_mode
+        args.engine = self.engine
+        args.no_cache = not self.use_cache
+        args.no_in_process = not self.in_process
+        args.fail_fast = self.fail_fast
+        args.verbose = self.verbose
+        args.progress = 'off'
+        return args
+
+
+class CheckRun:
+    """
+    A run of checks created by check_files(). The checks start when the run is iterated over,
+    either synchronously or using "async for", which yields their results as they complete. A run
+    can only be iterated over once. The counts of checks by directory, type and result are in
+    the summary, which is complete once all results have been yielded.
+
+    If the iteration is stopped early, close() kills the running checks. Using the run as a
+    context manager closes it automatically.
+    """
+
+    def __init__(self, checker: CodeChecker, check_inputs: List[CheckInput]) -> None:
+        self.checker = checker
+        self.check_inputs = check_inputs
+        self.summary = RunStats()
+        for file_path, check_type in check_inputs:
+            self.summary.add_check(checker.get_rel_dir_name_for_report(file_path), check_type)
+        self.results: Optional[Generator[CheckResult, None, None]] = None
+        self.are_check_runners_initialized = False
+
+    def is_successful(self) -> bool:
+        """
+        Returns True if no check has failed or timed out so far.
+        """
+        return not self.summary.has_failures()
+
+    def __iter__(self) -> Iterator[CheckResult]:
+        if self.results is not None:
+            raise RuntimeError("The results of a run can only be iterated over once")
+        self.results = self.iter_results()
+        return self.results
+
+    def iter_results(self) -> Generator[CheckResult, None, None]:
+        self.checker.init_check_runners()
+        self.are_check_runners_initialized = True
+        try:
+            yield from self.checker.iter_check_results(self.check_inputs, self.summary)
+        finally:
+            self.checker.stop_check_runners()
+
+    def kill_running_checks(self) -> None:
+        """
+        Kills the processes of the running checks, including the ones run by the worker pool
+        and the fork server. Can be called from any thread.
+        """
+        if self.are_check_runners_initialized:
+            self.checker.kill_running_checks()
+
+    def close(self) -> None:
+        """
+        Stops the run if it is still in progress, killing the running checks.
+        """
+        if self.results is not None:
+            # Closing the generator raises GeneratorExit in it, which cancels the checks.
+            self.results.close()
+
+    def __enter__(self) -> 'CheckRun':
+        return self
+
+    def __exit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __aiter__(self) -> AsyncIterator[CheckResult]:
+        return self.iter_results_async()
+
+    async def iter_results_async(self) -> AsyncIterator[CheckResult]:
+        """
+        Yields the results as they complete without blocking the event loop. The checks are run
+        from a separate thread. If the iteration is stopped early, the running checks are killed.
+        """
+        loop = asyncio.get_running_loop()
+        queue: 'asyncio.Queue[Tuple[Optional[CheckResult], Optional[BaseException]]]' = (
+            asyncio.Queue())
+        is_stopping = threading.Event()
+
+        def put(item: Tuple[Optional[CheckResult], Optional[BaseException]]) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The event loop has been closed, so nobody is waiting for the results anymore.
+                pass
+
+        def produce_results() -> None:
+            results = iter(self)
+            try:
+                for check_result in results:
+                    put((check_result, None))
+                    if is_stopping.is_set():
+                        break
+            except BaseException as ex:
+                put((None, ex))
+                return
+            finally:
+                self.close()
+            put((None, None))
+
+        thread = threading.Thread(target=produce_results, name='check_results', daemon=True)
+        thread.start()
+        is_finished = False
+        try:
+            while True:
+                check_result, exception = await queue.get()
+                if exception is not None:
+                    is_finished = True
+                    raise exception
+                if check_result is None:
+                    is_finished = True
+                    return
+                yield check_result
+        finally:
+            if not is_finished:
+                is_stopping.set()
+                # Make the checks that are running finish, so that the thread stops soon.
+                self.kill_running_checks()
+            await loop.run_in_executor(None, thread.join)
+
+
+def check_files(
+        file_paths: Optional[Iterable[str]] = None,
+        options: Optional[CheckOptions] = None) -> CheckRun:
+    """
+    Creates a run of the checks of the given files, with paths relative to the repository root
+    or absolute, which are checked regardless of the inclusion and exclusion patterns in the
+    configuration file. If no files are given, the files to check are found like codecheck does
+    on the command line. Like on the command line, checks run in the repository root, whatever
+    the current directory of the caller is. Nothing is printed, except for the tracebacks of
+    unexpected exceptions in checks, and messages logged using the logging module.
+    """
+    if options is None:
+        options = CheckOptions()
+    root_path = os.path.abspath(options.root_path)
+    checker = CodeChecker(root_path)
+    checker.args = options.to_args(checker.create_arg_parser())
+    checker.init_config()
+    if not os.path.isabs(checker.config.mypy_config_path):
+        checker.config.mypy_config_path = os.path.join(
+            root_path, checker.config.mypy_config_path)
+
+    if file_paths is None:
+        input_file_paths = checker.discover_files(report_filtering=False)[1]
+    else:
+        input_file_paths = set()
+        for file_path in file_paths:
+            abs_file_path = os.path.abspath(os.path.join(root_path, file_path))
+            if not os.path.isfile(abs_file_path):
+                raise ValueError(f"Not a file: {file_path}")
+            input_file_paths.add(abs_file_path)
+    return CheckRun(checker, checker.get_check_inputs(input_file_paths, set()))
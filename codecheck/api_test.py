@@ -0,0 +1,212 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Dict, List, Optional
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from codecheck.api import CheckOptions, CheckRun, check_files
+from codecheck.check_result import CheckResult
+from codecheck.test_util import (
+    DEFAULT_CONFIG,
+    FAILS_AFTER_SLOW_TEST_STARTS,
+    SLOW_TEST,
+    wait_for_process_exit,
+)
+
+
+# Checks of these files only pass when they run in the repository root.
+REPO_FILES = {
+    'codecheck.ini': '\n'.join([
+        '[checks]',
+        'mypy = off',
+        'shellcheck = off',
+        '[workers]',
+        'enabled = on',
+        '[fork_server]',
+        'enabled = on',
+        'preload_modules = json',
+        '',
+    ]),
+    'data.txt': 'data\n',
+    'reads_data.py': "DATA = open('data.txt').read()\n",
+    'reads_data_test.py': '\n'.join([
+        'import unittest',
+        '',
+        '',
+        'class ReadsDataTest(unittest.TestCase):',
+        '    def test_data(self) -> None:',
+        "        with open('data.txt') as data_file:",
+        "            self.assertEqual(data_file.read(), 'data\\n')",
+        '',
+    ]),
+}
+
+
+class CheckFilesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_api_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        for file_name, content in REPO_FILES.items():
+            with open(os.path.join(self.root_path, file_name), 'w') as output_file:
+                output_file.write(content)
+
+        # Run from a directory other than the repository root.
+        other_dir = tempfile.mkdtemp(prefix='codecheck_api_test_cwd_')
+        self.addCleanup(shutil.rmtree, other_dir)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(other_dir)
+
+    def get_returncodes(self, in_process: bool) -> Dict[str, List[int]]:
+        options = CheckOptions(
+            root_path=self.root_path, use_cache=False, parallelism=2, in_process=in_process)
+        returncodes: Dict[str, List[int]] = {}
+        with check_files(['reads_data.py', 'reads_data_test.py'], options) as run:
+            for check_result in run:
+                returncodes.setdefault(check_result.check_type, []).append(
+                    check_result.returncode)
+        self.assertTrue(run.is_successful(), returncodes)
+        return returncodes
+
+    def test_checks_run_in_root_as_separate_processes(self) -> None:
+        returncodes = self.get_returncodes(in_process=False)
+        self.assertEqual(returncodes['import'], [0, 0])
+        self.assertEqual(returncodes['unittest'], [0])
+
+    def test_checks_run_in_root_in_workers_and_fork_server(self) -> None:
+        returncodes = self.get_returncodes(in_process=True)
+        self.assertEqual(returncodes['import'], [0, 0])
+        self.assertEqual(returncodes['unittest'], [0])
+
+
+# A module that can be imported once the slow test is running.
+WAITS_FOR_SLOW_TEST = FAILS_AFTER_SLOW_TEST_STARTS.replace("raise Exception('fails')", 'X = 1')
+
+
+def get_check_name(check_result: CheckResult) -> str:
+    return '%s %s' % (check_result.check_type, os.path.basename(check_result.file_path))
+
+
+class CheckRunTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_api_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.write_file('codecheck.ini', DEFAULT_CONFIG)
+
+    def write_file(self, file_name: str, content: str) -> None:
+        with open(os.path.join(self.root_path, file_name), 'w') as output_file:
+            output_file.write(content)
+
+    def read_pid(self) -> int:
+        with open(os.path.join(self.root_path, 'pid')) as pid_file:
+            return int(pid_file.read())
+
+    def check_files(
+            self,
+            file_names: List[str],
+            parallelism: Optional[int] = None,
+            fail_fast: Optional[int] = None) -> CheckRun:
+        return check_files(file_names, CheckOptions(
+            root_path=self.root_path,
+            use_cache=False,
+            parallelism=parallelism,
+            fail_fast=fail_fast))
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            CheckOptions(mypy_mode='unknown')
+        with self.assertRaises(ValueError):
+            CheckOptions(engine='unknown')
+        with self.assertRaises(ValueError):
+            CheckOptions(parallelism=0)
+        with self.assertRaises(ValueError):
+            CheckOptions(fail_fast=0)
+        with self.assertRaises(ValueError):
+            self.check_files(['missing.py'])
+
+    def test_failures(self) -> None:
+        self.write_file('good.py', 'X = 1\n')
+        self.write_file('bad.py', 'X=1\n')
+        with self.check_files(['good.py', 'bad.py']) as run:
+            self.assertTrue(run.is_successful())
+            failed_checks = [get_check_name(check_result) for check_result in run
+                             if check_result.returncode != 0]
+            self.assertEqual(failed_checks, ['pycodestyle bad.py'])
+            self.assertFalse(run.is_successful())
+            with self.assertRaises(RuntimeError):
+                iter(run)
+
+    def test_leaving_run_early_kills_running_checks(self) -> None:
+        self.write_file('slow_test.py', SLOW_TEST)
+        self.write_file('waits.py', WAITS_FOR_SLOW_TEST)
+        start_time = time.monotonic()
+        with self.check_files(['slow_test.py', 'waits.py'], parallelism=4) as run:
+            for check_result in run:
+                if get_check_name(check_result) == 'import waits.py':
+                    break
+        self.assertLess(time.monotonic() - start_time, 30)
+        self.assertTrue(wait_for_process_exit(self.read_pid()))
+
+    def test_leaving_async_iteration_early_kills_running_checks(self) -> None:
+        self.write_file('slow_test.py', SLOW_TEST)
+        self.write_file('waits.py', WAITS_FOR_SLOW_TEST)
+
+        async def check() -> List[str]:
+            check_names = []
+            async for check_result in self.check_files(
+                    ['slow_test.py', 'waits.py'], parallelism=4):
+                check_names.append(get_check_name(check_result))
+                if check_names[-1] == 'import waits.py':
+                    break
+            return check_names
+
+        start_time = time.monotonic()
+        check_names = asyncio.run(check())
+        self.assertLess(time.monotonic() - start_time, 30)
+        self.assertNotIn('unittest slow_test.py', check_names)
+        self.assertTrue(wait_for_process_exit(self.read_pid()))
+
+    def test_async_iteration(self) -> None:
+        self.write_file('good.py', 'X = 1\n')
+        self.write_file('bad.py', 'X=1\n')
+        run = self.check_files(['good.py', 'bad.py'])
+
+        async def check() -> List[str]:
+            return [get_check_name(check_result) async for check_result in run]
+
+        self.assertEqual(sorted(asyncio.run(check())), [
+            '%s %s' % (check_type, file_name)
+            for check_type in ['compile', 'import', 'pycodestyle']
+            for file_name in ['bad.py', 'good.py']])
+        self.assertFalse(run.is_successful())
+
+    def test_fail_fast(self) -> None:
+        self.write_file('fails.py', FAILS_AFTER_SLOW_TEST_STARTS)
+        self.write_file('slow_test.py', SLOW_TEST)
+        start_time = time.monotonic()
+        with self.check_files(['fails.py', 'slow_test.py'], parallelism=4, fail_fast=1) as run:
+            skip_reasons = {get_check_name(check_result): check_result.skip_reason
+                            for check_result in run}
+        self.assertLess(time.monotonic() - start_time, 30)
+        self.assertFalse(run.is_successful())
+        self.assertEqual(
+            skip_reasons['unittest slow_test.py'], 'Stopped because of --fail-fast')
+        self.assertTrue(wait_for_process_exit(self.read_pid()))
+
+
+if __name__ == '__main__':
+    unittest.main()
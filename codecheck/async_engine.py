@@ -0,0 +1,93 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+An engine that runs checks as coroutines on an event loop in a background thread, instead of
+dedicating a thread to every running check (see --engine).
+"""
+
+from typing import Any, Callable, Coroutine, Iterator, Set, TypeVar
+
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import threading
+
+
+T = TypeVar('T')
+
+
+class AsyncioExecutor:
+    """
+    Runs coroutines on an event loop in a background thread, and returns futures for their
+    results that can be used from other threads like the futures of a ThreadPoolExecutor.
+    Cancelling such a future cancels the coroutine, even if it has started.
+
+    Work that can only be done by blocking, e.g. checks run in this process, runs in a pool of
+    threads using run_blocking().
+    """
+
+    def __init__(self, max_blocking_threads: int) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.blocking_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_blocking_threads, thread_name_prefix='check_blocking')
+        # Indexes of the worker ids in use, only accessed from the event loop thread.
+        self.busy_worker_indexes: Set[int] = set()
+        self.thread = threading.Thread(target=self.run_loop, name='check_loop', daemon=True)
+        self.thread.start()
+
+    def run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> 'concurrent.futures.Future[T]':
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def run_blocking(self, fn: Callable[..., T], *args: Any) -> T:
+        # Like asyncio.to_thread(), run the function with the context variables of the caller.
+        context = contextvars.copy_context()
+        return await self.loop.run_in_executor(
+            self.blocking_executor, functools.partial(context.run, fn, *args))
+
+    @contextlib.contextmanager
+    def acquire_worker_id(self) -> Iterator[str]:
+        """
+        Yields the lowest worker id not used by another running coroutine, named like the threads
+        of the thread engine, so that traces show a lane for every concurrently running check.
+        """
+        index = 0
+        while index in self.busy_worker_indexes:
+            index += 1
+        self.busy_worker_indexes.add(index)
+        try:
+            yield 'check_%d' % index
+        finally:
+            self.busy_worker_indexes.remove(index)
+
+    async def wait_for_tasks(self) -> None:
+        current_task = asyncio.current_task()
+        await asyncio.gather(
+            *[task for task in asyncio.all_tasks() if task is not current_task],
+            return_exceptions=True)
+
+    def shutdown(self) -> None:
+        """
+        Waits for all coroutines to finish, including cancelled ones that are still cleaning up,
+        and stops the event loop.
+        """
+        asyncio.run_coroutine_threadsafe(self.wait_for_tasks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.blocking_executor.shutdown()
@@ -0,0 +1,120 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Dict, List, Tuple
+
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+import unittest
+
+from codecheck.async_engine import AsyncioExecutor
+from codecheck.test_util import DEFAULT_CONFIG, TempRepoTestCase
+
+
+context_value: 'contextvars.ContextVar[str]' = contextvars.ContextVar('context_value')
+
+
+class AsyncioExecutorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.executor = AsyncioExecutor(max_blocking_threads=2)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_results_and_exceptions(self) -> None:
+        async def add(a: int, b: int) -> int:
+            await asyncio.sleep(0)
+            return a + b
+
+        async def fail() -> None:
+            raise ValueError('failed')
+
+        self.assertEqual(self.executor.submit(add(1, 2)).result(), 3)
+        with self.assertRaises(ValueError):
+            self.executor.submit(fail()).result()
+
+    def test_cancel_running_coroutine(self) -> None:
+        started = threading.Event()
+        cleaned_up = threading.Event()
+
+        async def run_long() -> None:
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            finally:
+                cleaned_up.set()
+
+        future = self.executor.submit(run_long())
+        self.assertTrue(started.wait(10))
+        self.assertTrue(future.cancel())
+        with self.assertRaises(concurrent.futures.CancelledError):
+            future.result()
+        self.assertTrue(cleaned_up.wait(10))
+
+    def test_run_blocking(self) -> None:
+        def get_context_value() -> Tuple[str, str]:
+            return context_value.get(), threading.current_thread().name
+
+        async def run() -> Tuple[str, str]:
+            context_value.set('value')
+            return await self.executor.run_blocking(get_context_value)
+
+        value, thread_name = self.executor.submit(run()).result()
+        self.assertEqual(value, 'value')
+        self.assertTrue(thread_name.startswith('check_blocking'), thread_name)
+
+    def test_worker_ids(self) -> None:
+        async def get_worker_ids() -> List[str]:
+            worker_ids = []
+            with self.executor.acquire_worker_id() as first_worker_id:
+                worker_ids.append(first_worker_id)
+                with self.executor.acquire_worker_id() as second_worker_id:
+                    worker_ids.append(second_worker_id)
+            with self.executor.acquire_worker_id() as third_worker_id:
+                worker_ids.append(third_worker_id)
+            return worker_ids
+
+        self.assertEqual(
+            self.executor.submit(get_worker_ids()).result(), ['check_0', 'check_1', 'check_0'])
+
+
+class AsyncioEngineTest(TempRepoTestCase):
+    def get_results(self, *args: str) -> Dict[str, Tuple[int, bool]]:
+        return {
+            '%s %s' % (record['check_type'], record['rel_file_path']):
+                (record['returncode'], record['timed_out'])
+            for record in self.run_codecheck_jsonl(*args)
+        }
+
+    def test_same_results_as_threads(self) -> None:
+        self.write_files({
+            'a.py': 'X = 1\n',
+            'b.py': 'X=1\n',
+            'c.py': 'import no_such_module\n',
+            'a_test.py': 'import unittest\n',
+            'slow.py': 'import time\ntime.sleep(60)\n',
+        })
+        self.write_file('codecheck.ini', DEFAULT_CONFIG + '[timeouts]\nimport = 1\n')
+        self.commit_all()
+        start_time = time.monotonic()
+        results = self.get_results('--engine', 'asyncio', '-j', '4')
+        self.assertLess(time.monotonic() - start_time, 30)
+        self.assertEqual(results, self.get_results('--engine', 'threads', '-j', '4'))
+        failed_checks = sorted(
+            check for check, (returncode, _) in results.items() if returncode != 0)
+        self.assertEqual(failed_checks, ['import c.py', 'import slow.py', 'pycodestyle b.py'])
+        self.assertTrue(results['import slow.py'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
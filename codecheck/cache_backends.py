@@ -0,0 +1,200 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Storage backends for the result cache. The local cache is a directory. A cache shared between
+machines can be a directory on a shared file system, or an HTTP server that serves entries with
+GET and accepts new ones with PUT, such as nginx with the WebDAV module enabled.
+"""
+
+from typing import List, Optional, Tuple
+
+import abc
+import logging
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+
+class CacheBackend(abc.ABC):
+    """
+    Stores cache entries, which are strings, by key. Backends handle their own errors: a failure
+    to read an entry is treated as a miss, and a failure to store one is logged. Backends can be
+    used from multiple threads.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abc.abstractmethod
+    def put(self, key: str, value: str) -> None:
+        pass
+
+    def evict_if_needed(self) -> None:
+        """
+        Removes entries if the backend has grown beyond its size limit, if it has one.
+        """
+        pass
+
+
+class DirectoryCacheBackend(CacheBackend):
+    """
+    Stores entries as files in a directory, one file per key. Entries are written atomically, so
+    the directory can be shared by concurrent processes, also on different machines using a shared
+    file system. If a maximum size is given, the least recently used entries are evicted by
+    evict_if_needed().
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: Optional[int]) -> None:
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+
+    def __str__(self) -> str:
+        return self.cache_dir
+
+    def get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[str]:
+        entry_path = self.get_entry_path(key)
+        try:
+            with open(entry_path) as entry_file:
+                value = entry_file.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        try:
+            # Mark the entry as recently used for the purposes of eviction.
+            os.utime(entry_path)
+        except OSError:
+            # E.g. a read-only shared cache.
+            pass
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        entry_path = self.get_entry_path(key)
+        entry_dir = os.path.dirname(entry_path)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            # Write to a temporary file and rename it, so that concurrent readers never see a
+            # partially written entry.
+            fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as tmp_file:
+                    tmp_file.write(value)
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as ex:
+            logging.warning("Failed to store result in cache at %s: %s", entry_path, ex)
+
+    def evict_if_needed(self) -> None:
+        if self.max_size_bytes is None or not os.path.isdir(self.cache_dir):
+            return
+        entries: List[Tuple[float, int, str]] = []
+        total_size = 0
+        for subdir_entry in os.scandir(self.cache_dir):
+            if not subdir_entry.is_dir():
+                continue
+            for entry in os.scandir(subdir_entry.path):
+                try:
+                    stat_result = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+                total_size += stat_result.st_size
+
+        if total_size <= self.max_size_bytes:
+            return
+
+        num_evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total_size -= size
+            num_evicted += 1
+        logging.info("Evicted %d entries from the result cache at %s", num_evicted, self.cache_dir)
+
+
+class HttpCacheBackend(CacheBackend):
+    """
+    Reads entries from <base URL>/<key> using GET, and stores them using PUT. A missing entry is
+    expected to be reported as 404. After the first error other than that, e.g. if the server is
+    unreachable, the backend is disabled for the rest of the run, so that a server that is down
+    does not slow the run down with a timeout for every check.
+    """
+
+    def __init__(self, base_url: str, timeout_sec: float) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.timeout_sec = timeout_sec
+        self.lock = threading.Lock()
+        self.is_disabled = False
+
+    def __str__(self) -> str:
+        return self.base_url
+
+    def get_entry_url(self, key: str) -> str:
+        return '%s/%s' % (self.base_url, key)
+
+    def disable(self, action: str, key: str, ex: Exception) -> None:
+        with self.lock:
+            if self.is_disabled:
+                return
+            self.is_disabled = True
+        logging.warning("Failed to %s %s, not using the remote result cache for the rest of "
+                        "the run: %s", action, self.get_entry_url(key), ex)
+
+    def get(self, key: str) -> Optional[str]:
+        if self.is_disabled:
+            return None
+        try:
+            with urllib.request.urlopen(
+                    self.get_entry_url(key), timeout=self.timeout_sec) as response:
+                return response.read().decode('utf-8')
+        except urllib.error.HTTPError as ex:
+            if ex.code != 404:
+                self.disable('read', key, ex)
+        except (OSError, UnicodeDecodeError) as ex:
+            self.disable('read', key, ex)
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        if self.is_disabled:
+            return
+        request = urllib.request.Request(
+            self.get_entry_url(key),
+            data=value.encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='PUT')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_sec):
+                pass
+        except OSError as ex:
+            self.disable('write', key, ex)
+
+
+def create_cache_backend(location: str, timeout_sec: float) -> CacheBackend:
+    """
+    Creates a backend for a shared cache, given either an HTTP(S) URL or a directory path. Shared
+    directories are not size-limited by codecheck, and are expected to be cleaned up separately,
+    e.g. by a periodic job removing entries that have not been used for a while.
+    """
+    if location.startswith(('http://', 'https://')):
+        return HttpCacheBackend(location, timeout_sec)
+    return DirectoryCacheBackend(os.path.expanduser(location), max_size_bytes=None)
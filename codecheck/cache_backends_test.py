@@ -0,0 +1,150 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Dict, List
+
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from codecheck.cache_backends import (
+    DirectoryCacheBackend,
+    HttpCacheBackend,
+    create_cache_backend,
+)
+
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves cache entries stored in the entries dictionary of the server, by path. Requests for
+    paths ending with "/error" fail.
+    """
+
+    server: 'CacheServer'
+
+    def do_GET(self) -> None:
+        self.server.requests.append('GET ' + self.path)
+        key = self.path.lstrip('/')
+        if key.endswith('/error'):
+            self.send_error(500)
+        elif key not in self.server.entries:
+            self.send_error(404)
+        else:
+            body = self.server.entries[key].encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def do_PUT(self) -> None:
+        self.server.requests.append('PUT ' + self.path)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.entries[self.path.lstrip('/')] = body.decode('utf-8')
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class CacheServer(http.server.ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), CacheRequestHandler)
+        self.entries: Dict[str, str] = {}
+        self.requests: List[str] = []
+
+    def get_url(self) -> str:
+        return 'http://127.0.0.1:%d/cache' % self.server_address[1]
+
+
+class DirectoryCacheBackendTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp(prefix='codecheck_cache_backends_test_')
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_get_and_put(self) -> None:
+        backend = DirectoryCacheBackend(self.cache_dir, max_size_bytes=None)
+        self.assertIsNone(backend.get('abcdef'))
+        backend.put('abcdef', 'value')
+        self.assertEqual(backend.get('abcdef'), 'value')
+        backend.put('abcdef', 'new value')
+        self.assertEqual(backend.get('abcdef'), 'new value')
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, 'ab')), ['abcdef.json'])
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        backend = DirectoryCacheBackend(self.cache_dir, max_size_bytes=250)
+        for index, key in enumerate(['key1', 'key2', 'key3']):
+            backend.put(key, 'x' * 100)
+            os.utime(backend.get_entry_path(key), (1000 + index, 1000 + index))
+        # Reading an entry marks it as recently used.
+        self.assertIsNotNone(backend.get('key1'))
+        backend.evict_if_needed()
+        self.assertIsNotNone(backend.get('key1'))
+        self.assertIsNone(backend.get('key2'))
+        self.assertIsNotNone(backend.get('key3'))
+
+    def test_write_failure(self) -> None:
+        file_path = os.path.join(self.cache_dir, 'file')
+        with open(file_path, 'w'):
+            pass
+        backend = DirectoryCacheBackend(file_path, max_size_bytes=None)
+        with self.assertLogs(level='WARNING'):
+            backend.put('key', 'value')
+        self.assertIsNone(backend.get('key'))
+
+
+class HttpCacheBackendTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = CacheServer()
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        server_thread.start()
+        self.addCleanup(server_thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_get_and_put(self) -> None:
+        backend = create_cache_backend(self.server.get_url() + '/', timeout_sec=10)
+        self.assertIsInstance(backend, HttpCacheBackend)
+        # A missing entry is not an error.
+        self.assertIsNone(backend.get('key'))
+        backend.put('key', 'value')
+        self.assertEqual(self.server.entries, {'cache/key': 'value'})
+        self.assertEqual(backend.get('key'), 'value')
+        self.assertEqual(self.server.requests,
+                         ['GET /cache/key', 'PUT /cache/key', 'GET /cache/key'])
+
+    def test_disabled_after_error(self) -> None:
+        backend = HttpCacheBackend(self.server.get_url(), timeout_sec=10)
+        self.server.entries['cache/key'] = 'value'
+        with self.assertLogs(level='WARNING') as logs:
+            self.assertIsNone(backend.get('error'))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsNone(backend.get('key'))
+        backend.put('key', 'new value')
+        self.assertEqual(self.server.requests, ['GET /cache/error'])
+
+    def test_unreachable_server(self) -> None:
+        url = self.server.get_url()
+        self.server.shutdown()
+        self.server.server_close()
+        backend = HttpCacheBackend(url, timeout_sec=10)
+        with self.assertLogs(level='WARNING'):
+            backend.put('key', 'value')
+        self.assertIsNone(backend.get('key'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,7 +11,9 @@
 # under the License.
 
 
-from typing import List
+from typing import List, Dict, Any, Optional, Union
+
+from codecheck.process_util import ProcessResult
 
 
 class CheckResult:
@@ -32,5 +34,103 @@ class CheckResult:
         self.returncode = returncode
         self.extra_messages = extra_messages
 
+        # True if this result was replayed from the result cache instead of running the check.
+        self.from_cache = False
+
+        # Why the check was not run (or was stopped), if it was skipped.
+        self.skip_reason: Optional[str] = None
+
+        # True if the check was killed because it exceeded its timeout.
+        self.timed_out = False
+
+        # When the task producing this result started and finished (as returned by time.time()),
+        # and the name of the thread that ran it. Results of batched checks share these values.
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.worker_id: Optional[str] = None
+
+        # Peak memory usage of the process that ran the check, if it ran as a separate process,
+        # and the CPU time used by the check, if known. Results of batched checks share these.
+        self.max_rss_bytes: Optional[int] = None
+        self.user_cpu_sec: Optional[float] = None
+        self.system_cpu_sec: Optional[float] = None
+
     def get_description(self) -> str:
         return "Check '%s' for %s" % (self.check_type, self.file_path)
+
+    def get_duration_sec(self) -> Optional[float]:
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def get_cpu_sec(self) -> Optional[float]:
+        if self.user_cpu_sec is None or self.system_cpu_sec is None:
+            return None
+        return self.user_cpu_sec + self.system_cpu_sec
+
+    def set_resource_usage(self, usage: Union[ProcessResult, 'CheckResult']) -> None:
+        self.max_rss_bytes = usage.max_rss_bytes
+        self.user_cpu_sec = usage.user_cpu_sec
+        self.system_cpu_sec = usage.system_cpu_sec
+
+    def add_resource_usage(self, other: 'CheckResult') -> None:
+        """
+        Adds the resource usage of another check run as part of the same task: CPU times add up,
+        and the peak memory usage is the larger one. Values unknown for either stay unknown.
+
+        >>> first = CheckResult('unittest', 'a.py')
+        >>> first.set_resource_usage(ProcessResult('', '', 0, 100, 1.0, 0.5))
+        >>> second = CheckResult('unittest', 'b.py')
+        >>> second.set_resource_usage(ProcessResult('', '', 0, 200, 2.0, None))
+        >>> first.add_resource_usage(second)
+        >>> first.max_rss_bytes, first.user_cpu_sec, first.system_cpu_sec
+        (200, 3.0, None)
+        """
+        self.max_rss_bytes = (
+            None if self.max_rss_bytes is None or other.max_rss_bytes is None
+            else max(self.max_rss_bytes, other.max_rss_bytes))
+        self.user_cpu_sec = (
+            None if self.user_cpu_sec is None or other.user_cpu_sec is None
+            else self.user_cpu_sec + other.user_cpu_sec)
+        self.system_cpu_sec = (
+            None if self.system_cpu_sec is None or other.system_cpu_sec is None
+            else self.system_cpu_sec + other.system_cpu_sec)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'check_type': self.check_type,
+            'file_path': self.file_path,
+            'cmd_args': self.cmd_args,
+            'stdout': self.stdout,
+            'stderr': self.stderr,
+            'returncode': self.returncode,
+            'extra_messages': self.extra_messages,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'worker_id': self.worker_id,
+            'max_rss_bytes': self.max_rss_bytes,
+            'user_cpu_sec': self.user_cpu_sec,
+            'system_cpu_sec': self.system_cpu_sec,
+            'skip_reason': self.skip_reason,
+            'timed_out': self.timed_out,
+        }
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> 'CheckResult':
+        check_result = CheckResult(
+            check_type=d['check_type'],
+            file_path=d['file_path'],
+            cmd_args=d['cmd_args'],
+            stdout=d['stdout'],
+            stderr=d['stderr'],
+            returncode=d['returncode'],
+            extra_messages=d['extra_messages'])
+        check_result.start_time = d.get('start_time')
+        check_result.end_time = d.get('end_time')
+        check_result.worker_id = d.get('worker_id')
+        check_result.max_rss_bytes = d.get('max_rss_bytes')
+        check_result.user_cpu_sec = d.get('user_cpu_sec')
+        check_result.system_cpu_sec = d.get('system_cpu_sec')
+        check_result.skip_reason = d.get('skip_reason')
+        check_result.timed_out = d.get('timed_out', False)
+        return check_result
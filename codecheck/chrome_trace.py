@@ -0,0 +1,126 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Writes the timeline of a run in the Chrome trace event format, which can be viewed with
+chrome://tracing or https://ui.perfetto.dev. The stages of the run are shown in the lane of the
+main thread, and every worker thread gets a lane with the tasks it ran.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+
+import json
+import logging
+
+from codecheck.check_result import CheckResult
+from codecheck.run_stats import get_task_description
+
+
+TRACE_PROCESS_ID = 1
+MAIN_THREAD_LANE_ID = 0
+
+
+def to_trace_timestamp(timestamp: float, start_time: float) -> int:
+    """
+    Converts a time.time() value into microseconds since the start of the run.
+
+    >>> to_trace_timestamp(101.5, 100.0)
+    1500000
+    """
+    return int(round((timestamp - start_time) * 1000000))
+
+
+def get_trace_events(
+        task_results: List[List[CheckResult]],
+        stages: List[Tuple[str, float, float]],
+        start_time: float,
+        relativize_path: Callable[[str], str]) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = [
+        {
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': TRACE_PROCESS_ID,
+            'args': {'name': 'codecheck'},
+        },
+        {
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': TRACE_PROCESS_ID,
+            'tid': MAIN_THREAD_LANE_ID,
+            'args': {'name': 'main'},
+        },
+    ]
+    for stage_name, stage_start_time, stage_end_time in stages:
+        events.append({
+            'name': stage_name,
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': to_trace_timestamp(stage_start_time, start_time),
+            'dur': to_trace_timestamp(stage_end_time, stage_start_time),
+            'pid': TRACE_PROCESS_ID,
+            'tid': MAIN_THREAD_LANE_ID,
+        })
+
+    # Number the worker lanes in the order in which the workers started their first tasks.
+    worker_lane_ids: Dict[str, int] = {}
+    for results in sorted(task_results, key=lambda results: results[0].start_time or 0.0):
+        first_result = results[0]
+        assert first_result.worker_id is not None
+        assert first_result.start_time is not None
+        assert first_result.end_time is not None
+        if first_result.worker_id not in worker_lane_ids:
+            lane_id = len(worker_lane_ids) + 1
+            worker_lane_ids[first_result.worker_id] = lane_id
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': TRACE_PROCESS_ID,
+                'tid': lane_id,
+                'args': {'name': first_result.worker_id},
+            })
+        events.append({
+            'name': get_task_description(results, relativize_path),
+            'cat': first_result.check_type,
+            'ph': 'X',
+            'ts': to_trace_timestamp(first_result.start_time, start_time),
+            'dur': to_trace_timestamp(first_result.end_time, first_result.start_time),
+            'pid': TRACE_PROCESS_ID,
+            'tid': worker_lane_ids[first_result.worker_id],
+            'args': {
+                'files': [relativize_path(result.file_path) for result in results],
+                'failed_files': [
+                    relativize_path(result.file_path) for result in results
+                    if result.returncode != 0
+                ],
+                'user_cpu_sec': first_result.user_cpu_sec,
+                'system_cpu_sec': first_result.system_cpu_sec,
+                'max_rss_bytes': first_result.max_rss_bytes,
+            },
+        })
+    return events
+
+
+def write_chrome_trace(
+        trace_file_path: str,
+        task_results: List[List[CheckResult]],
+        stages: List[Tuple[str, float, float]],
+        start_time: float,
+        relativize_path: Callable[[str], str]) -> None:
+    try:
+        with open(trace_file_path, 'w') as trace_file:
+            json.dump({
+                'traceEvents': get_trace_events(
+                    task_results, stages, start_time, relativize_path),
+                'displayTimeUnit': 'ms',
+            }, trace_file)
+    except OSError as ex:
+        logging.warning("Failed to write trace file %s: %s", trace_file_path, ex)
@@ -0,0 +1,58 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import unittest
+
+from codecheck.test_util import TempRepoTestCase
+
+
+class ChromeTraceTest(TempRepoTestCase):
+    def test_trace_file(self) -> None:
+        self.write_files({'a.py': 'X = 1\n', 'b.py': 'import sys\nsys.exit(1)\n'})
+        self.commit_all()
+        trace_file_path = os.path.join(self.root_path, 'trace.json')
+        process = self.run_codecheck('--trace-file', trace_file_path, '--verbose-stats')
+        self.assertEqual(process.returncode, 1)
+        self.assertIn('Resource usage by check type:', process.stdout)
+        self.assertIn('Slowest tasks:', process.stdout)
+
+        with open(trace_file_path) as trace_file:
+            events = json.load(trace_file)['traceEvents']
+        task_events = {
+            event['name']: event for event in events
+            if event['ph'] == 'X' and event['cat'] != 'stage'
+        }
+        self.assertEqual(
+            sorted(task_events),
+            ['compile a.py', 'compile b.py', 'import a.py', 'import b.py',
+             'pycodestyle a.py and 1 more files'])
+        self.assertEqual(task_events['import b.py']['args']['failed_files'], ['b.py'])
+        self.assertEqual(task_events['import a.py']['args']['failed_files'], [])
+        self.assertEqual(
+            task_events['pycodestyle a.py and 1 more files']['args']['files'], ['a.py', 'b.py'])
+        self.assertTrue(any(event['cat'] == 'stage' for event in events if event['ph'] == 'X'))
+
+        # Every worker lane that has tasks has a name.
+        lane_names = {
+            event['tid']: event['args']['name'] for event in events
+            if event['name'] == 'thread_name'
+        }
+        for event in task_events.values():
+            self.assertIn(event['tid'], lane_names)
+            self.assertGreaterEqual(event['ts'], 0)
+            self.assertGreaterEqual(event['dur'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,24 +19,65 @@ pycodestyle). Runs multiple checks in parallel.
 
 import argparse
 import concurrent.futures
+import contextlib
 import fnmatch
 import os
-import subprocess
 import sys
+import tempfile
+import threading
 import time
 import traceback
 import logging
 import multiprocessing
 import re
+import signal
 
-from typing import List, Dict, Tuple, Set, Optional, Any
+from typing import List, Dict, Tuple, Set, Optional, Any, Iterable, Iterator, TextIO, Union
 
+from codecheck.async_engine import AsyncioExecutor
+from codecheck.cache_backends import DirectoryCacheBackend, create_cache_backend
 from codecheck.check_result import CheckResult
-from codecheck.reporter import Reporter
+from codecheck.chrome_trace import write_chrome_trace
+from codecheck.duration_history import DurationHistory, estimate_default_duration_sec
+from codecheck.file_watcher import create_file_watcher
+from codecheck.fork_server import ForkServer
+from codecheck.file_discovery import InclusionExclusionMatcher, get_regular_file_paths
+from codecheck.git_files import get_changed_file_paths, get_suffix_pathspecs, list_tracked_files
+from codecheck.import_graph import ImportGraph
+from codecheck.in_process_checks import run_check_in_process
+from codecheck.lint_batch import (
+    find_nearest_config_dir,
+    split_into_batches,
+    split_lint_batch_result,
+)
+from codecheck.mypy_batch import split_mypy_batch_result
+from codecheck.mypy_cache import MypyCacheDirPool, get_mypy_cache_key
+from codecheck.mypy_daemon import MypyDaemon, stop_mypy_daemons
+from codecheck.progress import PROGRESS_LOG_INTERVAL_SEC, PROGRESS_MODES, Progress
+from codecheck.process_util import (
+    ProcessResult,
+    RunningProcesses,
+    current_task_id,
+    get_thread_cpu_times,
+    run_process,
+    run_process_async,
+)
+from codecheck import unittest_runner
+from codecheck.unittest_runner import read_unittest_batch_results
+from codecheck.reporter import OUTPUT_FORMATS, Reporter, create_reporter
+from codecheck.result_cache import (
+    CacheKeyBuilder,
+    ResultCache,
+    PYCODESTYLE_PROJECT_CONFIG_NAMES,
+)
+from codecheck.run_stats import RunStats
+from codecheck.scheduler import CheckScheduler
+from codecheck.sharding import get_shard_check_inputs, read_shard_results
+from codecheck.worker_pool import WorkerPool
 from codecheck.util import (
-    increment_counter,
-    ensure_str_decoded,
+    get_default_state_dir,
     get_module_name_from_path,
+    is_current_interpreter,
     CompiledRE,
     prepend_path_entries,
 )
@@ -45,41 +86,55 @@ from codecheck.constants import (
     DEFAULT_CONF_FILE_NAME,
     ALL_CHECK_TYPES,
     ALL_CHECKED_SUFFIXES,
+    CHECK_TYPES_AFFECTED_BY_IMPORTS,
+    CHECK_TYPE_PREREQUISITES,
     NAME_SUFFIX_TO_CHECK_TYPES,
+    MYPY_MODES,
+    MYPY_TYPE_INFO_SUFFIXES,
+    ENGINES,
+    DEFAULT_ENGINE,
+    IN_PROCESS_CHECK_TYPES,
+    WORKER_POOL_CHECK_TYPES,
 )
 
-NUM_REMAINING_CHECKS_TO_SHOW = 5
+# In --watch mode, how often to look for completed checks while checks are running, and how long
+# to wait for file changes at a time otherwise.
+WATCH_POLL_INTERVAL_SEC = 0.1
+WATCH_IDLE_WAIT_SEC = 1.0
 
-INDENTATION_SEPARATOR = '\n' + ' ' * 4
-
-
-def print_stats(
-        description: str,
-        d: Dict[str, int],
-        failure_counts: Dict[str, int] = {}) -> None:
-    print("%s:%s%s" % (
-        description,
-        INDENTATION_SEPARATOR,
-        INDENTATION_SEPARATOR.join(
-            '%s: %s%s' % (
-                k,
-                v,
-                ' (%d failed)' % failure_counts[k] if k in failure_counts else ''
-            ) for k, v in sorted(d.items())
-        )
-    ))
+# A file path and a check type to run on that file.
+CheckInput = Tuple[str, str]
 
 
 class CodeChecker:
     config: CodeCheckConfig
     args: argparse.Namespace
     root_path: str
+    mypy_cache_dir_pool: Optional[MypyCacheDirPool]
+
+    # Whether to run the IN_PROCESS_CHECK_TYPES checks inside this process.
+    run_in_process: bool
+
+    # If enabled, the WORKER_POOL_CHECK_TYPES checks run in long-lived worker processes.
+    worker_pool: Optional[WorkerPool]
+
+    # If enabled, import checks run in processes forked from a server with preloaded modules.
+    fork_server: Optional[ForkServer]
+
+    # Durations of checks in previous runs, used to start the longest checks first.
+    duration_history: DurationHistory
+
+    # Reports check results in the selected output format.
+    reporter: Reporter
+
+    # Check processes that are currently running, so that they can be killed.
+    running_processes: RunningProcesses
 
     def __init__(self, root_path: str) -> None:
         self.root_path = root_path
         self.root_path_realpath = os.path.realpath(root_path)
 
-    def parse_args(self) -> None:
+    def create_arg_parser(self) -> argparse.ArgumentParser:
         parser = argparse.ArgumentParser(prog=sys.argv[0])
         parser.add_argument(
             '-f', '--file-pattern',
@@ -94,6 +149,16 @@ class CodeChecker:
             '--detailed-progress',
             action='store_true',
             help='Show detailed progress information (even more verbose)')
+        parser.add_argument(
+            '--progress',
+            choices=PROGRESS_MODES,
+            default='auto',
+            help='How to show the progress of a run: "line" keeps updating a status line with '
+                 'the number of completed checks, the estimated remaining time and the running '
+                 'checks, "log" logs the progress every %d seconds, "off" does not show it. '
+                 '"auto" (the default) uses "line" if standard error is a terminal, and "off" '
+                 'otherwise. Use "log" to get periodic progress output in CI.'
+                 % PROGRESS_LOG_INTERVAL_SEC)
         num_cpus = multiprocessing.cpu_count()
         parser.add_argument(
             '-j', '--parallelism',
@@ -106,13 +171,173 @@ class CodeChecker:
             help=f'Configuration path ({DEFAULT_CONF_FILE_NAME} by default).',
             dest='config_path',
             default=DEFAULT_CONF_FILE_NAME)
+        parser.add_argument(
+            '--changed-since',
+            metavar='REF',
+            help='Only check files that changed compared to the merge base of the given git ref '
+                 '(e.g. origin/master) and HEAD, including uncommitted changes.')
+        parser.add_argument(
+            '--staged',
+            action='store_true',
+            help='Only check files with changes staged for commit. Combined with --changed-since, '
+                 'compares the index to the merge base instead of the working tree.')
+        parser.add_argument(
+            '--with-dependents',
+            action='store_true',
+            help='With --changed-since or --staged, also run the %s checks for files that '
+                 'directly or indirectly import changed Python files.' %
+                 ', '.join(CHECK_TYPES_AFFECTED_BY_IMPORTS))
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running, and whenever checked files change, re-run the checks for them and '
+                 'for the files importing them. Uses inotify on Linux, and polls files otherwise.')
+        parser.add_argument(
+            '--output-format',
+            choices=OUTPUT_FORMATS,
+            default='text',
+            help='Format in which to report check results: "text" shows the output of failed '
+                 'checks, "jsonl" writes a JSON object per line for every check, including '
+                 'diagnostics parsed from pycodestyle, mypy and shellcheck output, and "junit" '
+                 'writes a JUnit XML report. Results are written as the checks complete. With '
+                 'a machine-readable format written to standard output, all other messages go '
+                 'to standard error.')
+        parser.add_argument(
+            '--output-file',
+            metavar='PATH',
+            help='Write the check results to this file instead of standard output.')
+        parser.add_argument(
+            '--trace-file',
+            metavar='PATH',
+            help='Write a timeline of the run to this file in the Chrome trace event format, '
+                 'with a lane for every worker thread. It can be viewed using chrome://tracing '
+                 'or https://ui.perfetto.dev.')
+        parser.add_argument(
+            '--verbose-stats',
+            action='store_true',
+            help='At the end of a run, also show the time, CPU time and peak memory usage of the '
+                 'checks by type, the slowest tasks, and the longest tasks on the critical path.')
+        parser.add_argument(
+            '--fail-fast',
+            metavar='N',
+            nargs='?',
+            const=1,
+            type=int,
+            help='Stop after N failed checks (1 if N is not specified): do not start any more '
+                 'checks, and kill the checks that are running.')
+        parser.add_argument(
+            '--shard-index',
+            metavar='INDEX',
+            type=int,
+            help='Only run the checks of one shard, numbered from 0, out of --shard-count shards, '
+                 'e.g. to split the checks between multiple CI machines. All checks of a file '
+                 'run in the same shard. The split is balanced by estimated check durations, and '
+                 'is the same on all machines as long as they check the same files. Use '
+                 '--output-format jsonl to write the results of every shard to a file, and '
+                 '"merge" to combine them.')
+        parser.add_argument(
+            '--shard-count',
+            metavar='COUNT',
+            type=int,
+            help='The number of shards to split the checks between (see --shard-index).')
+        parser.add_argument(
+            '--shard-durations',
+            metavar='PATH',
+            help='Balance the shards using the check durations recorded in this file, written by '
+                 '"merge --save-durations". All shards have to use the same file. By default, '
+                 'the shards are balanced by estimates based on file sizes.')
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Do not use the result cache even if it is enabled in the configuration file.')
         parser.add_argument(
             '--python-interpreter',
             help='Python interpreter to use to invoke checks (must be Python 3.6 or later). '
                  'Could be an interpreter in a virtual environment. Default: "python3".',
             default='python3')
 
+        parser.add_argument(
+            '--mypy-mode',
+            choices=MYPY_MODES,
+            help='How to run mypy: "per_file" runs a separate mypy process for each file, '
+                 '"batch" runs mypy once for each group of files with the same import root, '
+                 '"daemon" checks each such group using a mypy daemon that is reused across '
+                 'runs. Overrides mypy_mode from the configuration file.')
+
+        parser.add_argument(
+            '--no-in-process',
+            action='store_true',
+            help='Always run checks as separate processes. By default, the %s checks of '
+                 'single files run inside the codecheck process when they have no timeout and '
+                 '--python-interpreter is the interpreter '
+                 'running codecheck, and the worker pool and the fork server are used if they '
+                 'are enabled in the configuration file.' % ', '.join(IN_PROCESS_CHECK_TYPES))
+
+        parser.add_argument(
+            '--engine',
+            choices=ENGINES,
+            default=DEFAULT_ENGINE,
+            help='How to run checks in parallel: "threads" uses a thread for every running '
+                 'check, and "asyncio" runs the checks that are separate processes on an '
+                 'asyncio event loop in a single thread, reading the output of all of them as '
+                 'it arrives. Other checks, e.g. the ones run in the worker pool, use threads '
+                 'with both engines.')
+
+        subparsers = parser.add_subparsers(
+            dest='command',
+            title='commands',
+            description='If no command is specified, "check" is assumed.')
+        subparsers.add_parser('check', help='Run checks (default).')
+        subparsers.add_parser(
+            'stop-daemons',
+            help='Stop the mypy daemons started by "--mypy-mode daemon" for this repository.')
+        merge_parser = subparsers.add_parser(
+            'merge',
+            help='Combine the results of the shards of a run, written with --output-format jsonl, '
+                 'into one report, reported in the selected output format.')
+        merge_parser.add_argument(
+            'result_file_paths',
+            metavar='RESULT_FILE',
+            nargs='+',
+            help='Results written by a shard.')
+        merge_parser.add_argument(
+            '--save-durations',
+            metavar='PATH',
+            help='Save the durations of the checks in the merged results to this file, to '
+                 'balance the shards of later runs using --shard-durations.')
+        return parser
+
+    def parse_args(self) -> None:
+        parser = self.create_arg_parser()
         self.args = parser.parse_args()
+        if self.args.watch and (self.args.changed_since is not None or self.args.staged):
+            parser.error('--watch cannot be combined with --changed-since or --staged')
+        if self.args.watch and self.args.trace_file is not None:
+            parser.error('--watch cannot be combined with --trace-file')
+        if self.args.watch and self.args.output_format == 'junit':
+            parser.error('--watch cannot be combined with --output-format junit')
+        if self.args.watch and self.args.fail_fast is not None:
+            parser.error('--watch cannot be combined with --fail-fast')
+        if self.args.fail_fast is not None and self.args.fail_fast < 1:
+            parser.error('--fail-fast must be at least 1')
+        if (self.args.shard_index is None) != (self.args.shard_count is None):
+            parser.error('--shard-index and --shard-count have to be specified together')
+        if self.args.shard_count is not None:
+            if self.args.watch:
+                parser.error('--watch cannot be combined with --shard-index')
+            if self.args.shard_count < 1:
+                parser.error('--shard-count must be at least 1')
+            if not 0 <= self.args.shard_index < self.args.shard_count:
+                parser.error('--shard-index must be between 0 and --shard-count minus 1')
+        if (self.args.shard_durations is not None and
+                not os.path.isfile(self.args.shard_durations)):
+            # Shards using different estimates could disagree on the split.
+            parser.error('--shard-durations file not found: %s' % self.args.shard_durations)
+        if self.args.command == 'merge':
+            if self.args.watch:
+                parser.error('--watch cannot be combined with merge')
+            if self.args.trace_file is not None:
+                parser.error('--trace-file cannot be combined with merge')
 
     def relativize_path(self, file_path: str) -> str:
         return os.path.relpath(os.path.realpath(file_path), self.root_path_realpath)
@@ -134,7 +359,16 @@ class CodeChecker:
 
         return ('.'.join(module_components[::-1]), [dir_path])
 
-    def check_file(self, file_path: str, check_type: str) -> CheckResult:
+    def get_check_command(
+            self,
+            file_path: str,
+            check_type: str,
+            exit_stack: contextlib.ExitStack) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Returns the command line of the given check of one file, the directories to add to
+        sys.path for it, and messages to show with its result. Resources that are needed while
+        the check runs, such as a mypy cache directory, are acquired using the given exit stack.
+        """
         assert check_type in ALL_CHECK_TYPES
 
         append_file_path = True
@@ -153,22 +387,16 @@ class CodeChecker:
                 )
 
         if check_type == 'mypy':
-            args = [
-                self.args.python_interpreter,
-                '-m', 'mypy',
-                '--config-file=%s' % self.config.mypy_config_path,
-                '--cache-dir=/dev/null']
+            args = self.get_mypy_args(exit_stack.enter_context(self.acquire_mypy_cache_dir()))
         elif check_type == 'compile':
             args = [self.args.python_interpreter, '-m', 'py_compile']
-        elif check_type == 'shellcheck':
-            args = ['shellcheck', '-x']
+        elif check_type in ['pycodestyle', 'shellcheck']:
+            args = self.get_lint_args(check_type)
         elif check_type == 'import':
             args = [
                 self.args.python_interpreter, '-c', f'import {fully_qualified_module_name}'
             ]
             append_file_path = False
-        elif check_type == 'pycodestyle':
-            args = [self.args.python_interpreter, '-m', 'pycodestyle']
         elif check_type == 'unittest':
             append_file_path = False
             if fully_qualified_module_name is None:
@@ -184,28 +412,610 @@ class CodeChecker:
 
         if append_file_path:
             args.append(file_path)
+        return args, additional_sys_path, extra_messages
+
+    def check_file(self, file_path: str, check_type: str) -> CheckResult:
+        timeout_sec = self.config.get_check_timeout_sec(check_type)
+        with contextlib.ExitStack() as exit_stack:
+            args, additional_sys_path, extra_messages = self.get_check_command(
+                file_path, check_type, exit_stack)
+            process_result = self.run_check_args(
+                args, check_type, additional_sys_path, timeout_sec)
+        return self.create_check_result(
+            file_path, check_type, args, extra_messages, process_result, timeout_sec)
 
+    async def check_file_async(
+            self, file_path: str, check_type: str) -> CheckResult:
+        """
+        Like check_file(), for checks that run as a separate process (see
+        runs_as_separate_process), without blocking a thread while the process is running.
+        """
+        timeout_sec = self.config.get_check_timeout_sec(check_type)
+        with contextlib.ExitStack() as exit_stack:
+            args, additional_sys_path, extra_messages = self.get_check_command(
+                file_path, check_type, exit_stack)
+            process_result = await run_process_async(
+                args,
+                self.get_subprocess_env(additional_sys_path),
+                self.running_processes,
+                timeout_sec,
+                cwd=self.root_path)
+        return self.create_check_result(
+            file_path, check_type, args, extra_messages, process_result, timeout_sec)
+
+    def create_check_result(
+            self,
+            file_path: str,
+            check_type: str,
+            args: List[str],
+            extra_messages: List[str],
+            process_result: ProcessResult,
+            timeout_sec: Optional[float]) -> CheckResult:
+        check_result = CheckResult(
+            check_type=check_type,
+            cmd_args=args,
+            file_path=file_path,
+            stdout=process_result.stdout,
+            stderr=process_result.stderr,
+            returncode=process_result.returncode,
+            extra_messages=extra_messages)
+        check_result.set_resource_usage(process_result)
+        if process_result.timed_out:
+            assert timeout_sec is not None
+            self.mark_timed_out(check_result, timeout_sec)
+        return check_result
+
+    def runs_as_separate_process(
+            self, check_type: str, timeout_sec: Optional[float], num_files: int) -> bool:
+        """
+        Returns True if run_check_args() runs checks of the given type of the given number of
+        files as separate processes, rather than using the fork server, the worker pool, or in
+        this process.
+        """
+        if self.fork_server is not None and check_type == 'import':
+            return False
+        if self.worker_pool is not None:
+            return check_type not in WORKER_POOL_CHECK_TYPES
+        return not self.runs_in_process(check_type, timeout_sec, num_files)
+
+    def runs_in_process(
+            self, check_type: str, timeout_sec: Optional[float], num_files: int) -> bool:
+        """
+        Returns True if a check of the given type of the given number of files runs in a thread
+        of this process. Checks running in a thread cannot be stopped, so checks with a timeout do
+        not. Neither do batches of files: they already spread the interpreter startup cost over
+        many files, and running them here would make them compete for the GIL.
+        """
+        return (
+            self.run_in_process and
+            self.worker_pool is None and
+            check_type in IN_PROCESS_CHECK_TYPES and
+            timeout_sec is None and
+            num_files == 1)
+
+    def run_check_args(
+            self,
+            args: List[str],
+            check_type: str,
+            additional_sys_path: List[str],
+            timeout_sec: Optional[float]) -> ProcessResult:
+        """
+        Runs the given check command using the fork server, the worker pool, or in this process,
+        depending on the check type and what is enabled, and as a separate process otherwise.
+        """
+        worker_result = None
+        if self.fork_server is not None and check_type == 'import':
+            worker_result = self.fork_server.run(
+                args[1:], additional_sys_path, timeout_sec, self.running_processes)
+        elif self.worker_pool is not None and check_type in WORKER_POOL_CHECK_TYPES:
+            worker_result = self.worker_pool.run(
+                args[1:], additional_sys_path, timeout_sec, self.running_processes)
+
+        if worker_result is not None:
+            return worker_result
+        # The command lines of the checks that can run in-process are "python -m <module> <files>".
+        file_paths = args[3:]
+        if self.runs_in_process(check_type, timeout_sec, len(file_paths)):
+            cpu_times_before = get_thread_cpu_times()
+            in_process_result = run_check_in_process(check_type, file_paths)
+            cpu_times_after = get_thread_cpu_times()
+            if in_process_result is not None:
+                if cpu_times_before is not None and cpu_times_after is not None:
+                    in_process_result.user_cpu_sec = cpu_times_after[0] - cpu_times_before[0]
+                    in_process_result.system_cpu_sec = cpu_times_after[1] - cpu_times_before[1]
+                return in_process_result
+        return run_process(
+            args,
+            self.get_subprocess_env(additional_sys_path),
+            self.running_processes,
+            timeout_sec,
+            cwd=self.root_path)
+
+    def get_lint_args(self, check_type: str) -> List[str]:
+        if check_type == 'pycodestyle':
+            return [self.args.python_interpreter, '-m', 'pycodestyle']
+        assert check_type == 'shellcheck', f"Unexpected check type: {check_type}"
+        return ['shellcheck', '-x']
+
+    def check_lint_batch(self, file_paths: List[str], check_type: str) -> List[CheckResult]:
+        """
+        Runs pycodestyle or shellcheck once on the given files and splits the output into per-file
+        results. For pycodestyle, the files must all use the same project configuration.
+        """
+        args = self.get_lint_args(check_type)
+        timeout_sec = self.get_batch_timeout_sec(check_type, len(file_paths))
+        # Neither tool imports the checked files, so there is no need to extend sys.path.
+        process_result = self.run_check_args(args + file_paths, check_type, [], timeout_sec)
+        return self.create_lint_batch_results(
+            file_paths, check_type, args, process_result, timeout_sec)
+
+    async def check_lint_batch_async(
+            self, file_paths: List[str], check_type: str) -> List[CheckResult]:
+        """
+        Like check_lint_batch(), for check types that run as a separate process (see
+        runs_as_separate_process), without blocking a thread while the process is running.
+        """
+        args = self.get_lint_args(check_type)
+        timeout_sec = self.get_batch_timeout_sec(check_type, len(file_paths))
+        process_result = await run_process_async(
+            args + file_paths,
+            self.get_subprocess_env([]),
+            self.running_processes,
+            timeout_sec,
+            cwd=self.root_path)
+        return self.create_lint_batch_results(
+            file_paths, check_type, args, process_result, timeout_sec)
+
+    def get_batch_timeout_sec(self, check_type: str, num_files: int) -> Optional[float]:
+        # The timeout of a batch grows with the number of files in it.
+        timeout_sec = self.config.get_check_timeout_sec(check_type)
+        if timeout_sec is not None:
+            timeout_sec *= num_files
+        return timeout_sec
+
+    def create_lint_batch_results(
+            self,
+            file_paths: List[str],
+            check_type: str,
+            args: List[str],
+            process_result: ProcessResult,
+            timeout_sec: Optional[float]) -> List[CheckResult]:
+        check_results = split_lint_batch_result(
+            check_type=check_type,
+            file_paths=file_paths,
+            per_file_cmd_args={file_path: args + [file_path] for file_path in file_paths},
+            stdout=process_result.stdout,
+            stderr=process_result.stderr,
+            returncode=process_result.returncode)
+        for check_result in check_results:
+            check_result.set_resource_usage(process_result)
+            if process_result.timed_out:
+                assert timeout_sec is not None
+                self.mark_timed_out(check_result, timeout_sec)
+        return check_results
+
+    def check_unittest_batch(self, file_paths: List[str]) -> List[CheckResult]:
+        """
+        Runs the tests of the given modules, which must all have the same import root, in one
+        process. Modules whose tests fail in the batch, or that did not finish because the process
+        died or timed out, are run again separately, and the result of that run is reported, so
+        that tests interfering with each other's state in the shared process cannot cause
+        failures.
+        """
+        module_names = [self.how_to_import_module(file_path)[0] for file_path in file_paths]
+        _, additional_sys_path = self.how_to_import_module(file_paths[0])
+        timeout_sec = self.get_batch_timeout_sec('unittest', len(file_paths))
+        fd, results_file_path = tempfile.mkstemp(prefix='codecheck_unittest_', suffix='.jsonl')
+        os.close(fd)
+        try:
+            process_result = run_process(
+                [self.args.python_interpreter,
+                 os.path.abspath(unittest_runner.__file__),
+                 results_file_path] + module_names,
+                self.get_subprocess_env(additional_sys_path),
+                self.running_processes,
+                timeout_sec,
+                cwd=self.root_path)
+            module_results = read_unittest_batch_results(results_file_path)
+        finally:
+            os.remove(results_file_path)
+
+        batch_message = 'Run in a batch of %d test modules' % len(file_paths)
+        # Output of the batch process that was not written while the tests of any module ran, e.g.
+        # at exit, or when the process crashed. It is reported with the module that was running
+        # when the batch stopped, or, if all modules finished, with every module, like output that
+        # is not about any particular file in batches of other check types.
+        batch_output_message = 'Output of the batch process (exit code %d):\n%s%s' % (
+            process_result.returncode, process_result.stdout, process_result.stderr)
+        check_results = []
+        # Resource usage of the batch process and of the separate runs of modules.
+        task_usage = CheckResult(check_type='unittest', file_path=file_paths[0])
+        task_usage.set_resource_usage(process_result)
+        batch_stopped = False
+        for file_path, module_name in zip(file_paths, module_names):
+            module_result = module_results.get(module_name)
+            if module_result is None or module_result['returncode'] != 0:
+                check_result = self.check_file(file_path, 'unittest')
+                task_usage.add_resource_usage(check_result)
+                check_result.extra_messages = check_result.extra_messages + [
+                    '%s, where it %s, so it was run again separately' % (
+                        batch_message,
+                        'did not finish' if module_result is None else 'failed')]
+                if module_result is None and not batch_stopped:
+                    batch_stopped = True
+                    check_result.extra_messages.append(batch_output_message)
+            else:
+                check_result = CheckResult(
+                    check_type='unittest',
+                    file_path=file_path,
+                    cmd_args=[self.args.python_interpreter, '-m', 'unittest', module_name],
+                    stdout=module_result['stdout'],
+                    stderr=module_result['stderr'],
+                    returncode=module_result['returncode'],
+                    extra_messages=[batch_message])
+            check_results.append(check_result)
+        if not batch_stopped and (process_result.stdout or process_result.stderr):
+            for check_result in check_results:
+                check_result.extra_messages = check_result.extra_messages + [batch_output_message]
+        # The usage of each module is not known. Like for other batches, the results share the
+        # usage of the whole task.
+        for check_result in check_results:
+            check_result.set_resource_usage(task_usage)
+        return check_results
+
+    def mark_timed_out(self, check_result: CheckResult, timeout_sec: float) -> None:
+        check_result.timed_out = True
+        check_result.extra_messages = check_result.extra_messages + [
+            'Killed after exceeding the timeout of %.1f seconds' % timeout_sec]
+
+    def get_mypy_options(self, cache_dir: str) -> List[str]:
+        return [
+            '--config-file=%s' % self.config.mypy_config_path,
+            '--cache-dir=%s' % cache_dir]
+
+    def get_mypy_args(self, cache_dir: str) -> List[str]:
+        return [self.args.python_interpreter, '-m', 'mypy'] + self.get_mypy_options(cache_dir)
+
+    def init_run_in_process(self) -> None:
+        self.run_in_process = (
+            not self.args.no_in_process and
+            is_current_interpreter(self.args.python_interpreter))
+        if self.args.verbose:
+            logging.info(
+                "Running %s checks %s",
+                ', '.join(IN_PROCESS_CHECK_TYPES),
+                'in-process' if self.run_in_process else 'as separate processes')
+
+    def init_worker_pool(self) -> None:
+        self.worker_pool = None
+        if self.config.worker_pool_enabled and not self.args.no_in_process:
+            self.worker_pool = WorkerPool(
+                python_interpreter=self.args.python_interpreter,
+                cwd=self.root_path,
+                max_tasks_per_worker=self.config.worker_max_tasks,
+                max_rss_bytes_per_worker=self.config.worker_max_memory_bytes)
+
+    def get_top_level_package_names(self) -> List[str]:
+        return sorted(
+            entry.name for entry in os.scandir(self.root_path)
+            if entry.is_dir() and os.path.isfile(os.path.join(entry.path, '__init__.py'))
+        )
+
+    def init_fork_server(self) -> None:
+        self.fork_server = None
+        if (not self.config.fork_server_enabled or
+                self.args.no_in_process or
+                'import' in self.config.disabled_check_types):
+            return
+        preload_modules = self.config.fork_server_preload_modules
+        if preload_modules is None:
+            preload_modules = self.get_top_level_package_names()
+        self.fork_server = ForkServer(
+            self.args.python_interpreter, preload_modules, cwd=self.root_path)
+        if self.fork_server.failed_modules:
+            logging.warning(
+                "Fork server failed to preload modules: %s", self.fork_server.failed_modules)
+        if self.args.verbose:
+            logging.info("Fork server preloaded modules: %s", self.fork_server.preloaded_modules)
+
+    def restart_fork_server_if_outdated(self, changed_file_paths: Set[str]) -> None:
+        """
+        Restarts the fork server if it has loaded any of the given files, so that import checks
+        do not run with outdated versions of the preloaded modules. Checks still using the old
+        server either finish normally or fall back to separate processes.
+        """
+        if (self.fork_server is None or
+                self.fork_server.loaded_file_paths.isdisjoint(changed_file_paths)):
+            return
+        outdated_fork_server = self.fork_server
+        self.init_fork_server()
+        outdated_fork_server.stop()
+        if self.args.verbose:
+            logging.info("Restarted the fork server, because files it had loaded changed")
+
+    def init_mypy_cache_dir_pool(self) -> None:
+        self.mypy_cache_dir_pool = None
+        if not self.config.mypy_incremental:
+            return
+        self.mypy_cache_dir_pool = MypyCacheDirPool(
+            os.path.join(self.get_state_dir(), 'mypy_cache'),
+            get_mypy_cache_key(self.args.python_interpreter, self.config.mypy_config_path))
+        self.mypy_cache_dir_pool.remove_stale_cache_dirs()
+        if self.args.verbose:
+            logging.info("Using mypy cache directories in %s", self.mypy_cache_dir_pool.key_dir)
+
+    @contextlib.contextmanager
+    def acquire_mypy_cache_dir(self) -> Iterator[str]:
+        """
+        Yields the cache directory to use for one mypy process. Without the mypy_incremental
+        option, the cache is not persisted.
+        """
+        if self.mypy_cache_dir_pool is None:
+            yield '/dev/null'
+        else:
+            with self.mypy_cache_dir_pool.acquire() as cache_dir:
+                yield cache_dir
+
+    def get_subprocess_env(self, additional_sys_path: List[str]) -> Dict[str, str]:
         subprocess_env = os.environ.copy()
         if additional_sys_path:
             for env_var_name in ['PYTHONPATH', 'MYPYPATH']:
                 subprocess_env[env_var_name] = prepend_path_entries(
                     additional_sys_path, os.getenv(env_var_name)
                 )
+        return subprocess_env
 
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=subprocess_env)
-        stdout, stderr = process.communicate()
-        return CheckResult(
-            check_type=check_type,
-            cmd_args=args,
-            file_path=file_path,
-            stdout=ensure_str_decoded(stdout),
-            stderr=ensure_str_decoded(stderr),
-            returncode=process.returncode,
-            extra_messages=extra_messages)
+    def check_mypy_batch(self, file_paths: List[str]) -> List[CheckResult]:
+        """
+        Runs mypy (or the mypy daemon) once on the given files, which must all have the same
+        import root, and splits the output into per-file results.
+        """
+        _, additional_sys_path = self.how_to_import_module(file_paths[0])
+        subprocess_env = self.get_subprocess_env(additional_sys_path)
+        timeout_sec = self.get_batch_timeout_sec('mypy', len(file_paths))
+        if self.args.mypy_mode == 'daemon':
+            daemon = MypyDaemon(
+                state_dir=self.get_state_dir(),
+                root_path=self.root_path,
+                python_interpreter=self.args.python_interpreter,
+                mypy_config_path=self.config.mypy_config_path,
+                import_root=additional_sys_path[0])
+            mypy_args = daemon.get_run_args(self.get_mypy_options(daemon.cache_dir))
+            with daemon.lock():
+                process_result = run_process(
+                    mypy_args + file_paths,
+                    subprocess_env,
+                    self.running_processes,
+                    timeout_sec,
+                    cwd=self.root_path)
+        else:
+            with self.acquire_mypy_cache_dir() as cache_dir:
+                mypy_args = self.get_mypy_args(cache_dir)
+                process_result = run_process(
+                    mypy_args + file_paths,
+                    subprocess_env,
+                    self.running_processes,
+                    timeout_sec,
+                    cwd=self.root_path)
+        check_results = split_mypy_batch_result(
+            file_paths=file_paths,
+            per_file_cmd_args={file_path: mypy_args + [file_path] for file_path in file_paths},
+            stdout=process_result.stdout,
+            stderr=process_result.stderr,
+            returncode=process_result.returncode)
+        for check_result in check_results:
+            check_result.set_resource_usage(process_result)
+            if process_result.timed_out:
+                assert timeout_sec is not None
+                self.mark_timed_out(check_result, timeout_sec)
+        return check_results
+
+    def group_check_inputs_into_tasks(
+            self, check_inputs: List[CheckInput]) -> List[List[CheckInput]]:
+        """
+        Groups checks into tasks, each of which is run by a single call to run_check_task. Most
+        tasks consist of a single check, but some check types can be run in batches.
+        """
+        tasks: List[List[CheckInput]] = []
+        mypy_batches: Dict[str, List[CheckInput]] = {}
+        # Files to check in batches, by check type and a key of files that can be checked together.
+        batch_groups: Dict[Tuple[str, str], List[str]] = {}
+        for file_path, check_type in check_inputs:
+            if check_type == 'mypy' and self.args.mypy_mode in ['batch', 'daemon']:
+                _, additional_sys_path = self.how_to_import_module(file_path)
+                mypy_batches.setdefault(additional_sys_path[0], []).append(
+                    (file_path, check_type))
+            elif self.config.max_batch_sizes.get(check_type, 1) > 1:
+                batch_groups.setdefault(
+                    (check_type, self.get_batch_group_key(file_path, check_type)),
+                    []).append(file_path)
+            else:
+                tasks.append([(file_path, check_type)])
+        for _, batch in sorted(mypy_batches.items()):
+            tasks.append(sorted(batch))
+        for (check_type, group_key), file_paths in sorted(batch_groups.items()):
+            for batch_file_paths in split_into_batches(
+                    sorted(file_paths),
+                    self.config.max_batch_sizes[check_type],
+                    self.args.parallelism):
+                if (check_type == 'pycodestyle' and
+                        self.get_batch_group_key(
+                            os.path.commonprefix(batch_file_paths), check_type) != group_key):
+                    # Pycodestyle looks for its configuration starting from the common prefix of
+                    # the paths it checks, which could in rare cases be a different directory.
+                    tasks.extend([(file_path, check_type)] for file_path in batch_file_paths)
+                else:
+                    tasks.append([(file_path, check_type) for file_path in batch_file_paths])
+        return tasks
+
+    def get_batch_group_key(self, file_path: str, check_type: str) -> str:
+        """
+        Files with the same key can be checked together. Pycodestyle uses the project
+        configuration found in the common parent directory of all checked files or its parents, so
+        only files with the same nearest configuration can be checked together. Test modules can
+        only be run together if they are imported using the same sys.path.
+        """
+        if check_type == 'pycodestyle':
+            return find_nearest_config_dir(file_path, PYCODESTYLE_PROJECT_CONFIG_NAMES) or ''
+        if check_type == 'unittest':
+            return self.how_to_import_module(file_path)[1][0]
+        return ''
+
+    def estimate_task_duration_sec(self, task: List[CheckInput]) -> float:
+        return sum(self.duration_history.estimate_duration_sec(file_path, check_type)
+                   for file_path, check_type in task)
+
+    def estimate_task_memory_bytes(self, task: List[CheckInput]) -> int:
+        # All checks of a task run in the same process.
+        return self.duration_history.estimate_peak_rss_bytes(task[0][1])
+
+    def create_scheduler(self) -> CheckScheduler:
+        """
+        Creates a scheduler that starts the tasks expected to take the longest first, which keeps
+        a slow check from starting last and becoming the tail of the whole run, subject to the
+        limits from the configuration file.
+        """
+        return CheckScheduler(
+            parallelism=self.args.parallelism,
+            concurrency_limits=self.config.concurrency_limits,
+            memory_budget_bytes=self.config.memory_budget_bytes,
+            estimate_duration_sec=self.estimate_task_duration_sec,
+            estimate_memory_bytes=self.estimate_task_memory_bytes,
+            get_prerequisites=self.get_check_prerequisites)
+
+    def get_check_prerequisites(self, check_input: CheckInput) -> List[CheckInput]:
+        file_path, check_type = check_input
+        return [(file_path, prerequisite_type)
+                for prerequisite_type in CHECK_TYPE_PREREQUISITES.get(check_type, [])]
+
+    def create_skipped_result(self, check_input: CheckInput, skip_reason: str) -> CheckResult:
+        file_path, check_type = check_input
+        check_result = CheckResult(check_type=check_type, file_path=file_path)
+        check_result.skip_reason = skip_reason
+        return check_result
+
+    def get_skipped_results_for_check_inputs(
+            self,
+            scheduler: CheckScheduler,
+            skipped_check_inputs: List[CheckInput]) -> List[CheckResult]:
+        """
+        Returns results for checks that the scheduler skipped because their prerequisites failed.
+        """
+        skipped_results = []
+        for check_input in skipped_check_inputs:
+            failed_check_types = [
+                prerequisite[1] for prerequisite in self.get_check_prerequisites(check_input)
+                if prerequisite in scheduler.failed_check_inputs]
+            skipped_results.append(self.create_skipped_result(
+                check_input,
+                'Skipped because the %s check failed' % ', '.join(failed_check_types)))
+        return skipped_results
+
+    def get_skipped_results(self, scheduler: CheckScheduler) -> List[CheckResult]:
+        return [
+            skipped_result
+            for _, skipped_check_inputs in scheduler.pop_skipped_tasks()
+            for skipped_result in self.get_skipped_results_for_check_inputs(
+                scheduler, skipped_check_inputs)
+        ]
+
+    def cancel_checks(
+            self,
+            scheduler: CheckScheduler,
+            futures: Iterable['concurrent.futures.Future[List[CheckResult]]']) -> None:
+        """
+        Drops the pending checks, cancels the tasks that have been submitted but not started, and
+        kills the processes of the running checks, so that the executor can shut down quickly.
+        """
+        scheduler.remove_pending_tasks(lambda task: True)
+        for future in futures:
+            future.cancel()
+        self.kill_running_checks()
+
+    def kill_running_checks(self) -> None:
+        """
+        Kills the processes of all running checks: separate processes, worker processes running a
+        check, and children of the fork server. Checks started afterwards are killed right away.
+        Checks running in threads of this process (see runs_in_process) cannot be killed, but
+        they only parse the checked files. Can be called from any thread.
+        """
+        self.running_processes.kill_all()
+
+    def get_failed_check_inputs(
+            self,
+            task: List[CheckInput],
+            check_results: Optional[List[CheckResult]]) -> List[CheckInput]:
+        if check_results is None:
+            return task
+        return [(check_result.file_path, check_result.check_type)
+                for check_result in check_results if check_result.returncode != 0]
+
+    def run_check_task(
+            self, task: List[CheckInput], task_id: Optional[int]) -> List[CheckResult]:
+        # The thread is reused for other tasks.
+        task_id_token = current_task_id.set(task_id)
+        try:
+            start_time = time.time()
+            check_results = self.run_check_task_untimed(task)
+            self.set_task_timing(
+                check_results, start_time, time.time(), threading.current_thread().name)
+        finally:
+            current_task_id.reset(task_id_token)
+        return check_results
+
+    async def run_check_task_async(
+            self,
+            executor: AsyncioExecutor,
+            task: List[CheckInput],
+            task_id: Optional[int]) -> List[CheckResult]:
+        """
+        Like run_check_task(), with the asyncio engine. Checks that run as separate processes
+        are run by the event loop, and other checks in the blocking threads of the executor.
+        """
+        # Every coroutine submitted to the executor runs in its own copy of the context.
+        current_task_id.set(task_id)
+        with executor.acquire_worker_id() as worker_id:
+            start_time = time.time()
+            check_type = task[0][1]
+            file_paths = [file_path for file_path, _ in task]
+            if (not self.runs_as_separate_process(
+                        check_type, self.config.get_check_timeout_sec(check_type), len(task)) or
+                    # Batches of mypy and unit test checks wait for locks or run more than one
+                    # process one after another, which is done the same way in a thread.
+                    check_type == 'mypy' and (
+                        len(task) > 1 or self.args.mypy_mode == 'daemon') or
+                    check_type == 'unittest' and len(task) > 1):
+                check_results = await executor.run_blocking(self.run_check_task_untimed, task)
+            elif len(task) > 1:
+                check_results = await self.check_lint_batch_async(file_paths, check_type)
+            else:
+                check_results = [await self.check_file_async(file_paths[0], check_type)]
+            self.set_task_timing(check_results, start_time, time.time(), worker_id)
+        return check_results
+
+    def set_task_timing(
+            self,
+            check_results: List[CheckResult],
+            start_time: float,
+            end_time: float,
+            worker_id: str) -> None:
+        for check_result in check_results:
+            check_result.start_time = start_time
+            check_result.end_time = end_time
+            check_result.worker_id = worker_id
+
+    def run_check_task_untimed(self, task: List[CheckInput]) -> List[CheckResult]:
+        check_type = task[0][1]
+        check_types = set(check_type for _, check_type in task)
+        assert check_types == {check_type}, f"Unexpected check types in a batch: {check_types}"
+        file_paths = [file_path for file_path, _ in task]
+        if check_type == 'mypy' and (len(task) > 1 or self.args.mypy_mode == 'daemon'):
+            return self.check_mypy_batch(file_paths)
+        if check_type == 'unittest' and len(task) > 1:
+            return self.check_unittest_batch(file_paths)
+        if len(task) > 1:
+            return self.check_lint_batch(file_paths, check_type)
+        return [self.check_file(file_paths[0], check_type)]
 
     def _allow_check_for_file_path(self, check_type: str, file_path: str) -> bool:
         assert check_type in ALL_CHECK_TYPES
@@ -223,21 +1033,73 @@ class CodeChecker:
         else:
             if self.args.verbose:
                 logging.info(f"Configuration file not found: {self.args.config_path}")
+        if self.args.mypy_mode is None:
+            self.args.mypy_mode = self.config.mypy_mode
+
+    def get_state_dir(self) -> str:
+        if self.config.state_dir is not None:
+            return os.path.join(self.root_path, os.path.expanduser(self.config.state_dir))
+        return get_default_state_dir(self.root_path)
+
+    def create_result_cache(self) -> Optional[ResultCache]:
+        if not self.config.result_cache_enabled or self.args.no_cache:
+            return None
+        cache_dir = os.path.join(self.get_state_dir(), 'results')
+        if self.args.verbose:
+            logging.info("Using result cache at %s", cache_dir)
+        remote_backend = None
+        if self.config.remote_cache_location is not None:
+            remote_backend = create_cache_backend(
+                self.config.remote_cache_location, self.config.remote_cache_timeout_sec)
+            if self.args.verbose:
+                logging.info("Using remote result cache at %s (%s)", remote_backend,
+                             'read-write' if self.config.remote_cache_upload else 'read-only')
+        return ResultCache(
+            self.root_path,
+            DirectoryCacheBackend(cache_dir, self.config.result_cache_max_size_bytes),
+            remote_backend,
+            self.config.remote_cache_upload)
+
+    def create_cache_key_builder(
+            self,
+            tracked_file_paths: List[str],
+            import_graph: ImportGraph) -> CacheKeyBuilder:
+        return CacheKeyBuilder(
+            root_path=self.root_path,
+            python_interpreter=self.args.python_interpreter,
+            mypy_config_path=self.config.mypy_config_path,
+            tracked_file_paths=tracked_file_paths,
+            # These options affect the extra messages in check results.
+            extra_key_parts=[
+                'verbose=%s' % self.args.verbose,
+                'mypy_mode=%s' % self.args.mypy_mode,
+                'max_batch_sizes=%s' % sorted(self.config.max_batch_sizes.items()),
+            ],
+            import_graph=import_graph)
+
+    def init_duration_history(self) -> None:
+        self.duration_history = DurationHistory(
+            os.path.join(self.get_state_dir(), 'durations.json'), self.root_path)
+
+    def create_import_graph(self, tracked_file_paths: List[str]) -> ImportGraph:
+        start_time = time.time()
+        import_graph = ImportGraph(
+            tracked_file_paths,
+            self.get_module_name,
+            cache_file_path=os.path.join(self.get_state_dir(), 'import_graph.json'))
+        if self.args.verbose:
+            logging.info(
+                "Built the import graph of %d Python files (%d of them parsed) in %.2f seconds",
+                len(import_graph.file_path_to_module_name),
+                import_graph.num_files_parsed,
+                time.time() - start_time)
+        return import_graph
 
     def filter_with_inclusion_exclusion_patterns(
             self, initial_list: List[str],
             re_pattern_list: List[Tuple[bool, CompiledRE]]) -> List[str]:
-        filtered_list = []
-        for item in initial_list:
-            should_include_item = False
-            # Try patterns one by one, and each pattern overrides the result of previous ones if
-            # it matches. So, we can include some files, then exclude some of those files, then
-            # again include some of the excluded files.
-            for is_inclusion_pattern, re_pattern in re_pattern_list:
-                if re_pattern.match(item):
-                    should_include_item = is_inclusion_pattern
-            if should_include_item:
-                filtered_list.append(item)
+        matcher = InclusionExclusionMatcher(re_pattern_list)
+        filtered_list = [item for item in initial_list if matcher.is_included(item)]
 
         if self.args.verbose:
             logging.info(
@@ -250,6 +1112,37 @@ class CodeChecker:
                 ])
         return filtered_list
 
+    def get_changed_file_paths(self) -> Optional[Set[str]]:
+        """
+        Returns the absolute paths of files changed according to --changed-since and --staged, or
+        None if all files should be checked.
+        """
+        if self.args.changed_since is None and not self.args.staged:
+            return None
+        try:
+            changed_rel_paths = get_changed_file_paths(
+                self.root_path, base_ref=self.args.changed_since, staged=self.args.staged)
+        except ValueError as ex:
+            logging.warning("Could not find changed files: %s. Checking all files.", ex)
+            return None
+        changed_file_paths = set(
+            os.path.abspath(os.path.join(self.root_path, rel_path))
+            for rel_path in changed_rel_paths)
+        # Configuration changes could affect the results of checks for any file.
+        config_file_paths = set(
+            os.path.abspath(file_path)
+            for file_path in [self.args.config_path, self.config.mypy_config_path]
+        )
+        for file_path in sorted(changed_file_paths):
+            if (file_path in config_file_paths or
+                    os.path.basename(file_path) in PYCODESTYLE_PROJECT_CONFIG_NAMES):
+                logging.info("Configuration file %s changed, checking all files", file_path)
+                return None
+        return changed_file_paths
+
+    def get_module_name(self, file_path: str) -> str:
+        return self.how_to_import_module(file_path)[0]
+
     def get_rel_dir_name_for_report(self, file_path: str) -> str:
         """
         Returns the directory name (potentially with multiple path components) of the given file
@@ -257,137 +1150,518 @@ class CodeChecker:
         """
         return os.path.dirname(self.relativize_path(file_path)) or 'root'
 
+    def init_reporter(self, exit_stack: contextlib.ExitStack) -> None:
+        """
+        Creates the reporter for the selected output format. If machine-readable results are
+        written to standard output, everything else that would be printed there is redirected to
+        standard error for as long as the given exit stack is open, to keep the results parseable.
+        """
+        output_file: TextIO
+        if self.args.output_file is not None:
+            output_file = exit_stack.enter_context(open(self.args.output_file, 'w'))
+        else:
+            output_file = sys.stdout
+            if self.args.output_format != 'text':
+                exit_stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        self.reporter = create_reporter(
+            self.args.output_format, output_file, self.relativize_path)
+
     def run(self) -> bool:
         self.parse_args()
         self.init_config()
-        args = self.args
+        if self.args.command == 'stop-daemons':
+            return stop_mypy_daemons(self.get_state_dir(), self.args.python_interpreter)
+        if self.args.command == 'merge':
+            with contextlib.ExitStack() as exit_stack:
+                self.init_reporter(exit_stack)
+                try:
+                    return self.run_merge()
+                finally:
+                    self.reporter.finish()
 
-        start_time = time.time()
-        file_list: List[str] = ensure_str_decoded(subprocess.check_output(
-            ['git', 'ls-files'],
-            cwd=self.root_path
-        )).split('\n')
+        with contextlib.ExitStack() as exit_stack:
+            self.init_reporter(exit_stack)
+            self.init_check_runners()
+            try:
+                if self.args.watch:
+                    return self.run_watch()
+                return self.run_checks()
+            finally:
+                self.reporter.finish()
+                self.stop_check_runners()
+
+    def init_check_runners(self) -> None:
+        """
+        Prepares everything needed to run checks after the arguments and the configuration have
+        been loaded. stop_check_runners() has to be called after the checks are done.
+        """
+        self.running_processes = RunningProcesses()
+        self.init_mypy_cache_dir_pool()
+        self.init_run_in_process()
+        self.init_worker_pool()
+        self.init_fork_server()
+        self.init_duration_history()
+
+    def stop_check_runners(self) -> None:
+        if self.worker_pool is not None:
+            self.worker_pool.stop()
+        if self.fork_server is not None:
+            self.fork_server.stop()
+
+    def discover_files(self, report_filtering: bool = True) -> Tuple[List[str], Set[str]]:
+        """
+        Returns the absolute paths of all files tracked by git that have the name suffixes of
+        checked files or of files that mypy reads type information from, and the set of absolute
+        paths of files to check.
+        """
+        # Only files that could be checked, or that affect the results of mypy, are needed. Other
+        # files do not affect any checks.
+        tracked_suffixes = ALL_CHECKED_SUFFIXES + MYPY_TYPE_INFO_SUFFIXES
+        tracked_file_list = [
+            file_path for file_path in list_tracked_files(
+                self.root_path, get_suffix_pathspecs(tracked_suffixes))
+            if file_path.endswith(tracked_suffixes)
+        ]
+        root_abs_path = os.path.abspath(self.root_path)
+        tracked_file_paths = [
+            os.path.join(root_abs_path, file_path) for file_path in tracked_file_list]
+        file_list = [
+            file_path for file_path in tracked_file_list
+            if file_path.endswith(ALL_CHECKED_SUFFIXES)
+        ]
 
         if self.config.included_regex_list is not None:
             file_list = self.filter_with_inclusion_exclusion_patterns(
                 file_list, self.config.included_regex_list)
 
-        input_file_paths = set([
-            os.path.abspath(file_path) for file_path in file_list if (
-                file_path.endswith(ALL_CHECKED_SUFFIXES)
-            )
-        ])
-
-        # Filter the set of input paths to only keep existing files that are not symlinks.
-        input_file_paths = set(
-            file_path for file_path in input_file_paths
-            if os.path.exists(file_path) and not os.path.islink(file_path)
-        )
+        # Only keep existing files that are not symlinks.
+        input_file_paths = get_regular_file_paths(
+            os.path.join(root_abs_path, file_path) for file_path in file_list)
 
         # If a filtering pattern is specified on the command line, apply that pattern.
-        if args.file_pattern:
+        if self.args.file_pattern:
             original_num_paths = len(input_file_paths)
-            effective_file_pattern = '*%s*' % args.file_pattern
+            effective_file_pattern = '*%s*' % self.args.file_pattern
             input_file_paths = set([
                 file_path for file_path in input_file_paths
                 if fnmatch.fnmatch(os.path.basename(file_path), effective_file_pattern)
             ])
-            print(
-                f"Filtered {original_num_paths} file paths to {len(input_file_paths)} paths "
-                f"using pattern {args.file_pattern}"
-            )
+            if report_filtering:
+                print(
+                    f"Filtered {original_num_paths} file paths to {len(input_file_paths)} paths "
+                    f"using pattern {self.args.file_pattern}"
+                )
+        return tracked_file_paths, input_file_paths
 
-        reporter = Reporter(line_width=80)
+    def get_check_inputs(
+            self,
+            input_file_paths: Set[str],
+            dependent_file_paths: Set[str]) -> List[CheckInput]:
+        """
+        Returns the checks to run for the given files. For files that are only checked because
+        they import other files, only the check types affected by imports are run.
+        """
+        check_inputs: List[CheckInput] = []
+        for file_path in sorted(input_file_paths):
+            for file_name_suffix, check_types in NAME_SUFFIX_TO_CHECK_TYPES.items():
+                for check_type in check_types:
+                    if check_type in self.config.disabled_check_types:
+                        continue
+                    if (file_path in dependent_file_paths and
+                            check_type not in CHECK_TYPES_AFFECTED_BY_IMPORTS):
+                        continue
+
+                    if (file_path.endswith(file_name_suffix) and
+                            self._allow_check_for_file_path(check_type, file_path)):
+                        check_inputs.append((file_path, check_type))
+        return check_inputs
+
+    def get_cached_results(
+            self,
+            check_inputs: List[CheckInput],
+            result_cache: ResultCache,
+            cache_key_builder: CacheKeyBuilder
+            ) -> Tuple[List[CheckResult], List[CheckInput], Dict[CheckInput, str]]:
+        """
+        Looks up the results of the given checks in the cache. Returns the cached results, the
+        checks that still have to be run, and the cache keys to store their results under.
+        """
+        cached_results = []
+        checks_to_run = []
+        check_input_to_cache_key: Dict[CheckInput, str] = {}
+        for file_path, check_type in check_inputs:
+            try:
+                check_input_to_cache_key[(file_path, check_type)] = cache_key_builder.get_key(
+                    file_path, check_type)
+            except OSError as ex:
+                logging.warning(
+                    "Could not compute cache key for check '%s' for '%s': %s",
+                    check_type, file_path, ex)
+        # Look up all keys at once, so that lookups in a remote cache can run in parallel.
+        key_to_cached_result = result_cache.get_many(list(check_input_to_cache_key.values()))
+        for check_input in check_inputs:
+            cache_key = check_input_to_cache_key.get(check_input)
+            if cache_key is not None and cache_key in key_to_cached_result:
+                cached_results.append(key_to_cached_result[cache_key])
+                del check_input_to_cache_key[check_input]
+            else:
+                checks_to_run.append(check_input)
+        return cached_results, checks_to_run, check_input_to_cache_key
 
-        checks_by_dir: Dict[str, int] = {}
-        checks_by_dir_failed: Dict[str, int] = {}
+    def get_shard_check_inputs(self, check_inputs: List[CheckInput]) -> List[CheckInput]:
+        shard_durations = None
+        if self.args.shard_durations is not None:
+            shard_durations = DurationHistory(self.args.shard_durations, self.root_path)
 
-        checks_by_type: Dict[str, int] = {}
-        checks_by_type_failed: Dict[str, int] = {}
+        def estimate_duration_sec(check_input: CheckInput) -> float:
+            if shard_durations is None:
+                return estimate_default_duration_sec(*check_input)
+            return shard_durations.estimate_duration_sec(*check_input)
 
-        checks_by_result: Dict[str, int] = {}
+        shard_check_inputs = get_shard_check_inputs(
+            check_inputs,
+            self.args.shard_index,
+            self.args.shard_count,
+            estimate_duration_sec,
+            self.relativize_path)
+        print("Shard %d of %d: running %d of %d checks" % (
+            self.args.shard_index,
+            self.args.shard_count,
+            len(shard_check_inputs),
+            len(check_inputs)))
+        return shard_check_inputs
 
-        overall_success = True
+    def create_executor(self) -> Union[concurrent.futures.ThreadPoolExecutor, AsyncioExecutor]:
+        if self.args.engine == 'asyncio':
+            return AsyncioExecutor(max_blocking_threads=self.args.parallelism)
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.args.parallelism, thread_name_prefix='check')
+
+    def submit_check_task(
+            self,
+            executor: Union[concurrent.futures.ThreadPoolExecutor, AsyncioExecutor],
+            task: List[CheckInput],
+            task_id: Optional[int] = None) -> 'concurrent.futures.Future[List[CheckResult]]':
+        """
+        Starts running the given task. If a task id is given, the processes running its checks
+        can be killed using running_processes.kill_task().
+        """
+        if isinstance(executor, AsyncioExecutor):
+            return executor.submit(self.run_check_task_async(executor, task, task_id))
+        return executor.submit(self.run_check_task, task, task_id)
+
+    def get_task_results(
+            self,
+            future: 'concurrent.futures.Future[List[CheckResult]]',
+            task: List[CheckInput]) -> Optional[List[CheckResult]]:
+        """
+        Returns the results of a completed task, or None if the task raised an exception, which is
+        printed.
+        """
+        try:
+            return future.result()
+        except Exception:
+            task_description = ', '.join(
+                f"'{check_type}' for '{file_path}'" for file_path, check_type in task)
+            print(
+                f"Check {task_description} generated an exception: "
+                f"{traceback.format_exc()}")
+            return None
+
+    def run_checks(self) -> bool:
+        args = self.args
+
+        start_time = time.time()
+        stats = RunStats()
+        tracked_file_paths, input_file_paths = self.discover_files()
+        import_graph: Optional[ImportGraph] = None
+
+        # Files that only need to be checked because they import changed files.
+        dependent_file_paths: Set[str] = set()
+        changed_file_paths = self.get_changed_file_paths()
+        if changed_file_paths is not None:
+            if args.with_dependents:
+                import_graph = self.create_import_graph(tracked_file_paths)
+                dependent_file_paths = (
+                    import_graph.get_dependent_file_paths(changed_file_paths) & input_file_paths)
+            original_num_paths = len(input_file_paths)
+            input_file_paths = input_file_paths & (changed_file_paths | dependent_file_paths)
+            print(
+                f"Filtered {original_num_paths} file paths to {len(input_file_paths)} paths "
+                f"changed according to git, including {len(dependent_file_paths)} paths of "
+                f"files importing changed files"
+                if args.with_dependents else
+                f"Filtered {original_num_paths} file paths to {len(input_file_paths)} paths "
+                f"changed according to git"
+            )
 
-        check_inputs = []
         if self.args.verbose:
             if self.config.disabled_check_types:
                 logging.info(f"Disabled check types: {sorted(self.config.disabled_check_types)}")
 
-        for file_path in input_file_paths:
-            rel_dir = self.get_rel_dir_name_for_report(file_path)
-            for file_name_suffix, check_types in NAME_SUFFIX_TO_CHECK_TYPES.items():
-                for check_type in check_types:
-                    if check_type in self.config.disabled_check_types:
-                        continue
+        check_inputs = self.get_check_inputs(input_file_paths, dependent_file_paths)
+        if args.shard_count is not None:
+            check_inputs = self.get_shard_check_inputs(check_inputs)
+        for file_path, check_type in check_inputs:
+            stats.add_check(self.get_rel_dir_name_for_report(file_path), check_type)
+        stats.add_stage('discover files', start_time, time.time())
 
-                    if (file_path.endswith(file_name_suffix) and
-                            self._allow_check_for_file_path(check_type, file_path)):
-                        check_inputs.append((file_path, check_type))
-                        increment_counter(checks_by_dir, rel_dir)
-                        increment_counter(checks_by_type, check_type)
+        for check_result in self.iter_check_results(
+                check_inputs, stats, tracked_file_paths, import_graph, self.reporter):
+            self.reporter.print_check_result(check_result)
+
+        report_start_time = time.time()
+        stats.print_stats()
+        if args.verbose_stats:
+            stats.print_resource_usage(self.relativize_path)
+            stats.print_critical_path(self.relativize_path)
+        stats.add_stage('report results', report_start_time, time.time())
+        if args.trace_file is not None:
+            write_chrome_trace(
+                args.trace_file,
+                list(stats.task_results.values()),
+                stats.stages,
+                start_time,
+                self.relativize_path)
+        if stats.result_cache_description is not None:
+            print("Result cache: %s" % stats.result_cache_description)
+
+        print("Elapsed time: %.1f seconds" % (time.time() - start_time))
+        print()
+        overall_success = not stats.has_failures()
+        if overall_success:
+            print(f"All {len(check_inputs)} checks are successful")
+        else:
+            print(f"Some checks failed")
+        print()
+        return overall_success
+
+    def iter_check_results(
+            self,
+            check_inputs: List[CheckInput],
+            stats: RunStats,
+            tracked_file_paths: Optional[List[str]] = None,
+            import_graph: Optional[ImportGraph] = None,
+            reporter: Optional[Reporter] = None) -> Iterator[CheckResult]:
+        """
+        Runs the given checks, or takes their results from the result cache, and yields their
+        results as they become available, including the results of skipped checks. The results
+        are recorded in the given stats. If the generator is closed early, the running checks are
+        killed. The progress line is cleared before anything is written using the given reporter.
+        The tracked files and the import graph are only needed for the result cache, and are
+        created if they are not given.
+        """
+        args = self.args
+        num_failed_checks = 0
+
+        def record_result(check_result: CheckResult) -> None:
+            nonlocal num_failed_checks
+            if check_result.skip_reason is not None:
+                stats.add_skipped_result()
+                return
+            succeeded = check_result.returncode == 0 and not check_result.timed_out
+            stats.add_result(
+                self.get_rel_dir_name_for_report(check_result.file_path),
+                check_result.check_type,
+                succeeded,
+                check_result.timed_out)
+            if not succeeded:
+                num_failed_checks += 1
+
+        result_cache = self.create_result_cache()
+        check_input_to_cache_key: Dict[CheckInput, str] = {}
+        cached_results: List[CheckResult] = []
+        if result_cache is not None:
+            cache_lookup_start_time = time.time()
+            if tracked_file_paths is None:
+                tracked_file_paths = self.discover_files(report_filtering=False)[0]
+            if import_graph is None:
+                import_graph = self.create_import_graph(tracked_file_paths)
+            cached_results, check_inputs, check_input_to_cache_key = self.get_cached_results(
+                check_inputs,
+                result_cache,
+                self.create_cache_key_builder(tracked_file_paths, import_graph))
+            stats.add_stage('look up cached results', cache_lookup_start_time, time.time())
+            for cached_result in cached_results:
+                record_result(cached_result)
+                yield cached_result
 
-        num_checks = len(check_inputs)
         if self.args.verbose:
             logging.info("Running %d checks", len(check_inputs))
-        pending_checks: Set[Tuple[str, str]] = set(check_inputs)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=args.parallelism) as executor:
-            future_to_check_input = {
-                executor.submit(self.check_file, file_path, check_type): (file_path, check_type)
-                for (file_path, check_type) in check_inputs
-            }
-            num_completed = 0
-            for future in concurrent.futures.as_completed(future_to_check_input):
-                file_path, check_type = future_to_check_input[future]
-
-                this_check_succeeded = True
-                try:
-                    check_result = future.result()
-                except Exception as exc:
-                    print(
-                        f"Check '{check_type}' for '{file_path}' generated an exception: "
-                        f"{traceback.format_exc()}")
-                    this_check_succeeded = False
-                else:
-                    reporter.print_check_result(check_result)
-                    if check_result.returncode != 0:
-                        this_check_succeeded = False
+        schedule_start_time = time.time()
+        progress = Progress(
+            check_inputs,
+            parallelism=args.parallelism,
+            estimate_duration_sec=lambda check_input: self.duration_history.estimate_duration_sec(
+                *check_input),
+            mode=args.progress,
+            output_file=sys.stderr,
+            show_pending_checks=args.detailed_progress,
+            relativize_path=self.relativize_path)
+        if reporter is not None:
+            reporter.before_write = progress.clear
 
-                if this_check_succeeded:
-                    increment_counter(checks_by_result, 'success')
-                else:
-                    increment_counter(checks_by_result, 'failure')
-                    increment_counter(checks_by_type_failed, check_type)
-                    rel_dir = self.get_rel_dir_name_for_report(file_path)
-                    increment_counter(checks_by_dir_failed, check_type)
+        scheduler = self.create_scheduler()
+        for cached_result in cached_results:
+            scheduler.set_check_failed(
+                (cached_result.file_path, cached_result.check_type),
+                cached_result.returncode != 0)
+        scheduler.add_tasks(self.group_check_inputs_into_tasks(check_inputs))
+        run_start_time = time.time()
+        stats.add_stage('schedule checks', schedule_start_time, run_start_time)
+        is_stopping = False
+        executor = self.create_executor()
+        future_to_task: Dict[
+            'concurrent.futures.Future[List[CheckResult]]', List[CheckInput]] = {}
+        try:
+            while True:
+                for task in scheduler.get_tasks_to_start():
+                    future_to_task[self.submit_check_task(executor, task)] = task
+                    progress.task_started(task)
+                for skipped_result in self.get_skipped_results(scheduler):
+                    record_result(skipped_result)
+                    progress.checks_skipped(
+                        [(skipped_result.file_path, skipped_result.check_type)])
+                    yield skipped_result
+                if (not is_stopping and
+                        args.fail_fast is not None and
+                        num_failed_checks >= args.fail_fast):
+                    # Do not start any more checks, and stop the running ones.
+                    is_stopping = True
+                    for task in scheduler.remove_pending_tasks(lambda task: True):
+                        progress.checks_skipped(task)
+                        for check_input in task:
+                            skipped_result = self.create_skipped_result(
+                                check_input,
+                                'Not run because of --fail-fast after %d failed checks' %
+                                num_failed_checks)
+                            record_result(skipped_result)
+                            yield skipped_result
+                    self.kill_running_checks()
+                if not future_to_task:
+                    break
+                progress.update()
+                done_futures, _ = concurrent.futures.wait(
+                    future_to_task,
+                    timeout=progress.get_wait_timeout_sec(),
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done_futures:
+                    continue
+                future = done_futures.pop()
+                task = future_to_task.pop(future)
+
+                if future.exception() is not None:
+                    # The exception is printed.
+                    progress.clear()
+                check_results = self.get_task_results(future, task)
+                scheduler.task_finished(task, self.get_failed_check_inputs(task, check_results))
+                if check_results is None:
+                    for file_path, check_type in task:
+                        stats.add_result(
+                            self.get_rel_dir_name_for_report(file_path), check_type, False)
+                    num_failed_checks += len(task)
+                    progress.task_finished(task)
+                    continue
+                self.duration_history.record_task(task, check_results)
+                for check_result in check_results:
+                    if (is_stopping and
+                            check_result.returncode == -signal.SIGKILL and
+                            not check_result.timed_out):
+                        check_result.skip_reason = 'Stopped because of --fail-fast'
+                        record_result(check_result)
+                        yield check_result
+                        continue
+                    record_result(check_result)
+                    stats.add_timed_result(check_result)
+                    result_cache_key = check_input_to_cache_key.get(
+                        (check_result.file_path, check_result.check_type))
+                    if (result_cache is not None and
+                            result_cache_key is not None and
+                            not check_result.timed_out):
+                        result_cache.put(result_cache_key, check_result)
+                    yield check_result
+                progress.task_finished(task)
+        except (KeyboardInterrupt, GeneratorExit):
+            self.cancel_checks(scheduler, future_to_task)
+            raise
+        finally:
+            progress.clear()
+            if reporter is not None:
+                reporter.before_write = None
+            executor.shutdown()
+        stats.add_stage('run checks', run_start_time, time.time())
+
+        self.duration_history.save()
+        if result_cache is not None:
+            result_cache.close()
+            stats.result_cache_description = result_cache.get_stats_description()
+            result_cache.evict_if_needed()
+
+    def run_merge(self) -> bool:
+        """
+        Reports the results written by the shards of a run (see --shard-index) as if all checks
+        had been run by this process. Returns True if all checks were successful.
+        """
+        stats = RunStats()
+        overall_success = True
+        shard_durations = None
+        if self.args.save_durations is not None:
+            shard_durations = DurationHistory(self.args.save_durations, self.root_path)
+        # Checks reported so far, to detect checks run by multiple shards.
+        reported_check_inputs: Set[CheckInput] = set()
+
+        for result_file_path in self.args.result_file_paths:
+            try:
+                shard_results = read_shard_results(result_file_path)
+            except (OSError, ValueError) as ex:
+                logging.error("Could not read shard results: %s", ex)
+                overall_success = False
+                continue
+            num_duplicates = 0
+            for rel_file_path, check_result in shard_results:
+                # Shards may have checked the repository out in different directories.
+                check_result.file_path = os.path.abspath(
+                    os.path.join(self.root_path, rel_file_path))
+                check_input = (check_result.file_path, check_result.check_type)
+                if check_input in reported_check_inputs:
+                    num_duplicates += 1
+                    continue
+                reported_check_inputs.add(check_input)
+                if check_result.worker_id is not None:
+                    # Worker thread names are only unique within a shard.
+                    check_result.worker_id = '%s:%s' % (result_file_path, check_result.worker_id)
+
+                rel_dir = self.get_rel_dir_name_for_report(check_result.file_path)
+                stats.add_check(rel_dir, check_result.check_type)
+                self.reporter.print_check_result(check_result)
+                if check_result.skip_reason is not None:
+                    stats.add_skipped_result()
+                    continue
+                succeeded = check_result.returncode == 0 and not check_result.timed_out
+                stats.add_result(
+                    rel_dir, check_result.check_type, succeeded, check_result.timed_out)
+                stats.add_timed_result(check_result)
+                if not succeeded:
                     overall_success = False
+            if num_duplicates:
+                logging.warning(
+                    "Ignoring %d checks in %s that were already reported in other files. The "
+                    "shards might have split the checks differently.",
+                    num_duplicates, result_file_path)
 
-                num_completed += 1
-                pending_checks.remove((file_path, check_type))
-                if self.args.detailed_progress:
-                    remaining_checks_to_show = sorted(pending_checks)[:NUM_REMAINING_CHECKS_TO_SHOW]
-                    logging.info(
-                        "%d out of %d checks completed (%.1f%%), %d checks remaining, "
-                        "%d of them are: %s",
-                        num_completed,
-                        len(future_to_check_input),
-                        num_completed * 100.0 / len(future_to_check_input),
-                        len(pending_checks),
-                        len(remaining_checks_to_show),
-                        remaining_checks_to_show)
-
-        if checks_by_dir:
-            print_stats("Checks by directory (relative to repo root)",
-                        checks_by_dir, checks_by_dir_failed)
-
-        if checks_by_type:
-            print_stats("Checks by type", checks_by_type, checks_by_type_failed)
-
-        if checks_by_result:
-            print_stats("Checks by result", checks_by_result)
+        stats.print_stats()
+        if self.args.verbose_stats:
+            stats.print_resource_usage(self.relativize_path)
+            stats.print_critical_path(self.relativize_path)
+        if shard_durations is not None:
+            for results in stats.task_results.values():
+                shard_durations.record_task(
+                    [(result.file_path, result.check_type) for result in results], results)
+            shard_durations.save()
 
-        print("Elapsed time: %.1f seconds" % (time.time() - start_time))
+        num_checks = len(reported_check_inputs)
+        print("Merged the results of %d checks from %d files" % (
+            num_checks, len(self.args.result_file_paths)))
         print()
         if overall_success:
             print(f"All {num_checks} checks are successful")
@@ -396,6 +1670,187 @@ class CodeChecker:
         print()
         return overall_success
 
+    def run_watch(self) -> bool:
+        """
+        Runs all checks, and then keeps watching the checked files and re-running the checks
+        affected by changes until interrupted. Returns True if all checks were successful at that
+        point.
+        """
+        result_cache = self.create_result_cache()
+        watcher = create_file_watcher()
+
+        # Checks that failed the last time they were run.
+        failed_checks: Set[CheckInput] = set()
+
+        # Incremented every time a check is scheduled, so that results of checks that were
+        # scheduled again in the meantime can be ignored.
+        check_input_versions: Dict[CheckInput, int] = {}
+
+        # Versions of the checks of every task when it was scheduled, by task id for tasks that
+        # have not started yet, and by future for running tasks.
+        pending_task_versions: Dict[int, Dict[CheckInput, int]] = {}
+        future_to_task: Dict[
+            'concurrent.futures.Future[List[CheckResult]]',
+            Tuple[List[CheckInput], Dict[CheckInput, int]]] = {}
+        scheduler = self.create_scheduler()
+
+        # Cache keys of the latest scheduled run of each check.
+        check_input_to_cache_key: Dict[CheckInput, str] = {}
+
+        # None means that all files should be checked.
+        changed_file_paths: Optional[Set[str]] = None
+        cycle_start_time = time.time()
+        num_checks_in_cycle = 0
+
+        def record_result(check_result: CheckResult) -> None:
+            self.reporter.print_check_result(check_result)
+            check_input = (check_result.file_path, check_result.check_type)
+            # Skipped checks are not counted as failing, their failed prerequisites are.
+            if check_result.returncode == 0 or check_result.skip_reason is not None:
+                failed_checks.discard(check_input)
+            else:
+                failed_checks.add(check_input)
+
+        executor = self.create_executor()
+        try:
+            while True:
+                if changed_file_paths is None or changed_file_paths:
+                    if changed_file_paths:
+                        self.restart_fork_server_if_outdated(changed_file_paths)
+                    tracked_file_paths, input_file_paths = self.discover_files(
+                        report_filtering=changed_file_paths is None)
+                    watcher.set_file_paths(input_file_paths)
+                    failed_checks.difference_update([
+                        check_input for check_input in failed_checks
+                        if check_input[0] not in input_file_paths])
+
+                    import_graph = None
+                    if changed_file_paths is None:
+                        check_inputs = self.get_check_inputs(input_file_paths, set())
+                    else:
+                        import_graph = self.create_import_graph(tracked_file_paths)
+                        dependent_file_paths = (
+                            import_graph.get_dependent_file_paths(changed_file_paths) &
+                            input_file_paths)
+                        check_inputs = self.get_check_inputs(
+                            (changed_file_paths & input_file_paths) | dependent_file_paths,
+                            dependent_file_paths - changed_file_paths)
+                        print("Changed files: %s, running %d checks" % (
+                            ', '.join(sorted(
+                                self.relativize_path(file_path)
+                                for file_path in changed_file_paths)),
+                            len(check_inputs)))
+                    if num_checks_in_cycle == 0:
+                        cycle_start_time = time.time()
+                    num_checks_in_cycle += len(check_inputs)
+
+                    for check_input in check_inputs:
+                        check_input_versions[check_input] = (
+                            check_input_versions.get(check_input, 0) + 1)
+                    # Tasks that only consist of checks that are scheduled again do not have to
+                    # run, and the processes of the ones that are running are killed.
+                    check_input_set = set(check_inputs)
+                    for task in scheduler.remove_pending_tasks(check_input_set.issuperset):
+                        del pending_task_versions[id(task)]
+                    for task, _ in future_to_task.values():
+                        if check_input_set.issuperset(task):
+                            self.running_processes.kill_task(id(task))
+
+                    if result_cache is not None:
+                        if import_graph is None:
+                            import_graph = self.create_import_graph(tracked_file_paths)
+                        cached_results, check_inputs, new_cache_keys = self.get_cached_results(
+                            check_inputs,
+                            result_cache,
+                            self.create_cache_key_builder(tracked_file_paths, import_graph))
+                        check_input_to_cache_key.update(new_cache_keys)
+                        for cached_result in cached_results:
+                            record_result(cached_result)
+                            scheduler.set_check_failed(
+                                (cached_result.file_path, cached_result.check_type),
+                                cached_result.returncode != 0)
+
+                    tasks = self.group_check_inputs_into_tasks(check_inputs)
+                    for task in tasks:
+                        pending_task_versions[id(task)] = {
+                            check_input: check_input_versions[check_input]
+                            for check_input in task}
+                    scheduler.add_tasks(tasks)
+                    changed_file_paths = set()
+
+                tasks_to_start = scheduler.get_tasks_to_start()
+                for task, skipped_check_inputs in scheduler.pop_skipped_tasks():
+                    # Tasks with no checks left are not started.
+                    versions = (
+                        pending_task_versions[id(task)] if task
+                        else pending_task_versions.pop(id(task)))
+                    for skipped_result in self.get_skipped_results_for_check_inputs(
+                            scheduler, skipped_check_inputs):
+                        check_input = (skipped_result.file_path, skipped_result.check_type)
+                        if versions[check_input] == check_input_versions[check_input]:
+                            record_result(skipped_result)
+                for task in tasks_to_start:
+                    future = self.submit_check_task(executor, task, id(task))
+                    future_to_task[future] = (task, pending_task_versions.pop(id(task)))
+
+                for future in [future for future in future_to_task if future.done()]:
+                    task, versions = future_to_task.pop(future)
+                    self.running_processes.forget_task(id(task))
+                    check_results = self.get_task_results(future, task)
+                    # Checks that have been scheduled again because of a newer change. Their
+                    # results are ignored, and do not change whether the checks are failing.
+                    stale_check_inputs = {
+                        check_input for check_input in task
+                        if versions[check_input] != check_input_versions[check_input]}
+                    scheduler.task_finished(
+                        task,
+                        (set(self.get_failed_check_inputs(task, check_results)) -
+                         stale_check_inputs) |
+                        (stale_check_inputs & scheduler.failed_check_inputs))
+                    if check_results is None:
+                        failed_checks.update(set(task) - stale_check_inputs)
+                        continue
+                    if len(stale_check_inputs) < len(task):
+                        # Tasks whose checks are all stale may have been killed.
+                        self.duration_history.record_task(task, check_results)
+                    for check_result in check_results:
+                        check_input = (check_result.file_path, check_result.check_type)
+                        if check_input in stale_check_inputs:
+                            continue
+                        record_result(check_result)
+                        result_cache_key = check_input_to_cache_key.get(check_input)
+                        if (result_cache is not None and
+                                result_cache_key is not None and
+                                not check_result.timed_out):
+                            result_cache.put(result_cache_key, check_result)
+
+                is_busy = bool(future_to_task) or scheduler.has_pending_tasks()
+                if num_checks_in_cycle > 0 and not is_busy:
+                    print("Finished %d checks in %.1f seconds. %s" % (
+                        num_checks_in_cycle,
+                        time.time() - cycle_start_time,
+                        '%d checks are failing.' % len(failed_checks) if failed_checks
+                        else 'All checks are successful.'))
+                    print("Watching for changes (press Ctrl-C to exit)...")
+                    print()
+                    num_checks_in_cycle = 0
+                    self.duration_history.save()
+                    if result_cache is not None:
+                        result_cache.wait_for_uploads()
+                        result_cache.evict_if_needed()
+
+                changed_file_paths = watcher.wait_for_changes(
+                    WATCH_POLL_INTERVAL_SEC if is_busy else WATCH_IDLE_WAIT_SEC)
+        except KeyboardInterrupt:
+            print()
+            self.cancel_checks(scheduler, future_to_task)
+        finally:
+            executor.shutdown()
+            watcher.close()
+            if result_cache is not None:
+                result_cache.close()
+        return not failed_checks
+
 
 def main() -> None:
     logging.basicConfig(
@@ -403,7 +1858,11 @@ def main() -> None:
         format="[%(filename)s:%(lineno)d] %(asctime)s %(levelname)s: %(message)s")
 
     checker = CodeChecker('.')
-    successful = checker.run()
+    try:
+        successful = checker.run()
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        sys.exit(130)
     sys.exit(0 if successful else 1)
 
 
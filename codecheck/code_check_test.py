@@ -0,0 +1,131 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Tests of whole codecheck runs on small repositories.
+"""
+
+from typing import Any, Dict, List
+
+import os
+import time
+import unittest
+
+from codecheck.test_util import (
+    DEFAULT_CONFIG,
+    FAILS_AFTER_SLOW_TEST_STARTS,
+    SLOW_TEST,
+    TempRepoTestCase,
+    wait_for_process_exit,
+)
+
+
+# A module whose import starts a process that runs for a long time, writes the process id of that
+# process to a file, and then waits for it.
+SLOW_IMPORT = '\n'.join([
+    'import subprocess',
+    'import sys',
+    '',
+    "process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])",
+    "with open('child_pid', 'w') as pid_file:",
+    '    pid_file.write(str(process.pid))',
+    'process.wait()',
+    '',
+])
+
+
+def index_records(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {'%s %s' % (record['check_type'], record['rel_file_path']): record
+            for record in records}
+
+
+class CodeCheckTest(TempRepoTestCase):
+    def read_pid(self, file_name: str = 'pid') -> int:
+        with open(os.path.join(self.root_path, file_name)) as pid_file:
+            return int(pid_file.read())
+
+    def test_compile_failure_skips_dependent_checks(self) -> None:
+        self.write_files({
+            'broken_test.py': 'import unittest\ndef f(:\n',
+            'good_test.py': 'import unittest\n',
+        })
+        self.commit_all()
+        records = index_records(self.run_codecheck_jsonl())
+        self.assertEqual(
+            sorted(records),
+            ['compile broken_test.py', 'compile good_test.py',
+             'import broken_test.py', 'import good_test.py',
+             'pycodestyle broken_test.py', 'pycodestyle good_test.py',
+             'unittest broken_test.py', 'unittest good_test.py'])
+        self.assertNotEqual(records['compile broken_test.py']['returncode'], 0)
+        for check_type in ['import', 'unittest']:
+            self.assertEqual(
+                records['%s broken_test.py' % check_type]['skip_reason'],
+                'Skipped because the compile check failed')
+            self.assertIsNone(records['%s good_test.py' % check_type]['skip_reason'])
+        # Checks that do not depend on compilation still run.
+        self.assertIsNone(records['pycodestyle broken_test.py']['skip_reason'])
+
+    def test_fail_fast(self) -> None:
+        self.write_files({
+            'fails.py': FAILS_AFTER_SLOW_TEST_STARTS,
+            'slow_test.py': SLOW_TEST,
+        })
+        self.commit_all()
+        start_time = time.monotonic()
+        records = index_records(self.run_codecheck_jsonl('--fail-fast', '-j', '4'))
+        self.assertLess(time.monotonic() - start_time, 30)
+        self.assertNotEqual(records['import fails.py']['returncode'], 0)
+
+        self.assertEqual(
+            records['unittest slow_test.py']['skip_reason'], 'Stopped because of --fail-fast')
+        self.assertTrue(wait_for_process_exit(self.read_pid()))
+
+        # Without --fail-fast, all checks are run.
+        self.write_file('slow_test.py', SLOW_TEST.replace('60', '0'))
+        records = index_records(self.run_codecheck_jsonl())
+        self.assertEqual(records['unittest slow_test.py']['returncode'], 0)
+        self.assertTrue(all(record['skip_reason'] is None for record in records.values()))
+
+    def test_timeouts(self) -> None:
+        self.write_files({
+            'slow.py': SLOW_IMPORT,
+            'slow_test.py': SLOW_TEST,
+        })
+        self.commit_all()
+        timeouts_config = '[timeouts]\nimport = 1\nunittest = 1\n'
+        # Checks are killed when they time out however they are run.
+        for extra_config in ['', '[workers]\nenabled = on\n', '[fork_server]\nenabled = on\n']:
+            with self.subTest(extra_config=extra_config):
+                self.write_file('codecheck.ini', DEFAULT_CONFIG + timeouts_config + extra_config)
+                start_time = time.monotonic()
+                records = index_records(self.run_codecheck_jsonl())
+                self.assertLess(time.monotonic() - start_time, 30)
+                for check_name in ['import slow.py', 'unittest slow_test.py']:
+                    record = records[check_name]
+                    self.assertTrue(record['timed_out'], check_name)
+                    self.assertNotEqual(record['returncode'], 0)
+                    self.assertEqual(
+                        record['extra_messages'][-1],
+                        'Killed after exceeding the timeout of 1.0 seconds')
+                # Processes started by the checks are killed too.
+                self.assertTrue(wait_for_process_exit(self.read_pid()))
+                self.assertTrue(wait_for_process_exit(self.read_pid('child_pid')))
+                self.assertFalse(records['import slow_test.py']['timed_out'])
+
+        process = self.run_codecheck()
+        self.assertEqual(process.returncode, 1)
+        self.assertRegex(process.stdout, r'timeout: 2\b')
+
+
+if __name__ == '__main__':
+    unittest.main()
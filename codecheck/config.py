@@ -11,7 +11,7 @@
 # under the License.
 
 
-from typing import List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import logging
 import re
@@ -19,22 +19,90 @@ import re
 import configparser
 from configparser import ConfigParser
 
-from codecheck.util import CompiledRE
-from codecheck.constants import ALL_CHECK_TYPES
+from codecheck.util import CompiledRE, parse_size
+from codecheck.constants import (
+    ALL_CHECK_TYPES,
+    BATCHED_CHECK_TYPES,
+    DEFAULT_MAX_BATCH_SIZES,
+    MYPY_MODES,
+    DEFAULT_MYPY_MODE,
+)
 
 
 class CodeCheckConfig:
     mypy_config_path: str
+    mypy_mode: str
+
+    # Whether to keep mypy's incremental cache between runs instead of using --cache-dir=/dev/null.
+    mypy_incremental: bool
     disabled_check_types: Set[str]
 
     # In each tuple, the first element is True if the pattern is included or False if it is
     # excluded.
     included_regex_list: Optional[List[Tuple[bool, CompiledRE]]]
 
+    # Directory for persistent state such as caches. None means a per-repository directory under
+    # the user's cache directory.
+    state_dir: Optional[str]
+
+    result_cache_enabled: bool
+    result_cache_max_size_bytes: int
+
+    # A cache shared with other machines, as an HTTP(S) URL or a directory path, whether to upload
+    # new results to it, and the timeout of requests to an HTTP cache.
+    remote_cache_location: Optional[str]
+    remote_cache_upload: bool
+    remote_cache_timeout_sec: float
+
+    # Settings of the pool of long-lived worker processes for Python-based checks.
+    worker_pool_enabled: bool
+    worker_max_tasks: int
+    worker_max_memory_bytes: int
+
+    # Settings of the fork server for import checks. If preload modules are not specified, the
+    # top-level packages of the repository are preloaded.
+    fork_server_enabled: bool
+    fork_server_preload_modules: Optional[List[str]]
+
+    # Maximum numbers of checks of each type to run at the same time, in addition to the overall
+    # parallelism.
+    concurrency_limits: Dict[str, int]
+
+    # If specified, checks are only started if their estimated peak memory usage, together with
+    # that of the running checks, fits into this budget.
+    memory_budget_bytes: Optional[int]
+
+    # Checks running longer than this are killed and reported as timed out. The default timeout
+    # applies to check types without a timeout of their own.
+    check_timeouts_sec: Dict[str, float]
+    default_check_timeout_sec: Optional[float]
+
+    # Maximum numbers of files checked by one invocation of the tool, for BATCHED_CHECK_TYPES. A
+    # batch size of 1 means that every file is checked separately.
+    max_batch_sizes: Dict[str, int]
+
     def __init__(self) -> None:
         self.mypy_config_path = 'mypy.ini'
+        self.mypy_mode = DEFAULT_MYPY_MODE
+        self.mypy_incremental = False
         self.disabled_check_types = set()
         self.included_regex_list = None
+        self.state_dir = None
+        self.result_cache_enabled = False
+        self.result_cache_max_size_bytes = 256 * 1024 * 1024
+        self.remote_cache_location = None
+        self.remote_cache_upload = True
+        self.remote_cache_timeout_sec = 10.0
+        self.worker_pool_enabled = False
+        self.worker_max_tasks = 100
+        self.worker_max_memory_bytes = 512 * 1024 * 1024
+        self.fork_server_enabled = False
+        self.fork_server_preload_modules = None
+        self.concurrency_limits = {}
+        self.memory_budget_bytes = None
+        self.check_timeouts_sec = {}
+        self.default_check_timeout_sec = None
+        self.max_batch_sizes = dict(DEFAULT_MAX_BATCH_SIZES)
 
     def load(self, file_path: str) -> None:
         parsed_ini = ConfigParser()
@@ -76,6 +144,95 @@ class CodeCheckConfig:
             mypy_config_path = default_section.get('mypy_config')
             if mypy_config_path is not None:
                 self.mypy_config_path = mypy_config_path
+            mypy_mode = default_section.get('mypy_mode')
+            if mypy_mode is not None:
+                if mypy_mode not in MYPY_MODES:
+                    raise ValueError(
+                        f"Invalid mypy_mode: {mypy_mode}, expected one of {MYPY_MODES}")
+                self.mypy_mode = mypy_mode
+            self.mypy_incremental = default_section.getboolean(
+                'mypy_incremental', fallback=self.mypy_incremental)
+            state_dir = default_section.get('state_dir')
+            if state_dir is not None:
+                self.state_dir = state_dir
+
+        cache_section = get_section('cache')
+        if cache_section:
+            self.result_cache_enabled = cache_section.getboolean(
+                'enabled', fallback=self.result_cache_enabled)
+            max_size = cache_section.get('max_size')
+            if max_size is not None:
+                self.result_cache_max_size_bytes = parse_size(max_size)
+            remote_cache_location = cache_section.get('remote')
+            if remote_cache_location is not None:
+                self.remote_cache_location = remote_cache_location
+            self.remote_cache_upload = cache_section.getboolean(
+                'remote_upload', fallback=self.remote_cache_upload)
+            self.remote_cache_timeout_sec = cache_section.getfloat(
+                'remote_timeout', fallback=self.remote_cache_timeout_sec)
+            if self.remote_cache_timeout_sec <= 0:
+                raise ValueError(
+                    f"Invalid remote cache timeout: {self.remote_cache_timeout_sec}")
+
+        workers_section = get_section('workers')
+        if workers_section:
+            self.worker_pool_enabled = workers_section.getboolean(
+                'enabled', fallback=self.worker_pool_enabled)
+            self.worker_max_tasks = workers_section.getint(
+                'max_tasks', fallback=self.worker_max_tasks)
+            max_memory = workers_section.get('max_memory')
+            if max_memory is not None:
+                self.worker_max_memory_bytes = parse_size(max_memory)
+
+        fork_server_section = get_section('fork_server')
+        if fork_server_section:
+            self.fork_server_enabled = fork_server_section.getboolean(
+                'enabled', fallback=self.fork_server_enabled)
+            preload_modules = fork_server_section.get('preload_modules')
+            if preload_modules is not None:
+                self.fork_server_preload_modules = preload_modules.replace(',', ' ').split()
+
+        limits_section = get_section('limits')
+        if limits_section:
+            for key in limits_section:
+                if key == 'memory_budget':
+                    self.memory_budget_bytes = parse_size(limits_section[key])
+                elif key in ALL_CHECK_TYPES:
+                    limit = int(limits_section[key])
+                    if limit < 1:
+                        raise ValueError(f"Invalid concurrency limit for {key}: {limit}")
+                    self.concurrency_limits[key] = limit
+                else:
+                    raise ValueError(
+                        f"Unknown key in the [limits] section: {key}, expected one of "
+                        f"{ALL_CHECK_TYPES + ['memory_budget']}")
+
+        timeouts_section = get_section('timeouts')
+        if timeouts_section:
+            for key in timeouts_section:
+                if key != 'default' and key not in ALL_CHECK_TYPES:
+                    raise ValueError(
+                        f"Unknown key in the [timeouts] section: {key}, expected one of "
+                        f"{ALL_CHECK_TYPES + ['default']}")
+                timeout_sec = float(timeouts_section[key])
+                if timeout_sec <= 0:
+                    raise ValueError(f"Invalid timeout for {key}: {timeout_sec}")
+                if key == 'default':
+                    self.default_check_timeout_sec = timeout_sec
+                else:
+                    self.check_timeouts_sec[key] = timeout_sec
+
+        batches_section = get_section('batches')
+        if batches_section:
+            for key in batches_section:
+                if key not in BATCHED_CHECK_TYPES:
+                    raise ValueError(
+                        f"Unknown key in the [batches] section: {key}, expected one of "
+                        f"{BATCHED_CHECK_TYPES}")
+                max_batch_size = int(batches_section[key])
+                if max_batch_size < 1:
+                    raise ValueError(f"Invalid batch size for {key}: {max_batch_size}")
+                self.max_batch_sizes[key] = max_batch_size
 
         checks_section = get_section('checks')
         if checks_section:
@@ -88,3 +245,6 @@ class CodeCheckConfig:
         if files_section:
             self.included_regex_list = get_multi_line_regex_list(
                 files_section, 'included_regex_list')
+
+    def get_check_timeout_sec(self, check_type: str) -> Optional[float]:
+        return self.check_timeouts_sec.get(check_type, self.default_check_timeout_sec)
@@ -0,0 +1,59 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from codecheck.config import CodeCheckConfig
+
+
+class CodeCheckConfigTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp(prefix='codecheck_config_test_')
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def load_config(self, content: str) -> CodeCheckConfig:
+        config_path = os.path.join(self.temp_dir, 'codecheck.ini')
+        with open(config_path, 'w') as config_file:
+            config_file.write(content)
+        config = CodeCheckConfig()
+        config.load(config_path)
+        return config
+
+    def test_limits(self) -> None:
+        config = self.load_config('[limits]\nmypy = 2\nunittest = 1\nmemory_budget = 1.5G\n')
+        self.assertEqual(config.concurrency_limits, {'mypy': 2, 'unittest': 1})
+        self.assertEqual(config.memory_budget_bytes, 1536 * 1024 * 1024)
+
+        config = self.load_config('')
+        self.assertEqual(config.concurrency_limits, {})
+        self.assertIsNone(config.memory_budget_bytes)
+
+        for invalid_limits in ['mypy = 0', 'no_such_check = 1', 'mypy = many']:
+            with self.assertRaises(ValueError):
+                self.load_config('[limits]\n%s\n' % invalid_limits)
+
+    def test_timeouts(self) -> None:
+        config = self.load_config('[timeouts]\ndefault = 300\nunittest = 600\n')
+        self.assertEqual(config.get_check_timeout_sec('unittest'), 600)
+        self.assertEqual(config.get_check_timeout_sec('mypy'), 300)
+        self.assertIsNone(self.load_config('').get_check_timeout_sec('mypy'))
+
+        for invalid_timeouts in ['mypy = 0', 'no_such_check = 1', 'default = -1']:
+            with self.assertRaises(ValueError):
+                self.load_config('[timeouts]\n%s\n' % invalid_timeouts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,56 @@ NAME_SUFFIX_TO_CHECK_TYPES: Dict[str, List[str]] = {
 
 ALL_CHECK_TYPES: List[str] = combine_value_lists(NAME_SUFFIX_TO_CHECK_TYPES)
 
+# Check types whose results may depend on the contents of other Python files in the repository,
+# because they import the module being checked or follow its imports.
+CHECK_TYPES_AFFECTED_BY_IMPORTS: List[str] = ['doctest', 'import', 'mypy', 'unittest']
+
+# Checks of these types only run for a file once the listed checks of the same file have passed.
+# There is no point in e.g. running mypy or importing a module that has a syntax error, as these
+# checks would fail with the same error, only more slowly.
+CHECK_TYPE_PREREQUISITES: Dict[str, List[str]] = {
+    'doctest': ['compile'],
+    'import': ['compile'],
+    'mypy': ['compile'],
+    'unittest': ['compile'],
+}
+
+# Check types that can run inside the codecheck process, by calling the tool as a library, when the
+# configured Python interpreter is the one running codecheck. They do not execute the checked code.
+IN_PROCESS_CHECK_TYPES: List[str] = ['compile', 'pycodestyle']
+
+# Check types implemented as "python -m <module> <file>" or "python -c <code>" that can run in a
+# pool of long-lived worker processes.
+WORKER_POOL_CHECK_TYPES: List[str] = ['compile', 'doctest', 'import', 'pycodestyle']
+
+# Check types that can check many files with one invocation of the tool, with the default maximum
+# numbers of files per invocation. Running unit tests of different modules in the same process
+# could change their results, so it is opt-in.
+DEFAULT_MAX_BATCH_SIZES: Dict[str, int] = {
+    'pycodestyle': 50,
+    'shellcheck': 50,
+    'unittest': 1,
+}
+BATCHED_CHECK_TYPES: List[str] = sorted(DEFAULT_MAX_BATCH_SIZES)
+
 ALL_CHECKED_SUFFIXES = tuple(sorted(NAME_SUFFIX_TO_CHECK_TYPES.keys()))
 
+# Files that are not checked themselves, but that mypy reads type information from: stubs, and the
+# markers of packages that ship type information (PEP 561).
+MYPY_TYPE_INFO_SUFFIXES = ('.pyi', 'py.typed')
+
 DEFAULT_CONF_FILE_NAME = 'codecheck.ini'
+
+# Ways of running mypy:
+# per_file - a separate mypy process for each file.
+# batch    - one mypy process for each group of files with the same import root.
+# daemon   - like batch, but each group of files is checked by a long-running mypy daemon (dmypy)
+#            that is reused across runs.
+MYPY_MODES: List[str] = ['per_file', 'batch', 'daemon']
+DEFAULT_MYPY_MODE = 'per_file'
+
+# Ways to run checks in parallel (see --engine):
+# threads - a thread for every running check.
+# asyncio - checks that are separate processes run as coroutines on one asyncio event loop.
+ENGINES: List[str] = ['threads', 'asyncio']
+DEFAULT_ENGINE = 'threads'
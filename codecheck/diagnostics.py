@@ -0,0 +1,172 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Parsing individual diagnostics (file, line, column, message) out of the output of the pycodestyle,
+mypy and shellcheck checks, for machine-readable output formats.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import os
+import re
+
+from codecheck.check_result import CheckResult
+
+
+# E.g. "codecheck/util.py:12:80: E501 line too long (105 > 100 characters)".
+PYCODESTYLE_LINE_RE = re.compile(r'^(.+?):(\d+):(\d+): ([EWCF]\d+) (.*)$')
+
+# E.g. "codecheck/util.py:12: error: Name "x" is not defined  [name-defined]", with an optional
+# column number after the line number.
+MYPY_LINE_RE = re.compile(
+    r'^(.+?):(\d+):(?:(\d+):)? (error|warning|note): (.*?)(?:  \[([a-z0-9-]+)\])?$')
+
+# shellcheck's default output format, e.g.:
+#
+# In bin/run.sh line 3:
+# echo $foo
+#      ^--^ SC2086 (info): Double quote to prevent globbing and word splitting.
+SHELLCHECK_LOCATION_RE = re.compile(r'^In (.+) line (\d+):$')
+SHELLCHECK_MESSAGE_RE = re.compile(r'^(\s*)\^-*\^? (SC\d+) \((\w+)\): (.*)$')
+
+
+class Diagnostic:
+    def __init__(
+            self,
+            file_path: str,
+            line: int,
+            column: Optional[int],
+            severity: str,
+            code: Optional[str],
+            message: str) -> None:
+        self.file_path = file_path
+        self.line = line
+        # 1-based, if known.
+        self.column = column
+        self.severity = severity
+        self.code = code
+        self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'file_path': self.file_path,
+            'line': self.line,
+            'column': self.column,
+            'severity': self.severity,
+            'code': self.code,
+            'message': self.message,
+        }
+
+    def __repr__(self) -> str:
+        return 'Diagnostic(%s)' % ', '.join(
+            '%s=%r' % (key, value) for key, value in self.to_dict().items())
+
+
+def parse_pycodestyle_output(output: str) -> List[Diagnostic]:
+    """
+    >>> parse_pycodestyle_output('a.py:3:80: E501 line too long (101 > 100 characters)\\n')
+    [Diagnostic(file_path='a.py', line=3, column=80, severity='error', code='E501', \
+message='line too long (101 > 100 characters)')]
+    """
+    diagnostics = []
+    for line in output.splitlines():
+        match = PYCODESTYLE_LINE_RE.match(line)
+        if match:
+            code = match.group(4)
+            diagnostics.append(Diagnostic(
+                file_path=match.group(1),
+                line=int(match.group(2)),
+                column=int(match.group(3)),
+                severity='warning' if code.startswith('W') else 'error',
+                code=code,
+                message=match.group(5)))
+    return diagnostics
+
+
+def parse_mypy_output(output: str) -> List[Diagnostic]:
+    """
+    >>> for diagnostic in parse_mypy_output(
+    ...         'a.py:7: error: Name "x" is not defined  [name-defined]\\n'
+    ...         'a.py:9:5: note: Revealed type is "builtins.int"\\n'
+    ...         'Found 1 error in 1 file (checked 1 source file)\\n'):
+    ...     print(diagnostic)
+    Diagnostic(file_path='a.py', line=7, column=None, severity='error', code='name-defined', \
+message='Name "x" is not defined')
+    Diagnostic(file_path='a.py', line=9, column=5, severity='note', code=None, \
+message='Revealed type is "builtins.int"')
+    """
+    diagnostics = []
+    for line in output.splitlines():
+        match = MYPY_LINE_RE.match(line)
+        if match:
+            diagnostics.append(Diagnostic(
+                file_path=match.group(1),
+                line=int(match.group(2)),
+                column=int(match.group(3)) if match.group(3) else None,
+                severity=match.group(4),
+                code=match.group(6),
+                message=match.group(5)))
+    return diagnostics
+
+
+def parse_shellcheck_output(output: str) -> List[Diagnostic]:
+    """
+    >>> for diagnostic in parse_shellcheck_output(
+    ...         '\\n'
+    ...         'In run.sh line 3:\\n'
+    ...         'echo $foo $bar\\n'
+    ...         '     ^--^ SC2086 (info): Double quote to prevent globbing.\\n'
+    ...         '          ^--^ SC2154 (warning): bar is referenced but not assigned.\\n'):
+    ...     print(diagnostic)
+    Diagnostic(file_path='run.sh', line=3, column=6, severity='info', code='SC2086', \
+message='Double quote to prevent globbing.')
+    Diagnostic(file_path='run.sh', line=3, column=11, severity='warning', code='SC2154', \
+message='bar is referenced but not assigned.')
+    """
+    diagnostics = []
+    file_path = None
+    line_number = 0
+    for line in output.splitlines():
+        location_match = SHELLCHECK_LOCATION_RE.match(line)
+        if location_match:
+            file_path = location_match.group(1)
+            line_number = int(location_match.group(2))
+            continue
+        message_match = SHELLCHECK_MESSAGE_RE.match(line)
+        if message_match and file_path is not None:
+            diagnostics.append(Diagnostic(
+                file_path=file_path,
+                line=line_number,
+                column=len(message_match.group(1)) + 1,
+                severity=message_match.group(3),
+                code=message_match.group(2),
+                message=message_match.group(4)))
+    return diagnostics
+
+
+def parse_diagnostics(check_result: CheckResult) -> List[Diagnostic]:
+    """
+    Returns the diagnostics reported by a check, for the check types with a known output format.
+    Relative file paths are resolved against the current directory, in which the checks run.
+    """
+    if check_result.check_type == 'pycodestyle':
+        diagnostics = parse_pycodestyle_output(check_result.stdout)
+    elif check_result.check_type == 'mypy':
+        diagnostics = parse_mypy_output(check_result.stdout)
+    elif check_result.check_type == 'shellcheck':
+        diagnostics = parse_shellcheck_output(check_result.stdout)
+    else:
+        return []
+    for diagnostic in diagnostics:
+        diagnostic.file_path = os.path.abspath(diagnostic.file_path)
+    return diagnostics
@@ -0,0 +1,216 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Durations and memory usage of checks recorded in previous runs. Durations are used to start the
+longest checks first so that they do not end up being the tail of a run, and memory usage is used
+to avoid running more checks at once than the memory budget allows.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import json
+import logging
+import os
+import tempfile
+
+from codecheck.check_result import CheckResult
+
+
+# Increment this when the format of the history file changes.
+DURATION_HISTORY_FORMAT_VERSION = '2'
+
+# Weight of the latest measurement when updating the recorded duration of a check.
+NEW_DURATION_WEIGHT = 0.5
+
+# Rough estimates for checks of files with no recorded durations, if no checks of the same type
+# have been recorded either: a fixed cost (mostly interpreter or tool startup) plus a cost per
+# kilobyte of the checked file.
+DEFAULT_BASE_DURATION_SEC: Dict[str, float] = {
+    'compile': 0.05,
+    'doctest': 0.2,
+    'import': 0.2,
+    'mypy': 1.0,
+    'pycodestyle': 0.1,
+    'shellcheck': 0.1,
+    'unittest': 1.0,
+}
+DEFAULT_DURATION_SEC_PER_KB = 0.01
+
+# Peak memory usage estimates for check types that have not been measured yet.
+DEFAULT_PEAK_RSS_BYTES: Dict[str, int] = {
+    'compile': 32 * 1024 * 1024,
+    'doctest': 64 * 1024 * 1024,
+    'import': 64 * 1024 * 1024,
+    'mypy': 256 * 1024 * 1024,
+    'pycodestyle': 32 * 1024 * 1024,
+    'shellcheck': 32 * 1024 * 1024,
+    'unittest': 128 * 1024 * 1024,
+}
+
+# Recorded peak memory usage of a check type decays by this factor in every run in which that check
+# type is run, so that the estimate can go down after a check that used a lot of memory is fixed.
+PEAK_RSS_DECAY = 0.9
+
+
+def get_file_size_kb(file_path: str) -> float:
+    try:
+        return os.path.getsize(file_path) / 1024.0
+    except OSError:
+        return 0.0
+
+
+def estimate_default_duration_sec(file_path: str, check_type: str) -> float:
+    """
+    Estimates the duration of a check based only on the check type and the size of the file.
+    """
+    return (DEFAULT_BASE_DURATION_SEC.get(check_type, 0.0) +
+            DEFAULT_DURATION_SEC_PER_KB * get_file_size_kb(file_path))
+
+
+class DurationHistory:
+    """
+    Recorded durations (in seconds) and sizes (in kilobytes) of the checked files, by check type
+    and file path relative to the repository root.
+    """
+
+    def __init__(self, history_file_path: str, root_path: str) -> None:
+        self.history_file_path = history_file_path
+        self.root_path_realpath = os.path.realpath(root_path)
+        self.entries: Dict[str, Tuple[float, float]] = {}
+        self.peak_rss_bytes_by_check_type: Dict[str, int] = {}
+        self.current_peak_rss_bytes_by_check_type: Dict[str, int] = {}
+        self.load()
+        self.sec_per_kb_by_check_type: Dict[str, float] = self.get_sec_per_kb_by_check_type()
+
+    def get_entry_key(self, file_path: str, check_type: str) -> str:
+        return check_type + ':' + os.path.relpath(
+            os.path.realpath(file_path), self.root_path_realpath)
+
+    def load(self) -> None:
+        if not os.path.exists(self.history_file_path):
+            return
+        try:
+            with open(self.history_file_path) as history_file:
+                history = json.load(history_file)
+            if history['version'] == DURATION_HISTORY_FORMAT_VERSION:
+                self.entries = {
+                    key: (float(duration_sec), float(size_kb))
+                    for key, (duration_sec, size_kb) in history['entries'].items()
+                }
+                self.peak_rss_bytes_by_check_type = {
+                    check_type: int(peak_rss_bytes)
+                    for check_type, peak_rss_bytes in history['peak_rss_bytes'].items()
+                }
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            logging.warning("Could not read check duration history %s: %s",
+                            self.history_file_path, ex)
+
+    def save(self) -> None:
+        # Forget about files that no longer exist.
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if os.path.exists(os.path.join(self.root_path_realpath, key.split(':', 1)[1]))
+        }
+        history_dir = os.path.dirname(self.history_file_path)
+        try:
+            os.makedirs(history_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=history_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as tmp_file:
+                    json.dump({
+                        'version': DURATION_HISTORY_FORMAT_VERSION,
+                        'entries': self.entries,
+                        'peak_rss_bytes': self.get_peak_rss_bytes_to_save(),
+                    }, tmp_file)
+                os.replace(tmp_path, self.history_file_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as ex:
+            logging.warning("Failed to save check duration history %s: %s",
+                            self.history_file_path, ex)
+
+    def get_sec_per_kb_by_check_type(self) -> Dict[str, float]:
+        """
+        For every check type with recorded durations, the average duration per kilobyte of
+        checked files, used to estimate durations of checks for new files.
+        """
+        totals: Dict[str, List[float]] = {}
+        for key, (duration_sec, size_kb) in self.entries.items():
+            check_type = key.split(':', 1)[0]
+            total = totals.setdefault(check_type, [0.0, 0.0])
+            total[0] += duration_sec
+            total[1] += size_kb
+        return {
+            check_type: total_duration_sec / total_size_kb
+            for check_type, (total_duration_sec, total_size_kb) in totals.items()
+            if total_size_kb > 0
+        }
+
+    def get_recorded_duration_sec(self, file_path: str, check_type: str) -> Optional[float]:
+        entry = self.entries.get(self.get_entry_key(file_path, check_type))
+        if entry is None:
+            return None
+        return entry[0]
+
+    def estimate_duration_sec(self, file_path: str, check_type: str) -> float:
+        recorded_duration_sec = self.get_recorded_duration_sec(file_path, check_type)
+        if recorded_duration_sec is not None:
+            return recorded_duration_sec
+        if check_type in self.sec_per_kb_by_check_type:
+            return self.sec_per_kb_by_check_type[check_type] * get_file_size_kb(file_path)
+        return estimate_default_duration_sec(file_path, check_type)
+
+    def record(self, file_path: str, check_type: str, duration_sec: float) -> None:
+        key = self.get_entry_key(file_path, check_type)
+        if key in self.entries:
+            old_duration_sec = self.entries[key][0]
+            duration_sec = (NEW_DURATION_WEIGHT * duration_sec +
+                            (1 - NEW_DURATION_WEIGHT) * old_duration_sec)
+        self.entries[key] = (duration_sec, get_file_size_kb(file_path))
+
+    def record_task(
+            self, task: List[Tuple[str, str]], check_results: List[CheckResult]) -> None:
+        """
+        Records the duration and memory usage of a task, given its (file path, check type) pairs
+        and results. The duration of a batch is split evenly between its checks.
+        """
+        if not check_results:
+            return
+        max_rss_bytes = check_results[0].max_rss_bytes
+        if max_rss_bytes is not None:
+            self.record_peak_rss(task[0][1], max_rss_bytes)
+        duration_sec = check_results[0].get_duration_sec()
+        if duration_sec is None:
+            return
+        for file_path, check_type in task:
+            self.record(file_path, check_type, duration_sec / len(task))
+
+    def record_peak_rss(self, check_type: str, max_rss_bytes: int) -> None:
+        self.current_peak_rss_bytes_by_check_type[check_type] = max(
+            max_rss_bytes, self.current_peak_rss_bytes_by_check_type.get(check_type, 0))
+
+    def estimate_peak_rss_bytes(self, check_type: str) -> int:
+        if check_type in self.current_peak_rss_bytes_by_check_type:
+            return max(self.current_peak_rss_bytes_by_check_type[check_type],
+                       self.peak_rss_bytes_by_check_type.get(check_type, 0))
+        if check_type in self.peak_rss_bytes_by_check_type:
+            return self.peak_rss_bytes_by_check_type[check_type]
+        return DEFAULT_PEAK_RSS_BYTES.get(check_type, 0)
+
+    def get_peak_rss_bytes_to_save(self) -> Dict[str, int]:
+        result = dict(self.peak_rss_bytes_by_check_type)
+        for check_type, peak_rss_bytes in self.current_peak_rss_bytes_by_check_type.items():
+            result[check_type] = max(
+                peak_rss_bytes, int(result.get(check_type, 0) * PEAK_RSS_DECAY))
+        return result
@@ -0,0 +1,120 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from codecheck.check_result import CheckResult
+from codecheck.duration_history import (
+    DEFAULT_BASE_DURATION_SEC,
+    DEFAULT_DURATION_SEC_PER_KB,
+    DEFAULT_PEAK_RSS_BYTES,
+    DurationHistory,
+)
+
+
+class DurationHistoryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_duration_history_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.history_file_path = os.path.join(self.root_path, 'state', 'durations.json')
+        # Files of 1 KB and 4 KB.
+        self.small_path = self.write_file('small.py', 1024)
+        self.large_path = self.write_file('large.py', 4096)
+
+    def write_file(self, file_name: str, size: int) -> str:
+        file_path = os.path.join(self.root_path, file_name)
+        with open(file_path, 'w') as output_file:
+            output_file.write('#' * size)
+        return file_path
+
+    def create_history(self) -> DurationHistory:
+        return DurationHistory(self.history_file_path, self.root_path)
+
+    def test_default_estimates(self) -> None:
+        history = self.create_history()
+        self.assertAlmostEqual(
+            history.estimate_duration_sec(self.large_path, 'mypy'),
+            DEFAULT_BASE_DURATION_SEC['mypy'] + 4 * DEFAULT_DURATION_SEC_PER_KB)
+        # Longer files are expected to take longer to check.
+        self.assertGreater(history.estimate_duration_sec(self.large_path, 'compile'),
+                           history.estimate_duration_sec(self.small_path, 'compile'))
+
+    def test_recorded_durations(self) -> None:
+        history = self.create_history()
+        history.record(self.small_path, 'unittest', 10.0)
+        self.assertEqual(history.estimate_duration_sec(self.small_path, 'unittest'), 10.0)
+        # The recorded duration is a moving average of the measurements.
+        history.record(self.small_path, 'unittest', 20.0)
+        self.assertEqual(history.estimate_duration_sec(self.small_path, 'unittest'), 15.0)
+        history.save()
+
+        history = self.create_history()
+        self.assertEqual(history.estimate_duration_sec(self.small_path, 'unittest'), 15.0)
+        # Checks of files without recorded durations are estimated using the average duration per
+        # kilobyte of checks of the same type.
+        self.assertEqual(history.estimate_duration_sec(self.large_path, 'unittest'), 60.0)
+        self.assertAlmostEqual(
+            history.estimate_duration_sec(self.large_path, 'import'),
+            DEFAULT_BASE_DURATION_SEC['import'] + 4 * DEFAULT_DURATION_SEC_PER_KB)
+
+    def test_record_task(self) -> None:
+        history = self.create_history()
+        check_result = CheckResult(check_type='pycodestyle', file_path=self.small_path)
+        check_result.start_time = 100.0
+        check_result.end_time = 102.0
+        # The duration of a batch is split between its checks.
+        history.record_task(
+            [(self.small_path, 'pycodestyle'), (self.large_path, 'pycodestyle')],
+            [check_result, check_result])
+        self.assertEqual(history.estimate_duration_sec(self.small_path, 'pycodestyle'), 1.0)
+        self.assertEqual(history.estimate_duration_sec(self.large_path, 'pycodestyle'), 1.0)
+
+    def test_peak_rss(self) -> None:
+        history = self.create_history()
+        self.assertEqual(
+            history.estimate_peak_rss_bytes('mypy'), DEFAULT_PEAK_RSS_BYTES['mypy'])
+        history.record_peak_rss('mypy', 1000)
+        history.record_peak_rss('mypy', 3000)
+        history.record_peak_rss('mypy', 2000)
+        self.assertEqual(history.estimate_peak_rss_bytes('mypy'), 3000)
+        history.save()
+
+        # The recorded peak decays slowly in runs with lower memory usage.
+        history = self.create_history()
+        self.assertEqual(history.estimate_peak_rss_bytes('mypy'), 3000)
+        history.record_peak_rss('mypy', 1000)
+        self.assertEqual(history.estimate_peak_rss_bytes('mypy'), 3000)
+        history.save()
+        self.assertEqual(self.create_history().estimate_peak_rss_bytes('mypy'), 2700)
+
+    def test_deleted_files_are_forgotten(self) -> None:
+        history = self.create_history()
+        history.record(self.small_path, 'compile', 1.0)
+        history.record(self.large_path, 'compile', 2.0)
+        os.remove(self.large_path)
+        history.save()
+        self.assertEqual(list(self.create_history().entries), ['compile:small.py'])
+
+    def test_corrupted_history_file(self) -> None:
+        os.makedirs(os.path.dirname(self.history_file_path))
+        with open(self.history_file_path, 'w') as history_file:
+            history_file.write('{')
+        with self.assertLogs(level='WARNING'):
+            history = self.create_history()
+        self.assertEqual(history.entries, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
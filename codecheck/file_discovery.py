@@ -0,0 +1,133 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Helpers for finding the files to check quickly in large repositories: matching paths against the
+ordered inclusion and exclusion patterns from the configuration file, and finding out which paths
+are regular files.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import os
+import re
+import stat
+
+from codecheck.util import CompiledRE
+
+
+# Patterns that would behave differently as part of a combined regular expression: backreferences
+# by number or name, and conditionals, which refer to groups by number.
+GROUP_REFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+# Flags of a regular expression compiled without any flags.
+DEFAULT_RE_FLAGS = re.compile('').flags
+
+# Listing a directory costs about as much as a few dozen lstat() calls, so directories are only
+# listed if that many of the files in them are needed.
+MIN_FILES_TO_LIST_DIR = 32
+
+
+class InclusionExclusionMatcher:
+    """
+    Decides whether paths are included by an ordered list of inclusion and exclusion patterns,
+    where the last pattern that matches the start of a path decides, and paths that no pattern
+    matches are excluded.
+
+    The patterns are combined into one regular expression, with the patterns as alternatives in
+    reverse order, so that each path is matched only once: the first alternative that matches is
+    the last matching pattern. An empty group at the end of each alternative identifies it. If a
+    pattern cannot be combined with others, e.g. because it refers to its own groups by number,
+    the patterns are tried one by one instead.
+
+    >>> matcher = InclusionExclusionMatcher([
+    ...     (True, re.compile(r'.*[.](py|sh)$')),
+    ...     (False, re.compile(r'build/')),
+    ...     (True, re.compile(r'build/keep'))])
+    >>> matcher.combined_re is not None
+    True
+    >>> [matcher.is_included(path)
+    ...  for path in ['a.py', 'b.sh', 'build/a.py', 'build/keep.py', 'build/keep.txt', 'a.txt']]
+    [True, True, False, True, True, False]
+    >>> InclusionExclusionMatcher([(True, re.compile(r'(a)\\1'))]).combined_re is None
+    True
+    """
+
+    def __init__(self, patterns: List[Tuple[bool, CompiledRE]]) -> None:
+        self.patterns = patterns
+        self.combined_re = self.combine_patterns(patterns)
+
+    @staticmethod
+    def combine_patterns(patterns: List[Tuple[bool, CompiledRE]]) -> Optional[CompiledRE]:
+        alternatives = []
+        for index in reversed(range(len(patterns))):
+            is_inclusion_pattern, re_pattern = patterns[index]
+            if (not isinstance(re_pattern.pattern, str) or
+                    re_pattern.flags != DEFAULT_RE_FLAGS or
+                    GROUP_REFERENCE_RE.search(re_pattern.pattern)):
+                return None
+            alternatives.append('(?:%s)(?P<%s%d>)' % (
+                re_pattern.pattern, 'include' if is_inclusion_pattern else 'exclude', index))
+        if not alternatives:
+            return None
+        try:
+            return re.compile('|'.join(alternatives))
+        except re.error:
+            return None
+
+    def is_included(self, path: str) -> bool:
+        if self.combined_re is not None:
+            match = self.combined_re.match(path)
+            return match is not None and (match.lastgroup or '').startswith('include')
+        should_include = False
+        # Each pattern overrides the result of previous ones if it matches. So, we can include
+        # some files, then exclude some of those files, then again include some of the excluded
+        # files.
+        for is_inclusion_pattern, re_pattern in self.patterns:
+            if re_pattern.match(path):
+                should_include = is_inclusion_pattern
+        return should_include
+
+
+def get_regular_file_paths(file_paths: Iterable[str]) -> Set[str]:
+    """
+    Returns those of the given paths that are regular files, rather than symlinks, directories, or
+    missing. Directories containing many of the paths are listed once using os.scandir(), which on
+    most file systems reports the type of every entry without a separate system call per file.
+    Other paths take one lstat() call each.
+    """
+    names_by_dir: Dict[str, List[str]] = {}
+    for file_path in file_paths:
+        dir_path, name = os.path.split(file_path)
+        names_by_dir.setdefault(dir_path, []).append(name)
+
+    regular_file_paths: Set[str] = set()
+    for dir_path, names in names_by_dir.items():
+        if len(names) < MIN_FILES_TO_LIST_DIR:
+            for name in names:
+                file_path = os.path.join(dir_path, name)
+                try:
+                    if stat.S_ISREG(os.lstat(file_path).st_mode):
+                        regular_file_paths.add(file_path)
+                except OSError:
+                    pass
+            continue
+        try:
+            with os.scandir(dir_path or os.curdir) as entries:
+                regular_file_names = set(
+                    entry.name for entry in entries if entry.is_file(follow_symlinks=False))
+        except OSError:
+            # E.g. a directory that has been deleted without committing the deletion.
+            continue
+        regular_file_paths.update(
+            os.path.join(dir_path, name) for name in names if name in regular_file_names)
+    return regular_file_paths
@@ -0,0 +1,138 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List, Tuple
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from codecheck.file_discovery import (
+    MIN_FILES_TO_LIST_DIR,
+    InclusionExclusionMatcher,
+    get_regular_file_paths,
+)
+from codecheck.test_util import DEFAULT_CONFIG, TempRepoTestCase, get_checked
+from codecheck.util import CompiledRE
+
+
+PATHS = [
+    'a.py', 'b.sh', 'a.txt', 'build/a.py', 'build/keep.py', 'build/keep/b.sh', 'src/build/a.py',
+    'aa.py', 'A.PY', 'third_party/x.py', 'third_party/patched/x.py',
+]
+
+
+def match_one_by_one(patterns: List[Tuple[bool, CompiledRE]], path: str) -> bool:
+    should_include = False
+    for is_inclusion_pattern, re_pattern in patterns:
+        if re_pattern.match(path):
+            should_include = is_inclusion_pattern
+    return should_include
+
+
+class InclusionExclusionMatcherTest(unittest.TestCase):
+    def check_patterns(
+            self, patterns: List[Tuple[bool, CompiledRE]], should_combine: bool) -> None:
+        matcher = InclusionExclusionMatcher(patterns)
+        self.assertEqual(matcher.combined_re is not None, should_combine)
+        for path in PATHS:
+            self.assertEqual(
+                matcher.is_included(path), match_one_by_one(patterns, path), (patterns, path))
+
+    def test_combined_patterns_match_like_separate_ones(self) -> None:
+        self.check_patterns([
+            (True, re.compile(r'.*[.](py|sh)$')),
+            (False, re.compile(r'build/')),
+            (True, re.compile(r'build/keep')),
+            (False, re.compile(r'third_party/')),
+            (True, re.compile(r'third_party/patched/.*[.]py$')),
+        ], should_combine=True)
+        # Patterns with groups named like the ones that identify the patterns in the combined
+        # regular expression are matched one by one.
+        self.check_patterns([
+            (True, re.compile(r'(?P<include0>.*)[.]py$')),
+            (False, re.compile(r'(?:a|b)[.](?P<exclude1>py)')),
+        ], should_combine=False)
+
+    def test_patterns_that_cannot_be_combined(self) -> None:
+        for patterns in [
+                [(True, re.compile(r'(a)\1[.]py'))],
+                [(True, re.compile(r'(?P<x>a)(?P=x)[.]py'))],
+                [(True, re.compile(r'.*[.]py$', re.IGNORECASE))],
+                []]:
+            self.check_patterns(patterns, should_combine=False)
+
+
+class GetRegularFilePathsTest(unittest.TestCase):
+    def test_get_regular_file_paths(self) -> None:
+        root_path = tempfile.mkdtemp(prefix='codecheck_file_discovery_test_')
+        self.addCleanup(shutil.rmtree, root_path)
+        expected_paths = []
+        # A small directory, which is not listed, and a large one, which is.
+        for dir_name, num_files in [('small', 3), ('large', MIN_FILES_TO_LIST_DIR + 1)]:
+            dir_path = os.path.join(root_path, dir_name)
+            os.makedirs(os.path.join(dir_path, 'subdir'))
+            for index in range(num_files):
+                file_path = os.path.join(dir_path, 'file%d.py' % index)
+                with open(file_path, 'w'):
+                    pass
+                expected_paths.append(file_path)
+            os.symlink('file0.py', os.path.join(dir_path, 'link.py'))
+            os.symlink('no_such_file.py', os.path.join(dir_path, 'broken_link.py'))
+        candidate_paths = expected_paths + [
+            os.path.join(root_path, dir_name, name)
+            for dir_name in ['small', 'large']
+            for name in ['link.py', 'broken_link.py', 'subdir', 'missing.py']
+        ] + [
+            os.path.join(root_path, 'deleted_dir', 'file%d.py' % index)
+            for index in range(MIN_FILES_TO_LIST_DIR)
+        ]
+        self.assertEqual(
+            sorted(get_regular_file_paths(candidate_paths)), sorted(expected_paths))
+
+
+class FileDiscoveryTest(TempRepoTestCase):
+    def test_discovered_files(self) -> None:
+        self.write_files({
+            'a.py': 'X = 1\n',
+            'build/b.py': 'X = 1\n',
+            'build/keep.py': 'X = 1\n',
+            'deleted.py': 'X = 1\n',
+            'link.py': 'X = 1\n',
+            'README.txt': '',
+        })
+        self.write_file('codecheck.ini', DEFAULT_CONFIG + '\n'.join([
+            '[files]',
+            'included_regex_list =',
+            '    .*[.]py$',
+            '    !build/',
+            '    build/keep',
+            '',
+        ]))
+        self.commit_all()
+        # Tracked files that have been deleted or replaced by symlinks are not checked, and
+        # neither are untracked files.
+        os.remove(os.path.join(self.root_path, 'deleted.py'))
+        os.remove(os.path.join(self.root_path, 'link.py'))
+        os.symlink('a.py', os.path.join(self.root_path, 'link.py'))
+        self.write_file('untracked.py', 'X = 1\n')
+        self.assertEqual(
+            get_checked(self.run_codecheck_jsonl()),
+            ['%s %s' % (check_type, file_name)
+             for check_type in ['compile', 'import', 'pycodestyle']
+             for file_name in ['a.py', 'build/keep.py']])
+
+
+if __name__ == '__main__':
+    unittest.main()
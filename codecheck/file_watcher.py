@@ -0,0 +1,209 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Watching a set of files for changes, used by the --watch mode. On Linux, inotify is used through
+ctypes, and on other platforms (or if inotify is not available) files are polled.
+
+Editors often save a file using several filesystem operations, and several files are often saved
+at once, so changes are reported only after no more changes have been seen for a short time.
+"""
+
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import abc
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+
+
+# Changes are reported when no more changes have been seen for this long.
+DEFAULT_DEBOUNCE_SEC = 0.2
+
+POLL_INTERVAL_SEC = 0.5
+
+# From sys/inotify.h.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Changes of file contents are reported when the file is closed after writing, not on every write.
+# Files replaced by renaming a temporary file over them are reported by IN_MOVED_TO.
+INOTIFY_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF)
+
+INOTIFY_EVENT_HEADER = struct.Struct('iIII')
+
+
+class FileWatcher(abc.ABC):
+    """
+    Reports changes to a set of files (absolute paths).
+    """
+
+    def __init__(self, debounce_sec: float) -> None:
+        self.debounce_sec = debounce_sec
+        self.file_paths: Set[str] = set()
+
+    def set_file_paths(self, file_paths: Iterable[str]) -> None:
+        self.file_paths = set(file_paths)
+
+    @abc.abstractmethod
+    def wait_for_changes(self, timeout_sec: float) -> Set[str]:
+        """
+        Waits for up to the given time for any of the files to change (including being created or
+        deleted). If there are changes, keeps waiting until there are no more changes for the
+        debounce period, and returns all changed files.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+# Modification time, size and inode of a file, or None if it does not exist.
+FileState = Optional[Tuple[int, int, int]]
+
+
+def get_file_state(file_path: str) -> FileState:
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
+class PollingFileWatcher(FileWatcher):
+    def __init__(self, debounce_sec: float) -> None:
+        super().__init__(debounce_sec)
+        self.file_states: Dict[str, FileState] = {}
+
+    def set_file_paths(self, file_paths: Iterable[str]) -> None:
+        super().set_file_paths(file_paths)
+        self.file_states = {
+            file_path: self.file_states[file_path] if file_path in self.file_states
+            else get_file_state(file_path)
+            for file_path in self.file_paths
+        }
+
+    def poll(self) -> Set[str]:
+        changed_file_paths = set()
+        for file_path, old_state in self.file_states.items():
+            new_state = get_file_state(file_path)
+            if new_state != old_state:
+                self.file_states[file_path] = new_state
+                changed_file_paths.add(file_path)
+        return changed_file_paths
+
+    def wait_for_changes(self, timeout_sec: float) -> Set[str]:
+        deadline = time.time() + timeout_sec
+        changed_file_paths = self.poll()
+        while not changed_file_paths and time.time() < deadline:
+            time.sleep(min(POLL_INTERVAL_SEC, max(0.0, deadline - time.time())))
+            changed_file_paths = self.poll()
+        while changed_file_paths:
+            time.sleep(self.debounce_sec)
+            more_changed_file_paths = self.poll()
+            if not more_changed_file_paths:
+                break
+            changed_file_paths |= more_changed_file_paths
+        return changed_file_paths
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Watches the directories containing the files, because editors often replace files instead of
+    modifying them in place, which would make a watch on the file itself stop working.
+    """
+
+    def __init__(self, debounce_sec: float) -> None:
+        super().__init__(debounce_sec)
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, 'inotify_init1 failed: %s' % os.strerror(errno))
+        self.dir_path_to_wd: Dict[str, int] = {}
+        self.wd_to_dir_path: Dict[int, str] = {}
+
+    def set_file_paths(self, file_paths: Iterable[str]) -> None:
+        super().set_file_paths(file_paths)
+        dir_paths = set(os.path.dirname(file_path) for file_path in self.file_paths)
+        for dir_path in sorted(set(self.dir_path_to_wd) - dir_paths):
+            wd = self.dir_path_to_wd.pop(dir_path)
+            del self.wd_to_dir_path[wd]
+            self.libc.inotify_rm_watch(self.fd, wd)
+        for dir_path in sorted(dir_paths - set(self.dir_path_to_wd)):
+            wd = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(dir_path), ctypes.c_uint32(INOTIFY_WATCH_MASK))
+            if wd < 0:
+                logging.warning("Could not watch directory %s: %s",
+                                dir_path, os.strerror(ctypes.get_errno()))
+                continue
+            self.dir_path_to_wd[dir_path] = wd
+            self.wd_to_dir_path[wd] = dir_path
+
+    def read_events(self, timeout_sec: float) -> Set[str]:
+        changed_file_paths: Set[str] = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout_sec)
+        if not readable:
+            return changed_file_paths
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed_file_paths
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                # Some events were lost, so any of the files could have changed.
+                changed_file_paths.update(self.file_paths)
+                continue
+            dir_path = self.wd_to_dir_path.get(wd)
+            if dir_path is None or not name:
+                continue
+            file_path = os.path.join(dir_path, name)
+            if file_path in self.file_paths:
+                changed_file_paths.add(file_path)
+        return changed_file_paths
+
+    def wait_for_changes(self, timeout_sec: float) -> Set[str]:
+        changed_file_paths = self.read_events(timeout_sec)
+        while changed_file_paths:
+            more_changed_file_paths = self.read_events(self.debounce_sec)
+            if not more_changed_file_paths:
+                break
+            changed_file_paths |= more_changed_file_paths
+        return changed_file_paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def create_file_watcher(debounce_sec: float = DEFAULT_DEBOUNCE_SEC) -> FileWatcher:
+    try:
+        return InotifyFileWatcher(debounce_sec)
+    except (OSError, AttributeError) as ex:
+        # AttributeError means that the C library does not have inotify functions.
+        logging.info("Could not use inotify (%s), polling files for changes instead", ex)
+        return PollingFileWatcher(debounce_sec)
@@ -0,0 +1,219 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Any, Callable, Dict, List, Set
+
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import codecheck
+from codecheck.file_watcher import FileWatcher, InotifyFileWatcher, PollingFileWatcher
+from codecheck.test_util import (
+    TempRepoTestCase,
+    get_checked,
+    is_process_running,
+    wait_for_process_exit,
+)
+from codecheck.util import prepend_path_entries
+
+
+# How long to wait for something that should happen quickly.
+TIMEOUT_SEC = 30
+
+
+class FileWatcherTestMixin:
+    temp_dir: str
+
+    def create_watcher(self) -> FileWatcher:
+        raise NotImplementedError()
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp(prefix='codecheck_file_watcher_test_')
+        for file_name in ['a.py', 'b.py', 'unwatched.py']:
+            self.write_file(file_name, '')
+        self.watcher = self.create_watcher()
+        self.watcher.set_file_paths(
+            [self.get_path('a.py'), self.get_path('b.py'), self.get_path('new.py')])
+
+    def tearDown(self) -> None:
+        self.watcher.close()
+        shutil.rmtree(self.temp_dir)
+
+    def get_path(self, file_name: str) -> str:
+        return os.path.join(self.temp_dir, file_name)
+
+    def write_file(self, file_name: str, content: str) -> None:
+        with open(self.get_path(file_name), 'w') as output_file:
+            output_file.write(content)
+
+    def get_changes(self) -> Set[str]:
+        return set(
+            os.path.basename(file_path) for file_path in self.watcher.wait_for_changes(2.0))
+
+    def test_changes(self) -> None:
+        test_case: Any = self
+        test_case.assertEqual(self.get_changes(), set())
+
+        self.write_file('a.py', 'X = 1\n')
+        self.write_file('unwatched.py', 'X = 1\n')
+        test_case.assertEqual(self.get_changes(), {'a.py'})
+
+        # Editors often replace files instead of writing them in place.
+        self.write_file('b.tmp', 'X = 2\n')
+        os.rename(self.get_path('b.tmp'), self.get_path('b.py'))
+        test_case.assertEqual(self.get_changes(), {'b.py'})
+
+        self.write_file('new.py', '')
+        os.remove(self.get_path('a.py'))
+        test_case.assertEqual(self.get_changes(), {'a.py', 'new.py'})
+
+
+class PollingFileWatcherTest(FileWatcherTestMixin, unittest.TestCase):
+    def create_watcher(self) -> FileWatcher:
+        return PollingFileWatcher(debounce_sec=0.1)
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is only available on Linux')
+class InotifyFileWatcherTest(FileWatcherTestMixin, unittest.TestCase):
+    def create_watcher(self) -> FileWatcher:
+        return InotifyFileWatcher(debounce_sec=0.1)
+
+
+# A test that keeps running until the file is changed.
+SLOW_TEST = '\n'.join([
+    'import os',
+    'import time',
+    'import unittest',
+    '',
+    'SLEEP_SEC = %d',
+    '',
+    '',
+    'class SlowTest(unittest.TestCase):',
+    '    def test_slow(self) -> None:',
+    "        with open('pid', 'w') as pid_file:",
+    '            pid_file.write(str(os.getpid()))',
+    '        time.sleep(SLEEP_SEC)',
+    '',
+])
+
+
+class WatchModeTest(TempRepoTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write_files({
+            'lib.py': 'X = 1\n',
+            'uses_lib.py': 'from lib import X\n',
+            'other.py': 'Y = 1\n',
+            'slow_test.py': SLOW_TEST % 60,
+        })
+        self.commit_all()
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = prepend_path_entries(
+            [os.path.dirname(os.path.dirname(os.path.abspath(codecheck.__file__)))],
+            env.get('PYTHONPATH'))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'codecheck', '--no-cache', '--watch', '-j', '2',
+             '--output-format', 'jsonl'],
+            cwd=self.root_path,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True)
+        self.addCleanup(self.stop_watch)
+        self.records: 'queue.Queue[Dict[str, Any]]' = queue.Queue()
+        self.reader_thread = threading.Thread(target=self.read_records)
+        self.reader_thread.start()
+
+    def read_records(self) -> None:
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            self.records.put(json.loads(line))
+
+    def stop_watch(self) -> None:
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+            try:
+                self.process.wait(timeout=TIMEOUT_SEC)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.reader_thread.join()
+        assert self.process.stdout is not None
+        self.process.stdout.close()
+
+    def wait_for_checks(self, expected_checks: List[str]) -> List[Dict[str, Any]]:
+        """
+        Returns the records of checks that are reported until all of the given checks, as
+        "<check type> <relative path>", are reported.
+        """
+        deadline = time.monotonic() + TIMEOUT_SEC
+        records = []
+        remaining_checks = set(expected_checks)
+        while remaining_checks:
+            record = self.records.get(timeout=max(deadline - time.monotonic(), 0.0))
+            records.append(record)
+            remaining_checks.discard('%s %s' % (record['check_type'], record['rel_file_path']))
+        return records
+
+    def wait_for_slow_test_pid(self) -> int:
+        pid_file_path = os.path.join(self.root_path, 'pid')
+        deadline = time.monotonic() + TIMEOUT_SEC
+        while not os.path.exists(pid_file_path):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.1)
+        time.sleep(0.1)
+        with open(pid_file_path) as pid_file:
+            pid = int(pid_file.read())
+        os.remove(pid_file_path)
+        return pid
+
+    def test_changes_rerun_checks_and_kill_outdated_ones(self) -> None:
+        self.wait_for_checks([
+            '%s %s' % (check_type, file_name)
+            for check_type in ['compile', 'import', 'pycodestyle']
+            for file_name in ['lib.py', 'uses_lib.py', 'other.py', 'slow_test.py']])
+        slow_test_pid = self.wait_for_slow_test_pid()
+
+        # Files that import a changed file are checked again, and other files are not.
+        self.write_file('lib.py', 'X = 2\n')
+        records = self.wait_for_checks(
+            ['compile lib.py', 'import lib.py', 'pycodestyle lib.py', 'import uses_lib.py'])
+        self.assertEqual(
+            get_checked(records),
+            ['compile lib.py', 'import lib.py', 'import uses_lib.py', 'pycodestyle lib.py'])
+        self.assertTrue(is_process_running(slow_test_pid))
+
+        # The outdated run of the slow test is killed, and the test runs again.
+        self.write_file('slow_test.py', SLOW_TEST % 0)
+        new_slow_test_pid = self.wait_for_slow_test_pid()
+        self.assertNotEqual(new_slow_test_pid, slow_test_pid)
+        self.assertTrue(wait_for_process_exit(slow_test_pid, TIMEOUT_SEC))
+        records = self.wait_for_checks(['unittest slow_test.py'])
+        self.assertEqual(records[-1]['returncode'], 0)
+        self.assertFalse(records[-1]['timed_out'])
+
+        self.process.send_signal(signal.SIGINT)
+        self.assertEqual(self.process.wait(timeout=TIMEOUT_SEC), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
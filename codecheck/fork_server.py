@@ -0,0 +1,146 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+A fork server for "import" checks. The server is an interpreter (the configured Python interpreter)
+that imports a set of commonly used modules once, and then forks a fresh child process for every
+check. Each child inherits the already imported modules, so a check only pays for importing the
+checked module itself and whatever it imports that was not preloaded.
+
+The server side is implemented in python_runner.py, which only depends on the standard library.
+"""
+
+from typing import List, Optional, Set
+
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+from codecheck import python_runner
+from codecheck.process_util import ProcessResult, RunningProcesses, kill_process_group
+
+
+class ForkServer:
+    def __init__(
+            self,
+            python_interpreter: str,
+            preload_modules: List[str],
+            cwd: Optional[str] = None) -> None:
+        self.temp_dir = tempfile.mkdtemp(prefix='codecheck_fork_server_')
+        self.socket_path = os.path.join(self.temp_dir, 'socket')
+        self.process = subprocess.Popen(
+            [
+                python_interpreter,
+                os.path.abspath(python_runner.__file__),
+                '--fork-server',
+                self.socket_path
+            ] + preload_modules,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding='utf-8',
+            cwd=cwd)
+        self.preloaded_modules: List[str] = []
+        self.failed_modules: List[str] = []
+        # Absolute paths of the source files of the modules loaded by the server.
+        self.loaded_file_paths: Set[str] = set()
+
+        assert self.process.stdout is not None
+        ready_line = self.process.stdout.readline()
+        self.is_running = bool(ready_line)
+        if self.is_running:
+            server_info = json.loads(ready_line)
+            self.preloaded_modules = server_info['preloaded_modules']
+            self.failed_modules = server_info['failed_modules']
+            self.loaded_file_paths = set(server_info['loaded_file_paths'])
+        else:
+            logging.warning("Fork server failed to start, exit code: %s", self.process.wait())
+
+    def run(
+            self,
+            python_args: List[str],
+            additional_sys_path: List[str],
+            timeout_sec: Optional[float] = None,
+            running_processes: Optional[RunningProcesses] = None) -> Optional[ProcessResult]:
+        """
+        Runs a Python command line of the form "-m <module> <args>" or "-c <code>" (not including
+        the interpreter) in a forked child of the server. Returns the output, exit code and
+        resource usage, or None if the check could not be run this way (e.g. the child crashed),
+        in which case the caller should run the check in a separate process. If the check does
+        not finish within the timeout, the child is killed, and a timed out result without output
+        is returned.
+
+        The child is added to the given running processes while it runs the check. If it is
+        killed through them, a killed result without output is returned.
+        """
+        if not self.is_running:
+            return None
+        response_data = b''
+        child_pid = None
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.connect(self.socket_path)
+                connection.sendall(json.dumps({
+                    'python_args': python_args,
+                    'additional_sys_path': additional_sys_path,
+                }).encode('utf-8') + b'\n')
+                while True:
+                    if deadline is not None:
+                        connection.settimeout(max(0.0, deadline - time.monotonic()))
+                    chunk = connection.recv(65536)
+                    if not chunk:
+                        break
+                    response_data += chunk
+                    # The first line of the response is the process id of the child.
+                    if child_pid is None and b'\n' in response_data:
+                        child_pid = json.loads(
+                            response_data.split(b'\n', 1)[0].decode('utf-8'))['pid']
+                        if running_processes is not None:
+                            running_processes.add(child_pid)
+        except socket.timeout:
+            if child_pid is not None:
+                kill_process_group(child_pid)
+            return ProcessResult.timed_out_result()
+        except OSError as ex:
+            logging.warning("Failed to run %s using the fork server: %s", python_args, ex)
+            return None
+        finally:
+            was_killed = (
+                child_pid is not None and
+                running_processes is not None and
+                running_processes.remove(child_pid))
+        response_lines = response_data.split(b'\n', 1)
+        if len(response_lines) < 2 or not response_lines[1].strip():
+            if was_killed:
+                return ProcessResult.killed_result()
+            logging.warning("Fork server child exited without a result for %s", python_args)
+            return None
+        response = json.loads(response_lines[1].decode('utf-8'))
+        return ProcessResult.from_response(response)
+
+    def stop(self) -> None:
+        if self.process.stdin is not None:
+            self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self.process.stdout is not None:
+            self.process.stdout.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
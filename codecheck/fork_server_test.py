@@ -0,0 +1,113 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List
+
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from codecheck.fork_server import ForkServer
+from codecheck.process_util import ProcessResult, RunningProcesses
+
+
+def is_process_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+class ForkServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp(prefix='codecheck_fork_server_test_')
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def create_server(self, preload_modules: List[str]) -> ForkServer:
+        fork_server = ForkServer(sys.executable, preload_modules)
+        self.addCleanup(fork_server.stop)
+        self.assertTrue(fork_server.is_running)
+        return fork_server
+
+    def run_code(self, fork_server: ForkServer, code: str) -> ProcessResult:
+        process_result = fork_server.run(['-c', code], [])
+        assert process_result is not None
+        return process_result
+
+    def test_preloaded_modules(self) -> None:
+        fork_server = self.create_server(['json', 'xml.dom.minidom', 'no_such_module'])
+        self.assertEqual(fork_server.preloaded_modules, ['json', 'xml.dom.minidom'])
+        self.assertEqual(fork_server.failed_modules, ['no_such_module'])
+        self.assertIn(json.__file__, fork_server.loaded_file_paths)
+        self.assertEqual(
+            self.run_code(
+                fork_server, 'import sys; print("xml.dom.minidom" in sys.modules)').stdout,
+            'True\n')
+
+    def test_checks_do_not_affect_each_other(self) -> None:
+        fork_server = self.create_server(['json'])
+        self.run_code(fork_server, 'import json, wave; json.marker = True')
+        self.assertEqual(
+            self.run_code(
+                fork_server,
+                'import json, sys; print(hasattr(json, "marker"), "wave" in sys.modules)').stdout,
+            'False False\n')
+
+    def test_child_crash(self) -> None:
+        fork_server = self.create_server([])
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(fork_server.run(
+                ['-c', 'import os, signal; os.kill(os.getpid(), signal.SIGKILL)'], []))
+        self.assertEqual(self.run_code(fork_server, 'print("next")').stdout, 'next\n')
+
+    def test_timeout_kills_the_child_and_its_processes(self) -> None:
+        fork_server = self.create_server([])
+        pid_file_path = os.path.join(self.temp_dir, 'pid')
+        start_time = time.monotonic()
+        process_result = fork_server.run(
+            ['-c', 'import subprocess, sys, time; '
+                   'process = subprocess.Popen('
+                   '    [sys.executable, "-c", "import time; time.sleep(60)"]); '
+                   'open(%r, "w").write(str(process.pid)); time.sleep(60)' % pid_file_path],
+            [],
+            timeout_sec=1)
+        assert process_result is not None
+        self.assertTrue(process_result.timed_out)
+        self.assertEqual(process_result.returncode, -signal.SIGKILL)
+        with open(pid_file_path) as pid_file:
+            grandchild_pid = int(pid_file.read())
+        while is_process_running(grandchild_pid):
+            self.assertLess(time.monotonic() - start_time, 10)
+            time.sleep(0.1)
+
+    def test_kill(self) -> None:
+        fork_server = self.create_server([])
+        running_processes = RunningProcesses()
+        timer = threading.Timer(0.5, running_processes.kill_all)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        process_result = fork_server.run(
+            ['-c', 'import time; time.sleep(60)'], [], running_processes=running_processes)
+        assert process_result is not None
+        self.assertEqual(process_result.returncode, -signal.SIGKILL)
+        self.assertFalse(process_result.timed_out)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Helpers for asking git which files to check.
+"""
+
+from typing import Iterable, List, Optional
+
+import os
+import subprocess
+
+from codecheck.util import ensure_str_decoded
+
+
+# Environment variables that change how git interprets pathspecs.
+PATHSPEC_ENV_VAR_NAMES = [
+    'GIT_GLOB_PATHSPECS',
+    'GIT_ICASE_PATHSPECS',
+    'GIT_LITERAL_PATHSPECS',
+    'GIT_NOGLOB_PATHSPECS',
+]
+
+
+def run_git_command_binary(root_path: str, args: List[str]) -> bytes:
+    process = subprocess.run(
+        ['git'] + args,
+        cwd=root_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise ValueError("Command 'git %s' failed with exit code %d: %s" % (
+            ' '.join(args), process.returncode, ensure_str_decoded(process.stderr).strip()))
+    return process.stdout
+
+
+def run_git_command(root_path: str, args: List[str]) -> str:
+    return ensure_str_decoded(run_git_command_binary(root_path, args))
+
+
+def split_null_terminated(output: str) -> List[str]:
+    """
+    >>> split_null_terminated('a.py\\0b c.py\\0')
+    ['a.py', 'b c.py']
+    >>> split_null_terminated('')
+    []
+    """
+    return [item for item in output.split('\0') if item]
+
+
+def get_suffix_pathspecs(suffixes: Iterable[str]) -> List[str]:
+    """
+    Returns git pathspecs matching files with any of the given name suffixes in any directory,
+    which relies on wildcards matching slashes, as they do by default. If the environment changes
+    how git interprets pathspecs, no pathspecs are returned, so that all files are listed. Suffixes
+    covered by other suffixes are skipped.
+
+    >>> get_suffix_pathspecs(['.py', '.sh', '_test.py'])
+    ['*.py', '*.sh']
+    """
+    if any(os.environ.get(env_var_name) for env_var_name in PATHSPEC_ENV_VAR_NAMES):
+        return []
+    suffixes = sorted(set(suffixes))
+    return [
+        '*' + suffix for suffix in suffixes
+        if not any(suffix != other_suffix and suffix.endswith(other_suffix)
+                   for other_suffix in suffixes)
+    ]
+
+
+def list_tracked_files(root_path: str, pathspecs: Optional[List[str]] = None) -> List[str]:
+    """
+    Returns the paths (relative to root_path, and only those under root_path) of files tracked by
+    git, optionally restricted to the given pathspecs. The output of git is NUL-separated, so
+    file names containing newlines or other characters that git would quote are returned as is,
+    and names that are not valid UTF-8 are decoded like the file system would.
+    """
+    args = ['ls-files', '-z']
+    if pathspecs:
+        args += ['--'] + pathspecs
+    return [
+        os.fsdecode(file_path)
+        for file_path in run_git_command_binary(root_path, args).split(b'\0') if file_path
+    ]
+
+
+def resolve_commit(root_path: str, ref: str) -> Optional[str]:
+    """
+    Returns the hash of the commit that the given ref points to, or None if it does not point to
+    a commit, e.g. if it does not exist, or if it is HEAD on a branch without commits yet.
+    """
+    try:
+        return run_git_command(
+            root_path, ['rev-parse', '--verify', '--quiet', ref + '^{commit}']).strip()
+    except ValueError:
+        return None
+
+
+def get_empty_tree_hash(root_path: str) -> str:
+    return run_git_command(root_path, ['hash-object', '-t', 'tree', os.devnull]).strip()
+
+
+def get_merge_base(root_path: str, ref: str) -> str:
+    try:
+        return run_git_command(root_path, ['merge-base', ref, 'HEAD']).strip()
+    except ValueError:
+        raise ValueError("%s and HEAD have no common ancestor" % ref)
+
+
+def get_changed_file_paths(
+        root_path: str,
+        base_ref: Optional[str],
+        staged: bool) -> List[str]:
+    """
+    Returns the paths (relative to root_path, and only those under root_path) of files that were
+    added, modified, renamed or deleted compared to the merge base of base_ref and HEAD. If staged
+    is True, only changes staged in the index are considered, otherwise the working tree is
+    compared. Without base_ref, the comparison is against HEAD, or against an empty tree if
+    there are no commits yet. Raises ValueError with a description of the problem if base_ref
+    cannot be resolved, or has no merge base with HEAD.
+    """
+    # With --no-renames, the old path of a renamed file is reported as deleted, so that the
+    # modules that imported it can be found.
+    args = ['diff', '--name-only', '-z', '--relative', '--no-renames']
+    if staged:
+        args.append('--cached')
+    head_commit = resolve_commit(root_path, 'HEAD')
+    if base_ref is not None:
+        if resolve_commit(root_path, base_ref) is None:
+            raise ValueError("Could not resolve git ref %s to a commit" % base_ref)
+        if head_commit is None:
+            raise ValueError(
+                "HEAD does not point to a commit yet, so it has no merge base with %s" %
+                base_ref)
+        args.append(get_merge_base(root_path, base_ref))
+    elif head_commit is None:
+        # All files are new on a branch without commits.
+        args.append(get_empty_tree_hash(root_path))
+    else:
+        args.append(head_commit)
+    return split_null_terminated(run_git_command(root_path, args))
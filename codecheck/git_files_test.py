@@ -0,0 +1,107 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List, Optional
+
+import os
+import unittest
+
+from codecheck.git_files import get_changed_file_paths, list_tracked_files
+from codecheck.test_util import DEFAULT_CONFIG, TempRepoTestCase, get_checked
+
+
+FILES = {
+    'lib.py': 'X = 1\n',
+    'uses_lib.py': 'import lib\n',
+    'uses_uses_lib.py': 'import uses_lib\n',
+    'other.py': 'Y = 1\n',
+    'sub/mod.py': 'Z = 1\n',
+}
+
+
+class GitFilesTest(TempRepoTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write_files(FILES)
+
+    def get_changed(self, base_ref: Optional[str] = None, staged: bool = False) -> List[str]:
+        return sorted(get_changed_file_paths(self.root_path, base_ref, staged))
+
+    def test_list_tracked_files(self) -> None:
+        self.write_file('new\nline.py', '')
+        self.write_file('untracked.py', '')
+        self.run_git('add', 'codecheck.ini', 'lib.py', 'sub/mod.py', 'new\nline.py')
+        self.assertEqual(
+            sorted(list_tracked_files(self.root_path)),
+            ['codecheck.ini', 'lib.py', 'new\nline.py', 'sub/mod.py'])
+        self.assertEqual(
+            sorted(list_tracked_files(self.root_path, ['*.py'])),
+            ['lib.py', 'new\nline.py', 'sub/mod.py'])
+        # Paths are relative to the given directory, which only lists the files under it.
+        self.assertEqual(
+            list_tracked_files(os.path.join(self.root_path, 'sub')), ['mod.py'])
+
+    def test_changes_without_commits(self) -> None:
+        self.run_git('add', 'lib.py')
+        self.assertEqual(self.get_changed(), ['lib.py'])
+        self.assertEqual(self.get_changed(staged=True), ['lib.py'])
+        with self.assertRaises(ValueError):
+            self.get_changed('HEAD')
+
+    def test_working_tree_and_staged_changes(self) -> None:
+        self.commit_all()
+        self.assertEqual(self.get_changed(), [])
+        self.write_file('lib.py', 'X = 2\n')
+        self.write_file('other.py', 'Y = 2\n')
+        self.run_git('add', 'other.py')
+        self.assertEqual(self.get_changed(), ['lib.py', 'other.py'])
+        self.assertEqual(self.get_changed(staged=True), ['other.py'])
+
+    def test_changes_since_merge_base(self) -> None:
+        self.commit_all()
+        self.run_git('branch', 'base')
+        self.run_git('checkout', '--quiet', '-b', 'feature')
+        self.run_git('mv', 'other.py', 'renamed.py')
+        self.commit_all()
+        # Changes on the base branch after the feature branch was created are not included.
+        self.run_git('checkout', '--quiet', 'base')
+        self.write_file('sub/mod.py', 'Z = 2\n')
+        self.commit_all()
+        self.run_git('checkout', '--quiet', 'feature')
+        self.write_file('lib.py', 'X = 2\n')
+        self.assertEqual(self.get_changed('base'), ['lib.py', 'other.py', 'renamed.py'])
+        self.assertEqual(self.get_changed('base', staged=True), ['other.py', 'renamed.py'])
+        with self.assertRaises(ValueError):
+            self.get_changed('no_such_branch')
+
+    def test_changed_since_with_dependents(self) -> None:
+        self.commit_all()
+        self.write_file('lib.py', 'X = 2\n')
+        self.assertEqual(
+            get_checked(self.run_codecheck_jsonl('--changed-since', 'HEAD')),
+            ['compile lib.py', 'import lib.py', 'pycodestyle lib.py'])
+        self.assertEqual(
+            get_checked(self.run_codecheck_jsonl('--changed-since', 'HEAD', '--with-dependents')),
+            ['compile lib.py', 'import lib.py', 'import uses_lib.py', 'import uses_uses_lib.py',
+             'pycodestyle lib.py'])
+
+    def test_config_change_checks_all_files(self) -> None:
+        self.commit_all()
+        self.write_file('codecheck.ini', DEFAULT_CONFIG + 'compile = off\n')
+        self.assertEqual(
+            get_checked(self.run_codecheck_jsonl('--changed-since', 'HEAD')),
+            ['import %s' % file_name for file_name in sorted(FILES)] +
+            ['pycodestyle %s' % file_name for file_name in sorted(FILES)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,288 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+A graph of imports between the Python modules of a repository, built by parsing the source code
+without importing anything. Used to find the modules whose checks could be affected by changes to
+other modules, both for choosing which files to check and for result cache keys.
+
+The imports found in each file are cached in the codecheck state directory by file contents, so
+that only changed files have to be parsed again.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from codecheck.util import get_module_name_from_path, get_sha256_of_strings
+
+
+# Returns the fully qualified module name of a Python file.
+ModuleNameFunction = Callable[[str], str]
+
+# Increment this when the format of the cache file or the way imports are found changes.
+IMPORT_CACHE_FORMAT_VERSION = '1'
+
+
+def get_package_name(module_name: str, is_package: bool, level: int) -> str:
+    """
+    Returns the package that a relative import with the given level refers to.
+
+    >>> get_package_name('a.b.c', False, 1)
+    'a.b'
+    >>> get_package_name('a.b.c', False, 2)
+    'a'
+    >>> get_package_name('a.b', True, 1)
+    'a.b'
+    """
+    components = module_name.split('.')
+    if not is_package:
+        components = components[:-1]
+    if level > 1:
+        components = components[:-(level - 1)]
+    return '.'.join(components)
+
+
+def add_module_and_parents(module_name: str, result: Set[str]) -> None:
+    """
+    Importing a module also executes the __init__.py files of all of its parent packages.
+    """
+    components = module_name.split('.')
+    for i in range(1, len(components) + 1):
+        result.add('.'.join(components[:i]))
+
+
+def get_imported_module_names(
+        source: Union[str, bytes], module_name: str, is_package: bool) -> Set[str]:
+    """
+    Returns the names of the modules that the given module source code could import, including
+    parent packages. For "from x import y", both x and x.y are returned, because y could be a
+    submodule.
+
+    >>> sorted(get_imported_module_names('import a.b\\nfrom c import d', 'm', False))
+    ['a', 'a.b', 'c', 'c.d']
+    >>> sorted(get_imported_module_names('from . import x\\nfrom ..y import z', 'p.q.m', False))
+    ['p', 'p.q', 'p.q.x', 'p.y', 'p.y.z']
+    """
+    result: Set[str] = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                add_module_and_parents(alias.name, result)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level > 0:
+                base_name = get_package_name(module_name, is_package, node.level)
+                if node.module:
+                    base_name = '.'.join(filter(None, [base_name, node.module]))
+            else:
+                base_name = node.module or ''
+            if not base_name:
+                continue
+            add_module_and_parents(base_name, result)
+            for alias in node.names:
+                if alias.name != '*':
+                    result.add(base_name + '.' + alias.name)
+    return result
+
+
+def find_imports(source: bytes, module_name: str, is_package: bool) -> Optional[List[str]]:
+    """
+    Returns the sorted names of the modules imported by the given source code, or None if it
+    could not be parsed. Errors like this are reported by the compile check of the file.
+    """
+    try:
+        return sorted(get_imported_module_names(source, module_name, is_package))
+    except (SyntaxError, ValueError):
+        return None
+
+
+def get_module_name_for_graph(file_path: str, get_module_name: ModuleNameFunction) -> str:
+    """
+    Returns the module name of a Python file, using the package name for __init__.py files.
+    """
+    module_name = get_module_name(file_path)
+    if get_module_name_from_path(file_path) == '__init__':
+        module_name = module_name.rpartition('.')[0]
+    return module_name
+
+
+class ImportGraph:
+    """
+    Imports between the given Python files. Module names are resolved to files the same way as
+    the checks import them, using the given module name function.
+    """
+
+    def __init__(
+            self,
+            file_paths: Iterable[str],
+            get_module_name: ModuleNameFunction,
+            cache_file_path: Optional[str] = None) -> None:
+        self.get_module_name_function = get_module_name
+        self.file_path_to_module_name: Dict[str, str] = {}
+        self.module_name_to_file_paths: Dict[str, List[str]] = {}
+        self.file_hashes: Dict[str, str] = {}
+
+        # Module names imported by each file (directly), and the reverse mapping.
+        self.file_path_to_imports: Dict[str, List[str]] = {}
+        self.module_name_to_importers: Dict[str, Set[str]] = {}
+
+        self.dependency_hashes: Dict[str, str] = {}
+        self.num_files_parsed = 0
+
+        cached_imports = self.load_cache(cache_file_path)
+        file_path_to_entry_key: Dict[str, str] = {}
+        new_cache_entries: Dict[str, Optional[List[str]]] = {}
+        files_to_parse: List[Tuple[str, str, Tuple[bytes, str, bool]]] = []
+        for file_path in sorted(set(file_paths)):
+            if not file_path.endswith('.py'):
+                continue
+            try:
+                with open(file_path, 'rb') as input_file:
+                    source = input_file.read()
+            except OSError as ex:
+                logging.debug("Could not read %s: %s", file_path, ex)
+                continue
+            module_name = get_module_name_for_graph(file_path, get_module_name)
+            is_package = get_module_name_from_path(file_path) == '__init__'
+            self.file_path_to_module_name[file_path] = module_name
+            self.module_name_to_file_paths.setdefault(module_name, []).append(file_path)
+            self.file_hashes[file_path] = hashlib.sha256(source).hexdigest()
+
+            entry_key = get_sha256_of_strings(
+                [self.file_hashes[file_path], module_name, str(is_package)])
+            file_path_to_entry_key[file_path] = entry_key
+            if entry_key in cached_imports:
+                new_cache_entries[entry_key] = cached_imports[entry_key]
+            else:
+                files_to_parse.append((file_path, entry_key, (source, module_name, is_package)))
+
+        # Files are parsed in the calling thread. Worker processes would have to be forked from a
+        # process that may be running other threads (e.g. in watch mode, or when using the API),
+        # or spawned, re-importing the main module of the caller.
+        for _, entry_key, (source, module_name, is_package) in files_to_parse:
+            new_cache_entries[entry_key] = find_imports(source, module_name, is_package)
+        self.num_files_parsed = len(files_to_parse)
+
+        for file_path, entry_key in file_path_to_entry_key.items():
+            imports = new_cache_entries[entry_key] or []
+            self.file_path_to_imports[file_path] = imports
+            # Importing a module also runs the __init__.py files of its parent packages, so it
+            # depends on them like on the modules it imports.
+            parent_package_names: Set[str] = set()
+            add_module_and_parents(self.file_path_to_module_name[file_path], parent_package_names)
+            parent_package_names.discard(self.file_path_to_module_name[file_path])
+            for imported_module_name in parent_package_names.union(imports):
+                self.module_name_to_importers.setdefault(
+                    imported_module_name, set()).add(file_path)
+
+        if cache_file_path is not None and new_cache_entries != cached_imports:
+            self.save_cache(cache_file_path, new_cache_entries)
+
+    @staticmethod
+    def load_cache(cache_file_path: Optional[str]) -> Dict[str, Optional[List[str]]]:
+        if cache_file_path is None or not os.path.exists(cache_file_path):
+            return {}
+        try:
+            with open(cache_file_path) as cache_file:
+                cache_data = json.load(cache_file)
+            if cache_data['version'] == IMPORT_CACHE_FORMAT_VERSION:
+                entries: Dict[str, Optional[List[str]]] = cache_data['entries']
+                return entries
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            logging.warning("Could not read the import graph cache %s: %s", cache_file_path, ex)
+        return {}
+
+    @staticmethod
+    def save_cache(cache_file_path: str, entries: Dict[str, Optional[List[str]]]) -> None:
+        """
+        Saves the entries for the current files only, so that the cache does not grow forever.
+        """
+        cache_dir = os.path.dirname(cache_file_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as tmp_file:
+                    json.dump({'version': IMPORT_CACHE_FORMAT_VERSION, 'entries': entries},
+                              tmp_file)
+                os.replace(tmp_path, cache_file_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as ex:
+            logging.warning("Failed to save the import graph cache %s: %s", cache_file_path, ex)
+
+    def get_module_name(self, file_path: str) -> Optional[str]:
+        return self.file_path_to_module_name.get(file_path)
+
+    def get_dependent_file_paths(self, file_paths: Iterable[str]) -> Set[str]:
+        """
+        Returns the files that directly or indirectly import any of the given files, not including
+        the given files themselves. The given files do not have to exist, e.g. they could have
+        been deleted, in which case module names are found using the module name function.
+        """
+        initial_file_paths = set(file_path for file_path in file_paths
+                                 if file_path.endswith('.py'))
+        visited: Set[str] = set(initial_file_paths)
+        queue: List[str] = sorted(initial_file_paths)
+        while queue:
+            file_path = queue.pop()
+            module_name = self.get_module_name(file_path)
+            if module_name is None:
+                module_name = get_module_name_for_graph(file_path, self.get_module_name_function)
+            for importer in self.module_name_to_importers.get(module_name, set()):
+                if importer not in visited:
+                    visited.add(importer)
+                    queue.append(importer)
+        return visited - initial_file_paths
+
+    def get_dependency_module_names(self, file_path: str) -> Set[str]:
+        """
+        Returns the names of all modules that importing the given file could import, directly or
+        indirectly through other files of the graph, including its own parent packages. Names of
+        modules outside of the graph (e.g. the standard library) are included but not followed.
+        """
+        module_name = self.file_path_to_module_name[file_path]
+        result: Set[str] = set()
+        add_module_and_parents(module_name, result)
+        result.discard(module_name)
+        result.update(self.file_path_to_imports[file_path])
+        queue = sorted(result)
+        while queue:
+            for dependency_file_path in self.module_name_to_file_paths.get(queue.pop(), []):
+                for imported_module_name in self.file_path_to_imports[dependency_file_path]:
+                    if imported_module_name not in result:
+                        result.add(imported_module_name)
+                        queue.append(imported_module_name)
+        return result
+
+    def get_dependency_hash(self, file_path: str, root_path: str) -> str:
+        """
+        Returns a hash of the names of all dependency modules of the given file and of the paths
+        (relative to root_path) and contents of the files of the graph implementing them. Names
+        of modules not found in the graph are included, so that e.g. adding a module that was
+        previously imported from elsewhere changes the hash.
+        """
+        if file_path not in self.dependency_hashes:
+            key_parts: List[str] = []
+            for module_name in sorted(self.get_dependency_module_names(file_path)):
+                key_parts.append(module_name)
+                for dependency_file_path in self.module_name_to_file_paths.get(module_name, []):
+                    key_parts.append(os.path.relpath(dependency_file_path, root_path))
+                    key_parts.append(self.file_hashes[dependency_file_path])
+            self.dependency_hashes[file_path] = get_sha256_of_strings(key_parts)
+        return self.dependency_hashes[file_path]
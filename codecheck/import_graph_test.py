@@ -0,0 +1,115 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List, Optional, Set
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from codecheck.import_graph import ImportGraph
+
+
+FILES = {
+    'app.py': 'from pkg import api\n',
+    'pkg/__init__.py': '',
+    'pkg/api.py': 'from . import impl\nimport json\n',
+    'pkg/impl.py': 'from .util import helper\n',
+    'pkg/util.py': 'def helper() -> None:\n    pass\n',
+    'standalone.py': 'import os\n',
+    'broken.py': 'import pkg.util\ndef f(:\n',
+}
+
+
+class ImportGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_import_graph_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        for file_name, content in FILES.items():
+            self.write_file(file_name, content)
+        self.cache_file_path = os.path.join(self.root_path, 'state', 'import_graph.json')
+
+    def write_file(self, file_name: str, content: str) -> None:
+        file_path = self.get_path(file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as output_file:
+            output_file.write(content)
+
+    def get_path(self, file_name: str) -> str:
+        return os.path.join(self.root_path, file_name)
+
+    def get_module_name(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.root_path)[:-len('.py')].replace(os.sep, '.')
+
+    def create_graph(self, cache_file_path: Optional[str] = None) -> ImportGraph:
+        return ImportGraph(
+            [self.get_path(file_name) for file_name in FILES],
+            self.get_module_name,
+            cache_file_path)
+
+    def get_dependents(self, import_graph: ImportGraph, file_names: List[str]) -> Set[str]:
+        return set(
+            os.path.relpath(file_path, self.root_path)
+            for file_path in import_graph.get_dependent_file_paths(
+                [self.get_path(file_name) for file_name in file_names]))
+
+    def test_dependents(self) -> None:
+        import_graph = self.create_graph()
+        self.assertEqual(
+            self.get_dependents(import_graph, ['pkg/util.py']),
+            {'pkg/impl.py', 'pkg/api.py', 'app.py'})
+        self.assertEqual(self.get_dependents(import_graph, ['pkg/api.py']), {'app.py'})
+        # Importing a submodule runs the __init__.py of its package.
+        self.assertEqual(
+            self.get_dependents(import_graph, ['pkg/__init__.py']),
+            {'pkg/impl.py', 'pkg/api.py', 'pkg/util.py', 'app.py'})
+        self.assertEqual(self.get_dependents(import_graph, ['standalone.py']), set())
+        # Files that cannot be parsed do not import anything.
+        self.assertNotIn('broken.py', self.get_dependents(import_graph, ['pkg/util.py']))
+
+    def test_deleted_file(self) -> None:
+        import_graph = self.create_graph()
+        os.remove(self.get_path('pkg/impl.py'))
+        self.assertEqual(
+            self.get_dependents(import_graph, ['pkg/impl.py']), {'pkg/api.py', 'app.py'})
+
+    def test_dependency_hash(self) -> None:
+        app_hash = self.create_graph().get_dependency_hash(self.get_path('app.py'), self.root_path)
+        standalone_hash = self.create_graph().get_dependency_hash(
+            self.get_path('standalone.py'), self.root_path)
+        self.write_file('pkg/util.py', 'def helper() -> int:\n    return 1\n')
+        import_graph = self.create_graph()
+        self.assertNotEqual(
+            import_graph.get_dependency_hash(self.get_path('app.py'), self.root_path), app_hash)
+        self.assertEqual(
+            import_graph.get_dependency_hash(self.get_path('standalone.py'), self.root_path),
+            standalone_hash)
+
+    def test_cache(self) -> None:
+        self.assertEqual(self.create_graph(self.cache_file_path).num_files_parsed, len(FILES))
+        self.assertEqual(self.create_graph(self.cache_file_path).num_files_parsed, 0)
+        self.write_file('standalone.py', 'import pkg.api\n')
+        import_graph = self.create_graph(self.cache_file_path)
+        self.assertEqual(import_graph.num_files_parsed, 1)
+        self.assertIn('standalone.py', self.get_dependents(import_graph, ['pkg/api.py']))
+
+        # A corrupted cache file is ignored.
+        with open(self.cache_file_path, 'w') as cache_file:
+            cache_file.write('{')
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(
+                self.create_graph(self.cache_file_path).num_files_parsed, len(FILES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Runs the compile and pycodestyle checks inside the codecheck process, producing the same output
+and exit code as "python -m py_compile <file>" and "python -m pycodestyle <files>" would, without
+paying the interpreter startup cost. The tools are called as libraries, so no interpreter-global
+state (sys.argv, sys.stdout, sys.modules) is changed, and any number of these checks can run in
+parallel threads. Neither tool executes the checked code.
+"""
+
+from typing import Any, List, Optional
+
+import py_compile
+import re
+
+from codecheck.process_util import ProcessResult
+
+
+def run_compile_check(file_paths: List[str]) -> ProcessResult:
+    """
+    The equivalent of "python -m py_compile <file_paths>", which stops at the first file that
+    fails to compile.
+    """
+    for file_path in file_paths:
+        try:
+            py_compile.compile(file_path, doraise=True)
+        except py_compile.PyCompileError as error:
+            return ProcessResult(stdout='', stderr=error.msg, returncode=1)
+        except OSError as error:
+            return ProcessResult(stdout='', stderr=str(error), returncode=1)
+    return ProcessResult(stdout='', stderr='', returncode=0)
+
+
+def run_pycodestyle_check(file_paths: List[str]) -> Optional[ProcessResult]:
+    """
+    The equivalent of "python -m pycodestyle <file_paths>", using the same user and project
+    configuration. Returns None if pycodestyle is not installed, or if the configuration asks for
+    output that is only produced by the command line tool (e.g. --benchmark), in which case the
+    check should be run as a separate process.
+    """
+    try:
+        import pycodestyle  # type: ignore
+    except ImportError:
+        return None
+
+    class CollectingReport(pycodestyle.StandardReport):  # type: ignore
+        """
+        Collects the lines that StandardReport would print to standard output.
+        """
+
+        def __init__(self, options: Any) -> None:
+            super().__init__(options)
+            self.output_lines: List[str] = []
+
+        def get_file_results(self) -> int:
+            self._deferred_print.sort()
+            for line_number, offset, code, text, doc in self._deferred_print:
+                self.output_lines.append(self._fmt % {
+                    'path': self.filename,
+                    'row': self.line_offset + line_number,
+                    'col': offset + 1,
+                    'code': code,
+                    'text': text,
+                })
+                if self._show_source:
+                    line = (
+                        '' if line_number > len(self.lines) else self.lines[line_number - 1])
+                    self.output_lines.append(line.rstrip())
+                    self.output_lines.append(re.sub(r'\S', ' ', line[:offset]) + '^')
+                if self._show_pep8 and doc:
+                    self.output_lines.append('    ' + doc.strip())
+            file_errors: int = self.file_errors
+            return file_errors
+
+    style_guide = pycodestyle.StyleGuide(paths=file_paths)
+    options = style_guide.options
+    if options.verbose or options.quiet or options.benchmark or options.diff:
+        return None
+    report = style_guide.init_report(CollectingReport)
+    style_guide.check_files()
+    output_lines = report.output_lines
+    if options.statistics:
+        output_lines.extend(report.get_statistics())
+    stderr = ''
+    if report.total_errors and options.count:
+        stderr = '%d\n' % report.total_errors
+    return ProcessResult(
+        stdout=''.join(line + '\n' for line in output_lines),
+        stderr=stderr,
+        returncode=1 if report.total_errors else 0)
+
+
+def run_check_in_process(check_type: str, file_paths: List[str]) -> Optional[ProcessResult]:
+    """
+    Runs a compile or pycodestyle check of the given files in the calling thread. Returns None if
+    the check has to be run as a separate process instead.
+    """
+    if check_type == 'compile':
+        return run_compile_check(file_paths)
+    if check_type == 'pycodestyle':
+        return run_pycodestyle_check(file_paths)
+    raise ValueError("Check type %s cannot run in-process" % check_type)
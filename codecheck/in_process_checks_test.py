@@ -0,0 +1,85 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from codecheck.in_process_checks import run_check_in_process
+from codecheck.process_util import ProcessResult
+
+
+FILES = {
+    'good.py': 'X = 1\n',
+    'syntax_error.py': 'def f(:\n',
+    'style.py': 'import os, sys\nx=1\n',
+    'long_line.py': 'X = "%s"\n' % ('a' * 90),
+}
+
+
+class InProcessChecksTest(unittest.TestCase):
+    """
+    Compares checks run in-process with the same checks run as separate processes.
+    """
+
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_in_process_checks_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        for file_name, content in FILES.items():
+            self.write_file(file_name, content)
+
+    def write_file(self, file_name: str, content: str) -> None:
+        with open(os.path.join(self.root_path, file_name), 'w') as output_file:
+            output_file.write(content)
+
+    def assert_same_result(self, check_type: str, file_names: List[str]) -> ProcessResult:
+        file_paths = [os.path.join(self.root_path, file_name) for file_name in file_names]
+        module_name = 'py_compile' if check_type == 'compile' else check_type
+        process = subprocess.run(
+            [sys.executable, '-m', module_name] + file_paths,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+        process_result = run_check_in_process(check_type, file_paths)
+        assert process_result is not None
+        self.assertEqual(process_result.returncode, process.returncode, file_names)
+        self.assertEqual(process_result.stdout, process.stdout)
+        return process_result
+
+    def test_compile(self) -> None:
+        self.assertEqual(self.assert_same_result('compile', ['good.py']).stderr, '')
+        process_result = self.assert_same_result('compile', ['good.py', 'syntax_error.py'])
+        self.assertIn('syntax_error.py', process_result.stderr)
+        self.assertIn('SyntaxError', process_result.stderr)
+
+    def test_pycodestyle(self) -> None:
+        for file_name in FILES:
+            self.assert_same_result('pycodestyle', [file_name])
+        self.assert_same_result('pycodestyle', sorted(FILES))
+
+    def test_pycodestyle_project_config(self) -> None:
+        self.write_file('setup.cfg', '[pycodestyle]\nmax-line-length = 100\nshow-source = True\n')
+        self.assertEqual(self.assert_same_result('pycodestyle', ['long_line.py']).returncode, 0)
+        self.assert_same_result('pycodestyle', ['style.py'])
+
+    def test_unsupported_check_type(self) -> None:
+        with self.assertRaises(ValueError):
+            run_check_in_process('mypy', [os.path.join(self.root_path, 'good.py')])
+
+
+if __name__ == '__main__':
+    unittest.main()
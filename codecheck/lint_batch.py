@@ -0,0 +1,247 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Support for checking many files with one pycodestyle or shellcheck invocation and splitting the
+combined output back into per-file results.
+"""
+
+from typing import Dict, List, Optional
+
+import os
+import re
+
+from codecheck.check_result import CheckResult
+from codecheck.diagnostics import (
+    PYCODESTYLE_LINE_RE,
+    SHELLCHECK_LOCATION_RE,
+    SHELLCHECK_MESSAGE_RE,
+)
+
+
+SHELLCHECK_SUMMARY_HEADER = 'For more information:'
+
+# E.g. "  https://www.shellcheck.net/wiki/SC2086 -- Double quote to prevent globbing ...".
+SHELLCHECK_WIKI_LINK_RE = re.compile(r'^\s+\S+/wiki/(SC\d+) ')
+
+
+def find_nearest_config_dir(path: str, config_names: List[str]) -> Optional[str]:
+    """
+    Returns the closest of the given path and its parent directories that contains any of the
+    given configuration files, like pycodestyle looks for its project configuration, or None.
+    """
+    dir_path = os.path.abspath(path)
+    while True:
+        if any(os.path.isfile(os.path.join(dir_path, config_name))
+               for config_name in config_names):
+            return dir_path
+        parent_dir_path = os.path.dirname(dir_path)
+        if parent_dir_path == dir_path:
+            return None
+        dir_path = parent_dir_path
+
+
+def split_into_batches(
+        file_paths: List[str], max_batch_size: int, min_num_batches: int) -> List[List[str]]:
+    """
+    Splits the given files into batches of at most the given size, and into at least the given
+    number of batches (e.g. the parallelism, so that all workers get a batch) as long as there are
+    enough files. Batch sizes differ by at most one.
+
+    >>> split_into_batches(['a', 'b', 'c', 'd', 'e'], 2, 1)
+    [['a', 'b'], ['c', 'd'], ['e']]
+    >>> split_into_batches(['a', 'b', 'c', 'd', 'e'], 50, 2)
+    [['a', 'b', 'c'], ['d', 'e']]
+    >>> split_into_batches(['a'], 50, 4)
+    [['a']]
+    """
+    num_batches = max(
+        (len(file_paths) + max_batch_size - 1) // max_batch_size,
+        min(min_num_batches, len(file_paths)))
+    batches = []
+    start = 0
+    for batch_index in range(num_batches):
+        end = start + (len(file_paths) - start) // (num_batches - batch_index)
+        if (len(file_paths) - start) % (num_batches - batch_index):
+            end += 1
+        batches.append(file_paths[start:end])
+        start = end
+    return batches
+
+
+class LintOutputSplit:
+    def __init__(self) -> None:
+        # Output lines for each of the checked files, keyed by absolute path.
+        self.lines_by_file: Dict[str, List[str]] = {}
+
+        # Lines that could not be attributed to any of the checked files.
+        self.unattributed_lines: List[str] = []
+
+        # For shellcheck, the lines of the final "For more information" section, by warning code.
+        self.wiki_link_lines: Dict[str, str] = {}
+
+    def add_line(self, file_path: Optional[str], line: str) -> None:
+        if file_path is None:
+            self.unattributed_lines.append(line)
+        else:
+            self.lines_by_file.setdefault(file_path, []).append(line)
+
+
+def split_pycodestyle_output(output: str, file_paths: List[str]) -> LintOutputSplit:
+    """
+    Attributes each line of pycodestyle output to one of the given files. Lines that do not start
+    with a file path (e.g. source lines shown with the show-source option) are attributed to the
+    same file as the preceding line.
+
+    >>> split = split_pycodestyle_output(
+    ...     'a.py:1:80: E501 line too long (81 > 79 characters)\\n'
+    ...     'b.py:2:1: W391 blank line at end of file\\n'
+    ...     '\\n'
+    ...     '^\\n', [os.path.abspath('a.py'), os.path.abspath('b.py')])
+    >>> [(os.path.basename(k), v) for k, v in sorted(split.lines_by_file.items())]
+    [('a.py', ['a.py:1:80: E501 line too long (81 > 79 characters)']), \
+('b.py', ['b.py:2:1: W391 blank line at end of file', '', '^'])]
+    """
+    result = LintOutputSplit()
+    abs_file_paths = set(os.path.abspath(file_path) for file_path in file_paths)
+    current_file_path: Optional[str] = None
+    for line in output.splitlines():
+        match = PYCODESTYLE_LINE_RE.match(line)
+        if match:
+            abs_path = os.path.abspath(match.group(1))
+            current_file_path = abs_path if abs_path in abs_file_paths else None
+        result.add_line(current_file_path, line)
+    return result
+
+
+def split_shellcheck_output(output: str, file_paths: List[str]) -> LintOutputSplit:
+    """
+    Splits shellcheck output in its default format into the blocks reported for each of the given
+    files, and collects the links to the explanations of the warnings from the final summary.
+
+    >>> split = split_shellcheck_output(
+    ...     '\\n'
+    ...     'In a.sh line 2:\\n'
+    ...     'echo $foo\\n'
+    ...     '     ^--^ SC2086 (info): Double quote to prevent globbing.\\n'
+    ...     '\\n'
+    ...     '\\n'
+    ...     'In b.sh line 3:\\n'
+    ...     'cd /x\\n'
+    ...     '^---^ SC2164 (warning): Use cd ... || exit.\\n'
+    ...     '\\n'
+    ...     'For more information:\\n'
+    ...     '  https://www.shellcheck.net/wiki/SC2086 -- Double quote to prevent globbing.\\n'
+    ...     '  https://www.shellcheck.net/wiki/SC2164 -- Use cd ... || exit.\\n',
+    ...     [os.path.abspath('a.sh'), os.path.abspath('b.sh')])
+    >>> for file_path, lines in sorted(split.lines_by_file.items()):
+    ...     print(os.path.basename(file_path), lines)
+    a.sh ['In a.sh line 2:', 'echo $foo', \
+'     ^--^ SC2086 (info): Double quote to prevent globbing.', '', '']
+    b.sh ['In b.sh line 3:', 'cd /x', '^---^ SC2164 (warning): Use cd ... || exit.', '']
+    >>> sorted(split.wiki_link_lines)
+    ['SC2086', 'SC2164']
+    """
+    result = LintOutputSplit()
+    abs_file_paths = set(os.path.abspath(file_path) for file_path in file_paths)
+    current_file_path: Optional[str] = None
+    is_in_summary = False
+    for line in output.splitlines():
+        if line == SHELLCHECK_SUMMARY_HEADER:
+            is_in_summary = True
+            continue
+        if is_in_summary:
+            wiki_link_match = SHELLCHECK_WIKI_LINK_RE.match(line)
+            if wiki_link_match:
+                result.wiki_link_lines[wiki_link_match.group(1)] = line
+            continue
+        location_match = SHELLCHECK_LOCATION_RE.match(line)
+        if location_match:
+            abs_path = os.path.abspath(location_match.group(1))
+            current_file_path = abs_path if abs_path in abs_file_paths else None
+        elif current_file_path is None and not line:
+            # The empty line at the start of the output.
+            continue
+        result.add_line(current_file_path, line)
+    return result
+
+
+def get_shellcheck_file_output(lines: List[str], wiki_link_lines: Dict[str, str]) -> str:
+    """
+    Formats the blocks reported for one file like the output of shellcheck for that file alone.
+    """
+    while lines and not lines[-1]:
+        lines = lines[:-1]
+    if not lines:
+        return ''
+    codes = []
+    for line in lines:
+        message_match = SHELLCHECK_MESSAGE_RE.match(line)
+        if message_match and message_match.group(2) not in codes:
+            codes.append(message_match.group(2))
+    summary_lines = [wiki_link_lines[code] for code in codes if code in wiki_link_lines]
+    if summary_lines:
+        lines = lines + ['', SHELLCHECK_SUMMARY_HEADER] + summary_lines
+    return ''.join('\n' + line for line in lines) + '\n'
+
+
+def split_lint_batch_result(
+        check_type: str,
+        file_paths: List[str],
+        per_file_cmd_args: Dict[str, List[str]],
+        stdout: str,
+        stderr: str,
+        returncode: int) -> List[CheckResult]:
+    """
+    Converts the result of one pycodestyle or shellcheck invocation on the given files into
+    per-file check results that look like the results of checking each file separately. A file
+    fails if any problems were reported for it.
+    """
+    assert check_type in ['pycodestyle', 'shellcheck'], f"Unexpected check type: {check_type}"
+    extra_messages = ['Checked by %s in a batch of %d files' % (check_type, len(file_paths))]
+    if check_type == 'pycodestyle':
+        split = split_pycodestyle_output(stdout, file_paths)
+    else:
+        split = split_shellcheck_output(stdout, file_paths)
+    if returncode not in [0, 1] or (returncode == 1 and not split.lines_by_file):
+        # The tool crashed or could not start, or failed to check some of the files, e.g. because
+        # they could not be read. Attribute the whole output to every file.
+        return [
+            CheckResult(
+                check_type=check_type,
+                file_path=file_path,
+                cmd_args=per_file_cmd_args[file_path],
+                stdout=stdout,
+                stderr=stderr,
+                returncode=returncode,
+                extra_messages=extra_messages)
+            for file_path in file_paths
+        ]
+
+    results = []
+    for file_path in file_paths:
+        # Lines about other files, e.g. scripts sourced by the checked ones, are reported for every
+        # file, as they could have been caused by any of them.
+        lines = split.lines_by_file.get(os.path.abspath(file_path), []) + split.unattributed_lines
+        if check_type == 'pycodestyle':
+            file_stdout = ''.join(line + '\n' for line in lines)
+        else:
+            file_stdout = get_shellcheck_file_output(lines, split.wiki_link_lines)
+        results.append(CheckResult(
+            check_type=check_type,
+            file_path=file_path,
+            cmd_args=per_file_cmd_args[file_path],
+            stdout=file_stdout,
+            stderr=stderr,
+            returncode=1 if file_stdout else 0,
+            extra_messages=extra_messages))
+    return results
@@ -0,0 +1,211 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Dict, List
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from codecheck.check_result import CheckResult
+from codecheck.lint_batch import find_nearest_config_dir, split_lint_batch_result
+
+
+def split(
+        check_type: str,
+        file_paths: List[str],
+        stdout: str,
+        returncode: int,
+        stderr: str = '') -> Dict[str, CheckResult]:
+    results = split_lint_batch_result(
+        check_type,
+        file_paths,
+        {file_path: [check_type, file_path] for file_path in file_paths},
+        stdout,
+        stderr,
+        returncode)
+    return {os.path.basename(check_result.file_path): check_result for check_result in results}
+
+
+PYTHON_FILE_PATHS = ['/src/a.py', '/src/b.py', '/src/c.py']
+SHELL_FILE_PATHS = ['/src/a.sh', '/src/b.sh']
+
+
+class SplitLintBatchResultTest(unittest.TestCase):
+    def test_pycodestyle(self) -> None:
+        results = split(
+            'pycodestyle',
+            PYTHON_FILE_PATHS,
+            '/src/a.py:1:80: E501 line too long (81 > 79 characters)\n'
+            '/src/c.py:2:1: W391 blank line at end of file\n'
+            '/src/a.py:3:1: E302 expected 2 blank lines, found 1\n',
+            1)
+        self.assertEqual(
+            results['a.py'].stdout,
+            '/src/a.py:1:80: E501 line too long (81 > 79 characters)\n'
+            '/src/a.py:3:1: E302 expected 2 blank lines, found 1\n')
+        self.assertEqual(results['a.py'].returncode, 1)
+        self.assertEqual(results['a.py'].cmd_args, ['pycodestyle', '/src/a.py'])
+        self.assertEqual(
+            results['a.py'].extra_messages, ['Checked by pycodestyle in a batch of 3 files'])
+        self.assertEqual(results['b.py'].stdout, '')
+        self.assertEqual(results['b.py'].returncode, 0)
+        self.assertEqual(results['c.py'].stdout, '/src/c.py:2:1: W391 blank line at end of file\n')
+
+    def test_shellcheck(self) -> None:
+        results = split(
+            'shellcheck',
+            SHELL_FILE_PATHS + ['/src/c.sh'],
+            '\n'
+            'In /src/a.sh line 2:\n'
+            'echo $foo\n'
+            '     ^--^ SC2086 (info): Double quote to prevent globbing.\n'
+            '\n'
+            '\n'
+            'In /src/b.sh line 3:\n'
+            'cd /x\n'
+            '^---^ SC2164 (warning): Use cd ... || exit.\n'
+            '\n'
+            'For more information:\n'
+            '  https://www.shellcheck.net/wiki/SC2086 -- Double quote to prevent globbing.\n'
+            '  https://www.shellcheck.net/wiki/SC2164 -- Use cd ... || exit.\n',
+            1)
+        # Every file gets only the explanations of its own warnings.
+        self.assertEqual(
+            results['a.sh'].stdout,
+            '\n'
+            'In /src/a.sh line 2:\n'
+            'echo $foo\n'
+            '     ^--^ SC2086 (info): Double quote to prevent globbing.\n'
+            '\n'
+            'For more information:\n'
+            '  https://www.shellcheck.net/wiki/SC2086 -- Double quote to prevent globbing.\n')
+        self.assertEqual(results['a.sh'].returncode, 1)
+        self.assertIn('SC2164', results['b.sh'].stdout)
+        self.assertNotIn('SC2086', results['b.sh'].stdout)
+        self.assertEqual(results['c.sh'].stdout, '')
+        self.assertEqual(results['c.sh'].returncode, 0)
+
+    def test_output_about_other_files_is_reported_for_every_file(self) -> None:
+        results = split(
+            'shellcheck',
+            SHELL_FILE_PATHS,
+            '\n'
+            'In /src/a.sh line 2:\n'
+            'echo $foo\n'
+            '     ^--^ SC2086 (info): Double quote to prevent globbing.\n'
+            '\n'
+            '\n'
+            'In /src/sourced.sh line 1:\n'
+            'echo $bar\n'
+            '     ^--^ SC2086 (info): Double quote to prevent globbing.\n',
+            1)
+        for file_name in ['a.sh', 'b.sh']:
+            self.assertEqual(results[file_name].returncode, 1)
+            self.assertIn('In /src/sourced.sh line 1:', results[file_name].stdout)
+        self.assertNotIn('In /src/a.sh', results['b.sh'].stdout)
+
+    def test_crash_output_is_reported_for_every_file(self) -> None:
+        stdout = 'Traceback (most recent call last):\nRuntimeError: crash\n'
+        for check_type, file_paths in [('pycodestyle', PYTHON_FILE_PATHS),
+                                       ('shellcheck', SHELL_FILE_PATHS)]:
+            # Exit code 1 without output about any of the files means that checking failed too.
+            for returncode in [1, 2, -9]:
+                results = split(check_type, file_paths, stdout, returncode, stderr='Error\n')
+                self.assertEqual(len(results), len(file_paths))
+                for check_result in results.values():
+                    self.assertEqual(check_result.returncode, returncode)
+                    self.assertEqual(check_result.stdout, stdout)
+                    self.assertEqual(check_result.stderr, 'Error\n')
+
+
+class FindNearestConfigDirTest(unittest.TestCase):
+    def test_find_nearest_config_dir(self) -> None:
+        root_path = tempfile.mkdtemp(prefix='codecheck_lint_batch_test_')
+        self.addCleanup(shutil.rmtree, root_path)
+        os.makedirs(os.path.join(root_path, 'sub', 'dir'))
+        for config_path in ['setup.cfg', 'sub/tox.ini']:
+            with open(os.path.join(root_path, config_path), 'w'):
+                pass
+        config_names = ['setup.cfg', 'tox.ini']
+        self.assertEqual(
+            find_nearest_config_dir(os.path.join(root_path, 'sub', 'dir', 'a.py'), config_names),
+            os.path.join(root_path, 'sub'))
+        self.assertEqual(
+            find_nearest_config_dir(os.path.join(root_path, 'a.py'), config_names), root_path)
+        self.assertIsNone(
+            find_nearest_config_dir(os.path.join(root_path, 'a.py'), ['no_such_config']))
+
+
+class LintBatchTest(unittest.TestCase):
+    """
+    Compares the split results of real pycodestyle and shellcheck batches with separate runs.
+    """
+
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_lint_batch_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+
+    def write_files(self, files: Dict[str, str]) -> List[str]:
+        for file_name, content in files.items():
+            with open(os.path.join(self.root_path, file_name), 'w') as output_file:
+                output_file.write(content)
+        return [os.path.join(self.root_path, file_name) for file_name in sorted(files)]
+
+    def check_batch_matches_separate_runs(
+            self, check_type: str, cmd_args: List[str], file_paths: List[str]) -> None:
+        def run(file_paths: List[str]) -> 'subprocess.CompletedProcess[str]':
+            return subprocess.run(
+                cmd_args + file_paths,
+                cwd=self.root_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True)
+
+        batch_process = run(file_paths)
+        results = split_lint_batch_result(
+            check_type,
+            file_paths,
+            {file_path: [] for file_path in file_paths},
+            batch_process.stdout,
+            batch_process.stderr,
+            batch_process.returncode)
+        self.assertEqual(len(results), len(file_paths))
+        for check_result in results:
+            process = run([check_result.file_path])
+            self.assertEqual(check_result.returncode, process.returncode, check_result.file_path)
+            self.assertEqual(check_result.stdout, process.stdout)
+
+    def test_pycodestyle(self) -> None:
+        file_paths = self.write_files({
+            'ok.py': 'X = 1\n',
+            'bad.py': 'X=1\nimport os\n',
+            'worse.py': 'def f( ):\n  return 1\n',
+        })
+        self.check_batch_matches_separate_runs(
+            'pycodestyle', [sys.executable, '-m', 'pycodestyle', '--show-source'], file_paths)
+
+    @unittest.skipUnless(shutil.which('shellcheck'), 'shellcheck is not installed')
+    def test_shellcheck(self) -> None:
+        file_paths = self.write_files({
+            'ok.sh': '#!/bin/bash\necho ok\n',
+            'bad.sh': '#!/bin/bash\necho $1\n',
+            'worse.sh': '#!/bin/bash\ncd /tmp\necho $1 $2\n',
+        })
+        self.check_batch_matches_separate_runs('shellcheck', ['shellcheck'], file_paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Support for checking many files with one mypy invocation and splitting the combined output back
+into per-file results.
+"""
+
+from typing import Dict, List, Optional
+
+import os
+import re
+
+from codecheck.check_result import CheckResult
+
+
+# Matches lines such as "pkg/mod.py:12: error: ..." or "pkg/mod.py:12:5: note: ...".
+MYPY_MESSAGE_RE = re.compile(r'^(?P<path>.+?):(?:\d+:){0,2} (?P<severity>error|note|warning):')
+
+# Summary lines printed by mypy at the end of its output.
+MYPY_SUMMARY_RE = re.compile(r'^(Found \d+ errors? in \d+ files?|Success: no issues found)')
+
+
+class MypyOutputSplit:
+    def __init__(self) -> None:
+        # Output lines for each of the checked files, keyed by absolute path.
+        self.lines_by_file: Dict[str, List[str]] = {}
+        self.num_errors_by_file: Dict[str, int] = {}
+
+        # Messages about files that were not among the checked files, e.g. imported modules.
+        self.unattributed_lines: List[str] = []
+        self.num_unattributed_errors = 0
+
+
+def split_mypy_output(output: str, file_paths: List[str]) -> MypyOutputSplit:
+    """
+    Attributes each line of mypy output to one of the given files. Lines that do not start with a
+    file path (e.g. the continuation of a multi-line message) are attributed to the same file as
+    the preceding line. Summary lines are dropped.
+
+    >>> split = split_mypy_output(
+    ...     'a.py:1: error: Bad\\n'
+    ...     'a.py:1: note: See here\\n'
+    ...     'b.py:3:5: error: Worse\\n'
+    ...     '    details\\n'
+    ...     'c.py:7: error: Elsewhere\\n'
+    ...     'Found 3 errors in 3 files (checked 2 source files)\\n',
+    ...     [os.path.abspath('a.py'), os.path.abspath('b.py')])
+    >>> [(os.path.basename(k), v) for k, v in sorted(split.lines_by_file.items())]
+    [('a.py', ['a.py:1: error: Bad', 'a.py:1: note: See here']), \
+('b.py', ['b.py:3:5: error: Worse', '    details'])]
+    >>> sorted(split.num_errors_by_file.values())
+    [1, 1]
+    >>> split.unattributed_lines, split.num_unattributed_errors
+    (['c.py:7: error: Elsewhere'], 1)
+    """
+    result = MypyOutputSplit()
+    abs_file_paths = set(os.path.abspath(file_path) for file_path in file_paths)
+    current_file_path: Optional[str] = None
+    for line in output.splitlines():
+        if MYPY_SUMMARY_RE.match(line):
+            continue
+        match = MYPY_MESSAGE_RE.match(line)
+        if match:
+            abs_path = os.path.abspath(match.group('path'))
+            current_file_path = abs_path if abs_path in abs_file_paths else None
+            is_error = match.group('severity') == 'error'
+            if current_file_path is not None and is_error:
+                result.num_errors_by_file[current_file_path] = (
+                    result.num_errors_by_file.get(current_file_path, 0) + 1)
+            elif is_error:
+                result.num_unattributed_errors += 1
+
+        if current_file_path is None:
+            result.unattributed_lines.append(line)
+        else:
+            result.lines_by_file.setdefault(current_file_path, []).append(line)
+    return result
+
+
+def get_mypy_summary_line(num_errors: int) -> str:
+    """
+    >>> get_mypy_summary_line(1)
+    'Found 1 error in 1 file (checked 1 source file)'
+    >>> get_mypy_summary_line(3)
+    'Found 3 errors in 1 file (checked 1 source file)'
+    """
+    return 'Found %d error%s in 1 file (checked 1 source file)' % (
+        num_errors, '' if num_errors == 1 else 's')
+
+
+def split_mypy_batch_result(
+        file_paths: List[str],
+        per_file_cmd_args: Dict[str, List[str]],
+        stdout: str,
+        stderr: str,
+        returncode: int) -> List[CheckResult]:
+    """
+    Converts the result of one mypy invocation on the given files into per-file check results that
+    look like the results of running mypy on each file separately.
+    """
+    extra_messages = ['Checked by mypy in a batch of %d files' % len(file_paths)]
+    split = split_mypy_output(stdout, file_paths)
+    if returncode not in [0, 1] or (
+            returncode == 1 and
+            not split.num_errors_by_file and
+            not split.num_unattributed_errors):
+        # Mypy crashed or could not start, e.g. because of a configuration error. Attribute the
+        # whole output to every file.
+        return [
+            CheckResult(
+                check_type='mypy',
+                file_path=file_path,
+                cmd_args=per_file_cmd_args[file_path],
+                stdout=stdout,
+                stderr=stderr,
+                returncode=returncode,
+                extra_messages=extra_messages)
+            for file_path in file_paths
+        ]
+
+    results = []
+    for file_path in file_paths:
+        abs_path = os.path.abspath(file_path)
+        lines = list(split.lines_by_file.get(abs_path, []))
+        num_errors = split.num_errors_by_file.get(abs_path, 0)
+        if split.num_unattributed_errors:
+            # Errors in modules outside of the batch could have been caused by any of the files
+            # that import them, so we report them for every file, as a separate mypy invocation
+            # for each of those files would.
+            lines.extend(split.unattributed_lines)
+            num_errors += split.num_unattributed_errors
+        if num_errors:
+            lines.append(get_mypy_summary_line(num_errors))
+        results.append(CheckResult(
+            check_type='mypy',
+            file_path=file_path,
+            cmd_args=per_file_cmd_args[file_path],
+            stdout=''.join(line + '\n' for line in lines),
+            stderr=stderr,
+            returncode=1 if num_errors else 0,
+            extra_messages=extra_messages))
+    return results
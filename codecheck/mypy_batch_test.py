@@ -0,0 +1,143 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Dict, List
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from codecheck.check_result import CheckResult
+from codecheck.mypy_batch import split_mypy_batch_result
+
+
+FILE_PATHS = ['/src/a.py', '/src/b.py', '/src/c.py']
+
+
+def split(stdout: str, returncode: int, stderr: str = '') -> Dict[str, CheckResult]:
+    results = split_mypy_batch_result(
+        FILE_PATHS,
+        {file_path: ['mypy', file_path] for file_path in FILE_PATHS},
+        stdout,
+        stderr,
+        returncode)
+    return {os.path.basename(check_result.file_path): check_result for check_result in results}
+
+
+class SplitMypyBatchResultTest(unittest.TestCase):
+    def test_success(self) -> None:
+        results = split('Success: no issues found in 3 source files\n', 0)
+        self.assertEqual(sorted(results), ['a.py', 'b.py', 'c.py'])
+        for check_result in results.values():
+            self.assertEqual(check_result.returncode, 0)
+            self.assertEqual(check_result.stdout, '')
+            self.assertEqual(
+                check_result.extra_messages, ['Checked by mypy in a batch of 3 files'])
+        self.assertEqual(results['b.py'].cmd_args, ['mypy', '/src/b.py'])
+
+    def test_errors_are_split_by_file(self) -> None:
+        results = split(
+            '/src/a.py:1: error: Bad  [misc]\n'
+            '/src/a.py:1: note: See here\n'
+            '/src/a.py:2:5: error: Worse  [misc]\n'
+            '/src/b.py:3: note: Only a note\n'
+            'Found 2 errors in 1 file (checked 3 source files)\n',
+            1)
+        self.assertEqual(results['a.py'].returncode, 1)
+        self.assertEqual(
+            results['a.py'].stdout,
+            '/src/a.py:1: error: Bad  [misc]\n'
+            '/src/a.py:1: note: See here\n'
+            '/src/a.py:2:5: error: Worse  [misc]\n'
+            'Found 2 errors in 1 file (checked 1 source file)\n')
+        self.assertEqual(results['b.py'].returncode, 0)
+        self.assertEqual(results['b.py'].stdout, '/src/b.py:3: note: Only a note\n')
+        self.assertEqual(results['c.py'].returncode, 0)
+        self.assertEqual(results['c.py'].stdout, '')
+
+    def test_errors_in_other_modules_are_reported_for_every_file(self) -> None:
+        results = split(
+            '/src/a.py:1: error: Bad  [misc]\n'
+            '/lib/imported.py:5: error: Elsewhere  [misc]\n'
+            'Found 2 errors in 2 files (checked 3 source files)\n',
+            1)
+        self.assertEqual(
+            results['a.py'].stdout,
+            '/src/a.py:1: error: Bad  [misc]\n'
+            '/lib/imported.py:5: error: Elsewhere  [misc]\n'
+            'Found 2 errors in 1 file (checked 1 source file)\n')
+        for file_name in ['b.py', 'c.py']:
+            self.assertEqual(results[file_name].returncode, 1)
+            self.assertEqual(
+                results[file_name].stdout,
+                '/lib/imported.py:5: error: Elsewhere  [misc]\n'
+                'Found 1 error in 1 file (checked 1 source file)\n')
+
+    def test_crash_output_is_reported_for_every_file(self) -> None:
+        stdout = 'Traceback (most recent call last):\nRuntimeError: crash\n'
+        for returncode in [1, 2]:
+            results = split(stdout, returncode, stderr='Internal error\n')
+            for check_result in results.values():
+                self.assertEqual(check_result.returncode, returncode)
+                self.assertEqual(check_result.stdout, stdout)
+                self.assertEqual(check_result.stderr, 'Internal error\n')
+
+
+class MypyBatchTest(unittest.TestCase):
+    """
+    Compares the split results of a real mypy batch with separate mypy runs.
+    """
+
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_mypy_batch_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        files = {
+            'ok.py': 'X: int = 1\n',
+            'bad.py': 'from ok import X\n\nY: str = X\n',
+            'worse.py': 'def f() -> int:\n    return "a"\n\n\nZ: str = 1\n',
+        }
+        for file_name, content in files.items():
+            with open(os.path.join(self.root_path, file_name), 'w') as output_file:
+                output_file.write(content)
+        self.file_paths = [os.path.join(self.root_path, file_name) for file_name in sorted(files)]
+
+    def run_mypy(self, file_paths: List[str]) -> 'subprocess.CompletedProcess[str]':
+        return subprocess.run(
+            [sys.executable, '-m', 'mypy', '--no-incremental', '--no-error-summary',
+             '--show-absolute-path'] + file_paths,
+            cwd=self.root_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+
+    def test_batch_matches_separate_runs(self) -> None:
+        batch_process = self.run_mypy(self.file_paths)
+        results = split_mypy_batch_result(
+            self.file_paths,
+            {file_path: [] for file_path in self.file_paths},
+            batch_process.stdout,
+            batch_process.stderr,
+            batch_process.returncode)
+        for check_result in results:
+            process = self.run_mypy([check_result.file_path])
+            self.assertEqual(check_result.returncode, process.returncode, check_result.file_path)
+            self.assertEqual(
+                [line for line in check_result.stdout.splitlines()
+                 if not line.startswith('Found ')],
+                process.stdout.splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Persistent mypy cache directories that can be safely used by concurrent mypy processes.
+
+Mypy does not support multiple processes writing to the same cache directory at the same time, so
+we keep a number of cache directories ("slots"), and each mypy process exclusively locks one of
+them for its duration using a lock file. The locks also work across concurrent codecheck runs.
+"""
+
+from typing import Iterator, List
+
+import contextlib
+import fcntl
+import logging
+import os
+import shutil
+
+from codecheck.result_cache import get_command_output_for_key, read_file_for_key
+from codecheck.util import get_sha256_of_strings
+
+
+INTERPRETER_IDENTITY_SCRIPT = 'import sys; print(sys.executable); print(sys.version)'
+
+
+def get_mypy_cache_key(python_interpreter: str, mypy_config_path: str) -> str:
+    """
+    Returns a key identifying the mypy version, interpreter and mypy configuration. Cache
+    directories are not reused across different keys.
+    """
+    return get_sha256_of_strings([
+        get_command_output_for_key([python_interpreter, '-m', 'mypy', '--version']),
+        get_command_output_for_key([python_interpreter, '-c', INTERPRETER_IDENTITY_SCRIPT]),
+        os.path.abspath(mypy_config_path),
+        read_file_for_key(mypy_config_path),
+    ])[:16]
+
+
+class MypyCacheDirPool:
+    def __init__(self, base_dir: str, cache_key: str) -> None:
+        self.base_dir = base_dir
+        self.cache_key = cache_key
+        self.key_dir = os.path.join(base_dir, cache_key)
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[str]:
+        """
+        Yields a cache directory that is not used by any other mypy process until the context
+        manager exits.
+        """
+        os.makedirs(self.key_dir, exist_ok=True)
+        slot_index = 0
+        while True:
+            lock_file = open(os.path.join(self.key_dir, '%d.lock' % slot_index), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Used by another thread of this process, or by another process.
+                lock_file.close()
+                slot_index += 1
+                continue
+
+            try:
+                yield os.path.join(self.key_dir, str(slot_index))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+            return
+
+    def remove_stale_cache_dirs(self) -> None:
+        """
+        Removes cache directories created for other keys (e.g. an older mypy version or a
+        different mypy configuration), unless they are being used by another codecheck run.
+        """
+        if not os.path.isdir(self.base_dir):
+            return
+        for entry in os.scandir(self.base_dir):
+            if entry.name == self.cache_key or not entry.is_dir():
+                continue
+            lock_fds: List[int] = []
+            try:
+                try:
+                    for lock_entry in os.scandir(entry.path):
+                        if not lock_entry.name.endswith('.lock'):
+                            continue
+                        fd = os.open(lock_entry.path, os.O_RDONLY)
+                        lock_fds.append(fd)
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                except OSError as ex:
+                    logging.warning("Could not lock mypy cache directory %s: %s", entry.path, ex)
+                    continue
+                # Remove the directory while still holding the locks.
+                logging.info("Removing stale mypy cache directory %s", entry.path)
+                shutil.rmtree(entry.path, ignore_errors=True)
+            finally:
+                for fd in lock_fds:
+                    os.close(fd)
@@ -0,0 +1,53 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from codecheck.mypy_cache import MypyCacheDirPool
+
+
+class MypyCacheDirPoolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.base_dir = tempfile.mkdtemp(prefix='codecheck_mypy_cache_test_')
+        self.addCleanup(shutil.rmtree, self.base_dir)
+
+    def test_concurrent_users_get_different_dirs(self) -> None:
+        pool = MypyCacheDirPool(self.base_dir, 'key')
+        with pool.acquire() as cache_dir1:
+            # Another pool object stands for another codecheck run.
+            with MypyCacheDirPool(self.base_dir, 'key').acquire() as cache_dir2:
+                self.assertNotEqual(cache_dir1, cache_dir2)
+        self.assertEqual(os.path.dirname(cache_dir1), os.path.join(self.base_dir, 'key'))
+        # Released directories are reused.
+        with pool.acquire() as cache_dir3:
+            self.assertEqual(cache_dir3, cache_dir1)
+
+    def test_remove_stale_cache_dirs(self) -> None:
+        old_pool = MypyCacheDirPool(self.base_dir, 'old_key')
+        with old_pool.acquire() as old_cache_dir:
+            os.makedirs(old_cache_dir)
+        in_use_pool = MypyCacheDirPool(self.base_dir, 'in_use_key')
+        pool = MypyCacheDirPool(self.base_dir, 'key')
+        with in_use_pool.acquire() as in_use_cache_dir, pool.acquire() as cache_dir:
+            os.makedirs(in_use_cache_dir)
+            os.makedirs(cache_dir)
+            pool.remove_stale_cache_dirs()
+            self.assertFalse(os.path.exists(old_pool.key_dir))
+            self.assertTrue(os.path.isdir(in_use_cache_dir))
+            self.assertTrue(os.path.isdir(cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
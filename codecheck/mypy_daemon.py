@@ -0,0 +1,130 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Support for running mypy checks through the mypy daemon (dmypy), which keeps the results of the
+analysis in memory between runs.
+
+There is one daemon per repository root, mypy configuration file and import root, identified by a
+status file in the codecheck state directory. A daemon re-checks everything whenever it is asked
+to check a different set of files, so all files of an import root are always sent to the daemon
+together, and requests to the same daemon are serialized using a lock file.
+"""
+
+from typing import Iterator, List
+
+import contextlib
+import fcntl
+import glob
+import json
+import logging
+import os
+import subprocess
+
+from codecheck.util import ensure_str_decoded, get_sha256_of_strings
+
+
+# The daemon exits if it has not received any requests for this long.
+DMYPY_IDLE_TIMEOUT_SEC = 3 * 3600
+
+STATUS_FILE_SUFFIX = '.json'
+
+
+def get_daemons_dir(state_dir: str) -> str:
+    return os.path.join(state_dir, 'dmypy')
+
+
+class MypyDaemon:
+    def __init__(
+            self,
+            state_dir: str,
+            root_path: str,
+            python_interpreter: str,
+            mypy_config_path: str,
+            import_root: str) -> None:
+        self.python_interpreter = python_interpreter
+        daemon_id = get_sha256_of_strings([
+            os.path.realpath(root_path),
+            os.path.abspath(mypy_config_path),
+            os.path.realpath(import_root),
+        ])[:16]
+        daemon_path_prefix = os.path.join(get_daemons_dir(state_dir), daemon_id)
+        self.status_file_path = daemon_path_prefix + STATUS_FILE_SUFFIX
+        self.lock_file_path = daemon_path_prefix + '.lock'
+        self.cache_dir = daemon_path_prefix + '_cache'
+
+    def get_run_args(self, mypy_options: List[str]) -> List[str]:
+        """
+        Returns the command that starts the daemon if necessary (or restarts it if the options
+        have changed) and checks files with it. Files to check should be appended to the command.
+        """
+        return [
+            self.python_interpreter, '-m', 'mypy.dmypy',
+            '--status-file', self.status_file_path,
+            'run',
+            '--timeout', str(DMYPY_IDLE_TIMEOUT_SEC),
+            '--'
+        ] + mypy_options
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        os.makedirs(os.path.dirname(self.lock_file_path), exist_ok=True)
+        with open(self.lock_file_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def is_daemon_alive(status_file_path: str) -> bool:
+    try:
+        with open(status_file_path) as status_file:
+            pid = json.load(status_file)['pid']
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, ValueError, KeyError):
+        # Let dmypy itself deal with unreadable status files or processes we cannot signal.
+        pass
+    return True
+
+
+def stop_mypy_daemons(state_dir: str, python_interpreter: str) -> bool:
+    """
+    Stops all mypy daemons started by codecheck for the repository with the given state
+    directory. Returns True if all of them were stopped successfully.
+    """
+    success = True
+    status_file_paths = sorted(
+        glob.glob(os.path.join(get_daemons_dir(state_dir), '*' + STATUS_FILE_SUFFIX)))
+    for status_file_path in status_file_paths:
+        if not is_daemon_alive(status_file_path):
+            logging.info("Removing status file of a mypy daemon that is no longer running: %s",
+                         status_file_path)
+            os.remove(status_file_path)
+            continue
+        process = subprocess.run(
+            [python_interpreter, '-m', 'mypy.dmypy', '--status-file', status_file_path, 'stop'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT)
+        output = ensure_str_decoded(process.stdout).strip()
+        if process.returncode == 0:
+            logging.info("Stopped mypy daemon with status file %s", status_file_path)
+        else:
+            logging.warning(
+                "Failed to stop mypy daemon with status file %s (exit code %d): %s",
+                status_file_path, process.returncode, output)
+            success = False
+    if not status_file_paths:
+        logging.info("No mypy daemons are running")
+    return success
@@ -0,0 +1,81 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from codecheck.mypy_daemon import MypyDaemon, get_daemons_dir, stop_mypy_daemons
+
+
+class MypyDaemonTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_mypy_daemon_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.state_dir = os.path.join(self.root_path, 'state')
+        self.mypy_config_path = os.path.join(self.root_path, 'mypy.ini')
+        with open(self.mypy_config_path, 'w') as config_file:
+            config_file.write('[mypy]\n')
+        self.file_path = os.path.join(self.root_path, 'bad.py')
+        with open(self.file_path, 'w') as output_file:
+            output_file.write('X: str = 1\n')
+
+    def create_daemon(self, import_root: str) -> MypyDaemon:
+        return MypyDaemon(
+            self.state_dir, self.root_path, sys.executable, self.mypy_config_path, import_root)
+
+    def test_daemon_ids(self) -> None:
+        daemon = self.create_daemon(self.root_path)
+        self.assertEqual(
+            self.create_daemon(self.root_path).status_file_path, daemon.status_file_path)
+        self.assertNotEqual(
+            self.create_daemon(os.path.join(self.root_path, 'src')).status_file_path,
+            daemon.status_file_path)
+        self.assertEqual(os.path.dirname(daemon.status_file_path), get_daemons_dir(self.state_dir))
+
+    def test_run_and_stop(self) -> None:
+        daemon = self.create_daemon(self.root_path)
+        os.makedirs(get_daemons_dir(self.state_dir))
+        with daemon.lock():
+            process = subprocess.run(
+                daemon.get_run_args(['--config-file=%s' % self.mypy_config_path]) +
+                [self.file_path],
+                cwd=self.root_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True)
+        self.addCleanup(stop_mypy_daemons, self.state_dir, sys.executable)
+        self.assertEqual(process.returncode, 1, process.stderr)
+        self.assertIn('bad.py:1: error: Incompatible types in assignment', process.stdout)
+        self.assertTrue(os.path.exists(daemon.status_file_path))
+
+        self.assertTrue(stop_mypy_daemons(self.state_dir, sys.executable))
+        self.assertFalse(os.path.exists(daemon.status_file_path))
+
+    def test_stale_status_files_are_removed(self) -> None:
+        status_file_path = self.create_daemon(self.root_path).status_file_path
+        os.makedirs(os.path.dirname(status_file_path))
+        # A process that has exited.
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        with open(status_file_path, 'w') as status_file:
+            json.dump({'pid': process.pid}, status_file)
+        self.assertTrue(stop_mypy_daemons(self.state_dir, sys.executable))
+        self.assertFalse(os.path.exists(status_file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
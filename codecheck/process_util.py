@@ -0,0 +1,414 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Running check processes and measuring the resources they use.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import asyncio
+import contextvars
+import os
+import resource
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from codecheck.util import ensure_str_decoded
+
+
+# After killing a process group, how long to keep reading output that is still buffered in the
+# pipes, in case some process outside of the group still holds them open.
+KILLED_PROCESS_OUTPUT_TIMEOUT_SEC = 5.0
+
+# The longest interval between checks whether a process whose output has been closed has exited,
+# when running processes asynchronously or with a timeout.
+MAX_REAP_POLL_INTERVAL_SEC = 0.1
+
+
+class ProcessResult:
+    def __init__(
+            self,
+            stdout: str,
+            stderr: str,
+            returncode: int,
+            max_rss_bytes: Optional[int] = None,
+            user_cpu_sec: Optional[float] = None,
+            system_cpu_sec: Optional[float] = None,
+            timed_out: bool = False) -> None:
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        # Peak resident set size and CPU time of the process, if known.
+        self.max_rss_bytes = max_rss_bytes
+        self.user_cpu_sec = user_cpu_sec
+        self.system_cpu_sec = system_cpu_sec
+        # True if the process was killed because it exceeded its timeout.
+        self.timed_out = timed_out
+
+    @staticmethod
+    def timed_out_result() -> 'ProcessResult':
+        """
+        A result for a check that timed out in a process that could not report its output.
+        """
+        return ProcessResult(stdout='', stderr='', returncode=-signal.SIGKILL, timed_out=True)
+
+    @staticmethod
+    def killed_result() -> 'ProcessResult':
+        """
+        A result for a check whose process was killed because the run was stopped, and could not
+        report its output.
+        """
+        return ProcessResult(stdout='', stderr='', returncode=-signal.SIGKILL)
+
+    @staticmethod
+    def from_response(response: Dict[str, Any]) -> 'ProcessResult':
+        """
+        Creates a result from a response of a worker or fork server process (see
+        python_runner.py).
+        """
+        return ProcessResult(
+            stdout=response['stdout'],
+            stderr=response['stderr'],
+            returncode=response['returncode'],
+            max_rss_bytes=response.get('max_rss_bytes'),
+            user_cpu_sec=response.get('user_cpu_sec'),
+            system_cpu_sec=response.get('system_cpu_sec'))
+
+
+def kill_process_group(pid: int) -> None:
+    """
+    Kills the process group led by the given process, which must have been started in a new
+    session, so that the processes it started are killed as well.
+    """
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+# The id of the check task that processes started in the current context belong to, if any, so
+# that the processes of a single task can be killed (see RunningProcesses.kill_task()).
+current_task_id: 'contextvars.ContextVar[Optional[int]]' = contextvars.ContextVar(
+    'current_task_id', default=None)
+
+
+class RunningProcesses:
+    """
+    The process groups running checks: processes started by run_process(), worker processes
+    while they run a check, and children of the fork server. They can all be killed when a run is
+    stopped early, or only the ones of a given task. Processes added after that are killed right
+    away.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Process ids of the leaders of the process groups, with the ids of their tasks.
+        self.pid_to_task_id: Dict[int, Optional[int]] = {}
+        self.killed_pids: Set[int] = set()
+        self.killed_task_ids: Set[int] = set()
+        self.is_killed = False
+
+    def add(self, pid: int) -> None:
+        task_id = current_task_id.get()
+        with self.lock:
+            self.pid_to_task_id[pid] = task_id
+            if self.is_killed or task_id in self.killed_task_ids:
+                self._kill(pid)
+
+    def remove(self, pid: int) -> bool:
+        """
+        Stops tracking a process group, and returns True if it has been killed.
+        """
+        with self.lock:
+            del self.pid_to_task_id[pid]
+            if pid in self.killed_pids:
+                self.killed_pids.remove(pid)
+                return True
+            return False
+
+    def _kill(self, pid: int) -> None:
+        self.killed_pids.add(pid)
+        kill_process_group(pid)
+
+    def kill_all(self) -> None:
+        with self.lock:
+            self.is_killed = True
+            for pid in self.pid_to_task_id:
+                self._kill(pid)
+
+    def kill_task(self, task_id: int) -> None:
+        """
+        Kills the processes of the given task, and any processes it starts until forget_task() is
+        called for it.
+        """
+        with self.lock:
+            self.killed_task_ids.add(task_id)
+            for pid, pid_task_id in self.pid_to_task_id.items():
+                if pid_task_id == task_id:
+                    self._kill(pid)
+
+    def forget_task(self, task_id: int) -> None:
+        """
+        Called when a task has finished.
+        """
+        with self.lock:
+            self.killed_task_ids.discard(task_id)
+
+
+def get_max_rss_bytes(rusage: resource.struct_rusage) -> int:
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+
+
+def get_thread_cpu_times() -> Optional[Tuple[float, float]]:
+    """
+    Returns user and system CPU time of the calling thread, or None if the platform cannot measure
+    it (RUSAGE_THREAD is Linux-specific). Used for checks run in a thread of this process.
+    """
+    if not hasattr(resource, 'RUSAGE_THREAD'):
+        return None
+    rusage = resource.getrusage(resource.RUSAGE_THREAD)
+    return rusage.ru_utime, rusage.ru_stime
+
+
+def get_returncode_from_wait_status(status: int) -> int:
+    """
+    Converts a status returned by os.wait4() into an exit code, using negative values for
+    processes killed by a signal, like subprocess does.
+    """
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def read_process_output(
+        process: 'subprocess.Popen[bytes]',
+        timeout_sec: Optional[float] = None) -> Tuple[Dict[int, bytes], bool]:
+    """
+    Reads standard output and standard error of the given process until both are closed. Returns
+    the data read from each of them, keyed by file descriptor, and whether the process group of
+    the process had to be killed because the timeout was exceeded.
+    """
+    output: Dict[int, List[bytes]] = {}
+    deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+    timed_out = False
+    with selectors.DefaultSelector() as selector:
+        for stream in [process.stdout, process.stderr]:
+            assert stream is not None
+            selector.register(stream, selectors.EVENT_READ)
+            output[stream.fileno()] = []
+        while selector.get_map():
+            remaining_sec = None if deadline is None else deadline - time.monotonic()
+            if remaining_sec is not None and remaining_sec <= 0:
+                if timed_out:
+                    break
+                timed_out = True
+                kill_process_group(process.pid)
+                deadline = time.monotonic() + KILLED_PROCESS_OUTPUT_TIMEOUT_SEC
+                continue
+            for key, _ in selector.select(remaining_sec):
+                chunk = os.read(key.fd, 65536)
+                if chunk:
+                    output[key.fd].append(chunk)
+                else:
+                    selector.unregister(key.fileobj)
+    return {fd: b''.join(chunks) for fd, chunks in output.items()}, timed_out
+
+
+def wait_for_process(
+        pid: int, deadline: Optional[float]) -> Tuple[int, resource.struct_rusage, bool]:
+    """
+    Reaps the given child process once it exits, and returns its wait status and resource usage.
+    If it has not exited by the given deadline (a time.monotonic() value), e.g. because it closed
+    its output and hangs, its process group is killed first, and the last value returned is True.
+    """
+    if deadline is None:
+        _, status, rusage = os.wait4(pid, 0)
+        return status, rusage, False
+    poll_interval_sec = 0.001
+    while True:
+        waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited_pid == pid:
+            return status, rusage, False
+        remaining_sec = deadline - time.monotonic()
+        if remaining_sec <= 0:
+            # The process has not been reaped, so its process id cannot have been reused.
+            kill_process_group(pid)
+            _, status, rusage = os.wait4(pid, 0)
+            return status, rusage, True
+        time.sleep(min(poll_interval_sec, remaining_sec))
+        poll_interval_sec = min(poll_interval_sec * 2, MAX_REAP_POLL_INTERVAL_SEC)
+
+
+def run_process(
+        args: List[str],
+        env: Dict[str, str],
+        running_processes: Optional[RunningProcesses] = None,
+        timeout_sec: Optional[float] = None,
+        cwd: Optional[str] = None) -> ProcessResult:
+    """
+    Runs a process and returns its output and exit code, as well as its peak memory usage and CPU
+    time. The process is reaped using os.wait4() to get its resource usage, instead of relying on
+    resource.getrusage(resource.RUSAGE_CHILDREN), which covers all child processes.
+
+    The process is started in a new session, so that it and all processes it starts can be killed
+    together if the timeout is exceeded or the run is stopped. This also keeps Ctrl-C in the
+    terminal from reaching it directly. The timeout covers both reading the output and waiting
+    for the process to exit.
+    """
+    deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+    with subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            cwd=cwd,
+            start_new_session=True) as process:
+        assert process.stdout is not None
+        assert process.stderr is not None
+        if running_processes is not None:
+            running_processes.add(process.pid)
+        try:
+            output, timed_out = read_process_output(process, timeout_sec)
+        finally:
+            # Stop tracking the process before reaping it, so that it cannot be killed after its
+            # process id has been reused.
+            if running_processes is not None:
+                running_processes.remove(process.pid)
+        status, rusage, wait_timed_out = wait_for_process(process.pid, deadline)
+        timed_out = timed_out or wait_timed_out
+        # Let Popen know that the process has been reaped.
+        process.returncode = get_returncode_from_wait_status(status)
+        return ProcessResult(
+            stdout=ensure_str_decoded(output[process.stdout.fileno()]),
+            stderr=ensure_str_decoded(output[process.stderr.fileno()]),
+            returncode=process.returncode,
+            max_rss_bytes=get_max_rss_bytes(rusage),
+            user_cpu_sec=rusage.ru_utime,
+            system_cpu_sec=rusage.ru_stime,
+            timed_out=timed_out)
+
+
+async def read_process_output_async(
+        process: 'subprocess.Popen[bytes]',
+        timeout_sec: Optional[float] = None) -> Tuple[Dict[int, bytes], bool]:
+    """
+    Like read_process_output(), but reads the output in callbacks of the running event loop, so
+    that the output of many processes can be read by one thread.
+    """
+    loop = asyncio.get_running_loop()
+    output: Dict[int, List[bytes]] = {}
+    open_fds: Set[int] = set()
+    all_closed: 'asyncio.Future[None]' = loop.create_future()
+
+    def read_chunk(fd: int) -> None:
+        chunk = os.read(fd, 65536)
+        if chunk:
+            output[fd].append(chunk)
+            return
+        loop.remove_reader(fd)
+        open_fds.discard(fd)
+        if not open_fds and not all_closed.done():
+            all_closed.set_result(None)
+
+    for stream in [process.stdout, process.stderr]:
+        assert stream is not None
+        output[stream.fileno()] = []
+        open_fds.add(stream.fileno())
+        loop.add_reader(stream.fileno(), read_chunk, stream.fileno())
+    timed_out = False
+    try:
+        done, _ = await asyncio.wait([all_closed], timeout=timeout_sec)
+        if not done:
+            timed_out = True
+            kill_process_group(process.pid)
+            await asyncio.wait([all_closed], timeout=KILLED_PROCESS_OUTPUT_TIMEOUT_SEC)
+    finally:
+        for fd in open_fds:
+            loop.remove_reader(fd)
+    return {fd: b''.join(chunks) for fd, chunks in output.items()}, timed_out
+
+
+async def wait_for_process_async(
+        pid: int, deadline: Optional[float]) -> Tuple[int, resource.struct_rusage, bool]:
+    """
+    Like wait_for_process(), without blocking the event loop.
+    """
+    poll_interval_sec = 0.001
+    while True:
+        waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited_pid == pid:
+            return status, rusage, False
+        if deadline is not None:
+            remaining_sec = deadline - time.monotonic()
+            if remaining_sec <= 0:
+                kill_process_group(pid)
+                _, status, rusage = os.wait4(pid, 0)
+                return status, rusage, True
+            poll_interval_sec = min(poll_interval_sec, remaining_sec)
+        await asyncio.sleep(poll_interval_sec)
+        poll_interval_sec = min(poll_interval_sec * 2, MAX_REAP_POLL_INTERVAL_SEC)
+
+
+async def run_process_async(
+        args: List[str],
+        env: Dict[str, str],
+        running_processes: Optional[RunningProcesses] = None,
+        timeout_sec: Optional[float] = None,
+        cwd: Optional[str] = None) -> ProcessResult:
+    """
+    Like run_process(), but as a coroutine running on an event loop, which can run many processes
+    at the same time. If the coroutine is cancelled, the process group is killed.
+
+    The process is not started using asyncio.create_subprocess_exec(), because then asyncio would
+    reap it, and its resource usage would be lost.
+    """
+    deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+    with subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            cwd=cwd,
+            start_new_session=True) as process:
+        assert process.stdout is not None
+        assert process.stderr is not None
+        if running_processes is not None:
+            running_processes.add(process.pid)
+        try:
+            output, timed_out = await read_process_output_async(process, timeout_sec)
+        except BaseException:
+            kill_process_group(process.pid)
+            raise
+        finally:
+            # Stop tracking the process before reaping it, so that it cannot be killed after its
+            # process id has been reused.
+            if running_processes is not None:
+                running_processes.remove(process.pid)
+            status, rusage, wait_timed_out = await wait_for_process_async(
+                process.pid, deadline)
+            # Let Popen know that the process has been reaped.
+            process.returncode = get_returncode_from_wait_status(status)
+        timed_out = timed_out or wait_timed_out
+        return ProcessResult(
+            stdout=ensure_str_decoded(output[process.stdout.fileno()]),
+            stderr=ensure_str_decoded(output[process.stderr.fileno()]),
+            returncode=process.returncode,
+            max_rss_bytes=get_max_rss_bytes(rusage),
+            user_cpu_sec=rusage.ru_utime,
+            system_cpu_sec=rusage.ru_stime,
+            timed_out=timed_out)
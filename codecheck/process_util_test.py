@@ -0,0 +1,98 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+import unittest
+
+from codecheck.process_util import RunningProcesses, run_process, run_process_async
+
+
+# Closes standard output and standard error, and then hangs.
+CLOSE_OUTPUT_AND_HANG_CODE = 'import os, time; os.close(1); os.close(2); time.sleep(60)'
+
+# Leaves a process that keeps standard output open behind.
+LEAVE_GRANDCHILD_CODE = (
+    'import subprocess, sys; '
+    'subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])')
+
+
+class RunProcessTest(unittest.TestCase):
+    def test_output_and_returncode(self) -> None:
+        process_result = run_process(
+            [sys.executable, '-c', 'import sys; print("out"); print("err", file=sys.stderr); '
+                                   'sys.exit(3)'],
+            dict(os.environ))
+        self.assertEqual(process_result.stdout, 'out\n')
+        self.assertEqual(process_result.stderr, 'err\n')
+        self.assertEqual(process_result.returncode, 3)
+        self.assertFalse(process_result.timed_out)
+        self.assertIsNotNone(process_result.max_rss_bytes)
+        self.assertIsNotNone(process_result.user_cpu_sec)
+
+    def test_cwd(self) -> None:
+        process_result = run_process(
+            [sys.executable, '-c', 'import os; print(os.getcwd())'], dict(os.environ), cwd='/')
+        self.assertEqual(process_result.stdout, '/\n')
+
+    def assert_timed_out_quickly(self, code: str, run_async: bool) -> None:
+        args = [sys.executable, '-c', code]
+        start_time = time.monotonic()
+        if run_async:
+            process_result = asyncio.run(
+                run_process_async(args, dict(os.environ), timeout_sec=0.5))
+        else:
+            process_result = run_process(args, dict(os.environ), timeout_sec=0.5)
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertTrue(process_result.timed_out)
+        self.assertEqual(process_result.returncode, -signal.SIGKILL)
+
+    def test_timeout_after_closing_output(self) -> None:
+        self.assert_timed_out_quickly(CLOSE_OUTPUT_AND_HANG_CODE, run_async=False)
+
+    def test_timeout_after_closing_output_async(self) -> None:
+        self.assert_timed_out_quickly(CLOSE_OUTPUT_AND_HANG_CODE, run_async=True)
+
+    def test_grandchild_keeping_output_open_is_killed(self) -> None:
+        start_time = time.monotonic()
+        process_result = run_process(
+            [sys.executable, '-c', LEAVE_GRANDCHILD_CODE], dict(os.environ), timeout_sec=0.5)
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertTrue(process_result.timed_out)
+
+    def test_kill_all(self) -> None:
+        running_processes = RunningProcesses()
+        timer = threading.Timer(0.5, running_processes.kill_all)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        start_time = time.monotonic()
+        process_result = run_process(
+            [sys.executable, '-c', 'import time; time.sleep(60)'],
+            dict(os.environ),
+            running_processes)
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertEqual(process_result.returncode, -signal.SIGKILL)
+        self.assertFalse(process_result.timed_out)
+        # Processes started after that are killed right away.
+        process_result = run_process(
+            [sys.executable, '-c', 'import time; time.sleep(60)'],
+            dict(os.environ),
+            running_processes)
+        self.assertEqual(process_result.returncode, -signal.SIGKILL)
+
+
+if __name__ == '__main__':
+    unittest.main()
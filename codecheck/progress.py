@@ -0,0 +1,269 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Showing the progress of a run: a status line that is updated in place on a terminal, or a log
+line every now and then otherwise.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, TextIO, Tuple
+
+import logging
+import shutil
+import time
+
+from codecheck.util import format_duration
+
+
+PROGRESS_MODES = ['auto', 'line', 'log', 'off']
+
+# How often to update the status line on a terminal.
+PROGRESS_LINE_INTERVAL_SEC = 0.5
+
+# How often to log the progress in the "log" mode.
+PROGRESS_LOG_INTERVAL_SEC = 10.0
+
+# With --detailed-progress, how many of the pending checks to show after every completed task.
+NUM_REMAINING_CHECKS_TO_SHOW = 5
+
+# Clears the rest of the line in a terminal.
+CLEAR_TO_END_OF_LINE = '\x1b[K'
+
+# A file path and a check type.
+CheckInput = Tuple[str, str]
+
+
+class PendingChecks:
+    """
+    The checks of a run that have not completed yet, in sorted order. They are kept in a doubly
+    linked list, so that removing a completed check takes constant time, and the first few
+    pending checks can be listed without sorting or scanning over completed ones.
+
+    >>> pending = PendingChecks([('c.py', 'mypy'), ('a.py', 'mypy'), ('b.py', 'compile')])
+    >>> pending.discard(('a.py', 'mypy'))
+    >>> pending.discard(('a.py', 'mypy'))
+    >>> pending.get_first(5)
+    [('b.py', 'compile'), ('c.py', 'mypy')]
+    >>> pending.discard(('c.py', 'mypy'))
+    >>> len(pending), pending.get_first(5)
+    (1, [('b.py', 'compile')])
+    """
+
+    def __init__(self, check_inputs: Iterable[CheckInput]) -> None:
+        # The key None stands for the start of the list, and the value None for its end.
+        self.next_check: Dict[Optional[CheckInput], Optional[CheckInput]] = {}
+        self.previous_check: Dict[CheckInput, Optional[CheckInput]] = {}
+        previous_check = None
+        for check_input in sorted(set(check_inputs)):
+            self.next_check[previous_check] = check_input
+            self.previous_check[check_input] = previous_check
+            previous_check = check_input
+        self.next_check[previous_check] = None
+
+    def __len__(self) -> int:
+        return len(self.previous_check)
+
+    def __contains__(self, check_input: CheckInput) -> bool:
+        return check_input in self.previous_check
+
+    def discard(self, check_input: CheckInput) -> None:
+        if check_input not in self.previous_check:
+            return
+        previous_check = self.previous_check.pop(check_input)
+        next_check = self.next_check.pop(check_input)
+        self.next_check[previous_check] = next_check
+        if next_check is not None:
+            self.previous_check[next_check] = previous_check
+
+    def get_first(self, max_num_checks: int) -> List[CheckInput]:
+        check_inputs: List[CheckInput] = []
+        check_input = self.next_check[None]
+        while check_input is not None and len(check_inputs) < max_num_checks:
+            check_inputs.append(check_input)
+            check_input = self.next_check[check_input]
+        return check_inputs
+
+
+class Progress:
+    """
+    Tracks the checks of a run as their tasks start and finish, and shows how many of them have
+    completed, the estimated time remaining, and the checks that are running.
+
+    The estimate is based on the durations of checks in previous runs, scaled by how long the
+    checks that have completed in this run took compared to their estimates.
+
+    In the "line" mode, the status line is shown on the given terminal, and has to be cleared
+    using clear() before anything else is written to it. It is shown again by the next update().
+    """
+
+    def __init__(
+            self,
+            check_inputs: List[CheckInput],
+            parallelism: int,
+            estimate_duration_sec: Callable[[CheckInput], float],
+            mode: str,
+            output_file: TextIO,
+            show_pending_checks: bool,
+            relativize_path: Callable[[str], str]) -> None:
+        assert mode in PROGRESS_MODES, f"Unknown progress mode: {mode}"
+        if mode == 'auto':
+            # Periodic log lines would change the output of non-interactive runs, e.g. in CI, so
+            # they are only written when asked for.
+            mode = 'line' if output_file.isatty() and not show_pending_checks else 'off'
+        self.mode = mode
+        self.output_file = output_file
+        self.show_pending_checks = show_pending_checks
+        self.relativize_path = relativize_path
+        self.parallelism = parallelism
+        self.num_checks = len(check_inputs)
+        self.pending_checks = PendingChecks(check_inputs)
+
+        self.estimated_duration_sec: Dict[CheckInput, float] = {
+            check_input: estimate_duration_sec(check_input) for check_input in check_inputs}
+        # Estimated total duration of the checks that have not started.
+        self.not_started_duration_sec = sum(self.estimated_duration_sec.values())
+        # Running tasks by id, with their start times and estimated durations.
+        self.running_tasks: Dict[int, Tuple[List[CheckInput], float, float]] = {}
+        # Measured and estimated total durations of the tasks that have finished.
+        self.finished_duration_sec = 0.0
+        self.finished_estimated_duration_sec = 0.0
+
+        self.start_time = time.monotonic()
+        self.last_shown_time = self.start_time
+        self.is_line_shown = False
+
+    def get_num_completed(self) -> int:
+        return self.num_checks - len(self.pending_checks)
+
+    def get_estimate_scale(self) -> float:
+        if self.finished_estimated_duration_sec <= 0 or self.finished_duration_sec <= 0:
+            return 1.0
+        return self.finished_duration_sec / self.finished_estimated_duration_sec
+
+    def task_started(self, task: List[CheckInput]) -> None:
+        estimated_duration_sec = sum(
+            self.estimated_duration_sec.get(check_input, 0.0) for check_input in task)
+        self.not_started_duration_sec -= estimated_duration_sec
+        self.running_tasks[id(task)] = (task, time.monotonic(), estimated_duration_sec)
+
+    def task_finished(self, task: List[CheckInput]) -> None:
+        _, start_time, estimated_duration_sec = self.running_tasks.pop(id(task))
+        self.finished_duration_sec += time.monotonic() - start_time
+        self.finished_estimated_duration_sec += estimated_duration_sec
+        self.checks_completed(task)
+        if self.show_pending_checks:
+            pending_checks_to_show = self.pending_checks.get_first(NUM_REMAINING_CHECKS_TO_SHOW)
+            logging.info(
+                "%d out of %d checks completed (%.1f%%), %d checks remaining, "
+                "%d of them are: %s",
+                self.get_num_completed(),
+                self.num_checks,
+                self.get_num_completed() * 100.0 / self.num_checks,
+                len(self.pending_checks),
+                len(pending_checks_to_show),
+                pending_checks_to_show)
+
+    def checks_skipped(self, check_inputs: List[CheckInput]) -> None:
+        """
+        Marks checks that will not be run, e.g. because their prerequisites failed, as completed.
+        """
+        for check_input in check_inputs:
+            if check_input in self.pending_checks:
+                self.not_started_duration_sec -= self.estimated_duration_sec.get(check_input, 0.0)
+        self.checks_completed(check_inputs)
+
+    def checks_completed(self, check_inputs: List[CheckInput]) -> None:
+        for check_input in check_inputs:
+            self.pending_checks.discard(check_input)
+
+    def estimate_remaining_sec(self, now: float) -> float:
+        """
+        Estimates the remaining time of the run, assuming that the work that has not started is
+        spread evenly between the workers, but not less than the longest running check needs.
+        """
+        scale = self.get_estimate_scale()
+        running_remaining_sec = [
+            max(estimated_duration_sec * scale - (now - start_time), 0.0)
+            for _, start_time, estimated_duration_sec in self.running_tasks.values()]
+        total_remaining_sec = (
+            max(self.not_started_duration_sec, 0.0) * scale + sum(running_remaining_sec))
+        return max([total_remaining_sec / self.parallelism] + running_remaining_sec)
+
+    def get_description(self, now: float) -> str:
+        num_completed = self.get_num_completed()
+        description = '%d/%d checks (%d%%), %d running, ETA %s' % (
+            num_completed,
+            self.num_checks,
+            num_completed * 100 // max(self.num_checks, 1),
+            len(self.running_tasks),
+            format_duration(self.estimate_remaining_sec(now)))
+        return description
+
+    def get_line(self, now: float, width: int) -> str:
+        """
+        Returns the status line, with the running tasks, longest running first, as far as they fit
+        into the given width.
+        """
+        line = self.get_description(now)
+        running_tasks = sorted(
+            self.running_tasks.values(), key=lambda running_task: running_task[1])
+        separator = ': '
+        for index, (task, start_time, _) in enumerate(running_tasks):
+            file_path, check_type = task[0]
+            task_description = '%s %s%s (%s)' % (
+                check_type,
+                self.relativize_path(file_path),
+                ' and %d more' % (len(task) - 1) if len(task) > 1 else '',
+                format_duration(now - start_time))
+            num_more = len(running_tasks) - index - 1
+            more_description = ', +%d more' % num_more if num_more else ''
+            if len(line + separator + task_description + more_description) > width:
+                if index > 0:
+                    line += ', +%d more' % (len(running_tasks) - index)
+                break
+            line += separator + task_description
+            separator = ', '
+        return line[:width]
+
+    def get_wait_timeout_sec(self) -> Optional[float]:
+        """
+        How long to wait for a task to finish before calling update() anyway.
+        """
+        if self.mode == 'line':
+            return PROGRESS_LINE_INTERVAL_SEC
+        if self.mode == 'log':
+            return max(
+                self.last_shown_time + PROGRESS_LOG_INTERVAL_SEC - time.monotonic(), 0.0)
+        return None
+
+    def update(self) -> None:
+        now = time.monotonic()
+        if self.mode == 'line':
+            if self.is_line_shown and now - self.last_shown_time < PROGRESS_LINE_INTERVAL_SEC:
+                return
+            # Leave the last column empty, so that the terminal does not wrap the line.
+            width = shutil.get_terminal_size().columns - 1
+            self.output_file.write('\r' + self.get_line(now, width) + CLEAR_TO_END_OF_LINE)
+            self.output_file.flush()
+            self.is_line_shown = True
+            self.last_shown_time = now
+        elif self.mode == 'log' and not self.show_pending_checks:
+            if now - self.last_shown_time < PROGRESS_LOG_INTERVAL_SEC:
+                return
+            logging.info("Progress: %s", self.get_description(now))
+            self.last_shown_time = now
+
+    def clear(self) -> None:
+        if self.is_line_shown:
+            self.output_file.write('\r' + CLEAR_TO_END_OF_LINE)
+            self.output_file.flush()
+            self.is_line_shown = False
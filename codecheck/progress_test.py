@@ -0,0 +1,69 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import io
+import unittest
+
+from codecheck.progress import Progress
+
+
+class TerminalOutput(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+class ProgressTest(unittest.TestCase):
+    def create_progress(
+            self, mode: str, output_file: io.StringIO, show_pending_checks: bool = False
+            ) -> Progress:
+        return Progress(
+            [('a.py', 'pycodestyle'), ('a.py', 'mypy')],
+            parallelism=2,
+            estimate_duration_sec=lambda check_input: 1.0,
+            mode=mode,
+            output_file=output_file,
+            show_pending_checks=show_pending_checks,
+            relativize_path=lambda path: path)
+
+    def test_auto_mode(self) -> None:
+        self.assertEqual(self.create_progress('auto', TerminalOutput()).mode, 'line')
+        # No periodic output unless asked for when not on a terminal, e.g. in CI.
+        self.assertEqual(self.create_progress('auto', io.StringIO()).mode, 'off')
+        self.assertEqual(
+            self.create_progress('auto', TerminalOutput(), show_pending_checks=True).mode, 'off')
+        self.assertEqual(self.create_progress('log', io.StringIO()).mode, 'log')
+
+    def test_off_mode_writes_nothing(self) -> None:
+        output_file = io.StringIO()
+        progress = self.create_progress('auto', output_file)
+        self.assertIsNone(progress.get_wait_timeout_sec())
+        with self.assertNoLogs(level='INFO'):
+            task = [('a.py', 'pycodestyle')]
+            progress.task_started(task)
+            progress.update()
+            progress.task_finished(task)
+            progress.update()
+        self.assertEqual(output_file.getvalue(), '')
+
+    def test_line_mode(self) -> None:
+        output_file = TerminalOutput()
+        progress = self.create_progress('line', output_file)
+        task = [('a.py', 'pycodestyle')]
+        progress.task_started(task)
+        progress.update()
+        self.assertIn('0/2', output_file.getvalue())
+        progress.clear()
+        self.assertTrue(output_file.getvalue().endswith('\r\x1b[K'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,367 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Runs Python-based checks such as "python -m doctest <file>" inside an already running
+interpreter, producing the same standard output, standard error and exit code as a separate
+process would, but without paying the interpreter startup cost. Checks run in long-lived worker
+processes (see worker_pool.py), or in children of a fork server (see fork_server.py), which run
+this file as a script. Checks are never run this way inside the codecheck process, because the
+checked code could change any state of the interpreter running it.
+
+This module only depends on the standard library, because worker processes could use a different
+interpreter that does not have codecheck installed.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import importlib.util
+import io
+import json
+import os
+import resource
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import traceback
+import warnings
+
+
+class _OutputCapture:
+    """
+    Captures standard output and standard error at the file descriptor level, like a separate
+    process with redirected output would, so that output written by C extensions, os.write() or
+    subprocesses of the checked code is captured too.
+    """
+
+    def __init__(self) -> None:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.saved_fds = [os.dup(1), os.dup(2)]
+        self.output_files = [tempfile.TemporaryFile(), tempfile.TemporaryFile()]
+        for fd, output_file in zip([1, 2], self.output_files):
+            os.dup2(output_file.fileno(), fd)
+
+    def stop(self) -> Tuple[str, str]:
+        """
+        Restores the original file descriptors and returns the captured standard output and
+        standard error.
+        """
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, saved_fd in zip([1, 2], self.saved_fds):
+            os.dup2(saved_fd, fd)
+            os.close(saved_fd)
+        output = []
+        for output_file in self.output_files:
+            output_file.seek(0)
+            output.append(output_file.read().decode('utf-8', errors='replace'))
+            output_file.close()
+        return output[0], output[1]
+
+
+def _get_exit_code(exit_exception: SystemExit) -> Tuple[int, Optional[str]]:
+    """
+    Converts the argument of SystemExit to an exit code and an optional message that the
+    interpreter would print to standard error, the same way the interpreter does.
+
+    >>> _get_exit_code(SystemExit())
+    (0, None)
+    >>> _get_exit_code(SystemExit(2))
+    (2, None)
+    >>> _get_exit_code(SystemExit('Error message'))
+    (1, 'Error message')
+    """
+    code = exit_exception.code
+    if code is None:
+        return 0, None
+    if isinstance(code, int):
+        return code, None
+    return 1, str(code)
+
+
+def _make_thread_safe_signal_function(original_signal_function: Any) -> Any:
+    """
+    Signal handlers can only be installed from the main thread, and checks running in-process
+    usually run in other threads. Some tools install handlers anyway (e.g. pycodestyle installs a
+    SIGPIPE handler), so we ignore such attempts instead of failing the check.
+    """
+    def signal_function(signalnum: int, handler: Any) -> Any:
+        if threading.current_thread() is threading.main_thread():
+            return original_signal_function(signalnum, handler)
+        return signal.getsignal(signalnum)
+    return signal_function
+
+
+def _make_thread_safe_exit_function(original_exit_function: Any) -> Any:
+    """
+    Checked code calling os._exit() (e.g. at import time during a doctest check) would terminate
+    the whole process that runs checks in-process. Instead, we convert such calls made by the
+    thread running the check into SystemExit.
+    """
+    check_thread = threading.current_thread()
+
+    def exit_function(code: int) -> None:
+        if threading.current_thread() is check_thread:
+            raise SystemExit(code)
+        original_exit_function(code)
+    return exit_function
+
+
+def _restore_modules(saved_modules: Dict[str, Any]) -> None:
+    for module_name in list(sys.modules):
+        if module_name not in saved_modules:
+            del sys.modules[module_name]
+    sys.modules.update(saved_modules)
+
+
+def _get_argv_and_target(python_args: List[str]) -> Tuple[List[str], Callable[[], None]]:
+    """
+    For a Python command line of the form "-m <module> <args>" or "-c <code>" (not including the
+    interpreter itself), returns the value of sys.argv and a function that does what the
+    interpreter would do.
+    """
+    if len(python_args) >= 2 and python_args[0] == '-m':
+        module_name = python_args[1]
+
+        def run_module() -> None:
+            if importlib.util.find_spec(module_name) is None:
+                sys.stderr.write('%s: No module named %s\n' % (sys.executable, module_name))
+                sys.exit(1)
+            runpy.run_module(module_name, run_name='__main__', alter_sys=True)
+
+        return [''] + python_args[2:], run_module
+
+    if len(python_args) == 2 and python_args[0] == '-c':
+        code = python_args[1]
+
+        def run_code() -> None:
+            exec(compile(code, '<string>', 'exec'), {'__name__': '__main__'})
+
+        return ['-c'], run_code
+
+    raise ValueError("Unsupported Python command line: %s" % python_args)
+
+
+def execute_python_args(python_args: List[str], additional_sys_path: List[str]) -> int:
+    """
+    Runs a Python command line of the form "-m <module> <args>" or "-c <code>" in the current
+    interpreter, with the given directories added to sys.path, and returns the exit code that
+    the interpreter would return. Errors are reported to sys.stderr. Changes to the interpreter
+    state made by the executed code are not undone.
+    """
+    argv, target = _get_argv_and_target(python_args)
+    sys.argv = argv
+    # The directories go right after the current directory, where the interpreter puts the
+    # entries of PYTHONPATH, which is how they are passed to separate check processes.
+    sys.path[1:1] = additional_sys_path
+    try:
+        with warnings.catch_warnings():
+            target()
+    except SystemExit as exit_exception:
+        returncode, message = _get_exit_code(exit_exception)
+        if message is not None:
+            sys.stderr.write(message + '\n')
+        return returncode
+    except Exception as ex:
+        # Omit the frames of this module from the traceback, so that it looks the same as when
+        # the check runs in a separate process.
+        tb = ex.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+            tb = tb.tb_next
+        traceback.print_exception(type(ex), ex, tb)
+        return 1
+    return 0
+
+
+def run_python_args_in_process(
+        python_args: List[str],
+        additional_sys_path: List[str]) -> Tuple[str, str, int]:
+    """
+    Does the equivalent of running "python <python_args>" with the given directories prepended
+    to PYTHONPATH, and returns the standard output, standard error and exit code. The interpreter
+    state is restored afterwards, and any modules imported by the check are unloaded. Only one
+    check can run this way in a process at a time.
+    """
+    saved_argv = sys.argv
+    saved_path = list(sys.path)
+    saved_modules = dict(sys.modules)
+    saved_stdout = sys.stdout
+    saved_stderr = sys.stderr
+    saved_signal_function = signal.signal
+    saved_exit_function = os._exit
+    output_capture = _OutputCapture()
+    try:
+        signal.signal = _make_thread_safe_signal_function(saved_signal_function)
+        os._exit = _make_thread_safe_exit_function(saved_exit_function)
+        returncode = execute_python_args(python_args, additional_sys_path)
+    finally:
+        stdout, stderr = output_capture.stop()
+        sys.stdout = saved_stdout
+        sys.stderr = saved_stderr
+        sys.argv = saved_argv
+        signal.signal = saved_signal_function
+        os._exit = saved_exit_function
+        sys.path[:] = saved_path
+        _restore_modules(saved_modules)
+    return stdout, stderr, returncode
+
+
+def _get_max_rss_bytes() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _get_cpu_times() -> Tuple[float, float]:
+    rusage = resource.getrusage(resource.RUSAGE_SELF)
+    return rusage.ru_utime, rusage.ru_stime
+
+
+def _init_script_process() -> Tuple[Any, Any]:
+    """
+    Common initialization of the processes running this file as a script. Returns text streams
+    for the protocol, using the original standard input and output.
+    """
+    # This file is run as a script, so its directory is at the front of sys.path. Replace it with
+    # the current directory, as "python -m" would, so that checked code cannot import the
+    # modules of this directory by accident.
+    sys.path[0] = os.getcwd()
+
+    # Keep the original standard input and output for the protocol, and make sure that nothing
+    # the checks do at the file descriptor level can interfere with it.
+    protocol_in = io.TextIOWrapper(os.fdopen(os.dup(0), 'rb'), encoding='utf-8')
+    protocol_out = io.TextIOWrapper(os.fdopen(os.dup(1), 'wb'), encoding='utf-8')
+    devnull_fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull_fd, 0)
+    os.dup2(2, 1)
+    os.close(devnull_fd)
+    return protocol_in, protocol_out
+
+
+def worker_main() -> None:
+    """
+    The main loop of a long-lived worker process (see worker_pool.py). Reads one JSON request per
+    line from standard input, and writes one JSON response per line to standard output.
+    """
+    protocol_in, protocol_out = _init_script_process()
+    for request_line in protocol_in:
+        request = json.loads(request_line)
+        user_cpu_sec_before, system_cpu_sec_before = _get_cpu_times()
+        stdout, stderr, returncode = run_python_args_in_process(
+            request['python_args'], request['additional_sys_path'])
+        user_cpu_sec, system_cpu_sec = _get_cpu_times()
+        protocol_out.write(json.dumps({
+            'stdout': stdout,
+            'stderr': stderr,
+            'returncode': returncode,
+            'max_rss_bytes': _get_max_rss_bytes(),
+            'user_cpu_sec': user_cpu_sec - user_cpu_sec_before,
+            'system_cpu_sec': system_cpu_sec - system_cpu_sec_before,
+        }) + '\n')
+        protocol_out.flush()
+
+
+def _run_forked_check(connection: socket.socket) -> None:
+    """
+    Runs one check in a child process of the fork server. The request is read from the given
+    connection, and the response is written to it, preceded by a line with the process id of the
+    child, which leads a new process group that can be killed if the check times out. Never
+    returns.
+    """
+    try:
+        request = json.loads(connection.makefile('rb').readline().decode('utf-8'))
+        os.setsid()
+        connection.sendall(json.dumps({'pid': os.getpid()}).encode('utf-8') + b'\n')
+        output_capture = _OutputCapture()
+        returncode = execute_python_args(
+            request['python_args'], request['additional_sys_path'])
+        stdout, stderr = output_capture.stop()
+        # The CPU time of a forked child starts from zero.
+        user_cpu_sec, system_cpu_sec = _get_cpu_times()
+        connection.sendall(json.dumps({
+            'stdout': stdout,
+            'stderr': stderr,
+            'returncode': returncode,
+            'max_rss_bytes': _get_max_rss_bytes(),
+            'user_cpu_sec': user_cpu_sec,
+            'system_cpu_sec': system_cpu_sec,
+        }).encode('utf-8') + b'\n')
+    finally:
+        os._exit(0)
+
+
+def fork_server_main(socket_path: str, preload_modules: List[str]) -> None:
+    """
+    The main loop of the fork server (see fork_server.py). Imports the given modules, and then
+    forks a child process, which inherits the imported modules, for each connection to the given
+    Unix domain socket. Exits when its standard input is closed.
+    """
+    protocol_in, protocol_out = _init_script_process()
+
+    preloaded_modules = []
+    failed_modules = []
+    for module_name in preload_modules:
+        try:
+            importlib.import_module(module_name)
+            preloaded_modules.append(module_name)
+        except (Exception, SystemExit):
+            failed_modules.append(module_name)
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    # Children are reaped automatically. They report their results through the connection.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+    # The source files of all modules the children inherit, which are outdated once any of
+    # these files change.
+    loaded_file_paths = []
+    for module in list(sys.modules.values()):
+        module_file_path = getattr(module, '__file__', None)
+        if isinstance(module_file_path, str):
+            loaded_file_paths.append(os.path.abspath(module_file_path))
+    protocol_out.write(json.dumps({
+        'preloaded_modules': preloaded_modules,
+        'failed_modules': failed_modules,
+        'loaded_file_paths': loaded_file_paths,
+    }) + '\n')
+    protocol_out.flush()
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(protocol_in, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is protocol_in:
+                # Standard input is closed (or the client wrote something), time to exit.
+                return
+            connection, _ = listener.accept()
+            if os.fork() == 0:
+                selector.close()
+                listener.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                _run_forked_check(connection)
+            connection.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == '--fork-server':
+        fork_server_main(sys.argv[2], sys.argv[3:])
+    else:
+        worker_main()
@@ -0,0 +1,104 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List, Optional
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from codecheck.fork_server import ForkServer
+from codecheck.process_util import ProcessResult, run_process
+from codecheck.util import prepend_path_entries
+from codecheck.worker_pool import WorkerPool
+
+
+# Writes output in all the ways that a separate process would report.
+WRITE_OUTPUT_CODE = '; '.join([
+    'import os, subprocess, sys',
+    'print("print")',
+    'sys.stdout.flush()',
+    'os.write(1, b"os.write\\n")',
+    'subprocess.run([sys.executable, "-c", "print(\'subprocess\')"])',
+    'os.write(2, b"stderr\\n")',
+])
+
+PRINT_SYS_PATH_CODE = 'import sys; print("\\n".join(sys.path))'
+
+
+class PythonRunnerTest(unittest.TestCase):
+    """
+    Checks run by workers and by the fork server behave like checks run as separate processes.
+    """
+
+    def setUp(self) -> None:
+        self.cwd = tempfile.mkdtemp(prefix='codecheck_python_runner_test_')
+        self.addCleanup(shutil.rmtree, self.cwd)
+        self.additional_dir = tempfile.mkdtemp(prefix='codecheck_python_runner_test_')
+        self.addCleanup(shutil.rmtree, self.additional_dir)
+
+        self.worker_pool = WorkerPool(
+            python_interpreter=sys.executable,
+            max_tasks_per_worker=10,
+            max_rss_bytes_per_worker=2 ** 40,
+            cwd=self.cwd)
+        self.addCleanup(self.worker_pool.stop)
+        self.fork_server = ForkServer(sys.executable, [], cwd=self.cwd)
+        self.addCleanup(self.fork_server.stop)
+
+    def run_everywhere(self, python_args: List[str]) -> List[Optional[ProcessResult]]:
+        env = dict(os.environ)
+        env['PYTHONPATH'] = prepend_path_entries([self.additional_dir], env.get('PYTHONPATH'))
+        return [
+            run_process([sys.executable] + python_args, env, cwd=self.cwd),
+            # Run twice in the same worker, to make sure that the output of a check does not
+            # leak into the next one.
+            self.worker_pool.run(python_args, [self.additional_dir]),
+            self.worker_pool.run(python_args, [self.additional_dir]),
+            self.fork_server.run(python_args, [self.additional_dir]),
+        ]
+
+    def test_output_at_file_descriptor_level(self) -> None:
+        results = self.run_everywhere(['-c', WRITE_OUTPUT_CODE])
+        for process_result in results:
+            assert process_result is not None
+            self.assertEqual(process_result.stdout, 'print\nos.write\nsubprocess\n')
+            self.assertEqual(process_result.stderr, 'stderr\n')
+            self.assertEqual(process_result.returncode, 0)
+
+    def test_sys_path_order(self) -> None:
+        results = self.run_everywhere(['-c', PRINT_SYS_PATH_CODE])
+        expected_result = results[0]
+        assert expected_result is not None
+        expected_sys_path = expected_result.stdout.splitlines()
+        self.assertEqual(expected_sys_path[1], self.additional_dir)
+        for process_result in results[1:]:
+            assert process_result is not None
+            sys_path = process_result.stdout.splitlines()
+            # The first entry is '' for "-c" in a separate process, and the current directory in
+            # workers, which is the same for imports.
+            self.assertEqual(sys_path[1:len(expected_sys_path)], expected_sys_path[1:])
+
+    def test_exit_code_and_exception(self) -> None:
+        for process_result in self.run_everywhere(['-c', 'raise ValueError("failure")']):
+            assert process_result is not None
+            self.assertEqual(process_result.returncode, 1)
+            self.assertIn('ValueError: failure', process_result.stderr)
+        for process_result in self.run_everywhere(['-c', 'import sys; sys.exit(3)']):
+            assert process_result is not None
+            self.assertEqual(process_result.returncode, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,29 +10,70 @@
 # or implied. See the License for the specific language governing permissions and limitations
 # under the License.
 
+"""
+Reporting check results as they complete, either as human-readable text or in a machine-readable
+format (JSON Lines or JUnit XML). Results are written out one by one rather than collected, so that
+the output of a large run can be consumed while the run is still going.
+"""
 
-import sys
+from typing import Any, Callable, Dict, Optional, TextIO
+
+import abc
+import json
+import re
 import shlex
 
+from xml.sax.saxutils import escape, quoteattr
+
 from codecheck.check_result import CheckResult
+from codecheck.diagnostics import parse_diagnostics
 
 
-class Reporter:
+OUTPUT_FORMATS = ['text', 'jsonl', 'junit']
+
+# Characters that are not allowed in XML 1.0 documents, even escaped.
+XML_INVALID_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
 
-    def __init__(self, line_width: int):
-        self.line_width = line_width
+
+class Reporter(abc.ABC):
+    def __init__(self, output_file: TextIO) -> None:
+        self.output_file = output_file
+        # Called before anything is written, e.g. to clear a progress line on the terminal.
+        self.before_write: Optional[Callable[[], None]] = None
 
     def write(self, line: str) -> None:
-        sys.stdout.write(line)
+        if self.before_write is not None:
+            self.before_write()
+        self.output_file.write(line)
 
     def print(self, line: str) -> None:
         self.write(line + '\n')
 
+    @abc.abstractmethod
+    def print_check_result(self, check_result: CheckResult) -> None:
+        pass
+
+    def finish(self) -> None:
+        """
+        Called after the last result has been reported.
+        """
+        self.output_file.flush()
+
+
+class TextReporter(Reporter):
+    """
+    Prints the output of failed checks.
+    """
+
+    def __init__(self, output_file: TextIO, line_width: int) -> None:
+        super().__init__(output_file)
+        self.line_width = line_width
+
     def get_horizontal_line(self) -> str:
         return '-' * self.line_width + '\n'
 
     def print_check_result(self, check_result: CheckResult) -> None:
-        if check_result.returncode == 0:
+        if check_result.returncode == 0 or check_result.skip_reason is not None:
             return
 
         s = ''
@@ -58,3 +99,97 @@ class Reporter:
 
         s += '\n'
         self.write(s)
+
+
+class JsonLinesReporter(Reporter):
+    """
+    Writes one JSON object per line for every check, successful or not, including the diagnostics
+    parsed from its output.
+    """
+
+    def __init__(self, output_file: TextIO, relativize_path: Callable[[str], str]) -> None:
+        super().__init__(output_file)
+        self.relativize_path = relativize_path
+
+    def get_record(self, check_result: CheckResult) -> Dict[str, Any]:
+        record = check_result.to_dict()
+        record['rel_file_path'] = self.relativize_path(check_result.file_path)
+        record['from_cache'] = check_result.from_cache
+        record['diagnostics'] = []
+        for diagnostic in parse_diagnostics(check_result):
+            diagnostic.file_path = self.relativize_path(diagnostic.file_path)
+            record['diagnostics'].append(diagnostic.to_dict())
+        return record
+
+    def print_check_result(self, check_result: CheckResult) -> None:
+        self.print(json.dumps(self.get_record(check_result)))
+        self.output_file.flush()
+
+
+def xml_text(s: str) -> str:
+    """
+    >>> xml_text('a < b\x1b[0m')
+    'a &lt; b[0m'
+    """
+    return escape(XML_INVALID_CHARS_RE.sub('', s))
+
+
+def xml_attr(s: str) -> str:
+    """
+    >>> print(xml_attr('"x" & y'))
+    '"x" &amp; y'
+    """
+    return quoteattr(XML_INVALID_CHARS_RE.sub('', s))
+
+
+class JUnitReporter(Reporter):
+    """
+    Writes a JUnit XML report with a test case for every check, named after the file, with the
+    check type as the class name. The test cases are written as the checks complete, so the test
+    suite element does not carry the total counts, which JUnit consumers compute themselves.
+    """
+
+    def __init__(self, output_file: TextIO, relativize_path: Callable[[str], str]) -> None:
+        super().__init__(output_file)
+        self.relativize_path = relativize_path
+        self.print('<?xml version="1.0" encoding="UTF-8"?>')
+        self.print('<testsuites>')
+        self.print('<testsuite name="codecheck">')
+
+    def print_check_result(self, check_result: CheckResult) -> None:
+        s = '<testcase classname=%s name=%s time="%.3f">' % (
+            xml_attr(check_result.check_type),
+            xml_attr(self.relativize_path(check_result.file_path)),
+            check_result.get_duration_sec() or 0.0)
+        if check_result.skip_reason is not None:
+            s += '<skipped message=%s/>' % xml_attr(check_result.skip_reason)
+        elif check_result.returncode != 0:
+            diagnostics = parse_diagnostics(check_result)
+            message = (
+                '%d problems found' % len(diagnostics) if diagnostics
+                else 'Exit code: %d' % check_result.returncode)
+            s += '<failure message=%s>%s</failure>' % (
+                xml_attr(message),
+                xml_text('Command: %s\n' % ' '.join(
+                    shlex.quote(arg) for arg in check_result.cmd_args) +
+                    check_result.stdout + check_result.stderr))
+        s += '</testcase>'
+        self.print(s)
+        self.output_file.flush()
+
+    def finish(self) -> None:
+        self.print('</testsuite>')
+        self.print('</testsuites>')
+        super().finish()
+
+
+def create_reporter(
+        output_format: str,
+        output_file: TextIO,
+        relativize_path: Callable[[str], str]) -> Reporter:
+    if output_format == 'jsonl':
+        return JsonLinesReporter(output_file, relativize_path)
+    if output_format == 'junit':
+        return JUnitReporter(output_file, relativize_path)
+    assert output_format == 'text', f"Unknown output format: {output_format}"
+    return TextReporter(output_file, line_width=80)
@@ -0,0 +1,150 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Any, Dict, List
+
+import io
+import json
+import os
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from codecheck.check_result import CheckResult
+from codecheck.reporter import Reporter, create_reporter
+from codecheck.test_util import TempRepoTestCase
+
+
+ROOT_PATH = '/repo'
+
+
+def relativize_path(file_path: str) -> str:
+    return os.path.relpath(file_path, ROOT_PATH)
+
+
+def create_results() -> List[CheckResult]:
+    """
+    Returns a successful, a failed and a skipped check result.
+    """
+    successful_result = CheckResult(
+        check_type='import', file_path='/repo/a.py', cmd_args=['python', '-c', 'import a'])
+    successful_result.start_time = 100.0
+    successful_result.end_time = 101.5
+
+    failed_result = CheckResult(
+        check_type='pycodestyle',
+        file_path='/repo/pkg/b.py',
+        cmd_args=['pycodestyle', '/repo/pkg/b.py'],
+        stdout=('/repo/pkg/b.py:3:80: E501 line too long (101 > 100 characters)\n'
+                '/repo/pkg/b.py:7:1: W391 blank line at end of file\n'
+                'Control characters \x1b[0m & <markup>\n'),
+        returncode=1)
+
+    skipped_result = CheckResult(check_type='unittest', file_path='/repo/c_test.py')
+    skipped_result.skip_reason = 'compile check failed'
+    return [successful_result, failed_result, skipped_result]
+
+
+def report(output_format: str, check_results: List[CheckResult]) -> str:
+    output_file = io.StringIO()
+    reporter: Reporter = create_reporter(output_format, output_file, relativize_path)
+    for check_result in check_results:
+        reporter.print_check_result(check_result)
+    reporter.finish()
+    return output_file.getvalue()
+
+
+class ReporterTest(unittest.TestCase):
+    def test_text(self) -> None:
+        output = report('text', create_results())
+        # Only failures are shown.
+        self.assertIn("Check 'pycodestyle' for /repo/pkg/b.py", output)
+        self.assertIn('Exit code: 1', output)
+        self.assertIn('E501 line too long', output)
+        self.assertNotIn('a.py', output)
+        self.assertNotIn('c_test.py', output)
+
+    def test_jsonl(self) -> None:
+        records = [json.loads(line) for line in report('jsonl', create_results()).splitlines()]
+        self.assertEqual(
+            [(record['check_type'], record['rel_file_path'], record['returncode'])
+             for record in records],
+            [('import', 'a.py', 0), ('pycodestyle', 'pkg/b.py', 1), ('unittest', 'c_test.py', 0)])
+        self.assertEqual(records[0]['diagnostics'], [])
+        self.assertEqual(records[0]['end_time'] - records[0]['start_time'], 1.5)
+        self.assertFalse(records[0]['from_cache'])
+        self.assertEqual(records[1]['diagnostics'], [
+            {'file_path': 'pkg/b.py', 'line': 3, 'column': 80, 'severity': 'error',
+             'code': 'E501', 'message': 'line too long (101 > 100 characters)'},
+            {'file_path': 'pkg/b.py', 'line': 7, 'column': 1, 'severity': 'warning',
+             'code': 'W391', 'message': 'blank line at end of file'},
+        ])
+        self.assertEqual(records[2]['skip_reason'], 'compile check failed')
+
+    def test_junit(self) -> None:
+        test_suites = ElementTree.fromstring(report('junit', create_results()))
+        test_cases = test_suites.findall('testsuite/testcase')
+        self.assertEqual(
+            [(test_case.get('classname'), test_case.get('name')) for test_case in test_cases],
+            [('import', 'a.py'), ('pycodestyle', 'pkg/b.py'), ('unittest', 'c_test.py')])
+        self.assertEqual(test_cases[0].get('time'), '1.500')
+        self.assertEqual(list(test_cases[0]), [])
+
+        failure = test_cases[1].find('failure')
+        assert failure is not None
+        self.assertEqual(failure.get('message'), '2 problems found')
+        # Characters that are not allowed in XML are removed.
+        self.assertIn('Control characters [0m & <markup>', failure.text or '')
+
+        skipped = test_cases[2].find('skipped')
+        assert skipped is not None
+        self.assertEqual(skipped.get('message'), 'compile check failed')
+
+    def test_junit_without_diagnostics(self) -> None:
+        check_result = CheckResult(
+            check_type='import', file_path='/repo/a.py', stderr='ImportError\n', returncode=1)
+        test_suites = ElementTree.fromstring(report('junit', [check_result]))
+        failure = test_suites.find('testsuite/testcase/failure')
+        assert failure is not None
+        self.assertEqual(failure.get('message'), 'Exit code: 1')
+        self.assertIn('ImportError', failure.text or '')
+
+
+class OutputFormatTest(TempRepoTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write_files({'a.py': 'X = 1\n', 'b.py': 'X=1\n'})
+        self.commit_all()
+
+    def test_jsonl(self) -> None:
+        records: Dict[str, Dict[str, Any]] = {
+            '%s %s' % (record['check_type'], record['rel_file_path']): record
+            for record in self.run_codecheck_jsonl()
+        }
+        self.assertEqual(records['pycodestyle a.py']['diagnostics'], [])
+        self.assertEqual(
+            [(diagnostic['file_path'], diagnostic['code'])
+             for diagnostic in records['pycodestyle b.py']['diagnostics']],
+            [('b.py', 'E225')])
+
+    def test_junit(self) -> None:
+        process = self.run_codecheck('--output-format', 'junit')
+        self.assertEqual(process.returncode, 1)
+        test_suites = ElementTree.fromstring(process.stdout)
+        failed_test_cases = [
+            '%s %s' % (test_case.get('classname'), test_case.get('name'))
+            for test_case in test_suites.findall('testsuite/testcase')
+            if test_case.find('failure') is not None]
+        self.assertEqual(failed_test_cases, ['pycodestyle b.py'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,394 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+A persistent cache of check results, stored on disk and optionally shared with other machines.
+Results are keyed by a hash of everything that could affect them: file contents, check type, tool
+version, interpreter environment, and configuration.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import concurrent.futures
+import json
+import os
+import subprocess
+
+from codecheck.cache_backends import CacheBackend
+from codecheck.check_result import CheckResult
+from codecheck.constants import CHECK_TYPES_AFFECTED_BY_IMPORTS, MYPY_TYPE_INFO_SUFFIXES
+from codecheck.import_graph import ImportGraph
+from codecheck.util import (
+    ensure_str_decoded,
+    get_sha256_of_file,
+    get_sha256_of_strings,
+)
+
+# Increment this when the format of cache keys or entries changes.
+CACHE_FORMAT_VERSION = '3'
+
+# Replaces the path of the repository root in stored results.
+ROOT_PATH_PLACEHOLDER = '${CODECHECK_ROOT}'
+
+# How many requests to make to the remote cache at the same time.
+REMOTE_CACHE_PARALLELISM = 16
+
+# Printed by the interpreter used to run checks. Installed distributions are included because
+# they affect the results of import, mypy and unit test checks.
+INTERPRETER_FINGERPRINT_SCRIPT = '''
+import sys
+print(sys.version)
+try:
+    import importlib.metadata
+    for dist in sorted('%s==%s' % (d.metadata['Name'], d.version)
+                       for d in importlib.metadata.distributions()):
+        print(dist)
+except Exception:
+    pass
+'''
+
+# Configuration files that pycodestyle looks for in the directory of the checked files and its
+# parents.
+PYCODESTYLE_PROJECT_CONFIG_NAMES = ['setup.cfg', 'tox.ini']
+
+SHELLCHECK_CONFIG_NAME = '.shellcheckrc'
+
+# Environment variables that affect the results of Python-based checks.
+RELEVANT_ENV_VAR_NAMES = ['PYTHONPATH', 'MYPYPATH']
+
+
+def get_command_output_for_key(args: List[str]) -> str:
+    """
+    Runs a command (e.g. a tool version command) and returns its output for inclusion into a
+    cache key. Failures are included as well, so that installing a missing tool changes the key.
+    """
+    try:
+        return ensure_str_decoded(subprocess.check_output(args, stderr=subprocess.STDOUT))
+    except subprocess.CalledProcessError as ex:
+        return 'exit code %d: %s' % (ex.returncode, ensure_str_decoded(ex.output))
+    except OSError as ex:
+        return 'error: %s' % ex
+
+
+def read_file_for_key(file_path: str) -> str:
+    try:
+        with open(file_path, 'rb') as input_file:
+            return ensure_str_decoded(input_file.read())
+    except (OSError, UnicodeDecodeError) as ex:
+        return 'error: %s' % ex
+
+
+class CacheKeyBuilder:
+    """
+    Computes result cache keys for (file, check type) pairs. Tool versions, configuration file
+    contents and file hashes are computed at most once per run.
+    """
+
+    def __init__(
+            self,
+            root_path: str,
+            python_interpreter: str,
+            mypy_config_path: str,
+            tracked_file_paths: List[str],
+            extra_key_parts: List[str],
+            import_graph: Optional[ImportGraph] = None) -> None:
+        """
+        :param tracked_file_paths: all files tracked in the repository. The results of some check
+            types depend on files other than the one being checked, so their keys include a hash
+            of all tracked files of the relevant type.
+        :param extra_key_parts: command-line options that affect check results.
+        :param import_graph: if specified, the keys of checks affected by imports of Python files
+            only include the files that the checked file depends on, instead of all Python files.
+        """
+        self.root_path_realpath = os.path.realpath(root_path)
+        self.python_interpreter = python_interpreter
+        self.mypy_config_path = mypy_config_path
+        self.tracked_file_paths = tracked_file_paths
+        self.extra_key_parts = extra_key_parts
+        self.import_graph = import_graph
+
+        self.file_hashes: Dict[str, str] = {}
+        if import_graph is not None:
+            self.file_hashes.update(import_graph.file_hashes)
+        self.tool_versions: Dict[str, str] = {}
+        self.tree_hashes: Dict[Union[str, Tuple[str, ...]], str] = {}
+        self.config_hashes_by_dir: Dict[Tuple[str, str], str] = {}
+        self.interpreter_fingerprint: Optional[str] = None
+
+    def relativize_path_for_key(self, path: str) -> str:
+        """
+        Makes paths within the repository relative to its root, so that keys are the same for
+        checkouts in different directories, e.g. on different machines sharing a remote cache.
+
+        >>> CacheKeyBuilder('/src/repo', 'python3', 'mypy.ini', [], []).relativize_path_for_key(
+        ...     '/src/repo/python')
+        '${CODECHECK_ROOT}/python'
+        """
+        if not path or not os.path.isabs(path):
+            return path
+        rel_path = os.path.relpath(os.path.realpath(path), self.root_path_realpath)
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return path
+        return os.path.join(ROOT_PATH_PLACEHOLDER, rel_path)
+
+    def get_file_hash(self, file_path: str) -> str:
+        file_path = os.path.abspath(file_path)
+        if file_path not in self.file_hashes:
+            self.file_hashes[file_path] = get_sha256_of_file(file_path)
+        return self.file_hashes[file_path]
+
+    def get_interpreter_fingerprint(self) -> str:
+        if self.interpreter_fingerprint is None:
+            self.interpreter_fingerprint = get_sha256_of_strings([
+                get_command_output_for_key(
+                    [self.python_interpreter, '-c', INTERPRETER_FINGERPRINT_SCRIPT])
+            ])
+        return self.interpreter_fingerprint
+
+    def get_tool_version(self, check_type: str) -> str:
+        if check_type not in self.tool_versions:
+            if check_type in ['mypy', 'pycodestyle']:
+                version = get_command_output_for_key(
+                    [self.python_interpreter, '-m', check_type, '--version'])
+            elif check_type == 'shellcheck':
+                version = get_command_output_for_key(['shellcheck', '--version'])
+            else:
+                # Other check types are implemented by the Python interpreter itself, which is
+                # covered by the interpreter fingerprint.
+                version = ''
+            self.tool_versions[check_type] = version
+        return self.tool_versions[check_type]
+
+    def get_tree_hash(self, suffix: Union[str, Tuple[str, ...]]) -> str:
+        """
+        Returns a hash of the paths and contents of all tracked files with the given suffix, or
+        any of the given suffixes.
+        """
+        if suffix not in self.tree_hashes:
+            key_parts = []
+            for file_path in sorted(self.tracked_file_paths):
+                if file_path.endswith(suffix) and os.path.isfile(file_path):
+                    key_parts.append(os.path.relpath(file_path, self.root_path_realpath))
+                    key_parts.append(self.get_file_hash(file_path))
+            self.tree_hashes[suffix] = get_sha256_of_strings(key_parts)
+        return self.tree_hashes[suffix]
+
+    def get_nearest_config_hash(self, dir_path: str, config_names: List[str]) -> str:
+        """
+        Looks for the given configuration files in the given directory and its parents, stopping
+        at the first directory that contains any of them, and returns a hash of their contents.
+        """
+        cache_key = (dir_path, ' '.join(config_names))
+        if cache_key in self.config_hashes_by_dir:
+            return self.config_hashes_by_dir[cache_key]
+
+        key_parts: List[str] = []
+        parent_dir_path = os.path.dirname(dir_path)
+        for config_name in config_names:
+            config_path = os.path.join(dir_path, config_name)
+            if os.path.isfile(config_path):
+                key_parts.extend([
+                    self.relativize_path_for_key(config_path), read_file_for_key(config_path)])
+        if key_parts:
+            result = get_sha256_of_strings(key_parts)
+        elif parent_dir_path == dir_path:
+            result = ''
+        else:
+            result = self.get_nearest_config_hash(parent_dir_path, config_names)
+        self.config_hashes_by_dir[cache_key] = result
+        return result
+
+    def get_config_key_parts(self, file_path: str, check_type: str) -> List[str]:
+        dir_path = os.path.dirname(os.path.abspath(file_path))
+        if check_type == 'mypy':
+            return [
+                self.relativize_path_for_key(self.mypy_config_path),
+                read_file_for_key(self.mypy_config_path),
+            ]
+        if check_type == 'pycodestyle':
+            user_config_path = os.path.join(
+                os.getenv('XDG_CONFIG_HOME') or os.path.expanduser('~/.config'), 'pycodestyle')
+            return [
+                self.get_nearest_config_hash(dir_path, PYCODESTYLE_PROJECT_CONFIG_NAMES),
+                read_file_for_key(user_config_path),
+            ]
+        if check_type == 'shellcheck':
+            return [
+                self.get_nearest_config_hash(dir_path, [SHELLCHECK_CONFIG_NAME]),
+                read_file_for_key(os.path.expanduser(os.path.join('~', SHELLCHECK_CONFIG_NAME))),
+            ]
+        return []
+
+    def get_key(self, file_path: str, check_type: str) -> str:
+        key_parts = [
+            CACHE_FORMAT_VERSION,
+            check_type,
+            os.path.relpath(os.path.realpath(file_path), self.root_path_realpath),
+            self.get_file_hash(file_path),
+            self.get_tool_version(check_type),
+        ]
+        if check_type == 'shellcheck':
+            # Shellcheck follows sourced files, so any shell script could affect the result.
+            key_parts.append(self.get_tree_hash('.sh'))
+        else:
+            key_parts.append(self.get_interpreter_fingerprint())
+            key_parts.extend(
+                '%s=%s' % (env_var_name, os.pathsep.join(
+                    self.relativize_path_for_key(entry)
+                    for entry in os.getenv(env_var_name, '').split(os.pathsep)))
+                for env_var_name in RELEVANT_ENV_VAR_NAMES)
+        if check_type in CHECK_TYPES_AFFECTED_BY_IMPORTS:
+            file_path = os.path.abspath(file_path)
+            if (self.import_graph is not None and
+                    self.import_graph.get_module_name(file_path) is not None):
+                key_parts.append(
+                    self.import_graph.get_dependency_hash(file_path, self.root_path_realpath))
+            else:
+                key_parts.append(self.get_tree_hash('.py'))
+        if check_type == 'mypy':
+            # Stubs and py.typed markers are not part of the import graph, and are not checked
+            # themselves, but change the types that mypy sees.
+            key_parts.append(self.get_tree_hash(MYPY_TYPE_INFO_SUFFIXES))
+        key_parts.extend(self.get_config_key_parts(file_path, check_type))
+        key_parts.extend(self.extra_key_parts)
+        return get_sha256_of_strings(key_parts)
+
+
+class ResultCache:
+    """
+    Looks up check results in a local cache backend, and optionally in a remote one shared with
+    other machines. Results found remotely are copied into the local cache. New results are stored
+    locally right away, and uploaded to the remote cache in the background.
+
+    Entries are portable between checkouts of the repository in different directories: paths in
+    the stored results are relative to the repository root, which is substituted back when results
+    are read.
+    """
+
+    def __init__(
+            self,
+            root_path: str,
+            local_backend: CacheBackend,
+            remote_backend: Optional[CacheBackend] = None,
+            upload_to_remote: bool = True) -> None:
+        self.root_path = os.path.abspath(root_path)
+        self.local_backend = local_backend
+        self.remote_backend = remote_backend
+        self.upload_to_remote = upload_to_remote
+        self.num_hits = 0
+        self.num_remote_hits = 0
+        self.num_misses = 0
+        self.remote_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.upload_futures: List['concurrent.futures.Future[None]'] = []
+        if remote_backend is not None:
+            self.remote_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=REMOTE_CACHE_PARALLELISM, thread_name_prefix='remote_cache')
+
+    def get_root_paths(self) -> List[str]:
+        root_paths = [self.root_path]
+        root_path_realpath = os.path.realpath(self.root_path)
+        if root_path_realpath != self.root_path:
+            root_paths.append(root_path_realpath)
+        return root_paths
+
+    def serialize(self, check_result: CheckResult) -> str:
+        def relativize(s: str) -> str:
+            for root_path in self.get_root_paths():
+                s = s.replace(root_path + os.sep, ROOT_PATH_PLACEHOLDER + os.sep)
+            return s
+
+        d = check_result.to_dict()
+        d['file_path'] = os.path.relpath(check_result.file_path, self.root_path)
+        d['cmd_args'] = [relativize(arg) for arg in check_result.cmd_args]
+        d['stdout'] = relativize(check_result.stdout)
+        d['stderr'] = relativize(check_result.stderr)
+        d['extra_messages'] = [relativize(message) for message in check_result.extra_messages]
+        return json.dumps(d)
+
+    def deserialize(self, value: str) -> CheckResult:
+        def absolutize(s: str) -> str:
+            return s.replace(ROOT_PATH_PLACEHOLDER + os.sep, self.root_path + os.sep)
+
+        check_result = CheckResult.from_dict(json.loads(value))
+        check_result.file_path = os.path.join(self.root_path, check_result.file_path)
+        check_result.cmd_args = [absolutize(arg) for arg in check_result.cmd_args]
+        check_result.stdout = absolutize(check_result.stdout)
+        check_result.stderr = absolutize(check_result.stderr)
+        check_result.extra_messages = [
+            absolutize(message) for message in check_result.extra_messages]
+        check_result.from_cache = True
+        return check_result
+
+    def get_from_backend(self, backend: CacheBackend, key: str) -> Optional[CheckResult]:
+        value = backend.get(key)
+        if value is None:
+            return None
+        try:
+            return self.deserialize(value)
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, CheckResult]:
+        """
+        Returns the cached results for those of the given keys that are found in the cache. Keys
+        missing from the local cache are looked up in the remote cache in parallel.
+        """
+        results: Dict[str, CheckResult] = {}
+        local_misses = []
+        for key in keys:
+            check_result = self.get_from_backend(self.local_backend, key)
+            if check_result is None:
+                local_misses.append(key)
+            else:
+                results[key] = check_result
+
+        if self.remote_backend is not None and self.remote_executor is not None:
+            remote_backend = self.remote_backend
+            for key, check_result in zip(local_misses, self.remote_executor.map(
+                    lambda key: self.get_from_backend(remote_backend, key), local_misses)):
+                if check_result is not None:
+                    results[key] = check_result
+                    self.local_backend.put(key, self.serialize(check_result))
+                    self.num_remote_hits += 1
+
+        self.num_hits += len(results)
+        self.num_misses += len(keys) - len(results)
+        return results
+
+    def put(self, key: str, check_result: CheckResult) -> None:
+        value = self.serialize(check_result)
+        self.local_backend.put(key, value)
+        if (self.remote_backend is not None and
+                self.remote_executor is not None and
+                self.upload_to_remote):
+            self.upload_futures.append(
+                self.remote_executor.submit(self.remote_backend.put, key, value))
+
+    def wait_for_uploads(self) -> None:
+        for future in self.upload_futures:
+            future.result()
+        self.upload_futures = []
+
+    def evict_if_needed(self) -> None:
+        self.local_backend.evict_if_needed()
+
+    def get_stats_description(self) -> str:
+        return "%d hits%s, %d misses" % (
+            self.num_hits,
+            ' (%d from the remote cache)' % self.num_remote_hits
+            if self.remote_backend is not None else '',
+            self.num_misses)
+
+    def close(self) -> None:
+        self.wait_for_uploads()
+        if self.remote_executor is not None:
+            self.remote_executor.shutdown()
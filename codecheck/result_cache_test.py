@@ -0,0 +1,188 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from codecheck.cache_backends import DirectoryCacheBackend
+from codecheck.check_result import CheckResult
+from codecheck.import_graph import ImportGraph
+from codecheck.result_cache import CacheKeyBuilder, ResultCache
+
+
+REPO_FILES = {
+    'a.py': 'import b\n',
+    'b.py': 'X = 1\n',
+    'c.py': 'Y = 2\n',
+    'stubs/d.pyi': 'Z: int\n',
+    'pkg/__init__.py': '',
+    'pkg/py.typed': '',
+    'setup.cfg': '[pycodestyle]\nmax-line-length = 100\n',
+    'mypy.ini': '[mypy]\n',
+}
+
+
+class CacheKeyBuilderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_result_cache_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        for file_name, content in REPO_FILES.items():
+            self.write_file(file_name, content)
+
+    def write_file(self, file_name: str, content: str) -> None:
+        file_path = os.path.join(self.root_path, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as output_file:
+            output_file.write(content)
+
+    def get_module_name(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.root_path)[:-len('.py')].replace(os.sep, '.')
+
+    def get_key(
+            self,
+            file_name: str,
+            check_type: str,
+            use_import_graph: bool = False,
+            extra_key_parts: List[str] = []) -> str:
+        """
+        Returns the key with a new builder, like in a new run, so that no hashes are reused.
+        """
+        tracked_file_paths = [
+            os.path.join(self.root_path, file_name) for file_name in sorted(REPO_FILES)
+            if not file_name.endswith(('.cfg', '.ini'))]
+        import_graph = None
+        if use_import_graph:
+            import_graph = ImportGraph(tracked_file_paths, self.get_module_name)
+        return CacheKeyBuilder(
+            self.root_path,
+            sys.executable,
+            os.path.join(self.root_path, 'mypy.ini'),
+            tracked_file_paths,
+            extra_key_parts,
+            import_graph
+        ).get_key(os.path.join(self.root_path, file_name), check_type)
+
+    def test_checked_file_changes(self) -> None:
+        key = self.get_key('c.py', 'pycodestyle')
+        self.assertEqual(self.get_key('c.py', 'pycodestyle'), key)
+        self.assertNotEqual(self.get_key('c.py', 'compile'), key)
+        self.write_file('c.py', 'Y = 3\n')
+        self.assertNotEqual(self.get_key('c.py', 'pycodestyle'), key)
+
+    def test_other_files_only_affect_checks_that_depend_on_them(self) -> None:
+        pycodestyle_key = self.get_key('c.py', 'pycodestyle')
+        import_key = self.get_key('c.py', 'import')
+        self.write_file('b.py', 'X = 2\n')
+        self.assertEqual(self.get_key('c.py', 'pycodestyle'), pycodestyle_key)
+        # Without the import graph, any Python file could be imported.
+        self.assertNotEqual(self.get_key('c.py', 'import'), import_key)
+
+    def test_import_graph_limits_dependencies(self) -> None:
+        a_key = self.get_key('a.py', 'import', use_import_graph=True)
+        c_key = self.get_key('c.py', 'import', use_import_graph=True)
+        self.write_file('b.py', 'X = 2\n')
+        self.assertNotEqual(self.get_key('a.py', 'import', use_import_graph=True), a_key)
+        self.assertEqual(self.get_key('c.py', 'import', use_import_graph=True), c_key)
+
+    def test_type_information_files_affect_mypy(self) -> None:
+        for type_info_file_name in ['stubs/d.pyi', 'pkg/py.typed']:
+            mypy_key = self.get_key('c.py', 'mypy', use_import_graph=True)
+            import_key = self.get_key('c.py', 'import', use_import_graph=True)
+            self.write_file(type_info_file_name, '# changed\n')
+            self.assertNotEqual(
+                self.get_key('c.py', 'mypy', use_import_graph=True), mypy_key, type_info_file_name)
+            self.assertEqual(self.get_key('c.py', 'import', use_import_graph=True), import_key)
+
+    def test_config_changes(self) -> None:
+        pycodestyle_key = self.get_key('c.py', 'pycodestyle')
+        mypy_key = self.get_key('c.py', 'mypy')
+        self.write_file('setup.cfg', '[pycodestyle]\nmax-line-length = 80\n')
+        self.assertNotEqual(self.get_key('c.py', 'pycodestyle'), pycodestyle_key)
+        self.assertEqual(self.get_key('c.py', 'mypy'), mypy_key)
+        self.write_file('mypy.ini', '[mypy]\nstrict = True\n')
+        self.assertNotEqual(self.get_key('c.py', 'mypy'), mypy_key)
+
+    def test_extra_key_parts(self) -> None:
+        self.assertNotEqual(
+            self.get_key('c.py', 'pycodestyle', extra_key_parts=['verbose=False']),
+            self.get_key('c.py', 'pycodestyle', extra_key_parts=['verbose=True']))
+
+    def test_keys_do_not_depend_on_checkout_location(self) -> None:
+        key = self.get_key('a.py', 'mypy', use_import_graph=True)
+        other_root_path = tempfile.mkdtemp(prefix='codecheck_result_cache_test_')
+        self.addCleanup(shutil.rmtree, other_root_path)
+        shutil.rmtree(other_root_path)
+        shutil.copytree(self.root_path, other_root_path)
+        self.root_path = other_root_path
+        self.assertEqual(self.get_key('a.py', 'mypy', use_import_graph=True), key)
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp(prefix='codecheck_result_cache_test_')
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_results_are_portable_between_checkouts(self) -> None:
+        backend = DirectoryCacheBackend(self.cache_dir, max_size_bytes=None)
+        check_result = CheckResult(
+            'mypy',
+            '/src/repo1/a.py',
+            cmd_args=['mypy', '/src/repo1/a.py'],
+            stdout='/src/repo1/a.py:1: error: failure\n',
+            returncode=1)
+        ResultCache('/src/repo1', backend).put('key', check_result)
+
+        result_cache = ResultCache('/src/repo2', backend)
+        self.assertEqual(list(result_cache.get_many(['key', 'missing_key'])), ['key'])
+        cached_result = result_cache.get_many(['key'])['key']
+        self.assertTrue(cached_result.from_cache)
+        self.assertEqual(cached_result.file_path, '/src/repo2/a.py')
+        self.assertEqual(cached_result.cmd_args, ['mypy', '/src/repo2/a.py'])
+        self.assertEqual(cached_result.stdout, '/src/repo2/a.py:1: error: failure\n')
+        self.assertEqual(cached_result.returncode, 1)
+        self.assertEqual(result_cache.get_stats_description(), '2 hits, 1 misses')
+
+    def test_remote_cache(self) -> None:
+        local_backend = DirectoryCacheBackend(
+            os.path.join(self.cache_dir, 'local'), max_size_bytes=None)
+        remote_backend = DirectoryCacheBackend(
+            os.path.join(self.cache_dir, 'remote'), max_size_bytes=None)
+        other_local_backend = DirectoryCacheBackend(
+            os.path.join(self.cache_dir, 'other_local'), max_size_bytes=None)
+
+        # New results are uploaded, unless uploads are turned off.
+        result_cache = ResultCache('/src/repo1', local_backend, remote_backend)
+        result_cache.put('key1', CheckResult('compile', '/src/repo1/a.py'))
+        result_cache.close()
+        result_cache = ResultCache(
+            '/src/repo1', local_backend, remote_backend, upload_to_remote=False)
+        result_cache.put('key2', CheckResult('compile', '/src/repo1/b.py'))
+        result_cache.close()
+        self.assertIsNotNone(remote_backend.get('key1'))
+        self.assertIsNone(remote_backend.get('key2'))
+
+        # Results found in the remote cache are copied to the local one.
+        result_cache = ResultCache('/src/repo2', other_local_backend, remote_backend)
+        self.assertEqual(list(result_cache.get_many(['key1', 'key2'])), ['key1'])
+        result_cache.close()
+        self.assertEqual(
+            result_cache.get_stats_description(), '1 hits (1 from the remote cache), 1 misses')
+        self.assertIsNotNone(other_local_backend.get('key1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from codecheck.check_result import CheckResult
+from codecheck.util import format_size, increment_counter
+
+
+INDENTATION_SEPARATOR = '\n' + ' ' * 4
+
+# How many of the longest tasks on the critical path to show.
+NUM_CRITICAL_PATH_TASKS_TO_SHOW = 5
+
+# How many of the slowest tasks of the whole run to show.
+NUM_SLOWEST_TASKS_TO_SHOW = 5
+
+
+def print_stats(
+        description: str,
+        d: Dict[str, int],
+        failure_counts: Dict[str, int] = {}) -> None:
+    print("%s:%s%s" % (
+        description,
+        INDENTATION_SEPARATOR,
+        INDENTATION_SEPARATOR.join(
+            '%s: %s%s' % (
+                k,
+                v,
+                ' (%d failed)' % failure_counts[k] if k in failure_counts else ''
+            ) for k, v in sorted(d.items())
+        )
+    ))
+
+
+def get_task_description(
+        results: List[CheckResult], relativize_path: Callable[[str], str]) -> str:
+    return '%s %s%s' % (
+        results[0].check_type,
+        relativize_path(results[0].file_path),
+        ' and %d more files' % (len(results) - 1) if len(results) > 1 else '')
+
+
+def get_resource_usage_description(
+        duration_sec: float, cpu_sec: Optional[float], max_rss_bytes: Optional[int]) -> str:
+    """
+    >>> get_resource_usage_description(2.25, 1.5, 1572864)
+    '2.2 seconds, 1.5 CPU seconds, peak memory 1.5M'
+    >>> get_resource_usage_description(0.5, None, None)
+    '0.5 seconds'
+    """
+    parts = ['%.1f seconds' % duration_sec]
+    if cpu_sec is not None:
+        parts.append('%.1f CPU seconds' % cpu_sec)
+    if max_rss_bytes is not None:
+        parts.append('peak memory %s' % format_size(max_rss_bytes))
+    return ', '.join(parts)
+
+
+class RunStats:
+    """
+    Counts of checks by directory, by type, and by result, printed at the end of a run.
+    """
+
+    def __init__(self) -> None:
+        self.checks_by_dir: Dict[str, int] = {}
+        self.checks_by_dir_failed: Dict[str, int] = {}
+
+        self.checks_by_type: Dict[str, int] = {}
+        self.checks_by_type_failed: Dict[str, int] = {}
+
+        self.checks_by_result: Dict[str, int] = {}
+
+        # Results of checks that were actually run (not taken from the cache), grouped by task.
+        self.task_results: Dict[Tuple[str, float], List[CheckResult]] = {}
+
+        # Names, start times and end times of the stages of the run.
+        self.stages: List[Tuple[str, float, float]] = []
+
+        # Numbers of hits and misses of the result cache, if it was used.
+        self.result_cache_description: Optional[str] = None
+
+    def add_check(self, rel_dir: str, check_type: str) -> None:
+        increment_counter(self.checks_by_dir, rel_dir)
+        increment_counter(self.checks_by_type, check_type)
+
+    def add_skipped_result(self) -> None:
+        increment_counter(self.checks_by_result, 'skipped')
+
+    def add_result(
+            self,
+            rel_dir: str,
+            check_type: str,
+            succeeded: bool,
+            timed_out: bool = False) -> None:
+        if succeeded:
+            increment_counter(self.checks_by_result, 'success')
+        else:
+            increment_counter(self.checks_by_result, 'timeout' if timed_out else 'failure')
+            increment_counter(self.checks_by_type_failed, check_type)
+            increment_counter(self.checks_by_dir_failed, rel_dir)
+
+    def has_failures(self) -> bool:
+        """
+        Returns True if any check failed or timed out.
+
+        >>> stats = RunStats()
+        >>> stats.add_result('root', 'mypy', succeeded=True)
+        >>> stats.add_skipped_result()
+        >>> stats.has_failures()
+        False
+        >>> stats.add_result('root', 'unittest', succeeded=False, timed_out=True)
+        >>> stats.has_failures()
+        True
+        """
+        return bool(
+            self.checks_by_result.get('failure', 0) or self.checks_by_result.get('timeout', 0))
+
+    def add_stage(self, name: str, start_time: float, end_time: float) -> None:
+        self.stages.append((name, start_time, end_time))
+
+    def add_timed_result(self, check_result: CheckResult) -> None:
+        if (check_result.from_cache or
+                check_result.worker_id is None or
+                check_result.start_time is None):
+            return
+        self.task_results.setdefault(
+            (check_result.worker_id, check_result.start_time), []).append(check_result)
+
+    def print_critical_path(self, relativize_path: Callable[[str], str]) -> None:
+        """
+        Prints the tasks run by the worker thread that finished last. The run could only have
+        finished sooner if these tasks had been shorter or had been distributed differently.
+        """
+        if not self.task_results:
+            return
+        worker_tasks: Dict[str, List[List[CheckResult]]] = {}
+        for (worker_id, _), results in self.task_results.items():
+            worker_tasks.setdefault(worker_id, []).append(results)
+        last_worker_id = max(
+            worker_tasks,
+            key=lambda worker_id: max(results[0].end_time or 0.0
+                                      for results in worker_tasks[worker_id]))
+        tasks = worker_tasks[last_worker_id]
+        tasks.sort(key=lambda results: results[0].get_duration_sec() or 0.0, reverse=True)
+        print("Critical path: %d tasks taking %.1f seconds in worker %s, longest ones:%s%s" % (
+            len(tasks),
+            sum(results[0].get_duration_sec() or 0.0 for results in tasks),
+            last_worker_id,
+            INDENTATION_SEPARATOR,
+            INDENTATION_SEPARATOR.join(
+                '%.1f seconds: %s' % (
+                    results[0].get_duration_sec() or 0.0,
+                    get_task_description(results, relativize_path))
+                for results in tasks[:NUM_CRITICAL_PATH_TASKS_TO_SHOW])))
+
+    def print_resource_usage(self, relativize_path: Callable[[str], str]) -> None:
+        """
+        Prints the total wall time and CPU time, and the peak memory usage, of the checks that
+        were run, by check type, followed by the slowest tasks. The CPU time and memory usage are
+        only shown where they could be measured.
+        """
+        if not self.task_results:
+            return
+        tasks = list(self.task_results.values())
+        num_checks_by_type: Dict[str, int] = {}
+        duration_sec_by_type: Dict[str, float] = {}
+        cpu_sec_by_type: Dict[str, float] = {}
+        max_rss_bytes_by_type: Dict[str, int] = {}
+        for results in tasks:
+            check_type = results[0].check_type
+            num_checks_by_type[check_type] = num_checks_by_type.get(check_type, 0) + len(results)
+            duration_sec_by_type[check_type] = (
+                duration_sec_by_type.get(check_type, 0.0) + (results[0].get_duration_sec() or 0.0))
+            cpu_sec = results[0].get_cpu_sec()
+            if cpu_sec is not None:
+                cpu_sec_by_type[check_type] = cpu_sec_by_type.get(check_type, 0.0) + cpu_sec
+            max_rss_bytes = results[0].max_rss_bytes
+            if max_rss_bytes is not None:
+                max_rss_bytes_by_type[check_type] = max(
+                    max_rss_bytes, max_rss_bytes_by_type.get(check_type, 0))
+        print("Resource usage by check type:%s%s" % (
+            INDENTATION_SEPARATOR,
+            INDENTATION_SEPARATOR.join(
+                '%s: %d checks, %s' % (
+                    check_type,
+                    num_checks_by_type[check_type],
+                    get_resource_usage_description(
+                        duration_sec_by_type[check_type],
+                        cpu_sec_by_type.get(check_type),
+                        max_rss_bytes_by_type.get(check_type)))
+                for check_type in sorted(num_checks_by_type))))
+
+        tasks.sort(key=lambda results: results[0].get_duration_sec() or 0.0, reverse=True)
+        print("Slowest tasks:%s%s" % (
+            INDENTATION_SEPARATOR,
+            INDENTATION_SEPARATOR.join(
+                '%s: %s' % (
+                    get_resource_usage_description(
+                        results[0].get_duration_sec() or 0.0,
+                        results[0].get_cpu_sec(),
+                        results[0].max_rss_bytes),
+                    get_task_description(results, relativize_path))
+                for results in tasks[:NUM_SLOWEST_TASKS_TO_SHOW])))
+
+    def print_stats(self) -> None:
+        if self.checks_by_dir:
+            print_stats("Checks by directory (relative to repo root)",
+                        self.checks_by_dir, self.checks_by_dir_failed)
+
+        if self.checks_by_type:
+            print_stats("Checks by type", self.checks_by_type, self.checks_by_type_failed)
+
+        if self.checks_by_result:
+            print_stats("Checks by result", self.checks_by_result)
@@ -0,0 +1,190 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Decides when check tasks can start. Tasks start in the order of their priority (longest first), as
+long as the overall parallelism, the concurrency limit of the task's check type, and the memory
+budget allow it. A task that does not fit does not block tasks of other types behind it.
+
+Checks can have prerequisites, other checks of the same file that have to finish first. If a
+prerequisite fails, the checks depending on it are skipped instead of being run.
+"""
+
+from typing import Callable, Collection, Dict, List, Optional, Set, Tuple
+
+
+# A (file path, check type) pair.
+CheckInput = Tuple[str, str]
+
+# A list of checks run together.
+Task = List[CheckInput]
+
+
+def get_task_check_type(task: Task) -> str:
+    return task[0][1]
+
+
+class CheckScheduler:
+    def __init__(
+            self,
+            parallelism: int,
+            concurrency_limits: Dict[str, int],
+            memory_budget_bytes: Optional[int],
+            estimate_duration_sec: Callable[[Task], float],
+            estimate_memory_bytes: Callable[[Task], int],
+            get_prerequisites: Callable[[CheckInput], List[CheckInput]]) -> None:
+        self.parallelism = parallelism
+        self.concurrency_limits = concurrency_limits
+        self.memory_budget_bytes = memory_budget_bytes
+        self.estimate_duration_sec = estimate_duration_sec
+        self.estimate_memory_bytes = estimate_memory_bytes
+        self.get_prerequisites = get_prerequisites
+
+        # Pending tasks with their estimated durations, longest first.
+        self.pending_tasks: List[Tuple[float, Task]] = []
+
+        self.num_running_by_check_type: Dict[str, int] = {}
+        self.num_running = 0
+        self.memory_in_use_bytes = 0
+
+        # Estimated memory usage of running tasks at the time they started, by task id.
+        self.running_task_memory_bytes: Dict[int, int] = {}
+
+        # How many runs of each check are pending or running. Checks are held back while any of
+        # their prerequisites have unfinished runs.
+        self.num_unfinished_runs: Dict[CheckInput, int] = {}
+
+        # Checks whose latest run failed. Checks depending on them are skipped.
+        self.failed_check_inputs: Set[CheckInput] = set()
+
+        # Tasks from which checks were removed because their prerequisites failed, with the removed
+        # checks. The remaining checks of such a task, if any, are started as usual.
+        self.skipped_tasks: List[Tuple[Task, List[CheckInput]]] = []
+
+    def add_tasks(self, tasks: List[Task]) -> None:
+        estimated_tasks = [(self.estimate_duration_sec(task), task) for task in tasks]
+        # A prerequisite gets the priority of the longest check waiting for it, on top of its own,
+        # so that waiting for it does not delay that check.
+        waiting_duration_sec: Dict[CheckInput, float] = {}
+        for duration_sec, task in estimated_tasks:
+            for check_input in task:
+                self.num_unfinished_runs[check_input] = (
+                    self.num_unfinished_runs.get(check_input, 0) + 1)
+                for prerequisite in self.get_prerequisites(check_input):
+                    waiting_duration_sec[prerequisite] = max(
+                        duration_sec, waiting_duration_sec.get(prerequisite, 0.0))
+        self.pending_tasks.extend(
+            (duration_sec + max(waiting_duration_sec.get(check_input, 0.0)
+                                for check_input in task),
+             task)
+            for duration_sec, task in estimated_tasks)
+        self.pending_tasks.sort(key=lambda item: (-item[0], item[1]))
+
+    def finish_check_inputs(self, check_inputs: List[CheckInput]) -> None:
+        for check_input in check_inputs:
+            self.num_unfinished_runs[check_input] -= 1
+            if self.num_unfinished_runs[check_input] == 0:
+                del self.num_unfinished_runs[check_input]
+
+    def remove_pending_tasks(self, predicate: Callable[[Task], bool]) -> List[Task]:
+        removed_tasks = [task for _, task in self.pending_tasks if predicate(task)]
+        self.pending_tasks = [item for item in self.pending_tasks if not predicate(item[1])]
+        for task in removed_tasks:
+            self.finish_check_inputs(task)
+        return removed_tasks
+
+    def set_check_failed(self, check_input: CheckInput, failed: bool) -> None:
+        """
+        Records the outcome of a check, also for checks that were not run by this scheduler, e.g.
+        results taken from the cache.
+        """
+        if failed:
+            self.failed_check_inputs.add(check_input)
+        else:
+            self.failed_check_inputs.discard(check_input)
+
+    def is_waiting_for_prerequisites(self, task: Task) -> bool:
+        return any(prerequisite in self.num_unfinished_runs
+                   for check_input in task
+                   for prerequisite in self.get_prerequisites(check_input))
+
+    def has_failed_prerequisites(self, check_input: CheckInput) -> bool:
+        return any(prerequisite in self.failed_check_inputs
+                   for prerequisite in self.get_prerequisites(check_input))
+
+    def has_pending_tasks(self) -> bool:
+        return bool(self.pending_tasks)
+
+    def can_start(self, task: Task) -> bool:
+        if self.num_running >= self.parallelism:
+            return False
+        if self.is_waiting_for_prerequisites(task):
+            return False
+        check_type = get_task_check_type(task)
+        limit = self.concurrency_limits.get(check_type)
+        if limit is not None and self.num_running_by_check_type.get(check_type, 0) >= limit:
+            return False
+        # Always allow one task to run, even if it is expected to exceed the budget on its own.
+        if (self.memory_budget_bytes is not None and
+                self.num_running > 0 and
+                self.memory_in_use_bytes + self.estimate_memory_bytes(task) >
+                self.memory_budget_bytes):
+            return False
+        return True
+
+    def get_tasks_to_start(self) -> List[Task]:
+        """
+        Returns the tasks that can start now, and considers them running until task_finished() is
+        called for them. Checks whose prerequisites failed are removed from the tasks, and can be
+        retrieved using pop_skipped_tasks().
+        """
+        tasks_to_start = []
+        remaining_tasks = []
+        for item in self.pending_tasks:
+            task = item[1]
+            if self.can_start(task):
+                skipped_check_inputs = [
+                    check_input for check_input in task
+                    if self.has_failed_prerequisites(check_input)]
+                if skipped_check_inputs:
+                    self.finish_check_inputs(skipped_check_inputs)
+                    task[:] = [
+                        check_input for check_input in task
+                        if check_input not in skipped_check_inputs]
+                    self.skipped_tasks.append((task, skipped_check_inputs))
+                    if not task:
+                        continue
+                check_type = get_task_check_type(task)
+                self.num_running += 1
+                self.num_running_by_check_type[check_type] = (
+                    self.num_running_by_check_type.get(check_type, 0) + 1)
+                memory_bytes = self.estimate_memory_bytes(task)
+                self.running_task_memory_bytes[id(task)] = memory_bytes
+                self.memory_in_use_bytes += memory_bytes
+                tasks_to_start.append(task)
+            else:
+                remaining_tasks.append(item)
+        self.pending_tasks = remaining_tasks
+        return tasks_to_start
+
+    def pop_skipped_tasks(self) -> List[Tuple[Task, List[CheckInput]]]:
+        skipped_tasks = self.skipped_tasks
+        self.skipped_tasks = []
+        return skipped_tasks
+
+    def task_finished(self, task: Task, failed_check_inputs: Collection[CheckInput]) -> None:
+        self.num_running -= 1
+        self.num_running_by_check_type[get_task_check_type(task)] -= 1
+        self.memory_in_use_bytes -= self.running_task_memory_bytes.pop(id(task))
+        self.finish_check_inputs(task)
+        for check_input in task:
+            self.set_check_failed(check_input, check_input in failed_check_inputs)
@@ -0,0 +1,170 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Callable, Dict, List, Optional
+
+import unittest
+
+from codecheck.constants import CHECK_TYPE_PREREQUISITES
+from codecheck.scheduler import CheckInput, CheckScheduler, Task
+
+
+# Estimated durations of checks by file path, and estimated memory usage by check type.
+DURATIONS_SEC = {
+    'a.py': 1.0,
+    'b.py': 5.0,
+    'c.py': 3.0,
+    'd.py': 2.0,
+}
+MEMORY_BYTES = {
+    'mypy': 600,
+    'unittest': 300,
+    'compile': 10,
+    'pycodestyle': 10,
+}
+
+
+def get_no_prerequisites(check_input: CheckInput) -> List[CheckInput]:
+    return []
+
+
+def get_prerequisites(check_input: CheckInput) -> List[CheckInput]:
+    file_path, check_type = check_input
+    return [(file_path, prerequisite_type)
+            for prerequisite_type in CHECK_TYPE_PREREQUISITES.get(check_type, [])]
+
+
+def format_tasks(tasks: List[Task]) -> List[str]:
+    return [' '.join('%s:%s' % (check_type, file_path) for file_path, check_type in task)
+            for task in tasks]
+
+
+class CheckSchedulerTest(unittest.TestCase):
+    def create_scheduler(
+            self,
+            parallelism: int = 8,
+            concurrency_limits: Optional[Dict[str, int]] = None,
+            memory_budget_bytes: Optional[int] = None,
+            get_prerequisites: Callable[[CheckInput], List[CheckInput]] = get_no_prerequisites
+            ) -> CheckScheduler:
+        return CheckScheduler(
+            parallelism=parallelism,
+            concurrency_limits=concurrency_limits or {},
+            memory_budget_bytes=memory_budget_bytes,
+            estimate_duration_sec=lambda task: sum(
+                DURATIONS_SEC[file_path] for file_path, _ in task),
+            estimate_memory_bytes=lambda task: MEMORY_BYTES[task[0][1]],
+            get_prerequisites=get_prerequisites)
+
+    def test_longest_tasks_start_first(self) -> None:
+        scheduler = self.create_scheduler(parallelism=2)
+        tasks = [[('a.py', 'compile')],
+                 [('b.py', 'compile')],
+                 [('c.py', 'compile'), ('a.py', 'compile')],
+                 [('d.py', 'compile')]]
+        scheduler.add_tasks(tasks)
+        started_tasks = scheduler.get_tasks_to_start()
+        self.assertEqual(format_tasks(started_tasks),
+                         ['compile:b.py', 'compile:c.py compile:a.py'])
+        self.assertEqual(scheduler.get_tasks_to_start(), [])
+
+        scheduler.task_finished(started_tasks[1], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['compile:d.py'])
+        scheduler.task_finished(started_tasks[0], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['compile:a.py'])
+        self.assertFalse(scheduler.has_pending_tasks())
+
+    def test_concurrency_limits(self) -> None:
+        scheduler = self.create_scheduler(concurrency_limits={'mypy': 1})
+        scheduler.add_tasks([[('b.py', 'mypy')], [('c.py', 'mypy')], [('a.py', 'compile')]])
+        # A task that has to wait does not block tasks of other types.
+        started_tasks = scheduler.get_tasks_to_start()
+        self.assertEqual(format_tasks(started_tasks), ['mypy:b.py', 'compile:a.py'])
+        scheduler.task_finished(started_tasks[1], [])
+        self.assertEqual(scheduler.get_tasks_to_start(), [])
+        scheduler.task_finished(started_tasks[0], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['mypy:c.py'])
+
+    def test_memory_budget(self) -> None:
+        scheduler = self.create_scheduler(memory_budget_bytes=1000)
+        scheduler.add_tasks([[('b.py', 'mypy')],
+                             [('c.py', 'mypy')],
+                             [('d.py', 'unittest')],
+                             [('a.py', 'unittest')]])
+        started_tasks = scheduler.get_tasks_to_start()
+        self.assertEqual(format_tasks(started_tasks), ['mypy:b.py', 'unittest:d.py'])
+        self.assertEqual(scheduler.memory_in_use_bytes, 900)
+
+        scheduler.task_finished(started_tasks[1], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['unittest:a.py'])
+        scheduler.task_finished(started_tasks[0], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['mypy:c.py'])
+
+    def test_task_over_memory_budget_runs_alone(self) -> None:
+        scheduler = self.create_scheduler(memory_budget_bytes=100)
+        scheduler.add_tasks([[('b.py', 'mypy')], [('a.py', 'compile')]])
+        started_tasks = scheduler.get_tasks_to_start()
+        self.assertEqual(format_tasks(started_tasks), ['mypy:b.py'])
+        scheduler.task_finished(started_tasks[0], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['compile:a.py'])
+        self.assertEqual(scheduler.memory_in_use_bytes, 10)
+
+    def test_remove_pending_tasks(self) -> None:
+        scheduler = self.create_scheduler(parallelism=1)
+        scheduler.add_tasks([[('b.py', 'compile')], [('a.py', 'compile')], [('c.py', 'mypy')]])
+        removed_tasks = scheduler.remove_pending_tasks(
+            lambda task: task[0][1] == 'compile')
+        self.assertEqual(format_tasks(removed_tasks), ['compile:b.py', 'compile:a.py'])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['mypy:c.py'])
+        self.assertFalse(scheduler.has_pending_tasks())
+
+    def test_prerequisites(self) -> None:
+        scheduler = self.create_scheduler(get_prerequisites=get_prerequisites)
+        scheduler.add_tasks([[('a.py', 'compile')],
+                             [('b.py', 'compile')],
+                             [('a.py', 'unittest')],
+                             [('b.py', 'unittest')],
+                             [('a.py', 'pycodestyle'), ('b.py', 'pycodestyle')]])
+        # A compile check gets the priority of the check waiting for it on top of its own, and the
+        # unittest checks wait for the compile checks.
+        started_tasks = scheduler.get_tasks_to_start()
+        self.assertEqual(
+            format_tasks(started_tasks),
+            ['compile:b.py', 'pycodestyle:a.py pycodestyle:b.py', 'compile:a.py'])
+
+        scheduler.task_finished(started_tasks[0], [('b.py', 'compile')])
+        self.assertEqual(scheduler.get_tasks_to_start(), [])
+        self.assertEqual(
+            [(format_tasks([task]), format_tasks([skipped_check_inputs]))
+             for task, skipped_check_inputs in scheduler.pop_skipped_tasks()],
+            [([''], ['unittest:b.py'])])
+
+        scheduler.task_finished(started_tasks[2], [])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['unittest:a.py'])
+        self.assertEqual(scheduler.pop_skipped_tasks(), [])
+        self.assertFalse(scheduler.has_pending_tasks())
+
+    def test_checks_of_a_batch_are_skipped_separately(self) -> None:
+        scheduler = self.create_scheduler(get_prerequisites=get_prerequisites)
+        # E.g. compile results taken from the result cache.
+        scheduler.set_check_failed(('a.py', 'compile'), True)
+        scheduler.set_check_failed(('b.py', 'compile'), False)
+        scheduler.add_tasks([[('a.py', 'mypy'), ('b.py', 'mypy')]])
+        self.assertEqual(format_tasks(scheduler.get_tasks_to_start()), ['mypy:b.py'])
+        self.assertEqual(
+            [format_tasks([skipped_check_inputs])
+             for _, skipped_check_inputs in scheduler.pop_skipped_tasks()],
+            [['mypy:a.py']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Splitting the checks of a run between multiple machines (shards), and reading the results written
+by the shards so that they can be merged into a single report.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+import heapq
+import json
+
+from codecheck.check_result import CheckResult
+
+
+# A (file path, check type) pair.
+CheckInput = Tuple[str, str]
+
+
+def get_shard_check_inputs(
+        check_inputs: List[CheckInput],
+        shard_index: int,
+        shard_count: int,
+        estimate_duration_sec: Callable[[CheckInput], float],
+        relativize_path: Callable[[str], str]) -> List[CheckInput]:
+    """
+    Returns the checks to run in the shard with the given (0-based) index. All checks of a file go
+    to the same shard, so that checks can still be skipped when their prerequisites fail. Files
+    are assigned longest first, each to the shard with the least estimated work so far. Files are
+    ordered by their paths relative to the repository root, so all shards agree on the split as
+    long as they see the same files and the same estimates, wherever the repository is checked
+    out.
+
+    >>> durations = {'a': 5.0, 'b': 3.0, 'c': 2.0, 'd': 1.0}
+    >>> check_inputs = [(path, check_type) for path in 'abcd' for check_type in ['compile', 'mypy']]
+    >>> for shard_index in range(2):
+    ...     print(sorted(set(path for path, _ in get_shard_check_inputs(
+    ...         check_inputs, shard_index, 2, lambda check_input: durations[check_input[0]],
+    ...         lambda path: path))))
+    ['a', 'd']
+    ['b', 'c']
+    """
+    file_duration_sec: Dict[str, float] = {}
+    for check_input in check_inputs:
+        file_path = check_input[0]
+        file_duration_sec[file_path] = (
+            file_duration_sec.get(file_path, 0.0) + estimate_duration_sec(check_input))
+
+    # Estimated total durations of the shards, with shard indexes to break ties.
+    shard_totals = [(0.0, index) for index in range(shard_count)]
+    shard_file_paths = set()
+    for file_path in sorted(
+            file_duration_sec,
+            key=lambda file_path: (-file_duration_sec[file_path], relativize_path(file_path))):
+        total_duration_sec, index = heapq.heappop(shard_totals)
+        if index == shard_index:
+            shard_file_paths.add(file_path)
+        heapq.heappush(shard_totals, (total_duration_sec + file_duration_sec[file_path], index))
+    return [check_input for check_input in check_inputs if check_input[0] in shard_file_paths]
+
+
+def read_shard_results(result_file_path: str) -> List[Tuple[str, CheckResult]]:
+    """
+    Reads the check results written by a shard with --output-format jsonl. Returns the results
+    along with the file paths they were reported for, relative to the repository root. Raises
+    ValueError if the file cannot be parsed.
+    """
+    results = []
+    with open(result_file_path) as result_file:
+        for line_number, line in enumerate(result_file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                check_result = CheckResult.from_dict(record)
+                check_result.from_cache = record.get('from_cache', False)
+                results.append((record['rel_file_path'], check_result))
+            except (ValueError, KeyError, TypeError) as ex:
+                raise ValueError("%s:%d: invalid check result: %s" % (
+                    result_file_path, line_number, ex))
+    return results
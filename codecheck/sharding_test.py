@@ -0,0 +1,143 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List
+
+import json
+import os
+import unittest
+
+from codecheck.sharding import CheckInput, get_shard_check_inputs, read_shard_results
+from codecheck.test_util import TempRepoTestCase, get_checked
+
+
+CHECK_TYPES = ['compile', 'import', 'pycodestyle']
+
+FILES = {
+    'a.py': 'X = 1\n',
+    'b.py': 'X = 2\n',
+    'c.py': 'X=3\n',
+    'd.py': 'import c\n',
+    'sub/e.py': 'X = 5\n',
+}
+
+
+def get_check_inputs(root_path: str) -> List[CheckInput]:
+    return [(os.path.join(root_path, file_name), check_type)
+            for file_name in sorted(FILES) for check_type in CHECK_TYPES]
+
+
+def get_shards(root_path: str, shard_count: int) -> List[List[CheckInput]]:
+    def estimate_duration_sec(check_input: CheckInput) -> float:
+        # The same estimate for all files, so that the order of the paths breaks the ties.
+        return 1.0
+
+    return [
+        get_shard_check_inputs(
+            get_check_inputs(root_path),
+            shard_index,
+            shard_count,
+            estimate_duration_sec,
+            lambda file_path: os.path.relpath(file_path, root_path))
+        for shard_index in range(shard_count)
+    ]
+
+
+class GetShardCheckInputsTest(unittest.TestCase):
+    def test_every_check_is_in_one_shard(self) -> None:
+        for shard_count in [1, 2, 3, 7]:
+            shards = get_shards('/repo', shard_count)
+            all_check_inputs = [check_input for shard in shards for check_input in shard]
+            self.assertEqual(sorted(all_check_inputs), sorted(get_check_inputs('/repo')))
+            for shard in shards:
+                # All checks of a file are in the same shard.
+                self.assertEqual(len(shard), len(CHECK_TYPES) * len(set(
+                    file_path for file_path, _ in shard)))
+                # The files are split evenly because their estimated durations are the same.
+                self.assertLessEqual(
+                    len(shard), len(CHECK_TYPES) * -(-len(FILES) // shard_count))
+
+    def test_same_split_in_any_checkout_location(self) -> None:
+        def get_rel_shards(root_path: str) -> List[List[CheckInput]]:
+            return [[(os.path.relpath(file_path, root_path), check_type)
+                     for file_path, check_type in shard]
+                    for shard in get_shards(root_path, 3)]
+
+        self.assertEqual(get_rel_shards('/repo'), get_rel_shards('/some/other/checkout'))
+
+
+class ShardAndMergeTest(TempRepoTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write_files(FILES)
+        self.commit_all()
+
+    def test_shard_and_merge(self) -> None:
+        all_records = self.run_codecheck_jsonl()
+        shard_file_paths = []
+        shard_records = []
+        for shard_index in range(3):
+            process = self.run_codecheck(
+                '--output-format', 'jsonl',
+                '--shard-index', str(shard_index), '--shard-count', '3')
+            shard_file_path = os.path.join(self.root_path, 'shard%d.jsonl' % shard_index)
+            with open(shard_file_path, 'w') as shard_file:
+                shard_file.write(process.stdout)
+            shard_file_paths.append(shard_file_path)
+            shard_records.append([json.loads(line) for line in process.stdout.splitlines()])
+            self.assertTrue(shard_records[-1])
+        self.assertEqual(
+            sorted(check for records in shard_records for check in get_checked(records)),
+            get_checked(all_records))
+
+        durations_file_path = os.path.join(self.root_path, 'durations.json')
+        merged_records = self.run_codecheck_jsonl(
+            'merge', '--save-durations', durations_file_path, *shard_file_paths)
+        self.assertEqual(get_checked(merged_records), get_checked(all_records))
+        self.assertEqual(
+            [record['rel_file_path'] for record in merged_records if record['returncode'] != 0],
+            ['c.py'])
+
+        process = self.run_codecheck('merge', *shard_file_paths)
+        self.assertEqual(process.returncode, 1)
+        self.assertIn(
+            'Merged the results of %d checks from 3 files' % len(all_records), process.stdout)
+
+        # The saved durations can be used to split later runs.
+        with open(durations_file_path) as durations_file:
+            self.assertEqual(len(json.load(durations_file)['entries']), len(all_records))
+        records = self.run_codecheck_jsonl(
+            '--shard-index', '0', '--shard-count', '1', '--shard-durations', durations_file_path)
+        self.assertEqual(get_checked(records), get_checked(all_records))
+
+    def test_merge_duplicates_and_invalid_files(self) -> None:
+        process = self.run_codecheck('--output-format', 'jsonl')
+        num_checks = len(process.stdout.splitlines())
+        shard_file_path = os.path.join(self.root_path, 'shard.jsonl')
+        with open(shard_file_path, 'w') as shard_file:
+            shard_file.write(process.stdout)
+        invalid_file_path = os.path.join(self.root_path, 'invalid.jsonl')
+        with open(invalid_file_path, 'w') as invalid_file:
+            invalid_file.write('{"check_type": "compile"}\n')
+        with self.assertRaises(ValueError):
+            read_shard_results(invalid_file_path)
+
+        process = self.run_codecheck('merge', shard_file_path, shard_file_path)
+        self.assertIn('Ignoring %d checks in %s that were already reported' % (
+            num_checks, shard_file_path), process.stderr)
+        process = self.run_codecheck('merge', shard_file_path, invalid_file_path)
+        self.assertEqual(process.returncode, 1)
+        self.assertIn('Could not read shard results', process.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
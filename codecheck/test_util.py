@@ -0,0 +1,148 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Helpers for tests that run codecheck on small repositories created in temporary directories.
+"""
+
+from typing import Any, Dict, List
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import codecheck
+from codecheck.util import prepend_path_entries
+
+
+# Checks that need tools that may not be installed, or that are slow, are turned off unless a test
+# needs them, and so are doctest checks, which would only duplicate the import checks of files
+# without doctests.
+DEFAULT_CONFIG = '[checks]\nmypy = off\nshellcheck = off\ndoctest = off\n'
+
+# A test that writes its process id to a file and then runs for a long time.
+SLOW_TEST = '\n'.join([
+    'import os',
+    'import time',
+    'import unittest',
+    '',
+    '',
+    'class SlowTest(unittest.TestCase):',
+    '    def test_slow(self) -> None:',
+    "        with open('pid', 'w') as pid_file:",
+    '            pid_file.write(str(os.getpid()))',
+    '        time.sleep(60)',
+    '',
+])
+
+# A module that fails to import once the slow test is running.
+FAILS_AFTER_SLOW_TEST_STARTS = '\n'.join([
+    'import os',
+    'import time',
+    '',
+    'deadline = time.monotonic() + 10',
+    "while not os.path.exists('pid') and time.monotonic() < deadline:",
+    '    time.sleep(0.05)',
+    "raise Exception('fails')",
+    '',
+])
+
+
+class TempRepoTestCase(unittest.TestCase):
+    """
+    Creates a git repository with a codecheck configuration in a temporary directory for every
+    test.
+    """
+
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_test_repo_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.run_git('init', '--quiet')
+        self.write_file('codecheck.ini', DEFAULT_CONFIG)
+
+    def write_file(self, file_name: str, content: str) -> None:
+        file_path = os.path.join(self.root_path, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as output_file:
+            output_file.write(content)
+
+    def write_files(self, files: Dict[str, str]) -> None:
+        for file_name, content in files.items():
+            self.write_file(file_name, content)
+
+    def run_git(self, *args: str) -> str:
+        return subprocess.check_output(
+            ['git',
+             '-c', 'user.name=Test', '-c', 'user.email=test@example.com',
+             '-c', 'commit.gpgsign=false'] + list(args),
+            cwd=self.root_path,
+            universal_newlines=True)
+
+    def commit_all(self, message: str = 'Commit') -> None:
+        self.run_git('add', '-A')
+        self.run_git('commit', '--quiet', '-m', message)
+
+    def run_codecheck(self, *args: str) -> 'subprocess.CompletedProcess[str]':
+        """
+        Runs codecheck in the repository root, without the result cache.
+        """
+        env = dict(os.environ)
+        env['PYTHONPATH'] = prepend_path_entries(
+            [os.path.dirname(os.path.dirname(os.path.abspath(codecheck.__file__)))],
+            env.get('PYTHONPATH'))
+        return subprocess.run(
+            [sys.executable, '-m', 'codecheck', '--no-cache'] + list(args),
+            cwd=self.root_path,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+
+    def run_codecheck_jsonl(self, *args: str) -> List[Dict[str, Any]]:
+        """
+        Runs codecheck with JSON Lines output, and returns the records of the checks.
+        """
+        process = self.run_codecheck('--output-format', 'jsonl', *args)
+        return [json.loads(line) for line in process.stdout.splitlines()]
+
+
+def get_checked(records: List[Dict[str, Any]]) -> List[str]:
+    """
+    Returns "<check type> <relative path>" for the records of checks, sorted.
+    """
+    return sorted('%s %s' % (record['check_type'], record['rel_file_path']) for record in records)
+
+
+def is_process_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def wait_for_process_exit(pid: int, timeout_sec: float = 10) -> bool:
+    """
+    Returns whether the process has exited (and has been reaped) within the timeout. A killed
+    process that has been reparented needs some time to be reaped.
+    """
+    deadline = time.monotonic() + timeout_sec
+    while is_process_running(pid):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.1)
+    return True
@@ -0,0 +1,140 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Runs the tests of multiple modules in one process, one module after another, and reports the
+result of each module separately, as "python -m unittest <module>" would have reported it:
+
+    python3 unittest_runner.py <results file> <module name>...
+
+For every module, a JSON object with the module name, the output of its tests and the exit code
+is appended to the results file as a line, as soon as the module's tests have finished. If the
+process dies in the middle of the batch, the results of the modules that had finished are still
+there. Output that is not written while the tests of a module run, e.g. when the interpreter exits,
+goes to the standard output and standard error of the process.
+
+This file is run as a script by the interpreter used for checks, so it only depends on the
+standard library.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+
+# Exit code of "python -m unittest" if no tests were found, starting with Python 3.12.
+_NO_TESTS_EXIT_CODE = 5
+
+
+class _OutputCapture:
+    """
+    Captures standard output and standard error at the file descriptor level, so that output
+    written by C extensions, os.write() or subprocesses of the tests, and by logging handlers
+    created while running them, is reported with the module that wrote it.
+    """
+
+    def __init__(self) -> None:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.saved_fds = [os.dup(1), os.dup(2)]
+        self.output_files = [tempfile.TemporaryFile(), tempfile.TemporaryFile()]
+        for fd, output_file in zip([1, 2], self.output_files):
+            os.dup2(output_file.fileno(), fd)
+
+    def stop(self) -> Tuple[str, str]:
+        """
+        Restores the original file descriptors and returns the captured standard output and
+        standard error.
+        """
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, saved_fd in zip([1, 2], self.saved_fds):
+            os.dup2(saved_fd, fd)
+            os.close(saved_fd)
+        output = []
+        for output_file in self.output_files:
+            output_file.seek(0)
+            output.append(output_file.read().decode('utf-8', errors='replace'))
+            output_file.close()
+        return output[0], output[1]
+
+
+def _run_module_tests(module_name: str) -> Dict[str, Any]:
+    original_stdout = sys.stdout
+    original_stderr = sys.stderr
+    output_capture = _OutputCapture()
+    finished = False
+    try:
+        # Import errors are reported as failing tests by the loader, like in "python -m unittest".
+        test_suite = unittest.defaultTestLoader.loadTestsFromName(module_name)
+        result = unittest.TextTestRunner(stream=sys.stderr).run(test_suite)
+        finished = True
+    finally:
+        # Tests may replace the streams without restoring them.
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
+        stdout, stderr = output_capture.stop()
+        if not finished:
+            # The tests are stopping the process, e.g. by calling sys.exit(). Pass their output
+            # on, so that it is reported as the output of the batch process.
+            sys.stdout.write(stdout)
+            sys.stderr.write(stderr)
+
+    if not result.wasSuccessful():
+        returncode = 1
+    elif (sys.version_info >= (3, 12) and
+            result.testsRun == 0 and
+            not result.skipped):
+        returncode = _NO_TESTS_EXIT_CODE
+    else:
+        returncode = 0
+    return {
+        'module_name': module_name,
+        'stdout': stdout,
+        'stderr': stderr,
+        'returncode': returncode,
+    }
+
+
+def read_unittest_batch_results(results_file_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the results file written by this script, used by codecheck. Returns the results by
+    module name. A partially written last line, e.g. if the process was killed, is ignored.
+    """
+    module_results = {}
+    with open(results_file_path) as results_file:
+        for line in results_file:
+            try:
+                module_result = json.loads(line)
+            except ValueError:
+                continue
+            module_results[module_result['module_name']] = module_result
+    return module_results
+
+
+def _main(args: List[str]) -> None:
+    results_file_path = args[0]
+    # This file is run as a script, so its directory is at the front of sys.path. Replace it with
+    # the current directory, like "python -m unittest" would have.
+    sys.path[0] = os.getcwd()
+    with open(results_file_path, 'a') as results_file:
+        for module_name in args[1:]:
+            results_file.write(json.dumps(_run_module_tests(module_name)) + '\n')
+            results_file.flush()
+
+
+if __name__ == '__main__':
+    _main(sys.argv[1:])
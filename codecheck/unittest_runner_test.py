@@ -0,0 +1,176 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Dict
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from codecheck import unittest_runner
+from codecheck.api import CheckOptions, check_files
+from codecheck.check_result import CheckResult
+from codecheck.unittest_runner import read_unittest_batch_results
+
+
+TEST_MODULES = {
+    # Sets up logging to standard error while it is being imported.
+    'logs_test': '\n'.join([
+        'import logging',
+        'import os',
+        'import unittest',
+        '',
+        'logging.basicConfig(level=logging.INFO, format="%(message)s")',
+        '',
+        '',
+        'class LogsTest(unittest.TestCase):',
+        '    def test_log(self) -> None:',
+        '        logging.info("logs_test")',
+        '        os.write(1, b"os.write in logs_test\\n")',
+        '',
+    ]),
+    # Replaces standard output and does not restore it.
+    'replaces_stdout_test': '\n'.join([
+        'import io',
+        'import sys',
+        'import unittest',
+        '',
+        '',
+        'class ReplacesStdoutTest(unittest.TestCase):',
+        '    def test_replace(self) -> None:',
+        '        sys.stdout = io.StringIO()',
+        '',
+    ]),
+    'prints_test': '\n'.join([
+        'import atexit',
+        'import logging',
+        'import unittest',
+        '',
+        'atexit.register(print, "at exit")',
+        '',
+        '',
+        'class PrintsTest(unittest.TestCase):',
+        '    def test_print(self) -> None:',
+        '        print("prints_test")',
+        '        logging.info("logged in prints_test")',
+        '',
+    ]),
+    # Stops the process while it is being imported.
+    'exits_test': '\n'.join([
+        'import sys',
+        '',
+        'print("before exit")',
+        'sys.exit(3)',
+        '',
+    ]),
+}
+
+
+class UnittestRunnerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_unittest_runner_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        for module_name, content in TEST_MODULES.items():
+            self.write_file(module_name + '.py', content)
+
+    def write_file(self, file_name: str, content: str) -> None:
+        with open(os.path.join(self.root_path, file_name), 'w') as output_file:
+            output_file.write(content)
+
+    def run_batch(self, *module_names: str) -> 'subprocess.CompletedProcess[str]':
+        results_file_path = os.path.join(self.root_path, 'results.jsonl')
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(unittest_runner.__file__), results_file_path] +
+            list(module_names),
+            cwd=self.root_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+        self.module_results = read_unittest_batch_results(results_file_path)
+        return process
+
+    def test_output_is_reported_with_the_module_that_wrote_it(self) -> None:
+        process = self.run_batch('logs_test', 'replaces_stdout_test', 'prints_test')
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(process.stdout, 'at exit\n')
+        self.assertEqual(process.stderr, '')
+
+        logs_result = self.module_results['logs_test']
+        self.assertEqual(logs_result['returncode'], 0)
+        self.assertEqual(logs_result['stdout'], 'os.write in logs_test\n')
+        self.assertIn('logs_test\n', logs_result['stderr'])
+        self.assertNotIn('prints_test', logs_result['stderr'])
+
+        prints_result = self.module_results['prints_test']
+        self.assertEqual(prints_result['returncode'], 0)
+        self.assertEqual(prints_result['stdout'], 'prints_test\n')
+        # The logging handler created by the first module writes to the current standard error.
+        self.assertIn('logged in prints_test\n', prints_result['stderr'])
+
+    def test_output_of_module_stopping_the_process(self) -> None:
+        process = self.run_batch('prints_test', 'exits_test', 'logs_test')
+        self.assertEqual(process.returncode, 3)
+        self.assertEqual(process.stdout, 'before exit\nat exit\n')
+        self.assertEqual(sorted(self.module_results), ['prints_test'])
+
+
+class UnittestBatchTest(unittest.TestCase):
+    """
+    Checks how the results of unit test batches are reported.
+    """
+
+    def setUp(self) -> None:
+        self.root_path = tempfile.mkdtemp(prefix='codecheck_unittest_runner_test_')
+        self.addCleanup(shutil.rmtree, self.root_path)
+        with open(os.path.join(self.root_path, 'codecheck.ini'), 'w') as config_file:
+            config_file.write('[checks]\nmypy = off\nshellcheck = off\n[batches]\nunittest = 5\n')
+        for module_name, content in TEST_MODULES.items():
+            with open(os.path.join(self.root_path, module_name + '.py'), 'w') as output_file:
+                output_file.write(content)
+
+    def get_unittest_results(self, *module_names: str) -> Dict[str, CheckResult]:
+        options = CheckOptions(
+            root_path=self.root_path, use_cache=False, parallelism=1)
+        with check_files([module_name + '.py' for module_name in module_names], options) as run:
+            return {
+                os.path.basename(check_result.file_path)[:-len('.py')]: check_result
+                for check_result in run if check_result.check_type == 'unittest'
+            }
+
+    def test_output_at_exit_is_reported_with_every_module(self) -> None:
+        results = self.get_unittest_results('logs_test', 'prints_test')
+        for module_name in ['logs_test', 'prints_test']:
+            self.assertEqual(results[module_name].returncode, 0)
+            self.assertIn(
+                'Output of the batch process (exit code 0):\nat exit\n',
+                results[module_name].extra_messages)
+
+    def test_output_of_crashed_batch_is_reported_with_the_running_module(self) -> None:
+        results = self.get_unittest_results('prints_test', 'exits_test', 'logs_test')
+        self.assertEqual(sorted(results), ['exits_test', 'logs_test', 'prints_test'])
+        self.assertEqual(results['prints_test'].returncode, 0)
+        self.assertEqual(results['logs_test'].returncode, 0)
+        self.assertEqual(results['exits_test'].returncode, 3)
+        # The order of the modules in the batch is up to the scheduler, so "at exit" may be missing.
+        self.assertTrue(results['exits_test'].extra_messages[-1].startswith(
+            'Output of the batch process (exit code 3):\nbefore exit\n'))
+        for module_name in ['prints_test', 'logs_test']:
+            self.assertFalse(any(
+                message.startswith('Output of the batch process')
+                for message in results[module_name].extra_messages))
+
+
+if __name__ == '__main__':
+    unittest.main()
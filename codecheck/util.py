@@ -11,11 +11,13 @@
 # under the License.
 
 
-from typing import Dict, Union, Set, List, Optional
+from typing import Dict, Union, Set, List, Optional, Iterable
 
+import hashlib
 import os
 import sys
 import re
+import subprocess
 
 
 if sys.version_info <= (3, 7):
@@ -67,3 +69,132 @@ def prepend_path_entries(new_entries: List[str], existing_path: Optional[str]) -
         existing_path = ':' + existing_path
     assert isinstance(new_entries, list), "Invalid list of new entries: %s" % new_entries
     return ':'.join(new_entries) + existing_path
+
+
+SIZE_SUFFIX_MULTIPLIERS: Dict[str, int] = {
+    'K': 1024,
+    'M': 1024 ** 2,
+    'G': 1024 ** 3,
+    'T': 1024 ** 4,
+}
+
+
+def parse_size(s: str) -> int:
+    """
+    Parse a human-readable size, e.g. from a configuration file, into a number of bytes.
+
+    >>> parse_size('1024')
+    1024
+    >>> parse_size('16K')
+    16384
+    >>> parse_size('1.5m')
+    1572864
+    >>> parse_size(' 2G ')
+    2147483648
+    """
+    s = s.strip().upper()
+    if s.endswith('B'):
+        s = s[:-1]
+    multiplier = 1
+    if s and s[-1] in SIZE_SUFFIX_MULTIPLIERS:
+        multiplier = SIZE_SUFFIX_MULTIPLIERS[s[-1]]
+        s = s[:-1]
+    return int(float(s) * multiplier)
+
+
+def format_size(num_bytes: int) -> str:
+    """
+    Formats a number of bytes in the form accepted by parse_size.
+
+    >>> format_size(512)
+    '512'
+    >>> format_size(16384)
+    '16.0K'
+    >>> format_size(1572864)
+    '1.5M'
+    """
+    for suffix, multiplier in sorted(
+            SIZE_SUFFIX_MULTIPLIERS.items(), key=lambda item: item[1], reverse=True):
+        if num_bytes >= multiplier:
+            return '%.1f%s' % (num_bytes / multiplier, suffix)
+    return str(num_bytes)
+
+
+def format_duration(duration_sec: float) -> str:
+    """
+    Formats a duration compactly, rounded to whole seconds.
+
+    >>> format_duration(7.4)
+    '7s'
+    >>> format_duration(80)
+    '1m20s'
+    >>> format_duration(3725)
+    '1h02m'
+    """
+    total_sec = int(round(duration_sec))
+    if total_sec < 60:
+        return '%ds' % total_sec
+    if total_sec < 3600:
+        return '%dm%02ds' % (total_sec // 60, total_sec % 60)
+    return '%dh%02dm' % (total_sec // 3600, total_sec % 3600 // 60)
+
+
+def get_sha256_of_file(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as input_file:
+        for chunk in iter(lambda: input_file.read(65536), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_sha256_of_strings(strings: Iterable[str]) -> str:
+    """
+    Computes a hash of a sequence of strings, making sure that the boundaries between the strings
+    affect the result.
+
+    >>> get_sha256_of_strings(['a', 'bc']) == get_sha256_of_strings(['ab', 'c'])
+    False
+    """
+    sha256 = hashlib.sha256()
+    for s in strings:
+        encoded = s.encode('utf-8')
+        sha256.update(b'%d:' % len(encoded))
+        sha256.update(encoded)
+    return sha256.hexdigest()
+
+
+INTERPRETER_IDENTITY_SCRIPT = (
+    'import os, sys; '
+    'print(os.path.realpath(sys.executable)); print(sys.prefix); print(sys.version)'
+)
+
+
+def is_current_interpreter(python_interpreter: str) -> bool:
+    """
+    Determines whether the given Python interpreter command runs the same interpreter, in the same
+    environment (e.g. virtualenv), as the one running this code.
+    """
+    current_identity = '%s\n%s\n%s\n' % (
+        os.path.realpath(sys.executable), sys.prefix, sys.version)
+    try:
+        identity = ensure_str_decoded(subprocess.check_output(
+            [python_interpreter, '-c', INTERPRETER_IDENTITY_SCRIPT]))
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return identity == current_identity
+
+
+def get_default_state_dir(root_path: str) -> str:
+    """
+    Returns the directory where codecheck keeps its persistent state (caches, history) for the
+    repository at the given path. This is outside of the repository so that it does not show up
+    in "git status".
+    """
+    cache_home = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    root_realpath = os.path.realpath(root_path)
+    return os.path.join(
+        cache_home,
+        'codecheck',
+        '%s-%s' % (
+            os.path.basename(root_realpath) or 'root',
+            get_sha256_of_strings([root_realpath])[:16]))
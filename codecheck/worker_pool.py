@@ -0,0 +1,177 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+A pool of long-lived worker processes running the configured Python interpreter, used to run
+Python-based checks without starting a new interpreter for every check. Workers are recycled after
+a number of checks or when their memory usage grows too much, to limit the amount of state that
+leaks from one check (e.g. importing a module) to the next ones.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import json
+import logging
+import os
+import select
+import subprocess
+import threading
+
+from codecheck import python_runner
+from codecheck.process_util import ProcessResult, RunningProcesses, kill_process_group
+
+
+class WorkerProcess:
+    def __init__(self, python_interpreter: str, cwd: Optional[str] = None) -> None:
+        self.process = subprocess.Popen(
+            [python_interpreter, os.path.abspath(python_runner.__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding='utf-8',
+            cwd=cwd,
+            # Allows killing the worker together with any processes started by the checked code.
+            start_new_session=True)
+        self.num_tasks = 0
+        self.max_rss_bytes = 0
+
+    def run(
+            self,
+            request: Dict[str, Any],
+            timeout_sec: Optional[float]) -> Optional[Dict[str, Any]]:
+        """
+        Sends a request to the worker and waits for the response. Returns None if the worker
+        exited without responding, e.g. because the checked code called os._exit() or crashed.
+        Raises subprocess.TimeoutExpired if there is no response within the timeout.
+        """
+        assert self.process.stdin is not None
+        assert self.process.stdout is not None
+        try:
+            self.process.stdin.write(json.dumps(request) + '\n')
+            self.process.stdin.flush()
+            # The worker writes nothing but a single line per request, so nothing can be buffered
+            # in the stream while waiting for the response.
+            if timeout_sec is not None:
+                readable, _, _ = select.select([self.process.stdout], [], [], timeout_sec)
+                if not readable:
+                    raise subprocess.TimeoutExpired(self.process.args, timeout_sec)
+            response_line = self.process.stdout.readline()
+        except (BrokenPipeError, ValueError):
+            return None
+        if not response_line:
+            return None
+        response: Dict[str, Any] = json.loads(response_line)
+        self.num_tasks += 1
+        self.max_rss_bytes = response['max_rss_bytes']
+        return response
+
+    def stop(self) -> None:
+        if self.process.stdin is not None:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self.process.stdout is not None:
+            self.process.stdout.close()
+
+
+class WorkerPool:
+    def __init__(
+            self,
+            python_interpreter: str,
+            max_tasks_per_worker: int,
+            max_rss_bytes_per_worker: int,
+            cwd: Optional[str] = None) -> None:
+        self.python_interpreter = python_interpreter
+        # The working directory of the workers, which checks run in.
+        self.cwd = cwd
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes_per_worker = max_rss_bytes_per_worker
+
+        self.lock = threading.Lock()
+        self.idle_workers: List[WorkerProcess] = []
+        self.num_workers_started = 0
+
+    def acquire_worker(self) -> WorkerProcess:
+        with self.lock:
+            if self.idle_workers:
+                return self.idle_workers.pop()
+            self.num_workers_started += 1
+        return WorkerProcess(self.python_interpreter, self.cwd)
+
+    def release_worker(self, worker: WorkerProcess) -> None:
+        if (worker.num_tasks >= self.max_tasks_per_worker or
+                worker.max_rss_bytes >= self.max_rss_bytes_per_worker):
+            worker.stop()
+            return
+        with self.lock:
+            self.idle_workers.append(worker)
+
+    def run(
+            self,
+            python_args: List[str],
+            additional_sys_path: List[str],
+            timeout_sec: Optional[float] = None,
+            running_processes: Optional[RunningProcesses] = None) -> Optional[ProcessResult]:
+        """
+        Runs a Python command line of the form "-m <module> <args>" or "-c <code>" (not including
+        the interpreter) in a worker. Returns the output, exit code and resource usage, or None
+        if the worker died while running the check, in which case the caller should run the
+        check in a separate process to get its actual output. If the check does not finish within
+        the timeout, the worker is killed, and a timed out result without output is returned.
+
+        The worker is added to the given running processes while it runs the check. If it is
+        killed through them, a killed result without output is returned, and the worker is not
+        reused.
+        """
+        worker = self.acquire_worker()
+        if running_processes is not None:
+            running_processes.add(worker.process.pid)
+        response = None
+        try:
+            response = worker.run({
+                'python_args': python_args,
+                'additional_sys_path': additional_sys_path,
+            }, timeout_sec)
+        except subprocess.TimeoutExpired:
+            kill_process_group(worker.process.pid)
+            worker.stop()
+            return ProcessResult.timed_out_result()
+        finally:
+            was_killed = (
+                running_processes is not None and running_processes.remove(worker.process.pid))
+        if response is None:
+            worker.stop()
+            if was_killed:
+                return ProcessResult.killed_result()
+            logging.warning(
+                "Worker process exited with code %s while running %s",
+                worker.process.returncode, python_args)
+            return None
+        if was_killed:
+            # The worker was killed right after responding, so it cannot be reused.
+            worker.stop()
+        else:
+            self.release_worker(worker)
+        return ProcessResult.from_response(response)
+
+    def stop(self) -> None:
+        with self.lock:
+            idle_workers = self.idle_workers
+            self.idle_workers = []
+        for worker in idle_workers:
+            worker.stop()
@@ -0,0 +1,89 @@
+# Copyright (c) Yugabyte, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations
+# under the License.
+
+import signal
+import sys
+import threading
+import time
+import unittest
+
+from codecheck.process_util import ProcessResult, RunningProcesses
+from codecheck.worker_pool import WorkerPool
+
+
+PRINT_PID_CODE = 'import os; print(os.getpid())'
+
+
+class WorkerPoolTest(unittest.TestCase):
+    def create_pool(self, max_tasks_per_worker: int = 10) -> WorkerPool:
+        worker_pool = WorkerPool(
+            python_interpreter=sys.executable,
+            max_tasks_per_worker=max_tasks_per_worker,
+            max_rss_bytes_per_worker=2 ** 40)
+        self.addCleanup(worker_pool.stop)
+        return worker_pool
+
+    def run_code(self, worker_pool: WorkerPool, code: str) -> ProcessResult:
+        process_result = worker_pool.run(['-c', code], [])
+        assert process_result is not None
+        return process_result
+
+    def test_workers_are_reused_and_recycled(self) -> None:
+        worker_pool = self.create_pool(max_tasks_per_worker=2)
+        pids = [self.run_code(worker_pool, PRINT_PID_CODE).stdout for _ in range(3)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertEqual(worker_pool.num_workers_started, 2)
+
+    def test_imported_modules_are_unloaded(self) -> None:
+        worker_pool = self.create_pool()
+        self.run_code(worker_pool, 'import xml.dom.minidom')
+        self.assertEqual(
+            self.run_code(
+                worker_pool, 'import sys; print("xml.dom.minidom" in sys.modules)').stdout,
+            'False\n')
+
+    def test_worker_dying_during_check(self) -> None:
+        worker_pool = self.create_pool()
+        # os._exit() only stops the check, not the worker.
+        self.assertEqual(self.run_code(worker_pool, 'import os; os._exit(3)').returncode, 3)
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(worker_pool.run(
+                ['-c', 'import os, signal; os.kill(os.getpid(), signal.SIGKILL)'], []))
+        self.assertEqual(self.run_code(worker_pool, 'print("next")').stdout, 'next\n')
+
+    def test_timeout(self) -> None:
+        worker_pool = self.create_pool()
+        start_time = time.monotonic()
+        process_result = worker_pool.run(
+            ['-c', 'import time; time.sleep(60)'], [], timeout_sec=0.5)
+        assert process_result is not None
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertTrue(process_result.timed_out)
+        self.assertEqual(self.run_code(worker_pool, 'print("next")').stdout, 'next\n')
+
+    def test_kill(self) -> None:
+        worker_pool = self.create_pool()
+        running_processes = RunningProcesses()
+        timer = threading.Timer(0.5, running_processes.kill_all)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        process_result = worker_pool.run(
+            ['-c', 'import time; time.sleep(60)'], [], running_processes=running_processes)
+        assert process_result is not None
+        self.assertEqual(process_result.returncode, -signal.SIGKILL)
+        self.assertFalse(process_result.timed_out)
+        self.assertEqual(worker_pool.idle_workers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()